@@ -0,0 +1 @@
+port = 9989
\ No newline at end of file
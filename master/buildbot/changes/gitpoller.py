@@ -18,6 +18,7 @@ from __future__ import annotations
 import contextlib
 import os
 import re
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 from typing import Any
 from typing import ClassVar
@@ -56,6 +57,64 @@ class GitError(Exception):
     """Raised when git exits with code 128."""
 
 
+# Each commit starts with a NUL character, and its fields are terminated by NUL characters, which
+# cannot appear in any of them. The last field is the list of the changed files that git outputs
+# after the formatted commit, with the file names quoted (see core.quotePath).
+_COMMIT_LOG_FORMAT = '%x00%H%x00%P%x00%ct%x00%aN <%aE>%x00%cN <%cE>%x00%s%n%b%x00'
+_COMMIT_LOG_FIELD_COUNT = 7
+
+
+@dataclass
+class _CommitInfo:
+    revision: str
+    parents: list[str]
+    timestamp: int | None
+    author: str
+    committer: str
+    comments: str
+    files: list[str]
+
+
+class _CommitLogParser:
+    """
+    Splits the output of git log with _COMMIT_LOG_FORMAT into the fields of each commit, as it is
+    received.
+    """
+
+    def __init__(self, on_commit: Callable[[list[bytes]], None]) -> None:
+        self._on_commit = on_commit
+        self._pending: list[bytes] = []
+        self._fields: list[bytes] = []
+        self._started = False
+
+    def feed(self, data: bytes) -> None:
+        if b'\0' not in data:
+            # do not join the pending data again for each chunk of a big field
+            self._pending.append(data)
+            return
+        fields = b''.join([*self._pending, data]).split(b'\0')
+        self._pending = [fields.pop()]
+        for field in fields:
+            self._add_field(field)
+
+    def finish(self) -> None:
+        self._add_field(b''.join(self._pending))
+        self._pending = []
+        if self._fields:
+            raise ValueError(f'truncated git log output: {self._fields!r}')
+
+    def _add_field(self, field: bytes) -> None:
+        if not self._started:
+            # the output starts with the separator of the first commit
+            self._started = True
+            return
+        self._fields.append(field)
+        if len(self._fields) == _COMMIT_LOG_FIELD_COUNT:
+            fields = self._fields
+            self._fields = []
+            self._on_commit(fields)
+
+
 class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
     """This source will poll a remote git repo for changes and submit
     them to the change master."""
@@ -488,86 +547,70 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         # but not a critical error. Just use HEAD as the ref to use
         return (['HEAD'], False)
 
-    def _get_commit_comments(self, rev: str) -> defer.Deferred[str]:
-        args = ['--no-walk', r'--format=%s%n%b', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
-        return d  # type: ignore[return-value]
-
-    def _get_commit_timestamp(self, rev: str) -> defer.Deferred[int | None]:
-        # unix timestamp
-        args = ['--no-walk', r'--format=%ct', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
-
-        @d.addCallback
-        def process(git_output: str) -> int | None:
-            if self.usetimestamps:
-                try:
-                    stamp = int(git_output)
-                except Exception as e:
-                    log.msg(
-                        f'gitpoller: caught exception converting output \'{git_output}\' to '
-                        'timestamp'
-                    )
-                    raise e
-                return stamp
-            return None
-
-        return d  # type: ignore[return-value]
-
-    def _get_commit_files(self, rev: str) -> defer.Deferred[list[str]]:
-        args = ['--name-only', '--no-walk', r'--format=%n', '-m', '--first-parent', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
-
-        def decode_file(file: str) -> str:
-            # git use octal char sequences in quotes when non ASCII
-            match = re.match('^"(.*)"$', file)
-            if match:
-                file = bytes2unicode(
-                    match.groups()[0], encoding=self.encoding, errors='unicode_escape'
+    def _decode_file(self, file: str) -> str:
+        # git use octal char sequences in quotes when non ASCII
+        match = re.match('^"(.*)"$', file)
+        if match:
+            file = bytes2unicode(match.groups()[0], encoding=self.encoding, errors='unicode_escape')
+        return bytes2unicode(file, encoding=self.encoding)
+
+    def _parse_commit(self, fields: list[bytes]) -> _CommitInfo:
+        revision, parents, timestamp, author, committer, comments, files = [
+            bytes2unicode(field, self.encoding) for field in fields
+        ]
+        revision = revision.strip()
+
+        stamp = None
+        if self.usetimestamps:
+            try:
+                stamp = int(timestamp)
+            except Exception as e:
+                log.msg(
+                    f'gitpoller: caught exception converting output \'{timestamp}\' to timestamp'
                 )
-            return bytes2unicode(file, encoding=self.encoding)
-
-        @d.addCallback
-        def process(git_output: str) -> list[str]:
-            fileList = [
-                decode_file(file) for file in [s for s in git_output.splitlines() if len(s)]
-            ]
-            return fileList
-
-        return d  # type: ignore[return-value]
-
-    def _get_commit_author(self, rev: str) -> defer.Deferred[str]:
-        args = ['--no-walk', r'--format=%aN <%aE>', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
-
-        @d.addCallback
-        def process(git_output: str) -> str:
-            if not git_output:
-                raise OSError('could not get commit author for rev')
-            return git_output
-
-        return d
+                raise e
+
+        author = author.strip()
+        if not author:
+            raise OSError(f'could not get commit author for rev {revision}')
+        committer = committer.strip()
+        if not committer:
+            raise OSError(f'could not get commit committer for rev {revision}')
+
+        return _CommitInfo(
+            revision=revision,
+            parents=parents.split(),
+            timestamp=stamp,
+            author=author,
+            committer=committer,
+            comments=comments.strip(),
+            files=[self._decode_file(file) for file in files.splitlines() if file],
+        )
 
-    @defer.inlineCallbacks
-    def _get_commit_committer(self, rev: str) -> InlineCallbacksType[str]:
-        args = ['--no-walk', r'--format=%cN <%cE>', rev, '--']
-        res = yield self._dovccmd('log', args, path=self.workdir)
-        if not res:
-            raise OSError('could not get commit committer for rev')
-        return res
-
-    def _get_commit_parent_hashes(self, rev: str) -> defer.Deferred[str]:
-        args = ['--no-walk', r'--format=%P', rev, '--']
-        d = self._dovccmd('log', args, path=self.workdir)
-        return d
+    @async_to_deferred
+    async def _get_commits(self, args: list[str]) -> list[_CommitInfo]:
+        """
+        Returns the information about the commits selected by the given git log arguments, with a
+        single git invocation whose output is split into commits as it is received.
+        """
+        commit_fields: list[list[bytes]] = []
+        parser = _CommitLogParser(commit_fields.append)
+        await self._dovccmd(
+            'log',
+            ['--name-only', '-m', f'--format={_COMMIT_LOG_FORMAT}', *args],
+            path=self.workdir,
+            collect_stdout=parser.feed,
+        )
+        parser.finish()
+        # parsed once git is done, so that an invalid commit fails the poll
+        return [self._parse_commit(fields) for fields in commit_fields]
 
     @defer.inlineCallbacks
     def _process_changes(self, newRev: str, branch: str) -> InlineCallbacksType[None]:
         """
         Read changes since last change.
 
-        - Read list of commit hashes.
-        - Extract details from each commit.
+        - Read the details of the new commits, with a single git log.
         - Add changes to database.
         """
 
@@ -575,23 +618,17 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         if not self.lastRev:
             return
 
-        # get the change list
-        revListArgs = (
-            ['--ignore-missing', '--first-parent']
-            + ['--format=%H', f'{newRev}']
+        # get the changes, oldest first
+        commits = yield self._get_commits(
+            ['--ignore-missing', '--first-parent', '--reverse', newRev]
             + ['^' + rev for rev in sorted(self.lastRev.values())]
             + ['--']
         )
-        results = yield self._dovccmd('log', revListArgs, path=self.workdir)
-
-        # process oldest change first
-        revList = results.split()
-        revList.reverse()
 
-        if self.buildPushesWithNoCommits and not revList:
+        if self.buildPushesWithNoCommits and not commits:
             existingRev = self.lastRev.get(branch)
             if existingRev != newRev:
-                revList = [newRev]
+                commits = yield self._get_commits(['--no-walk', '--first-parent', newRev, '--'])
                 if existingRev is None:
                     # This branch was completely unknown, rebuild
                     log.msg(f'gitpoller: rebuilding {newRev} for new branch "{branch}"')
@@ -600,20 +637,20 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
                     # commit than last time we saw it, rebuild.
                     log.msg(f'gitpoller: rebuilding {newRev} for updated branch "{branch}"')
 
-        change_count = len(revList)
+        change_count = len(commits)
         self.lastRev[branch] = newRev
 
         if change_count:
+            revList = [commit.revision for commit in commits]
             log.msg(
                 f'gitpoller: processing {change_count} changes: {revList} from '
                 f'"{self.repourl}" branch "{branch}"'
             )
 
         last_commit_id = None
-        if self._codebase_id is not None and change_count:
-            rev = revList[0]
-            parent_hashes = yield self._get_commit_parent_hashes(rev)
-            parent_hash = parent_hashes.split()[0]
+        # the first change is a root commit when its parents are empty
+        if self._codebase_id is not None and change_count and commits[0].parents:
+            parent_hash = commits[0].parents[0]
             last_commit = yield self.master.data.get((
                 'codebases',
                 self._codebase_id,
@@ -623,37 +660,15 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
             if last_commit is not None:
                 last_commit_id = last_commit['commitid']
 
-        for rev in revList:
-            dl: defer.Deferred[Any] = defer.DeferredList(
-                [
-                    self._get_commit_timestamp(rev),
-                    self._get_commit_author(rev),
-                    self._get_commit_committer(rev),
-                    self._get_commit_files(rev),
-                    self._get_commit_comments(rev),
-                ],
-                consumeErrors=True,
-            )
-
-            results = yield dl
-
-            # check for failures
-            failures = [r[1] for r in results if not r[0]]
-            if failures:
-                for failure in failures:
-                    log.err(failure, f"while processing changes for {rev} {branch}")
-                # just fail on the first error; they're probably all related!
-                failures[0].raiseException()
-
-            timestamp, author, committer, files, comments = [r[1] for r in results]
-
+        for commit in commits:
+            rev = commit.revision
             yield self.master.data.updates.addChange(
-                author=author,
-                committer=committer,
-                revision=bytes2unicode(rev, encoding=self.encoding),
-                files=files,
-                comments=comments,
-                when_timestamp=timestamp,
+                author=commit.author,
+                committer=commit.committer,
+                revision=rev,
+                files=commit.files,
+                comments=commit.comments,
+                when_timestamp=commit.timestamp,
                 branch=bytes2unicode(self._removeHeads(branch)),
                 project=self.project,
                 repository=bytes2unicode(self.repourl, encoding=self.encoding),
@@ -664,11 +679,11 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
             if self._codebase_id is not None:
                 last_commit_id = yield self.master.data.updates.add_commit(
                     codebaseid=self._codebase_id,
-                    author=author,
-                    committer=committer,
-                    comments=comments,
-                    when_timestamp=timestamp,
-                    revision=bytes2unicode(rev, encoding=self.encoding),
+                    author=commit.author,
+                    committer=commit.committer,
+                    comments=commit.comments,
+                    when_timestamp=commit.timestamp,
+                    revision=rev,
                     parent_commitid=last_commit_id,
                 )
 
@@ -688,6 +703,7 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         path: str | None = None,
         auth_files_path: str | None = None,
         initial_stdin: str | None = None,
+        collect_stdout: Callable[[bytes], None] | None = None,
     ) -> str:
         full_args: list[str] = []
         full_env = os.environ.copy()
@@ -712,9 +728,15 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
             path,
             env=full_env,
             initial_stdin=unicode2bytes(initial_stdin) if initial_stdin is not None else None,
+            collect_stdout=collect_stdout if collect_stdout is not None else True,
         )
-        (code, stdout, stderr) = res
-        stdout = bytes2unicode(stdout, self.encoding)
+        if collect_stdout is not None:
+            # the output was given to collect_stdout as it was received
+            (code, stderr) = res
+            stdout = ''
+        else:
+            (code, stdout, stderr) = res
+            stdout = bytes2unicode(stdout, self.encoding)
         stderr = bytes2unicode(stderr, self.encoding)
         if code != 0:
             if code == 128:
@@ -149,6 +149,7 @@ class FileLoader(ComparableMixin):
 class DBConfig:
     db_url: str | interfaces.IRenderable = DEFAULT_DB_URL
     engine_kwargs: dict[str, Any] = field(default_factory=lambda: {})
+    thread_pool_max_size: int | None = None
 
     @defer.inlineCallbacks
     def getRenderingFor(self, iprops: IProperties) -> Generator[Any, Any, DBConfig]:
@@ -158,7 +159,7 @@ class DBConfig:
             db_url = self.db_url
         engine_kwargs = yield iprops.render(self.engine_kwargs)
 
-        return DBConfig(db_url, engine_kwargs)
+        return DBConfig(db_url, engine_kwargs, self.thread_pool_max_size)
 
 
 class MasterConfig(util.ComparableMixin):
@@ -194,6 +195,7 @@ class MasterConfig(util.ComparableMixin):
         self.logEncoding = 'utf-8'
         self.logMaxSize = None
         self.logMaxTailSize = None
+        self.logRecompression = None
         self.properties = properties.Properties()
         self.collapseRequests = None
         self.codebaseGenerator = None
@@ -254,6 +256,7 @@ class MasterConfig(util.ComparableMixin):
         "logEncoding",
         "logMaxSize",
         "logMaxTailSize",
+        "logRecompression",
         "manhole",
         "machines",
         "collapseRequests",
@@ -425,8 +428,11 @@ class MasterConfig(util.ComparableMixin):
             'logCompressionMethod',
             _default_log_compression_method(),
         )
-        if self.logCompressionMethod not in ('raw', 'bz2', 'gz', 'lz4', 'zstd', 'br'):
-            error("c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br' or 'zstd'")
+        if self.logCompressionMethod not in ('raw', 'bz2', 'gz', 'lz4', 'zstd', 'zstd-dict', 'br'):
+            error(
+                "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br', 'zstd' "
+                "or 'zstd-dict'"
+            )
 
         if self.logCompressionMethod == "lz4":
             try:
@@ -438,14 +444,14 @@ class MasterConfig(util.ComparableMixin):
                     "To set c['logCompressionMethod'] to 'lz4' "
                     "you must install the lz4 library ('pip install lz4')"
                 )
-        elif self.logCompressionMethod == "zstd":
+        elif self.logCompressionMethod in ("zstd", "zstd-dict"):
             try:
                 import zstandard  # pylint: disable=import-outside-toplevel
 
                 _ = zstandard
             except ImportError:
                 error(
-                    "To set c['logCompressionMethod'] to 'zstd' "
+                    f"To set c['logCompressionMethod'] to '{self.logCompressionMethod}' "
                     "you must install the zstandard Buildbot extra ('pip install buildbot[zstd]')"
                 )
         elif self.logCompressionMethod == "br":
@@ -459,6 +465,22 @@ class MasterConfig(util.ComparableMixin):
                     "you must install the brotli Buildbot extra ('pip install buildbot[brotli]')"
                 )
 
+        log_recompression = config_dict.get('logRecompression')
+        if log_recompression is not None:
+            if not isinstance(log_recompression, dict) or not set(log_recompression) <= {
+                'batch_size',
+                'interval',
+            }:
+                error(
+                    "c['logRecompression'] must be a dictionary with optional keys "
+                    "'batch_size' and 'interval'"
+                )
+            else:
+                self.logRecompression = {'batch_size': 10, 'interval': 60, **log_recompression}
+                for key, value in self.logRecompression.items():
+                    if not isinstance(value, int) or value < 1:
+                        error(f"c['logRecompression']['{key}'] must be a positive integer")
+
         copy_int_param('logMaxSize')
         copy_int_param('logMaxTailSize')
         copy_param('logEncoding')
@@ -546,11 +568,20 @@ class MasterConfig(util.ComparableMixin):
         dbconfig = DBConfig()
 
         if 'db' in config_dict:
-            if set(config_dict['db'].keys()) - set(['db_url', 'engine_kwargs']) and throwErrors:
+            known_keys = set(['db_url', 'engine_kwargs', 'thread_pool_max_size'])
+            if set(config_dict['db'].keys()) - known_keys and throwErrors:
                 error("unrecognized keys in c['db']")
+            thread_pool_max_size = config_dict['db'].get('thread_pool_max_size')
+            if thread_pool_max_size is not None and (
+                not isinstance(thread_pool_max_size, int) or thread_pool_max_size < 1
+            ):
+                if throwErrors:
+                    error("c['db']['thread_pool_max_size'] must be a positive integer")
+                thread_pool_max_size = None
             dbconfig = DBConfig(
                 db_url=config_dict['db'].get('db_url', DEFAULT_DB_URL),
                 engine_kwargs=config_dict['db'].get('engine_kwargs', {}),
+                thread_pool_max_size=thread_pool_max_size,
             )
         elif 'db_url' in config_dict:
             dbconfig = DBConfig(config_dict['db_url'])
@@ -816,6 +847,9 @@ class MasterConfig(util.ComparableMixin):
             'allowed_origins',
             'auth',
             'authz',
+            'avatar_cache_file',
+            'avatar_cache_seconds',
+            'avatar_cache_size',
             'avatar_methods',
             'change_hook_auth',
             'change_hook_dialects',
@@ -865,6 +899,19 @@ class MasterConfig(util.ComparableMixin):
                     'be a datetime.timedelta'
                 )
 
+        avatar_cache_size = www_cfg.get('avatar_cache_size')
+        if avatar_cache_size is not None:
+            if not isinstance(avatar_cache_size, int) or avatar_cache_size < 1:
+                error('Invalid www["avatar_cache_size"] configuration should be a positive integer')
+
+        avatar_cache_seconds = www_cfg.get('avatar_cache_seconds')
+        if avatar_cache_seconds is not None:
+            if not isinstance(avatar_cache_seconds, (int, float)) or avatar_cache_seconds < 0:
+                error(
+                    'Invalid www["avatar_cache_seconds"] configuration should '
+                    'be a non-negative number'
+                )
+
         self.www.update(www_cfg)
 
     def load_services(self, filename: str, config_dict: dict[str, Any]) -> None:
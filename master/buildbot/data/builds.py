@@ -81,6 +81,14 @@ def _generate_filtered_properties(props, filters):
     return None
 
 
+def _property_names(filters):
+    """
+    Returns the names of the properties to load from the db for the given property filters, or
+    None if all of them are needed.
+    """
+    return None if '*' in filters else filters
+
+
 class BuildEndpoint(base.BuildNestingMixin, base.Endpoint):
     kind = base.EndpointKind.SINGLE
     pathPatterns = [
@@ -107,7 +115,10 @@ class BuildEndpoint(base.BuildNestingMixin, base.Endpoint):
             # Avoid to request DB for Build's properties if not specified
             if filters:
                 try:
-                    props = yield self.master.db.builds.getBuildProperties(data['buildid'])
+                    props = yield self.master.db.builds.getBuildsProperties(
+                        [data['buildid']], _property_names(filters)
+                    )
+                    props = props[data['buildid']]
                 except (KeyError, TypeError):
                     props = {}
                 filtered_properties = _generate_filtered_properties(props, filters)
@@ -189,17 +200,19 @@ class BuildsEndpoint(base.BuildNestingMixin, base.Endpoint):
         # returns properties' list
         filters = resultSpec.popProperties()
 
-        buildscol = []
-        for b in builds:
-            data = _db2data(b)
-            # Avoid to request DB for Build's properties if not specified
-            if filters:
-                props = yield self.master.db.builds.getBuildProperties(data["buildid"])
-                filtered_properties = _generate_filtered_properties(props, filters)
+        buildscol = [_db2data(b) for b in builds]
+        # Avoid to request DB for Build's properties if not specified
+        if filters and buildscol:
+            props_by_buildid = yield self.master.db.builds.getBuildsProperties(
+                [data["buildid"] for data in buildscol], _property_names(filters)
+            )
+            for data in buildscol:
+                filtered_properties = _generate_filtered_properties(
+                    props_by_buildid[data["buildid"]], filters
+                )
                 if filtered_properties:
                     data["properties"] = filtered_properties
 
-            buildscol.append(data)
         return buildscol
 
 
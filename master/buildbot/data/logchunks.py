@@ -20,7 +20,9 @@ from typing import TYPE_CHECKING
 from twisted.internet import defer
 
 from buildbot.data import base
+from buildbot.data import exceptions
 from buildbot.data import types
+from buildbot.util.twisted import async_to_deferred
 
 if TYPE_CHECKING:
     from typing import Any
@@ -219,3 +221,92 @@ class LogChunk(base.ResourceType):
         content = types.String()
 
     entityType = EntityType(name)
+
+
+class LogMatchesEndpoint(base.BuildNestingMixin, base.Endpoint):
+    kind = base.EndpointKind.COLLECTION
+    pathPatterns = [
+        "/logs/n:logid/search",
+        "/steps/n:stepid/logs/i:log_slug/search",
+        "/builds/n:buildid/steps/i:step_name/logs/i:log_slug/search",
+        "/builds/n:buildid/steps/n:step_number/logs/i:log_slug/search",
+        "/builders/n:builderid/builds/n:build_number/steps/i:step_name/logs/i:log_slug/search",
+        "/builders/n:builderid/builds/n:build_number/steps/n:step_number/logs/i:log_slug/search",
+    ]
+
+    MAX_CONTEXT = 100
+    # default and maximum number of matches returned at once
+    MAX_MATCHES = 1000
+
+    @async_to_deferred
+    async def get(self, resultSpec: base.ResultSpec, kwargs: dict[str, Any]):
+        pattern = resultSpec.popOneFilter('content', 'contains')
+        if not pattern:
+            raise exceptions.InvalidQueryParameter("a 'content__contains' filter is required")
+        context = resultSpec.popIntegerFilter('context') or 0
+        if not 0 <= context <= self.MAX_CONTEXT:
+            raise exceptions.InvalidQueryParameter(
+                f"'context' must be between 0 and {self.MAX_CONTEXT}"
+            )
+
+        offset = resultSpec.offset or 0
+        limit = resultSpec.limit if resultSpec.limit is not None else self.MAX_MATCHES
+        if not 0 <= limit <= self.MAX_MATCHES:
+            raise exceptions.InvalidQueryParameter(
+                f"'limit' must be between 0 and {self.MAX_MATCHES}"
+            )
+        if resultSpec.order is None and not resultSpec.filters:
+            # the matches are found in log order: only keep the requested page
+            resultSpec.removePagination()
+            skip = offset
+            max_matches = limit
+        else:
+            # the order and the other filters apply to the first matches of the log
+            skip = 0
+            max_matches = offset + limit
+
+        retriever = base.NestedBuildDataRetriever(self.master, kwargs)
+        log_dict = await retriever.get_log_dict()
+        if log_dict is None or max_matches == 0:
+            return []
+
+        # for stdio logs, the first char is the stream type
+        strip = 1 if log_dict.type == 's' else 0
+
+        matches: list[dict[str, Any]] = []
+        async for match in self.master.db.logs.iter_log_matches(log_dict.id, pattern, context):
+            content = match.content[strip:]
+            # the pattern may have matched across the stream type
+            if pattern not in content:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            matches.append({
+                'logid': log_dict.id,
+                'line': match.line,
+                'content': content,
+                'context': context,
+                'before': [line[strip:] for line in match.before],
+                'after': [line[strip:] for line in match.after],
+            })
+            # stop reading the log as soon as the requested page of matches is found
+            if len(matches) >= max_matches:
+                break
+        return matches
+
+
+class LogMatch(base.ResourceType):
+    name = "logmatch"
+    plural = "logmatches"
+    endpoints = [LogMatchesEndpoint]
+
+    class EntityType(types.Entity):
+        logid = types.Integer()
+        line = types.Integer()
+        content = types.String()
+        context = types.Integer()
+        before = types.List(of=types.String())
+        after = types.List(of=types.String())
+
+    entityType = EntityType(name)
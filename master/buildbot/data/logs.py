@@ -29,18 +29,21 @@ if TYPE_CHECKING:
     from buildbot.util.twisted import InlineCallbacksType
 
 
+def log_db_to_data(model: LogModel):
+    return {
+        'logid': model.id,
+        'name': model.name,
+        'slug': model.slug,
+        'stepid': model.stepid,
+        'complete': model.complete,
+        'num_lines': model.num_lines,
+        'type': model.type,
+    }
+
+
 class EndpointMixin:
     def db2data(self, model: LogModel):
-        data = {
-            'logid': model.id,
-            'name': model.name,
-            'slug': model.slug,
-            'stepid': model.stepid,
-            'complete': model.complete,
-            'num_lines': model.num_lines,
-            'type': model.type,
-        }
-        return defer.succeed(data)
+        return defer.succeed(log_db_to_data(model))
 
 
 class LogEndpoint(EndpointMixin, base.BuildNestingMixin, base.Endpoint):
@@ -140,7 +143,7 @@ class Log(base.ResourceType):
     @base.updateMethod
     @defer.inlineCallbacks
     def appendLog(self, logid: int, content: str) -> InlineCallbacksType[None]:
-        res = yield self.master.db.logs.appendLog(logid=logid, content=content)
+        res = yield self.master.db.logs.append_log_buffered(logid=logid, content=content)
         self.generateEvent(logid, "append")
         return res
 
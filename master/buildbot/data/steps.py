@@ -27,7 +27,7 @@ if TYPE_CHECKING:
     from buildbot.util.twisted import InlineCallbacksType
 
 
-def _db2data(model: StepModel):
+def step_db_to_data(model: StepModel):
     return {
         'stepid': model.id,
         'number': model.number,
@@ -60,14 +60,14 @@ class StepEndpoint(base.BuildNestingMixin, base.Endpoint):
     def get(self, resultSpec, kwargs):
         if 'stepid' in kwargs:
             dbdict = yield self.master.db.steps.getStep(kwargs['stepid'])
-            return _db2data(dbdict) if dbdict else None
+            return step_db_to_data(dbdict) if dbdict else None
         buildid = yield self.getBuildid(kwargs)
         if buildid is None:
             return None
         dbdict = yield self.master.db.steps.getStep(
             buildid=buildid, number=kwargs.get('step_number'), name=kwargs.get('step_name')
         )
-        return _db2data(dbdict) if dbdict else None
+        return step_db_to_data(dbdict) if dbdict else None
 
 
 class StepsEndpoint(base.BuildNestingMixin, base.Endpoint):
@@ -87,7 +87,7 @@ class StepsEndpoint(base.BuildNestingMixin, base.Endpoint):
             if buildid is None:
                 return None
         steps = yield self.master.db.steps.getSteps(buildid=buildid)
-        return [_db2data(model) for model in steps]
+        return [step_db_to_data(model) for model in steps]
 
 
 class UrlEntityType(types.Entity):
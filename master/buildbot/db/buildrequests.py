@@ -82,6 +82,13 @@ class BuildRequestModel:
         raise KeyError(key)
 
 
+@dataclass
+class BuilderBuildRequestsSummaryModel:
+    builderid: int
+    oldest_submitted_at: datetime.datetime | None = None
+    highest_priority: int | None = None
+
+
 @deprecate.deprecated(versions.Version("buildbot", 4, 1, 0), BuildRequestModel)
 class BrDict(BuildRequestModel):
     pass
@@ -192,6 +199,39 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
         res = yield self.db.pool.do(thd)
         return res
 
+    def get_builders_buildrequests_summary(
+        self, builderids
+    ) -> defer.Deferred[dict[int, BuilderBuildRequestsSummaryModel]]:
+        def thd(conn) -> dict[int, BuilderBuildRequestsSummaryModel]:
+            reqs_tbl = self.db.model.buildrequests
+            claims_tbl = self.db.model.buildrequest_claims
+
+            summaries = {
+                builderid: BuilderBuildRequestsSummaryModel(builderid=builderid)
+                for builderid in builderids
+            }
+
+            for batch in self.doBatch(summaries, 100):
+                q = (
+                    sa.select(
+                        reqs_tbl.c.builderid,
+                        sa.func.min(reqs_tbl.c.submitted_at),
+                        sa.func.max(reqs_tbl.c.priority),
+                    )
+                    .select_from(reqs_tbl.outerjoin(claims_tbl, reqs_tbl.c.id == claims_tbl.c.brid))
+                    .where(reqs_tbl.c.builderid.in_(batch))
+                    .where((claims_tbl.c.claimed_at == NULL) & (reqs_tbl.c.complete == 0))
+                    .group_by(reqs_tbl.c.builderid)
+                )
+                for builderid, submitted_at, priority in conn.execute(q).fetchall():
+                    summary = summaries[builderid]
+                    summary.oldest_submitted_at = epoch2datetime(submitted_at)
+                    summary.highest_priority = priority
+
+            return summaries
+
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def claimBuildRequests(self, brids, claimed_at=None):
         if claimed_at is not None:
@@ -219,7 +259,7 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
 
             transaction.commit()
 
-        yield self.db.pool.do(thd)
+        yield self.db.pool.do_in_lane('scheduling', thd)
 
     @defer.inlineCallbacks
     def unclaimBuildRequests(self, brids):
@@ -252,7 +292,7 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
 
             transaction.commit()
 
-        yield self.db.pool.do(thd)
+        yield self.db.pool.do_in_lane('scheduling', thd)
 
     @defer.inlineCallbacks
     def completeBuildRequests(self, brids, results, complete_at=None):
@@ -290,7 +330,7 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
                     raise NotClaimedError
             transaction.commit()
 
-        yield self.db.pool.do(thd)
+        yield self.db.pool.do_in_lane('scheduling', thd)
 
     def set_build_requests_priority(self, brids, priority):
         def thd(conn):
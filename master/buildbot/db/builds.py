@@ -30,6 +30,8 @@ from buildbot.warnings import warn_deprecated
 
 if TYPE_CHECKING:
     import datetime
+    from typing import Any
+    from typing import Iterable
     from typing import Sequence
 
     from buildbot.data.resultspec import ResultSpec
@@ -70,6 +72,14 @@ class BuildModel:
         raise KeyError(key)
 
 
+@dataclass(eq=False)
+class _PrevSuccessfulBuildLookup:
+    build: BuildModel | None
+    # False if the build may change, when previous builds are still running
+    final: bool
+    used: bool = False
+
+
 class BuildsConnectorComponent(base.DBConnectorComponent):
     def _getBuild(self, whereclause) -> defer.Deferred[BuildModel | None]:
         def thd(conn) -> BuildModel | None:
@@ -119,39 +129,85 @@ class BuildsConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
-    @defer.inlineCallbacks
-    def getPrevSuccessfulBuild(
+    @async_to_deferred
+    async def getPrevSuccessfulBuild(
         self, builderid: int, number: int, ssBuild: Sequence[SourceStampModel]
-    ):
-        gssfb = self.master.db.sourcestamps.getSourceStampsForBuild
-        rv = None
-        tbl = self.db.model.builds
-        offset = 0
-        increment = 1000
-        matchssBuild = {(ss.repository, ss.branch, ss.codebase) for ss in ssBuild}
-        while rv is None:
-            # Get some recent successful builds on the same builder
-            prevBuilds = yield self._getRecentBuilds(
-                whereclause=(
-                    (tbl.c.builderid == builderid) & (tbl.c.number < number) & (tbl.c.results == 0)
-                ),
-                offset=offset,
-                limit=increment,
+    ) -> BuildModel | None:
+        signature = frozenset((ss.repository, ss.branch, ss.codebase) for ss in ssBuild)
+        key = (builderid, number, signature)
+        cache = self.master.caches.get_cache(
+            "prevSuccessfulBuilds", self._lookupPrevSuccessfulBuild
+        )
+        lookup = await cache.get(key)
+        if not lookup.final:
+            # builds which were not finished at the time of the cached lookup may have succeeded
+            # since, so a cached lookup is only used once
+            if lookup.used:
+                lookup = await self._lookupPrevSuccessfulBuild(key)
+                cache.put(key, lookup)
+            lookup.used = True
+        return lookup.build
+
+    def _lookupPrevSuccessfulBuild(
+        self, key: tuple[int, int, frozenset[tuple[str, str | None, str]]]
+    ) -> defer.Deferred[_PrevSuccessfulBuildLookup]:
+        builderid, number, signature = key
+
+        def thd(conn) -> _PrevSuccessfulBuildLookup:
+            builds_tbl = self.db.model.builds
+            reqs_tbl = self.db.model.buildrequests
+            bsss_tbl = self.db.model.buildset_sourcestamps
+            ss_tbl = self.db.model.sourcestamps
+
+            # find the most recent successful build on the same builder, whose set of
+            # (repository, branch, codebase) is the same
+            ss_count = sa.func.count(ss_tbl.c.id)
+            if signature:
+                matches = sa.or_(*[
+                    (ss_tbl.c.repository == repository)
+                    & (ss_tbl.c.branch == branch)
+                    & (ss_tbl.c.codebase == codebase)
+                    for repository, branch, codebase in signature
+                ])
+                match_count = sa.func.sum(sa.case((matches, 1), else_=0))
+            else:
+                match_count = ss_count
+
+            q = (
+                sa.select(builds_tbl)
+                .select_from(
+                    builds_tbl.join(reqs_tbl, builds_tbl.c.buildrequestid == reqs_tbl.c.id)
+                    .outerjoin(bsss_tbl, reqs_tbl.c.buildsetid == bsss_tbl.c.buildsetid)
+                    .outerjoin(ss_tbl, bsss_tbl.c.sourcestampid == ss_tbl.c.id)
+                )
+                .where(
+                    (builds_tbl.c.builderid == builderid)
+                    & (builds_tbl.c.number < number)
+                    & (builds_tbl.c.results == 0)
+                )
+                .group_by(*builds_tbl.c)
+                .having((ss_count == len(signature)) & (match_count == len(signature)))
+                .order_by(sa.desc(builds_tbl.c.complete_at), sa.desc(builds_tbl.c.id))
+                .limit(1)
             )
-            if not prevBuilds:
-                break
-            for prevBuild in prevBuilds:
-                prevssBuild = {
-                    (ss.repository, ss.branch, ss.codebase) for ss in (yield gssfb(prevBuild.id))
-                }
-                if prevssBuild == matchssBuild:
-                    # A successful build with the same
-                    # repository/branch/codebase was found !
-                    rv = prevBuild
-                    break
-            offset += increment
-
-        return rv
+            row = conn.execute(q).fetchone()
+            build = self._model_from_row(row) if row else None
+
+            # the result may only change if one of the previous builds is still running
+            q = (
+                sa.select(builds_tbl.c.id)
+                .where(
+                    (builds_tbl.c.builderid == builderid)
+                    & (builds_tbl.c.number < number)
+                    & (builds_tbl.c.complete_at == NULL)
+                )
+                .limit(1)
+            )
+            final = conn.execute(q).fetchone() is None
+
+            return _PrevSuccessfulBuildLookup(build=build, final=final)
+
+        return self.db.pool.do(thd)
 
     def getBuildsForChange(self, changeid: int) -> defer.Deferred[list[BuildModel]]:
         assert changeid > 0
@@ -316,6 +372,36 @@ class BuildsConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
+    def getBuildsProperties(
+        self, buildids: Iterable[int], names: Iterable[str] | None = None
+    ) -> defer.Deferred[dict[int, dict[str, tuple[Any, str]]]]:
+        """
+        Returns the properties of several builds at once, as a dictionary mapping each build id to
+        the properties of that build. If names is given, only the properties with these names are
+        returned.
+        """
+
+        def thd(conn) -> dict[int, dict[str, tuple[Any, str]]]:
+            bp_tbl = self.db.model.build_properties
+            result: dict[int, dict[str, tuple[Any, str]]] = {bid: {} for bid in buildids}
+            # batch the build ids to stay within the maximum number of variables of a query
+            for batch in self.doBatch(result, 100):
+                q = sa.select(
+                    bp_tbl.c.buildid,
+                    bp_tbl.c.name,
+                    bp_tbl.c.value,
+                    bp_tbl.c.source,
+                ).where(bp_tbl.c.buildid.in_(batch))
+                if names is not None:
+                    q = q.where(bp_tbl.c.name.in_(names))
+                for row in conn.execute(q):
+                    result[row.buildid][row.name] = (json.loads(row.value), row.source)
+            return result
+
+        if names is not None:
+            names = list(names)
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def setBuildProperty(self, bid, name, value, source):
         """A kind of create_or_update, that's between one or two queries per
@@ -19,6 +19,7 @@ from buildbot.db.compression.native import BZipCompressor
 from buildbot.db.compression.native import GZipCompressor
 from buildbot.db.compression.protocol import CompressorInterface
 from buildbot.db.compression.zstd import ZStdCompressor
+from buildbot.db.compression.zstd import ZStdDictCompressor
 
 __all__ = [
     'BrotliCompressor',
@@ -27,4 +28,5 @@ __all__ = [
     'GZipCompressor',
     'LZ4Compressor',
     'ZStdCompressor',
+    'ZStdDictCompressor',
 ]
@@ -17,6 +17,7 @@ from __future__ import annotations
 
 import contextlib
 import os
+import struct
 from threading import Lock
 from typing import TYPE_CHECKING
 from typing import Generic
@@ -152,3 +153,106 @@ class ZStdCompressor(CompressorInterface):
                 compressor = self._compressor
                 self._compressor = None
                 ZStdCompressor._compressor_pool.release(compressor)
+
+
+class ZStdDictCompressor:
+    """
+    zstd compression against a dictionary trained on similar data (e.g. previous logs of a
+    builder), which gives much better ratios on small inputs.
+
+    The dictionary is identified by an id chosen by the caller, which is stored ahead of the
+    compressed data so that the matching dictionary can be found to read it back.
+    """
+
+    name = "zstd-dict"
+    available = HAS_ZSTD
+
+    COMPRESS_LEVEL = ZStdCompressor.COMPRESS_LEVEL
+
+    _header = struct.Struct('>I')
+    HEADER_SIZE = _header.size
+
+    def __init__(self, dictionary_id: int, dictionary: bytes) -> None:
+        self.dictionary_id = dictionary_id
+        self._header_bytes = self._header.pack(dictionary_id)
+        self._dictionary = zstandard.ZstdCompressionDict(dictionary)
+        # there is a dictionary per builder: only keep one (de)compressor around for each,
+        # as a compressor context with a dictionary is large
+        self._compressor_pool: _Pool[zstandard.ZstdCompressor] = _Pool(
+            lambda: zstandard.ZstdCompressor(level=self.COMPRESS_LEVEL, dict_data=self._dictionary),
+            max_size=1,
+        )
+        self._decompressor_pool: _Pool[zstandard.ZstdDecompressor] = _Pool(
+            lambda: zstandard.ZstdDecompressor(dict_data=self._dictionary),
+            max_size=1,
+        )
+
+    @staticmethod
+    def train(samples: list[bytes], dictionary_size: int) -> bytes | None:
+        """Returns None if the samples are not enough to train a dictionary"""
+        try:
+            dictionary = zstandard.train_dictionary(
+                dictionary_size, samples, level=ZStdDictCompressor.COMPRESS_LEVEL
+            )
+        except zstandard.ZstdError:
+            return None
+        return dictionary.as_bytes()
+
+    @classmethod
+    def get_dictionary_id(cls, data: bytes) -> int:
+        return cls._header.unpack_from(data)[0]
+
+    def dumps(self, data: bytes) -> bytes:
+        with self._compressor_pool.item() as compressor:
+            return self._header_bytes + compressor.compress(data)
+
+    def read(self, data: bytes) -> bytes:
+        dictionary_id = self.get_dictionary_id(data)
+        if dictionary_id != self.dictionary_id:
+            msg = (
+                f"Data was compressed with dictionary {dictionary_id}, "
+                f"not with dictionary {self.dictionary_id}"
+            )
+            raise ValueError(msg)
+        with self._decompressor_pool.item() as decompressor:
+            decompress_obj = decompressor.decompressobj()
+            return decompress_obj.decompress(data[self._header.size :]) + decompress_obj.flush()
+
+    def CompressObj(self) -> CompressObjInterface:
+        return ZStdDictCompressor._CompressObj(self)
+
+    class _CompressObj(CompressObjInterface):
+        def __init__(self, compressor: ZStdDictCompressor) -> None:
+            self._dict_compressor = compressor
+            self._compressor: zstandard.ZstdCompressor | None = None
+            self._compressobj: zstandard.ZstdCompressionObj | None = None
+
+        def compress(self, data: bytes) -> bytes:
+            header = b''
+            if self._compressor is None:
+                header = self._dict_compressor._header_bytes
+                self._compressor = self._dict_compressor._compressor_pool.acquire()
+                self._compressobj = self._compressor.compressobj()
+            else:
+                assert self._compressobj is not None, (
+                    "Programming error: _compressobj is None when _compressor is not"
+                )
+
+            return header + self._compressobj.compress(data)
+
+        def flush(self) -> bytes:
+            assert self._compressor is not None, (
+                "Programming error: Flush called without previous compress"
+            )
+            assert self._compressobj is not None, (
+                "Programming error: _compressobj is None when _compressor is not"
+            )
+
+            try:
+                return self._compressobj.flush(flush_mode=zstandard.COMPRESSOBJ_FLUSH_FINISH)
+            finally:
+                # release _compressobj as it's not re-usable
+                self._compressobj = None
+                compressor = self._compressor
+                self._compressor = None
+                self._dict_compressor._compressor_pool.release(compressor)
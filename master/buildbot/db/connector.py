@@ -189,7 +189,12 @@ class DBConnector(service.ReconfigurableServiceMixin, service.AsyncMultiService)
         )
         self.upsert = get_upsert_method(self._engine)
         self.has_native_upsert = self.upsert != get_upsert_method(None)
-        self.pool = pool.DBThreadPool(self._engine, reactor=self.master.reactor, verbose=verbose)
+        self.pool = pool.DBThreadPool(
+            self._engine,
+            reactor=self.master.reactor,
+            verbose=verbose,
+            max_threads=self.configured_db_config.thread_pool_max_size,
+        )
         self.pool.start()
 
         # make sure the db is up to date, unless specifically asked not to
@@ -18,7 +18,7 @@ from __future__ import annotations
 import dataclasses
 import io
 import os
-import threading
+from collections import deque
 from functools import partial
 from typing import TYPE_CHECKING
 
@@ -26,11 +26,8 @@ import sqlalchemy as sa
 from twisted.internet import defer
 from twisted.internet import threads
 from twisted.python import log
-from twisted.python import threadpool
-from twisted.python.failure import Failure
 
 from buildbot import util
-from buildbot.config.master import get_is_in_unit_tests
 from buildbot.db import base
 from buildbot.db.compression import BrotliCompressor
 from buildbot.db.compression import BZipCompressor
@@ -38,7 +35,9 @@ from buildbot.db.compression import CompressorInterface
 from buildbot.db.compression import GZipCompressor
 from buildbot.db.compression import LZ4Compressor
 from buildbot.db.compression import ZStdCompressor
+from buildbot.db.compression import ZStdDictCompressor
 from buildbot.db.compression.protocol import CompressObjInterface
+from buildbot.util.twisted import async_iter_on_pool
 from buildbot.util.twisted import async_to_deferred
 from buildbot.warnings import warn_deprecated
 
@@ -46,11 +45,12 @@ if TYPE_CHECKING:
     from typing import AsyncGenerator
     from typing import Callable
     from typing import Generator
+    from typing import Iterable
     from typing import Literal
     from typing import TypeVar
 
     from sqlalchemy.engine import Connection as SAConnection
-    from twisted.internet.interfaces import IReactorThreads
+    from twisted.internet.interfaces import IDelayedCall
     from typing_extensions import ParamSpec
 
     _T = TypeVar('_T')
@@ -95,6 +95,17 @@ class LogModel:
         raise KeyError(key)
 
 
+@dataclasses.dataclass
+class LogLineMatch:
+    # number of the matching line
+    line: int
+    # line content, without the line-ending
+    content: str
+    # the lines around the matching line
+    before: list[str]
+    after: list[str]
+
+
 class RawCompressor(CompressorInterface):
     name = "raw"
 
@@ -114,6 +125,103 @@ class RawCompressor(CompressorInterface):
             return b''
 
 
+@dataclasses.dataclass
+class _BuilderDictionaryState:
+    """'zstd-dict' compression dictionary of a builder"""
+
+    dictionary_id: int | None
+    # when to (re)train the dictionary
+    next_training_at: float
+    training: bool = False
+
+
+@dataclasses.dataclass
+class _LinesSearchResult:
+    matches: list[LogLineMatch]
+    # the first and last lines, for the context of the matches of the
+    # neighbouring lines
+    head: list[str]
+    tail: list[str]
+
+
+def _search_lines(data: bytes, first_line: int, pattern: bytes, context: int) -> _LinesSearchResult:
+    # data is newline-separated lines, without the last line-ending. Searching the
+    # encoded content directly is fine, as UTF-8 cannot match in the middle of a
+    # character, and skips the lines that do not need to be decoded
+    if pattern not in data:
+        if not context:
+            return _LinesSearchResult(matches=[], head=[], tail=[])
+        return _LinesSearchResult(
+            matches=[],
+            head=[line.decode('utf-8') for line in data.split(b'\n', context)[:context]],
+            tail=[line.decode('utf-8') for line in data.rsplit(b'\n', context)[-context:]],
+        )
+
+    lines = [line.decode('utf-8') for line in data.split(b'\n')]
+    str_pattern = pattern.decode('utf-8')
+    matches = [
+        LogLineMatch(
+            line=first_line + idx,
+            content=line,
+            before=lines[max(0, idx - context) : idx],
+            after=lines[idx + 1 : idx + 1 + context],
+        )
+        for idx, line in enumerate(lines)
+        if str_pattern in line
+    ]
+    return _LinesSearchResult(
+        matches=matches,
+        head=lines[:context],
+        tail=lines[-context:] if context else [],
+    )
+
+
+class _LogAppendBuffer:
+    """Appends to a log that are not yet written to the database"""
+
+    def __init__(self, first_line: int) -> None:
+        # number of the first line that is not yet written to the database
+        self.first_line = first_line
+        # pending appends, as (content, number of lines)
+        self.contents: list[tuple[str, int]] = []
+        self.num_lines = 0
+        self.size = 0
+        self.flush_timer: IDelayedCall | None = None
+        # serializes the flushes of the buffer
+        self.lock = defer.DeferredLock()
+
+    def append(self, content: str) -> tuple[int, int]:
+        first_line = self.first_line + self.num_lines
+        count = content.count('\n')
+        self.contents.append((content, count))
+        self.num_lines += count
+        self.size += len(content)
+        return first_line, first_line + count - 1
+
+    def consume(self, count: int) -> None:
+        # forget the first count appends, once they are written to the database
+        for content, num_lines in self.contents[:count]:
+            self.first_line += num_lines
+            self.num_lines -= num_lines
+            self.size -= len(content)
+        del self.contents[:count]
+
+    def get_lines(self, first_line: int, last_line: int | None) -> list[str]:
+        lines: list[str] = []
+        line_idx = self.first_line
+        for content, num_lines in self.contents:
+            if last_line is not None and line_idx > last_line:
+                break
+            if line_idx + num_lines <= first_line:
+                line_idx += num_lines
+                continue
+            for line in content.split('\n')[:-1]:
+                if line_idx >= first_line and (last_line is None or line_idx <= last_line):
+                    lines.append(line + '\n')
+                line_idx += 1
+        return lines
+
+
 class LogsConnectorComponent(base.DBConnectorComponent):
     # Postgres and MySQL will both allow bigger sizes than this.  The limit
     # for MySQL appears to be max_packet_size (default 1M).
@@ -121,6 +229,13 @@ class LogsConnectorComponent(base.DBConnectorComponent):
     MAX_CHUNK_SIZE = 65536  # a chunk may not be bigger than this
     MAX_CHUNK_LINES = 1000  # a chunk may not have more lines than this
 
+    # append_log_buffered keeps appends in memory, and writes them to the
+    # database as a single chunk once that many bytes or lines are pending, or
+    # after that many seconds
+    APPEND_BUFFER_MAX_SIZE = MAX_CHUNK_SIZE
+    APPEND_BUFFER_MAX_LINES = MAX_CHUNK_LINES
+    APPEND_BUFFER_FLUSH_INTERVAL = 1.0
+
     NO_COMPRESSION_ID = 0
     COMPRESSION_BYID: dict[int, type[CompressorInterface]] = {
         NO_COMPRESSION_ID: RawCompressor,
@@ -129,7 +244,21 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         3: LZ4Compressor,
         4: ZStdCompressor,
         5: BrotliCompressor,
+        6: ZStdDictCompressor,  # type: ignore[dict-item]
     }
+    ZSTD_DICT_COMPRESSION_ID = 6
+
+    # with the 'zstd-dict' compression method, chunks are compressed with a dictionary
+    # trained on the most recent chunks of the builder's logs, which is retrained after
+    # DICTIONARY_RETRAIN_INTERVAL seconds (or DICTIONARY_TRAINING_RETRY_INTERVAL seconds
+    # if there were not enough logs to train one)
+    DICTIONARY_SIZE = 65536
+    DICTIONARY_SAMPLE_CHUNKS = 200
+    DICTIONARY_RETRAIN_INTERVAL = 7 * 24 * 3600
+    DICTIONARY_TRAINING_RETRY_INTERVAL = 3600
+    # a dictionary replaced by a newer one is deleted once no log uses it, but not before
+    # DICTIONARY_DELETE_GRACE_PERIOD seconds, so that the masters load the newer one
+    DICTIONARY_DELETE_GRACE_PERIOD = 24 * 3600
 
     COMPRESSION_MODE = {
         compressor.name: (compressor_id, compressor)
@@ -150,6 +279,15 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             maxthreads=max_threads,
             name='DBLogCompression',
         )
+        # keep every compression thread busy while the previous chunks of a
+        # read are consumed
+        self._read_max_chunks_in_flight = max_threads * 2
+        self._append_buffers: dict[int, _LogAppendBuffer] = {}
+        self._dictionary_compressors: dict[int, ZStdDictCompressor] = {}
+        self._builder_dictionaries: dict[int, _BuilderDictionaryState] = {}
+        # builder and dictionary of the logs being written with 'zstd-dict' compression
+        self._log_builderids: dict[int, int] = {}
+        self._log_dictionary_ids: dict[int, int] = {}
 
     @defer.inlineCallbacks
     def startService(self):
@@ -158,6 +296,7 @@ class LogsConnectorComponent(base.DBConnectorComponent):
 
     @defer.inlineCallbacks
     def stopService(self):
+        yield self.flush_logs()
         yield super().stopService()
         self._compression_pool.stop()
 
@@ -171,7 +310,15 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             self.master.reactor, self._compression_pool, callable, *args, **kwargs
         )
 
-    def _get_compressor(self, compressor_id: int) -> type[CompressorInterface]:
+    def _get_compressor(
+        self,
+        compressor_id: int,
+        content: bytes | None = None,
+    ) -> type[CompressorInterface] | ZStdDictCompressor:
+        """
+        content is needed to find the dictionary of 'zstd-dict' compressed chunks,
+        which must have been loaded with _load_dictionaries
+        """
         compressor = self.COMPRESSION_BYID.get(compressor_id)
         if compressor is None:
             msg = f"Unknown compression method ID {compressor_id}"
@@ -182,8 +329,107 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 "You might be missing a dependency."
             )
             raise LogCompressionFormatUnavailableError(msg)
+        if compressor_id == self.ZSTD_DICT_COMPRESSION_ID:
+            assert content is not None
+            dictionary_id = ZStdDictCompressor.get_dictionary_id(content)
+            dictionary_compressor = self._dictionary_compressors.get(dictionary_id)
+            if dictionary_compressor is None:
+                msg = f"Log compression dictionary {dictionary_id} does not exist"
+                raise LogCompressionFormatUnavailableError(msg)
+            return dictionary_compressor
         return compressor
 
+    async def _load_dictionaries(self, chunks: list[tuple[int, bytes]]) -> None:
+        """Load the dictionaries needed to read the given (compressed, content) chunks"""
+        if not ZStdDictCompressor.available:
+            return
+        await self._load_dictionary_ids({
+            ZStdDictCompressor.get_dictionary_id(content)
+            for compressed, content in chunks
+            if compressed == self.ZSTD_DICT_COMPRESSION_ID
+        })
+
+    async def _load_dictionary_ids(self, dictionary_ids: set[int]) -> None:
+        dictionary_ids = dictionary_ids - self._dictionary_compressors.keys()
+        if not dictionary_ids:
+            return
+
+        def thd(conn: SAConnection) -> list[tuple[int, bytes]]:
+            tbl = self.db.model.log_compression_dictionaries
+            q = sa.select(tbl.c.id, tbl.c.content).where(tbl.c.id.in_(dictionary_ids))
+            return [(row.id, row.content) for row in conn.execute(q)]
+
+        for dictionary_id, content in await self.db.pool.do(thd):
+            if dictionary_id not in self._dictionary_compressors:
+                self._dictionary_compressors[dictionary_id] = ZStdDictCompressor(
+                    dictionary_id, content
+                )
+
+    async def _get_log_builderid(self, logid: int) -> int | None:
+        builderid = self._log_builderids.get(logid)
+        if builderid is not None:
+            return builderid
+
+        def thd(conn: SAConnection) -> int | None:
+            model = self.db.model
+            q = (
+                sa.select(model.builds.c.builderid)
+                .select_from(
+                    model.logs.join(model.steps, model.logs.c.stepid == model.steps.c.id).join(
+                        model.builds, model.steps.c.buildid == model.builds.c.id
+                    )
+                )
+                .where(model.logs.c.id == logid)
+            )
+            res = conn.execute(q)
+            row = res.fetchone()
+            res.close()
+            return row.builderid if row else None
+
+        builderid = await self.db.pool.do(thd)
+        if builderid is not None:
+            self._log_builderids[logid] = builderid
+        return builderid
+
+    async def _get_builder_dictionary_state(
+        self, builderid: int, refresh: bool = False
+    ) -> _BuilderDictionaryState:
+        """
+        Other masters may train a newer dictionary for the builder at any time: refresh loads
+        the latest dictionary of the builder from the database again.
+        """
+        state = self._builder_dictionaries.get(builderid)
+        if state is not None and not refresh:
+            return state
+
+        def thd(conn: SAConnection) -> tuple[int, int] | None:
+            tbl = self.db.model.log_compression_dictionaries
+            q = (
+                sa.select(tbl.c.id, tbl.c.created_at)
+                .where(tbl.c.builderid == builderid)
+                .order_by(tbl.c.id.desc())
+                .limit(1)
+            )
+            res = conn.execute(q)
+            row = res.fetchone()
+            res.close()
+            return (row.id, row.created_at) if row else None
+
+        row = await self.db.pool.do(thd)
+        # another call may have created the state in the meantime
+        state = self._builder_dictionaries.setdefault(
+            builderid,
+            _BuilderDictionaryState(
+                dictionary_id=None, next_training_at=self.master.reactor.seconds()
+            ),
+        )
+        if row is not None:
+            dictionary_id, created_at = row
+            if state.dictionary_id is None or dictionary_id > state.dictionary_id:
+                state.dictionary_id = dictionary_id
+                state.next_training_at = created_at + self.DICTIONARY_RETRAIN_INTERVAL
+        return state
+
     def _getLog(self, whereclause) -> defer.Deferred[LogModel | None]:
         def thd_getLog(conn) -> LogModel | None:
             q = self.db.model.logs.select()
@@ -198,7 +444,9 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             res.close()
             return rv
 
-        return self.db.pool.do(thd_getLog)
+        d = self.db.pool.do(thd_getLog)
+        d.addCallback(self._add_buffered_lines)
+        return d
 
     def getLog(self, logid: int) -> defer.Deferred[LogModel | None]:
         return self._getLog(self.db.model.logs.c.id == logid)
@@ -217,7 +465,78 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             res = conn.execute(q).mappings()
             return [self._model_from_row(row) for row in res.fetchall()]
 
-        return self.db.pool.do(thdGetLogs)
+        d = self.db.pool.do(thdGetLogs)
+        d.addCallback(lambda models: [self._add_buffered_lines(model) for model in models])
+        return d
+
+    def getLogsForSteps(self, stepids: Iterable[int]) -> defer.Deferred[dict[int, list[LogModel]]]:
+        """
+        Returns the logs of several steps at once, as a dictionary mapping each step id to the
+        logs of that step, ordered by id.
+        """
+
+        def thd(conn) -> dict[int, list[LogModel]]:
+            tbl = self.db.model.logs
+            result: dict[int, list[LogModel]] = {stepid: [] for stepid in stepids}
+            # batch the step ids to stay within the maximum number of variables of a query
+            for batch in self.doBatch(result, 100):
+                q = tbl.select().where(tbl.c.stepid.in_(batch)).order_by(tbl.c.id)
+                for row in conn.execute(q).fetchall():
+                    result[row.stepid].append(self._model_from_row(row))
+            return result
+
+        def add_buffered_lines(result: dict[int, list[LogModel]]) -> dict[int, list[LogModel]]:
+            for models in result.values():
+                for model in models:
+                    self._add_buffered_lines(model)
+            return result
+
+        d = self.db.pool.do(thd)
+        d.addCallback(add_buffered_lines)
+        return d
+
+    def get_logids_for_compression(
+        self, after_logid: int = 0, limit: int | None = None, logids: list[int] | None = None
+    ) -> defer.Deferred[tuple[list[int], list[int], int]]:
+        """
+        Returns the ids of the logs that still have their chunks after after_logid (and among
+        logids, if given), in ascending order: the ids of the finished logs, the ids of the
+        logs that are not finished yet, and the highest log id. limit applies to both lists
+        together.
+        """
+
+        def thd(conn: SAConnection) -> tuple[list[int], list[int], int]:
+            tbl = self.db.model.logs
+            q = (
+                sa.select(tbl.c.id, tbl.c.complete)
+                .where(tbl.c.id > after_logid)
+                .where(tbl.c.type != 'd')
+                .order_by(tbl.c.id)
+            )
+            if logids is not None:
+                q = q.where(tbl.c.id.in_(logids))
+            if limit is not None:
+                q = q.limit(limit)
+            finished_logids = []
+            unfinished_logids = []
+            for row in conn.execute(q):
+                if row.complete:
+                    finished_logids.append(row.id)
+                else:
+                    unfinished_logids.append(row.id)
+
+            res = conn.execute(sa.select(sa.func.max(tbl.c.id)))
+            max_logid = res.scalar() or 0
+            res.close()
+            return finished_logids, unfinished_logids, max_logid
+
+        return self.db.pool.do_in_lane('bulk', thd)
+
+    def _add_buffered_lines(self, model: LogModel | None) -> LogModel | None:
+        # readers see the lines that are not yet written to the database
+        if model is not None and (buf := self._append_buffers.get(model.id)) is not None:
+            model.num_lines = max(model.num_lines, buf.first_line + buf.num_lines)
+        return model
 
     async def iter_log_lines(
         self,
@@ -225,6 +544,44 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         first_line: int = 0,
         last_line: int | None = None,
     ) -> AsyncGenerator[str, None]:
+        buf = self._append_buffers.get(logid)
+        if buf is None:
+            async for line in self._iter_db_log_lines(logid, first_line, last_line):
+                yield line
+            return
+
+        # the buffer may be flushed while we read, moving its first lines to
+        # the database, so check where the next line is each time
+        line_idx = first_line
+        while last_line is None or line_idx <= last_line:
+            if line_idx < buf.first_line:
+                db_last_line = buf.first_line - 1
+                if last_line is not None:
+                    db_last_line = min(db_last_line, last_line)
+                async for line in self._iter_db_log_lines(logid, line_idx, db_last_line):
+                    yield line
+                line_idx = db_last_line + 1
+                continue
+
+            lines = buf.get_lines(line_idx, last_line)
+            if not lines:
+                break
+            for line in lines:
+                yield line
+            line_idx += len(lines)
+
+    async def _iter_db_chunks(
+        self,
+        logid: int,
+        first_line: int,
+        last_line: int | None,
+        thd_process_chunk: Callable[[int, int, bytes], _T],
+    ) -> AsyncGenerator[_T, None]:
+        """
+        Yields thd_process_chunk(chunk_first_line, compressed, content) for each chunk of the
+        log between first_line and last_line, in chunk order
+        """
+
         def _thd_get_chunks(
             conn: SAConnection,
             first_line: int,
@@ -250,18 +607,54 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         async def _iter_chunks_batched():
             CHUNK_BATCH_SIZE = 100
             batch_first_line = first_line
-            while chunks := await self.db.pool.do(
+            while chunks := await self.db.pool.do_in_lane(
+                'bulk',
                 _thd_get_chunks,
                 batch_first_line,
                 last_line,
                 CHUNK_BATCH_SIZE,
             ):
+                await self._load_dictionaries([
+                    (compressed, content) for _, _, compressed, content in chunks
+                ])
                 for chunk in chunks:
                     yield chunk
 
                 _, chunk_last_line, _, _ = chunks[-1]
                 batch_first_line = max(batch_first_line, chunk_last_line) + 1
 
+        # chunks are processed concurrently on the compression pool, and their
+        # results yielded in chunk order. At most `_read_max_chunks_in_flight`
+        # chunks are being processed or waiting to be consumed at any time,
+        # which bounds the memory used by a single read
+        pending: deque[defer.Deferred[_T]] = deque()
+        try:
+            async for chunk_first_line, _, compressed, content in _iter_chunks_batched():
+                pending.append(
+                    self._defer_to_compression_pool(
+                        thd_process_chunk, chunk_first_line, compressed, content
+                    )
+                )
+                # do not hold back results that are already available
+                while pending and (
+                    len(pending) >= self._read_max_chunks_in_flight or pending[0].called
+                ):
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # reader stopped early or a chunk failed to be processed: the results
+            # of the remaining chunks are not needed
+            for d in pending:
+                d.addErrback(lambda _: None)
+
+    async def _iter_db_log_lines(
+        self,
+        logid: int,
+        first_line: int = 0,
+        last_line: int | None = None,
+    ) -> AsyncGenerator[str, None]:
         def _iter_uncompress_lines(
             chunk_first_line: int,
             compressed: int,
@@ -269,7 +662,7 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         ) -> Generator[str, None, None]:
             # Retrieve associated "reader" and extract the data
             # Note that row.content is stored as bytes, and our caller expects unicode
-            data = self._get_compressor(compressed).read(content)
+            data = self._get_compressor(compressed, content).read(content)
             # NOTE: we need a streaming decompression interface
             with io.BytesIO(data) as data_buffer, io.TextIOWrapper(
                 data_buffer,
@@ -291,21 +684,83 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                     yield line
                     line_idx += 1
 
-        async for chunk_first_line, _, compressed, content in _iter_chunks_batched():
-            async for line in _async_iter_on_pool(
-                partial(
-                    _iter_uncompress_lines,
-                    chunk_first_line=chunk_first_line,
-                    compressed=compressed,
-                    content=content,
-                ),
-                reactor=self.master.reactor,
-                provider_threadpool=self._compression_pool,
-                # disable limit as we process one chunk at a time
-                max_backlog=0,
-            ):
+        def _thd_uncompress_lines(
+            chunk_first_line: int,
+            compressed: int,
+            content: bytes,
+        ) -> list[str]:
+            return list(_iter_uncompress_lines(chunk_first_line, compressed, content))
+
+        async for lines in self._iter_db_chunks(
+            logid, first_line, last_line, _thd_uncompress_lines
+        ):
+            for line in lines:
                 yield line
 
+    async def iter_log_matches(
+        self,
+        logid: int,
+        pattern: str,
+        context: int = 0,
+    ) -> AsyncGenerator[LogLineMatch, None]:
+        """
+        Yields the lines of the log which contain pattern, with up to context lines before and
+        after them.
+        """
+        pattern_bytes = pattern.encode('utf-8')
+
+        def _thd_search_chunk(
+            chunk_first_line: int,
+            compressed: int,
+            content: bytes,
+        ) -> _LinesSearchResult:
+            data = self._get_compressor(compressed, content).read(content)
+            return _search_lines(data, chunk_first_line, pattern_bytes, context)
+
+        # the last lines before the lines being searched, for the context of the
+        # first matches
+        previous_lines: deque[str] = deque(maxlen=context)
+        # the matches which are missing some of the lines after them
+        waiting: deque[LogLineMatch] = deque()
+
+        def add_result(result: _LinesSearchResult) -> None:
+            for match in waiting:
+                match.after.extend(result.head[: context - len(match.after)])
+            for match in result.matches:
+                if missing := context - len(match.before):
+                    match.before[:0] = list(previous_lines)[max(0, len(previous_lines) - missing) :]
+                waiting.append(match)
+            previous_lines.extend(result.tail)
+
+        async def search_db_lines(first_line: int, last_line: int | None):
+            async for result in self._iter_db_chunks(
+                logid, first_line, last_line, _thd_search_chunk
+            ):
+                add_result(result)
+                while waiting and len(waiting[0].after) == context:
+                    yield waiting.popleft()
+
+        buf = self._append_buffers.get(logid)
+        if buf is None:
+            async for match in search_db_lines(0, None):
+                yield match
+        else:
+            # see iter_log_lines
+            line_idx = 0
+            while line_idx < buf.first_line:
+                db_last_line = buf.first_line - 1
+                async for match in search_db_lines(line_idx, db_last_line):
+                    yield match
+                line_idx = db_last_line + 1
+
+            if lines := buf.get_lines(line_idx, None):
+                data = ''.join(lines)[:-1].encode('utf-8')
+                add_result(_search_lines(data, line_idx, pattern_bytes, context))
+
+        # the end of the log is reached
+        while waiting:
+            yield waiting.popleft()
+
     @async_to_deferred
     async def getLogLines(self, logid: int, first_line: int, last_line: int) -> str:
         lines: list[str] = []
@@ -348,15 +803,143 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         compress_method: str = self.master.config.logCompressionMethod
         return self.COMPRESSION_MODE.get(compress_method, (self.NO_COMPRESSION_ID, RawCompressor))
 
+    async def _get_log_compressor(
+        self, logid: int
+    ) -> tuple[int, type[CompressorInterface] | ZStdDictCompressor]:
+        compressor_id, compressor = self._get_configured_compressor()
+        if compressor_id != self.ZSTD_DICT_COMPRESSION_ID:
+            return compressor_id, compressor
+
+        def thd_get_log_dictionary_id(conn: SAConnection) -> int | None:
+            tbl = self.db.model.logs
+            res = conn.execute(sa.select(tbl.c.dictionary_id).where(tbl.c.id == logid))
+            row = res.fetchone()
+            res.close()
+            return row.dictionary_id if row else None
+
+        def thd_set_log_dictionary_id(conn: SAConnection, dictionary_id: int) -> None:
+            tbl = self.db.model.logs
+            conn.execute(
+                tbl.update().where(tbl.c.id == logid).values(dictionary_id=dictionary_id)
+            ).close()
+            conn.commit()
+
+        dictionary_id = self._log_dictionary_ids.get(logid)
+        if dictionary_id is None:
+            # a log keeps the dictionary that it was first written with
+            dictionary_id = await self.db.pool.do(thd_get_log_dictionary_id)
+        if dictionary_id is None:
+            builderid = await self._get_log_builderid(logid)
+            if builderid is not None:
+                # a log is written with the latest dictionary of its builder when it starts,
+                # which is recorded before any chunk uses it so that it is not deleted
+                state = await self._get_builder_dictionary_state(builderid, refresh=True)
+                dictionary_id = state.dictionary_id
+                if dictionary_id is not None:
+                    await self.db.pool.do(thd_set_log_dictionary_id, dictionary_id)
+        if dictionary_id is not None:
+            await self._load_dictionary_ids({dictionary_id})
+            compressor = self._dictionary_compressors.get(dictionary_id)
+            if compressor is not None:
+                self._log_dictionary_ids[logid] = dictionary_id
+                return compressor_id, compressor
+
+        # until a dictionary is trained for the builder
+        return self.COMPRESSION_MODE[ZStdCompressor.name]
+
+    def _thd_compress_chunk(
+        self,
+        compress_obj: CompressObjInterface,
+        compressor_id: int,
+        lines: list[bytes],
+    ) -> tuple[bytes, int, int]:
+        # check for trailing newline and strip it for storage
+        # chunks omit the trailing newline
+        assert lines and lines[-1][-1:] == b'\n'
+        lines[-1] = lines[-1][:-1]
+
+        compressed_bytes: list[bytes] = []
+        uncompressed_size = 0
+        for line in lines:
+            uncompressed_size += len(line)
+            compressed_bytes.append(compress_obj.compress(line))
+        compressed_bytes.append(compress_obj.flush())
+        compressed_chunk = b''.join(compressed_bytes)
+
+        # Is it useful to compress the chunk?
+        if uncompressed_size <= len(compressed_chunk):
+            return b''.join(lines), self.NO_COMPRESSION_ID, len(lines)
+
+        return compressed_chunk, compressor_id, len(lines)
+
+    def _thd_iter_chunk_compress(
+        self,
+        logid: int,
+        content: str,
+        compressor_id: int,
+        compressor: type[CompressorInterface] | ZStdDictCompressor,
+    ) -> Generator[tuple[bytes, int, int], None]:
+        """
+        Split content into chunk delimited by line-endings.
+        Try our best to keep chunks smaller than MAX_CHUNK_SIZE
+        """
+
+        def _truncate_line(line: bytes) -> bytes:
+            log.msg(f'truncating long line for log {logid}')
+            line = line[: self.MAX_CHUNK_SIZE - 1]
+            while line:
+                try:
+                    line.decode('utf-8')
+                    break
+                except UnicodeDecodeError:
+                    line = line[:-1]
+            return line + b'\n'
+
+        compress_obj = compressor.CompressObj()
+
+        with io.StringIO(content) as buffer:
+            lines: list[bytes] = []
+            lines_size = 0
+            while line := buffer.readline():
+                line_bytes = line.encode('utf-8')
+                line_size = len(line_bytes)
+                # would this go over limit?
+                if lines and lines_size + line_size > self.MAX_CHUNK_SIZE:
+                    # flush lines
+                    yield self._thd_compress_chunk(compress_obj, compressor_id, lines)
+                    del lines[:]
+                    lines_size = 0
+
+                if line_size > self.MAX_CHUNK_SIZE:
+                    compressed = self._thd_compress_chunk(compress_obj, compressor_id, [line_bytes])
+                    compressed_chunk, _, _ = compressed
+                    # check if compressed size is compliant with DB row limit
+                    if len(compressed_chunk) > self.MAX_CHUNK_SIZE:
+                        compressed = self._thd_compress_chunk(
+                            compress_obj, compressor_id, [_truncate_line(line_bytes)]
+                        )
+                    yield compressed
+                else:
+                    lines.append(line_bytes)
+
+            if lines:
+                yield self._thd_compress_chunk(compress_obj, compressor_id, lines)
+
+    def _thd_get_numlines(self, conn: SAConnection, logid: int) -> int | None:
+        q = sa.select(self.db.model.logs.c.num_lines)
+        q = q.where(self.db.model.logs.c.id == logid)
+        res = conn.execute(q)
+        num_lines = res.fetchone()
+        res.close()
+        return num_lines[0] if num_lines else None
+
     @async_to_deferred
     async def appendLog(self, logid: int, content: str) -> tuple[int, int] | None:
-        def _thd_get_numlines(conn: SAConnection) -> int | None:
-            q = sa.select(self.db.model.logs.c.num_lines)
-            q = q.where(self.db.model.logs.c.id == logid)
-            res = conn.execute(q)
-            num_lines = res.fetchone()
-            res.close()
-            return num_lines[0] if num_lines else None
+        if logid in self._append_buffers:
+            # keep the order of the lines that are still buffered
+            res = await self.append_log_buffered(logid, content)
+            await self.flush_logs([logid])
+            return res
 
         def _thd_insert_chunk(
             conn: SAConnection,
@@ -387,97 +970,28 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             conn.commit()
             res.close()
 
-        def _thd_compress_chunk(
-            compress_obj: CompressObjInterface,
-            compressor_id: int,
-            lines: list[bytes],
-        ) -> tuple[bytes, int, int]:
-            # check for trailing newline and strip it for storage
-            # chunks omit the trailing newline
-            assert lines and lines[-1][-1:] == b'\n'
-            lines[-1] = lines[-1][:-1]
-
-            compressed_bytes: list[bytes] = []
-            uncompressed_size = 0
-            for line in lines:
-                uncompressed_size += len(line)
-                compressed_bytes.append(compress_obj.compress(line))
-            compressed_bytes.append(compress_obj.flush())
-            compressed_chunk = b''.join(compressed_bytes)
-
-            # Is it useful to compress the chunk?
-            if uncompressed_size <= len(compressed_chunk):
-                return b''.join(lines), self.NO_COMPRESSION_ID, len(lines)
-
-            return compressed_chunk, compressor_id, len(lines)
-
-        def _thd_iter_chunk_compress(
-            content: str,
-        ) -> Generator[tuple[bytes, int, int], None]:
-            """
-            Split content into chunk delimited by line-endings.
-            Try our best to keep chunks smaller than MAX_CHUNK_SIZE
-            """
-
-            def _truncate_line(line: bytes) -> bytes:
-                log.msg(f'truncating long line for log {logid}')
-                line = line[: self.MAX_CHUNK_SIZE - 1]
-                while line:
-                    try:
-                        line.decode('utf-8')
-                        break
-                    except UnicodeDecodeError:
-                        line = line[:-1]
-                return line + b'\n'
-
-            compressor_id, compressor = self._get_configured_compressor()
-            compress_obj = compressor.CompressObj()
-
-            with io.StringIO(content) as buffer:
-                lines: list[bytes] = []
-                lines_size = 0
-                while line := buffer.readline():
-                    line_bytes = line.encode('utf-8')
-                    line_size = len(line_bytes)
-                    # would this go over limit?
-                    if lines and lines_size + line_size > self.MAX_CHUNK_SIZE:
-                        # flush lines
-                        yield _thd_compress_chunk(compress_obj, compressor_id, lines)
-                        del lines[:]
-                        lines_size = 0
-
-                    if line_size > self.MAX_CHUNK_SIZE:
-                        compressed = _thd_compress_chunk(compress_obj, compressor_id, [line_bytes])
-                        compressed_chunk, _, _ = compressed
-                        # check if compressed size is compliant with DB row limit
-                        if len(compressed_chunk) > self.MAX_CHUNK_SIZE:
-                            compressed = _thd_compress_chunk(
-                                compress_obj, compressor_id, [_truncate_line(line_bytes)]
-                            )
-                        yield compressed
-                    else:
-                        lines.append(line_bytes)
-
-                if lines:
-                    yield _thd_compress_chunk(compress_obj, compressor_id, lines)
-
         assert content[-1] == '\n'
 
-        num_lines = await self.db.pool.do(_thd_get_numlines)
+        num_lines = await self.db.pool.do(self._thd_get_numlines, logid)
         if num_lines is None:
             # ignore a missing log
             return None
 
+        compressor_id, compressor = await self._get_log_compressor(logid)
+
         # Break the content up into chunks
         chunk_first_line = last_line = num_lines
         async for (
             compressed_chunk,
             compressed_id,
             chunk_lines_count,
-        ) in _async_iter_on_pool(
+        ) in async_iter_on_pool(
             partial(
-                _thd_iter_chunk_compress,
+                self._thd_iter_chunk_compress,
+                logid=logid,
                 content=content,
+                compressor_id=compressor_id,
+                compressor=compressor,
             ),
             reactor=self.master.reactor,
             provider_threadpool=self._compression_pool,
@@ -504,18 +1018,202 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         await self.db.pool.do(_thd_update_num_lines, last_line + 1)
         return num_lines, last_line
 
-    def finishLog(self, logid: int) -> defer.Deferred[None]:
+    @async_to_deferred
+    async def append_log_buffered(self, logid: int, content: str) -> tuple[int, int] | None:
+        assert content[-1] == '\n'
+
+        buf = self._append_buffers.get(logid)
+        if buf is None:
+            num_lines = await self.db.pool.do(self._thd_get_numlines, logid)
+            if num_lines is None:
+                # ignore a missing log
+                return None
+            # another append may have created the buffer in the meantime
+            buf = self._append_buffers.setdefault(logid, _LogAppendBuffer(num_lines))
+
+        first_line, last_line = buf.append(content)
+
+        if buf.size >= self.APPEND_BUFFER_MAX_SIZE or buf.num_lines >= self.APPEND_BUFFER_MAX_LINES:
+            await self._flush_append_buffer(logid, buf)
+        elif buf.flush_timer is None:
+            buf.flush_timer = self.master.reactor.callLater(
+                self.APPEND_BUFFER_FLUSH_INTERVAL, self._on_flush_timer, logid, buf
+            )
+        return first_line, last_line
+
+    def _on_flush_timer(self, logid: int, buf: _LogAppendBuffer) -> None:
+        buf.flush_timer = None
+        d = self._flush_append_buffer(logid, buf)
+        d.addErrback(log.err, f"while writing appends to log {logid}")
+        self.db.run_db_task(d)
+
+    @async_to_deferred
+    async def _flush_append_buffer(self, logid: int, buf: _LogAppendBuffer) -> None:
+        def _thd_write_chunks(
+            conn: SAConnection,
+            first_line: int,
+            chunks: list[tuple[bytes, int, int]],
+        ) -> None:
+            rows = []
+            for content, compressed_id, chunk_lines_count in chunks:
+                rows.append({
+                    "logid": logid,
+                    "first_line": first_line,
+                    "last_line": first_line + chunk_lines_count - 1,
+                    "content": content,
+                    "compressed": compressed_id,
+                })
+                first_line += chunk_lines_count
+
+            with conn.begin():
+                conn.execute(self.db.model.logchunks.insert(), rows).close()
+                conn.execute(
+                    self.db.model.logs.update()
+                    .where(self.db.model.logs.c.id == logid)
+                    .values(num_lines=first_line)
+                ).close()
+
+        async with buf.lock:
+            if buf.flush_timer is not None:
+                buf.flush_timer.cancel()
+                buf.flush_timer = None
+            if not buf.contents:
+                return
+
+            # appends made while the chunks are written stay in the buffer
+            count = len(buf.contents)
+            content = ''.join(c for c, _ in buf.contents)
+            compressor_id, compressor = await self._get_log_compressor(logid)
+            chunks = await self._defer_to_compression_pool(
+                lambda: list(
+                    self._thd_iter_chunk_compress(logid, content, compressor_id, compressor)
+                )
+            )
+            await self.db.pool.do(_thd_write_chunks, buf.first_line, chunks)
+            buf.consume(count)
+
+            if buf.contents and buf.flush_timer is None:
+                buf.flush_timer = self.master.reactor.callLater(
+                    self.APPEND_BUFFER_FLUSH_INTERVAL, self._on_flush_timer, logid, buf
+                )
+
+    @async_to_deferred
+    async def flush_logs(self, logids: list[int] | None = None) -> None:
+        """Write the buffered appends of the given logs, or of all logs, to the database"""
+        if logids is None:
+            logids = list(self._append_buffers)
+        for logid in logids:
+            buf = self._append_buffers.get(logid)
+            if buf is not None:
+                await self._flush_append_buffer(logid, buf)
+
+    @async_to_deferred
+    async def finishLog(self, logid: int) -> None:
         def thdfinishLog(conn) -> None:
             tbl = self.db.model.logs
             q = tbl.update().where(tbl.c.id == logid)
             conn.execute(q.values(complete=1))
 
-        return self.db.pool.do_with_transaction(thdfinishLog)
+        buf = self._append_buffers.get(logid)
+        if buf is not None:
+            await self._flush_append_buffer(logid, buf)
+            # no more appends are expected once a log is finished
+            if not buf.contents:
+                del self._append_buffers[logid]
+
+        await self.db.pool.do_with_transaction(thdfinishLog)
+
+        if self._get_configured_compressor()[0] == self.ZSTD_DICT_COMPRESSION_ID:
+            await self._maybe_train_dictionary(logid)
+        self._log_builderids.pop(logid, None)
+        self._log_dictionary_ids.pop(logid, None)
+
+    async def _maybe_train_dictionary(self, logid: int) -> None:
+        builderid = await self._get_log_builderid(logid)
+        if builderid is None:
+            return
+        state = await self._get_builder_dictionary_state(builderid)
+        if state.training or self.master.reactor.seconds() < state.next_training_at:
+            return
+
+        state.training = True
+
+        @async_to_deferred
+        async def train() -> None:
+            try:
+                await self.train_log_dictionary(builderid)
+            except Exception as e:
+                log.err(e, f"while training log compression dictionary of builder {builderid}")
+            finally:
+                state.training = False
+
+        # train in the background, finishing the log does not need to wait for it
+        self.db.run_db_task(train())
 
     @async_to_deferred
-    async def compressLog(self, logid: int, force: bool = False) -> int:
+    async def train_log_dictionary(self, builderid: int) -> int | None:
+        """
+        Train a new 'zstd-dict' compression dictionary for the builder, from the chunks of
+        its most recent logs.
+
+        Returns the id of the new dictionary, or None if there is not enough log content yet.
+        """
+
+        def _thd_get_sample_chunks(conn: SAConnection) -> list[tuple[int, bytes]]:
+            model = self.db.model
+            q = (
+                sa.select(model.logchunks.c.compressed, model.logchunks.c.content)
+                .select_from(
+                    model.logchunks.join(model.logs, model.logchunks.c.logid == model.logs.c.id)
+                    .join(model.steps, model.logs.c.stepid == model.steps.c.id)
+                    .join(model.builds, model.steps.c.buildid == model.builds.c.id)
+                )
+                .where(model.builds.c.builderid == builderid)
+                .where(model.logs.c.complete == 1)
+                .where(model.logs.c.type != 'd')
+                .order_by(model.logchunks.c.logid.desc(), model.logchunks.c.first_line)
+                .limit(self.DICTIONARY_SAMPLE_CHUNKS)
+            )
+            return [(row.compressed, row.content) for row in conn.execute(q)]
+
+        def _thd_train(chunks: list[tuple[int, bytes]]) -> bytes | None:
+            samples = [
+                self._get_compressor(compressed, content).read(content)
+                for compressed, content in chunks
+            ]
+            return ZStdDictCompressor.train(samples, self.DICTIONARY_SIZE)
+
+        def _thd_insert_dictionary(conn: SAConnection, content: bytes, created_at: int) -> int:
+            r = conn.execute(
+                self.db.model.log_compression_dictionaries.insert(),
+                {"builderid": builderid, "created_at": created_at, "content": content},
+            )
+            conn.commit()
+            return r.inserted_primary_key[0]
+
+        now = self.master.reactor.seconds()
+        state = await self._get_builder_dictionary_state(builderid)
+
+        chunks = await self.db.pool.do_in_lane('bulk', _thd_get_sample_chunks)
+        await self._load_dictionaries(chunks)
+        content = await self._defer_to_compression_pool(_thd_train, chunks)
+        if content is None:
+            state.next_training_at = now + self.DICTIONARY_TRAINING_RETRY_INTERVAL
+            return None
+
+        dictionary_id = await self.db.pool.do(_thd_insert_dictionary, content, int(now))
+        self._dictionary_compressors[dictionary_id] = ZStdDictCompressor(dictionary_id, content)
+        state.dictionary_id = dictionary_id
+        state.next_training_at = now + self.DICTIONARY_RETRAIN_INTERVAL
+        return dictionary_id
+
+    @async_to_deferred
+    async def compressLog(self, logid: int, force: bool = False, recompress: bool = False) -> int:
         """
         returns the size (in bytes) saved.
+
+        If recompress is True, chunks that are not compressed with the configured
+        method are recompressed too, even if they cannot be grouped.
         """
         tbl = self.db.model.logchunks
 
@@ -529,6 +1227,7 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                     tbl.c.first_line,
                     tbl.c.last_line,
                     sa.func.length(tbl.c.content),
+                    tbl.c.compressed,
                 )
                 .where(tbl.c.logid == logid)
                 .order_by(tbl.c.first_line)
@@ -551,12 +1250,14 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             # see if we need to do some work
             # start at 1 since we already queries one above
             current_chunk_count = 1
+            needs_recompression = first_chunk.compressed != compressed_id
 
             current_group_new_size = first_chunk.length_1
             # first pass, we fetch the full list of chunks (without content) and find out
             # the chunk groups which could use some gathering.
             for row in rows:
                 current_chunk_count += 1
+                needs_recompression = needs_recompression or row.compressed != compressed_id
 
                 chunk_first_line: int = row.first_line
                 chunk_last_line: int = row.last_line
@@ -581,7 +1282,11 @@ class LogsConnectorComponent(base.DBConnectorComponent):
 
             rows.close()
 
-            if not force and current_chunk_count <= len(grouped_chunks):
+            if (
+                not force
+                and not (recompress and needs_recompression)
+                and current_chunk_count <= len(grouped_chunks)
+            ):
                 return []
 
             return grouped_chunks
@@ -638,11 +1343,12 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         def _thd_recompress_chunks(
             compressed_chunks: list[tuple[int, bytes]],
             compress_obj: CompressObjInterface,
-        ) -> tuple[bytes, int]:
+        ) -> tuple[bytes, int, int]:
             """This has to run in the compression thread pool"""
             # decompress this group of chunks. Note that the content is binary bytes.
             # no need to decode anything as we are going to put in back stored as bytes anyway
             chunks: list[bytes] = []
+            uncompressed_chunks: list[bytes] = []
             bytes_saved = 0
             for idx, (chunk_compress_id, chunk_content) in enumerate(compressed_chunks):
                 bytes_saved += len(chunk_content)
@@ -652,21 +1358,37 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 if idx != 0:
                     chunks.append(compress_obj.compress(b'\n'))
 
-                uncompressed_content = self._get_compressor(chunk_compress_id).read(chunk_content)
+                uncompressed_content = self._get_compressor(chunk_compress_id, chunk_content).read(
+                    chunk_content
+                )
+                uncompressed_chunks.append(uncompressed_content)
                 chunks.append(compress_obj.compress(uncompressed_content))
 
             chunks.append(compress_obj.flush())
             new_content = b''.join(chunks)
+            new_compressed_id = compressed_id
+
+            # Is it useful to compress the chunk?
+            uncompressed_size = (
+                sum(len(c) for c in uncompressed_chunks) + len(compressed_chunks) - 1
+            )
+            if uncompressed_size <= len(new_content):
+                new_content = b'\n'.join(uncompressed_chunks)
+                new_compressed_id = self.NO_COMPRESSION_ID
+
             bytes_saved -= len(new_content)
-            return new_content, bytes_saved
+            return new_content, new_compressed_id, bytes_saved
+
+        compressed_id, compressor = await self._get_log_compressor(logid)
 
         chunk_groups = await self.db.pool.do(_thd_gather_chunks_to_process)
         if not chunk_groups:
+            self._log_builderids.pop(logid, None)
+            self._log_dictionary_ids.pop(logid, None)
             return 0
 
         total_bytes_saved: int = 0
 
-        compressed_id, compressor = self._get_configured_compressor()
         compress_obj = compressor.CompressObj()
         for group_first_line, group_last_line in chunk_groups:
             compressed_chunks = await self.db.pool.do(
@@ -674,12 +1396,17 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 first_line=group_first_line,
                 last_line=group_last_line,
             )
+            await self._load_dictionaries(compressed_chunks)
 
-            new_content, bytes_saved = await self._defer_to_compression_pool(
+            new_content, new_compressed_id, bytes_saved = await self._defer_to_compression_pool(
                 _thd_recompress_chunks,
                 compressed_chunks=compressed_chunks,
                 compress_obj=compress_obj,
             )
+            if len(new_content) > self.MAX_CHUNK_SIZE and len(compressed_chunks) > 1:
+                # groups are made on the current size of the chunks, which may grow
+                # when recompressed with another method: keep them as they are
+                continue
 
             total_bytes_saved += bytes_saved
 
@@ -687,13 +1414,16 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 _thd_replace_chunks_by_new_grouped_chunk,
                 first_line=group_first_line,
                 last_line=group_last_line,
-                new_compressed_id=compressed_id,
+                new_compressed_id=new_compressed_id,
                 new_content=new_content,
             )
 
+        self._log_builderids.pop(logid, None)
+        self._log_dictionary_ids.pop(logid, None)
         return total_bytes_saved
 
-    def deleteOldLogChunks(self, older_than_timestamp: int) -> defer.Deferred[int]:
+    @async_to_deferred
+    async def deleteOldLogChunks(self, older_than_timestamp: int) -> int:
         def thddeleteOldLogs(conn) -> int:
             model = self.db.model
             res = conn.execute(sa.select(sa.func.count(model.logchunks.c.logid)))
@@ -749,12 +1479,56 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             res = conn.execute(q)
             conn.commit()
             res.close()
+
+            # the deleted logs do not use their compression dictionary anymore
+            res = conn.execute(
+                model.logs.update()
+                .where(model.logs.c.type == 'd')
+                .where(model.logs.c.dictionary_id.is_not(None))
+                .values(dictionary_id=None)
+            )
+            conn.commit()
+            res.close()
+
             res = conn.execute(sa.select(sa.func.count(model.logchunks.c.logid)))
             count2 = res.fetchone()[0]
             res.close()
             return count1 - count2
 
-        return self.db.pool.do(thddeleteOldLogs)
+        def thd_delete_unused_dictionaries(conn, superseded_before: int) -> list[int]:
+            # a dictionary replaced by a newer one is not used for new logs anymore, and is
+            # deleted once no log records it
+            tbl = self.db.model.log_compression_dictionaries
+            logs_tbl = self.db.model.logs
+            newer = tbl.alias('newer')
+            unused = ~sa.exists().where(logs_tbl.c.dictionary_id == tbl.c.id)
+            q = (
+                sa.select(tbl.c.id)
+                .where(
+                    sa.exists()
+                    .where(newer.c.builderid == tbl.c.builderid)
+                    .where(newer.c.id > tbl.c.id)
+                    .where(newer.c.created_at < superseded_before)
+                )
+                .where(unused)
+            )
+            dictionary_ids = [row.id for row in conn.execute(q)]
+            if dictionary_ids:
+                # a log may have recorded one of them since, so check again when deleting
+                conn.execute(tbl.delete().where(tbl.c.id.in_(dictionary_ids)).where(unused)).close()
+                conn.commit()
+            return dictionary_ids
+
+        count = await self.db.pool.do(thddeleteOldLogs)
+        superseded_before = min(
+            older_than_timestamp,
+            int(self.master.reactor.seconds()) - self.DICTIONARY_DELETE_GRACE_PERIOD,
+        )
+        for dictionary_id in await self.db.pool.do_in_lane(
+            'bulk', thd_delete_unused_dictionaries, superseded_before
+        ):
+            self._dictionary_compressors.pop(dictionary_id, None)
+        return count
 
     def _model_from_row(self, row):
         return LogModel(
@@ -766,109 +1540,3 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             num_lines=row.num_lines,
             type=row.type,
         )
-
-
-async def _async_iter_on_pool(
-    generator_sync: Callable[[], Generator[_T, None, None]],
-    *,
-    reactor: IReactorThreads,
-    provider_threadpool: threadpool.ThreadPool | None = None,
-    max_backlog: int = 1,
-    wait_backlog_consuption: bool = True,
-) -> AsyncGenerator[_T, None]:
-    """
-    Utility to transform a sync `Generator` function into an `AsyncGenerator`
-    by executing it on a threadpool.
-
-    :param generator_sync:
-        sync Generator function (if arguments are necessary, use functools.partial)
-
-    :param reactor: Twisted reactor to use
-
-    :param provider_threadpool:
-        Threadpool to run the Generator on (default to reactor's ThreadPool)
-
-    :param max_backlog:
-        Maximum size of the buffer used to communicate between sync and async Generators.
-
-        A value of 0 or less means unlimited.
-
-        When the buffer contains `max_backlog` items,
-        the threaded sync Generator will wait until at least one element is consumed.
-
-        Note: this is forced to `0` if in unit tests and `provider_threadpool` is a `NonThreadPool`.
-
-    :param wait_backlog_consuption:
-        If `True`, will wait until all items in the buffer are consumed.
-
-        This is used to prevent a new threadpool task to run,
-        potentially creating a new buffer consuming memory
-        while the previous buffer is still in use.
-
-        Note: this is forced to `False` if in unit tests and `provider_threadpool` is a `NonThreadPool`.
-    """
-
-    if provider_threadpool is None:
-        provider_threadpool = reactor.getThreadPool()
-
-    # create a single element queue as to
-    # occupy a thread of the pool
-    # avoiding too many compressed chunks in memory awaiting DB insert
-    # use 0 (unlimited) in tests as there isn't really a threadpool / reactor running
-    if get_is_in_unit_tests():
-        from buildbot.test.fake.reactor import NonThreadPool
-
-        if isinstance(provider_threadpool, NonThreadPool):
-            max_backlog = 0
-            wait_backlog_consuption = False
-
-    queue: defer.DeferredQueue[_T | _CloseObj] = defer.DeferredQueue()
-
-    condition = threading.Condition()
-
-    # dummy object that resolve the callback of the task.
-    # Needed as we can't know what the callable will provide,
-    # so None, False, ... can't be used.
-    # But, we know that callback will return None, so we can
-    # override it's callback result
-    class _CloseObj:
-        pass
-
-    close_obj = _CloseObj()
-
-    def _can_put_in_queue():
-        return max_backlog <= 0 or len(queue.pending) < max_backlog
-
-    def _provider_wrapped() -> None:
-        try:
-            for item in generator_sync():
-                with condition:
-                    condition.wait_for(_can_put_in_queue)
-                reactor.callFromThread(queue.put, item)
-        finally:
-            if wait_backlog_consuption:
-                with condition:
-                    condition.wait_for(lambda: len(queue.pending) <= 0)
-
-    def _put_close(res: None | Failure) -> None | Failure:
-        queue.put(close_obj)
-        return res
-
-    worker_task = threads.deferToThreadPool(
-        reactor,
-        provider_threadpool,
-        _provider_wrapped,
-    ).addBoth(callback=_put_close)
-
-    while (item := await queue.get()) is not close_obj:
-        assert not isinstance(item, _CloseObj)
-        with condition:
-            condition.notify()
-        yield item
-
-    assert worker_task.called
-    # so that if task ended in exception, it's correctly propagated
-    # but only if error, as await a successfully resolved Deferred will
-    # never finish
-    if isinstance(worker_task.result, Failure):
-        await worker_task
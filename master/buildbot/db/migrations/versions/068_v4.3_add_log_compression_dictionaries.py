@@ -0,0 +1,66 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+"""add log_compression_dictionaries table and logs.dictionary_id
+
+Revision ID: 068
+Revises: 067
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "068"
+down_revision = "067"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'log_compression_dictionaries',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'builderid',
+            sa.Integer,
+            sa.ForeignKey('builders.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('created_at', sa.Integer, nullable=False),
+        sa.Column('content', sa.LargeBinary(65536), nullable=False),
+        mysql_DEFAULT_CHARSET='utf8',
+    )
+
+    op.create_index(
+        'log_compression_dictionaries_builderid',
+        'log_compression_dictionaries',
+        ['builderid'],
+    )
+
+    with op.batch_alter_table('logs') as batch_op:
+        batch_op.add_column(sa.Column('dictionary_id', sa.Integer, nullable=True))
+
+    op.create_index('logs_dictionary_id', 'logs', ['dictionary_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('logs_dictionary_id', table_name='logs')
+    op.drop_column('logs', 'dictionary_id')
+    op.drop_index(
+        'log_compression_dictionaries_builderid', table_name='log_compression_dictionaries'
+    )
+    op.drop_table('log_compression_dictionaries')
@@ -245,6 +245,8 @@ class Model(base.DBConnectorComponent):
         sa.Column('num_lines', sa.Integer, nullable=False),
         # 's' = stdio, 't' = text, 'h' = html, 'd' = deleted
         sa.Column('type', sa.String(1), nullable=False),
+        # the 'zstd-dict' compression dictionary that the chunks of the log are compressed with
+        sa.Column('dictionary_id', sa.Integer, nullable=True),
     )
 
     logchunks = sautils.Table(
@@ -263,6 +265,22 @@ class Model(base.DBConnectorComponent):
         sa.Column('compressed', sa.SmallInteger, nullable=False),
     )
 
+    # zstd dictionaries trained on the logs of a builder, used to compress its
+    # log chunks when logCompressionMethod is 'zstd-dict'
+    log_compression_dictionaries = sautils.Table(
+        'log_compression_dictionaries',
+        metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'builderid',
+            sa.Integer,
+            sa.ForeignKey('builders.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('created_at', sa.Integer, nullable=False),
+        sa.Column('content', sa.LargeBinary(65536), nullable=False),
+    )
+
     # Tables related to buildsets
     # ---------------------------
 
@@ -1113,6 +1131,8 @@ class Model(base.DBConnectorComponent):
     sa.Index('logs_slug', logs.c.stepid, logs.c.slug, unique=True)
     sa.Index('logchunks_firstline', logchunks.c.logid, logchunks.c.first_line)
     sa.Index('logchunks_lastline', logchunks.c.logid, logchunks.c.last_line)
+    sa.Index('log_compression_dictionaries_builderid', log_compression_dictionaries.c.builderid)
+    sa.Index('logs_dictionary_id', logs.c.dictionary_id)
     sa.Index(
         'test_names_name', test_names.c.builderid, test_names.c.name, mysql_length={'name': 255}
     )
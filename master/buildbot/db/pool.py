@@ -18,6 +18,8 @@ from __future__ import annotations
 import inspect
 import time
 import traceback
+from collections import deque
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import sqlalchemy as sa
@@ -105,10 +107,40 @@ def timed_do_fn(f):
     return wrap
 
 
+# Lanes in which database calls are queued, highest priority first.  Calls
+# that the scheduling of builds depends on (claiming and completing build
+# requests) go into the 'scheduling' lane, large reads (e.g. of log chunks) go
+# into the 'bulk' lane, and everything else into the 'default' lane.
+LANE_SCHEDULING = 'scheduling'
+LANE_DEFAULT = 'default'
+LANE_BULK = 'bulk'
+LANES = (LANE_SCHEDULING, LANE_DEFAULT, LANE_BULK)
+
+
+@dataclass
+class DBThreadPoolLaneStats:
+    lane: str
+    queued: int
+    running: int
+    calls: int
+    total_wait_time: float
+    max_wait_time: float
+
+
+class _Lane:
+    def __init__(self, name):
+        self.name = name
+        self.queue = deque()
+        self.running = 0
+        self.calls = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+
 class DBThreadPool:
     running = False
 
-    def __init__(self, engine, reactor, verbose=False):
+    def __init__(self, engine, reactor, verbose=False, max_threads=None):
         # verbose is used by upgrade scripts, and if it is set we should print
         # messages about versions and other warnings
         log_msg = log.msg
@@ -125,14 +157,40 @@ class DBThreadPool:
 
         # If the engine has an C{optimal_thread_pool_size} attribute, then the
         # maxthreads of the thread pool will be set to that value.  This is
-        # most useful for SQLite in-memory connections, where exactly one
-        # connection (and thus thread) should be used.
+        # the number of connections the engine may open at once
+        # (pool_size + max_overflow), or a single connection for SQLite.
         if hasattr(engine, 'optimal_thread_pool_size'):
             pool_size = engine.optimal_thread_pool_size
 
+        # a configured size can only lower that value: more threads than
+        # connections would only wait for a connection to become available
+        if max_threads is not None:
+            if max_threads < 1:
+                raise ValueError(f"max_threads must be at least 1, got {max_threads}")
+            if max_threads > pool_size:
+                log_msg(
+                    f"NOTE: limiting DB thread pool to {pool_size} threads, the "
+                    "number of connections the database engine may open"
+                )
+            pool_size = min(max_threads, pool_size)
+
+        # The thread pool starts with a single thread and grows toward
+        # pool_size as calls are queued.  Calls are queued here, by lane,
+        # rather than in the thread pool, and at most pool_size of them are
+        # handed to the thread pool at once, so that a newly queued call in a
+        # higher priority lane always runs before calls waiting in lower
+        # priority lanes.
+        self.max_threads = pool_size
         self._pool = util.twisted.ThreadPool(
             minthreads=1, maxthreads=pool_size, name='DBThreadPool'
         )
+        self._lanes = {name: _Lane(name) for name in LANES}
+        self._running_calls = 0
+        self._dispatching = False
+        self._idle_notifier = util.Notifier()
+        # bulk calls never occupy all threads, so that there is always one
+        # left for the other lanes when there is more than one thread
+        self._max_bulk_calls = max(1, pool_size - 1)
 
         self.engine = engine
         if engine.dialect.name == 'sqlite':
@@ -172,14 +230,33 @@ class DBThreadPool:
 
         raise ImportError("Could not import SQLAlchemy result type")
 
+    def get_lane_stats(self, lane: str) -> DBThreadPoolLaneStats:
+        """Return the queue depth, the number of running calls and the time
+        spent by calls waiting in the queue of the given lane"""
+        l = self._lanes[lane]
+        return DBThreadPoolLaneStats(
+            lane=lane,
+            queued=len(l.queue),
+            running=l.running,
+            calls=l.calls,
+            total_wait_time=l.total_wait_time,
+            max_wait_time=l.max_wait_time,
+        )
+
     def start(self):
         if not self.running:
             self._pool.start()
             self.running = True
 
+    def _is_idle(self):
+        return self._running_calls == 0 and not any(l.queue for l in self._lanes.values())
+
     @defer.inlineCallbacks
     def stop(self):
         if self.running:
+            # run the calls that are still queued, so that their deferreds fire
+            if not self._is_idle():
+                yield self._idle_notifier.wait()
             yield threads.deferToThreadPool(self.reactor, self._pool, self.engine.dispose)
             self._pool.stop()
             self.running = False
@@ -281,15 +358,19 @@ class DBThreadPool:
         *args: _P.args,
         **kwargs: _P.kwargs,
     ) -> defer.Deferred[_T]:
-        return threads.deferToThreadPool(
-            self.reactor,
-            self._pool,
-            self.__thd,  # type: ignore[arg-type]
-            False,
-            callable,
-            args,
-            kwargs,
-        )
+        return self._queue_call(LANE_DEFAULT, False, callable, args, kwargs)
+
+    def do_in_lane(
+        self,
+        lane: str,
+        callable: Callable[Concatenate[sa.engine.Connection, _P], _T],
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> defer.Deferred[_T]:
+        """Same as `do`, but queue the call in the given lane"""
+        if lane not in self._lanes:
+            raise ValueError(f"unknown DB thread pool lane {lane!r}")
+        return self._queue_call(lane, False, callable, args, kwargs)
 
     def do_with_engine(
         self,
@@ -297,12 +378,70 @@ class DBThreadPool:
         *args: _P.args,
         **kwargs: _P.kwargs,
     ) -> defer.Deferred[_T]:
-        return threads.deferToThreadPool(
+        return self._queue_call(LANE_DEFAULT, True, callable, args, kwargs)
+
+    def _queue_call(self, lane, with_engine, callable, args, kwargs):
+        d = defer.Deferred()
+        self._lanes[lane].queue.append((
+            d,
+            self.reactor.seconds(),
+            with_engine,
+            callable,
+            args,
+            kwargs,
+        ))
+        self._dispatch()
+        return d
+
+    def _next_lane(self):
+        for lane in self._lanes.values():
+            if not lane.queue:
+                continue
+            if lane.name == LANE_BULK and lane.running >= self._max_bulk_calls:
+                continue
+            return lane
+        return None
+
+    def _dispatch(self):
+        # calls may complete synchronously (e.g. in tests), and completing a
+        # call dispatches the next ones, so guard against re-entering the loop
+        if self._dispatching:
+            return
+        self._dispatching = True
+        try:
+            while self._running_calls < self.max_threads:
+                lane = self._next_lane()
+                if lane is None:
+                    break
+                self._run_call(lane, *lane.queue.popleft())
+        finally:
+            self._dispatching = False
+
+    def _run_call(self, lane, d, queued_at, with_engine, callable, args, kwargs):
+        wait_time = self.reactor.seconds() - queued_at
+        lane.calls += 1
+        lane.total_wait_time += wait_time
+        lane.max_wait_time = max(lane.max_wait_time, wait_time)
+
+        lane.running += 1
+        self._running_calls += 1
+
+        def call_done(res):
+            lane.running -= 1
+            self._running_calls -= 1
+            self._dispatch()
+            if self._is_idle():
+                self._idle_notifier.notify(None)
+            return res
+
+        run_d = threads.deferToThreadPool(
             self.reactor,
             self._pool,
             self.__thd,  # type: ignore[arg-type]
-            True,
+            with_engine,
             callable,
             args,
             kwargs,
         )
+        run_d.addBoth(call_done)
+        run_d.chainDeferred(d)
@@ -168,6 +168,47 @@ class StateConnectorComponent(base.DBConnectorComponent):
         except (sqlalchemy.exc.IntegrityError, sqlalchemy.exc.ProgrammingError):
             conn.rollback()  # someone beat us to it - oh well
 
+    # returns a Deferred that returns a bool
+    def compareAndSetState(self, objectid, name, old_value, new_value):
+        def thd(conn):
+            object_state_tbl = self.db.model.object_state
+
+            try:
+                old_value_json = json.dumps(old_value)
+                new_value_json = json.dumps(new_value)
+            except (TypeError, ValueError) as e:
+                raise TypeError(f"Error encoding JSON for {new_value!r}") from e
+
+            state_name = self.ensureLength(object_state_tbl.c.name, name)
+
+            q = object_state_tbl.update().where(
+                object_state_tbl.c.objectid == objectid,
+                object_state_tbl.c.name == state_name,
+                object_state_tbl.c.value_json == old_value_json,
+            )
+            res = conn.execute(q.values(value_json=new_value_json))
+            conn.commit()
+            if res.rowcount > 0:
+                return True
+            if old_value is not None:
+                return False
+
+            # a missing state is the same as a None state
+            self._test_timing_hook(conn)
+            try:
+                conn.execute(
+                    object_state_tbl.insert().values(
+                        objectid=objectid, name=state_name, value_json=new_value_json
+                    )
+                )
+                conn.commit()
+            except (sqlalchemy.exc.IntegrityError, sqlalchemy.exc.ProgrammingError):
+                conn.rollback()  # the state was set in the meantime
+                return False
+            return True
+
+        return self.db.pool.do(thd)
+
     def _test_timing_hook(self, conn):
         # called so tests can simulate another process inserting a database row
         # at an inopportune moment
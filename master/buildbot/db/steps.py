@@ -29,6 +29,7 @@ from buildbot.warnings import warn_deprecated
 
 if TYPE_CHECKING:
     import datetime
+    from typing import Iterable
 
 
 @dataclass
@@ -135,6 +136,27 @@ class StepsConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
+    def getStepsForBuilds(
+        self, buildids: Iterable[int]
+    ) -> defer.Deferred[dict[int, list[StepModel]]]:
+        """
+        Returns the steps of several builds at once, as a dictionary mapping each build id to the
+        steps of that build, ordered by number.
+        """
+
+        def thd(conn) -> dict[int, list[StepModel]]:
+            tbl = self.db.model.steps
+            result: dict[int, list[StepModel]] = {buildid: [] for buildid in buildids}
+            # batch the build ids to stay within the maximum number of variables of a query
+            for batch in self.doBatch(result, 100):
+                q = tbl.select().where(tbl.c.buildid.in_(batch))
+                q = q.order_by(tbl.c.buildid, tbl.c.number)
+                for row in conn.execute(q).fetchall():
+                    result[row.buildid].append(self._model_from_row(row))
+            return result
+
+        return self.db.pool.do(thd)
+
     def addStep(
         self, buildid: int, name: str, state_string: str
     ) -> defer.Deferred[tuple[int, int, str]]:
@@ -40,6 +40,7 @@ from buildbot.process import cache
 from buildbot.process import debug
 from buildbot.process import metrics
 from buildbot.process.botmaster import BotMaster
+from buildbot.process.logrecompression import LogRecompressionService
 from buildbot.process.users.manager import UserManagerManager
 from buildbot.schedulers.manager import SchedulerManager
 from buildbot.secrets.manager import SecretManager
@@ -190,6 +191,9 @@ class BuildMaster(service.ReconfigurableServiceMixin, service.MasterService):
         self.debug = debug.DebugServices()
         yield self.debug.setServiceParent(self)
 
+        self.log_recompression = LogRecompressionService()
+        yield self.log_recompression.setServiceParent(self)
+
         self.secrets_manager = SecretManager()
         yield self.secrets_manager.setServiceParent(self)
         self.secrets_manager.reconfig_priority = self.db.reconfig_priority - 1
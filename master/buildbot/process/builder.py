@@ -347,6 +347,7 @@ class Builder(util_service.ReconfigurableServiceMixin, service.MultiService):
             props = yield self._setup_props_if_needed(props, workerforbuilder, buildrequest)
             can_start = yield worker.isCompatibleWithBuild(props)
             if not can_start:
+                worker.buildRejectedAsIncompatible()
                 return False
 
         if IRenderable.providedBy(locks):
@@ -18,6 +18,7 @@ from __future__ import annotations
 import copy
 import math
 import random
+from collections import deque
 from datetime import datetime
 from typing import TYPE_CHECKING
 
@@ -32,13 +33,27 @@ from buildbot.process.buildrequest import BuildRequest
 from buildbot.util import deferwaiter
 from buildbot.util import epoch2datetime
 from buildbot.util import service
-from buildbot.util.async_sort import async_sort
 from buildbot.util.twisted import async_to_deferred
+from buildbot.worker.warmpool import WarmPoolManager
 
 if TYPE_CHECKING:
     from buildbot.process.builder import Builder
 
 
+def _is_warm(workerforbuilder) -> bool:
+    worker = getattr(workerforbuilder, 'worker', None)
+    return getattr(worker, 'is_warm', False) is True
+
+
+def _default_next_worker(bldr, workers, buildrequest):
+    if not workers:
+        return None
+    # prefer the idle workers that a warm pool keeps substantiated, so that the build does not
+    # wait for a new instance
+    warm_workers = [wfb for wfb in workers if _is_warm(wfb)]
+    return random.choice(warm_workers or workers)
+
+
 class BuildChooserBase:
     #
     # WARNING: This API is experimental and in active development.
@@ -195,7 +210,7 @@ class BasicBuildChooser(BuildChooserBase):
         if not self.nextWorker:
             self.nextWorker = self.master.config.select_next_worker
         if not self.nextWorker:
-            self.nextWorker = lambda _, workers, __: random.choice(workers) if workers else None
+            self.nextWorker = _default_next_worker
 
         self.workerpool = self.bldr.getAvailableWorkers()
 
@@ -320,6 +335,9 @@ class BuildRequestDistributor(service.AsyncMultiService):
 
     BuildChooser = BasicBuildChooser
 
+    # how long the number of build requests waiting for a worker is remembered, in seconds
+    QUEUE_DEPTH_WINDOW = 300
+
     def __init__(self, botmaster):
         super().__init__()
         self.botmaster = botmaster
@@ -341,6 +359,10 @@ class BuildRequestDistributor(service.AsyncMultiService):
         # start new builds if it has a parent waiting on it
         self.distribute_only_waited_childs = False
 
+        # builder name -> (time, number of waiting build requests), sorted by time and with
+        # strictly decreasing numbers, so that the first entry is the maximum of the window
+        self._queue_depths: dict[str, deque[tuple[float, int]]] = {}
+
     @property
     def can_distribute(self):
         return bool(self.running) or self.distribute_only_waited_childs
@@ -410,15 +432,23 @@ class BuildRequestDistributor(service.AsyncMultiService):
         timer = metrics.Timer("BuildRequestDistributor._defaultSorter()")
         timer.start()
 
-        @defer.inlineCallbacks
-        def key(bldr):
+        # fetch the unclaimed build request summary of all builders in a single query instead of
+        # querying each builder separately
+        builderids = yield defer.gatherResults(
+            [defer.maybeDeferred(bldr.getBuilderId) for bldr in builders], consumeErrors=True
+        )
+        summaries = yield master.db.buildrequests.get_builders_buildrequests_summary(builderids)
+
+        def key(item):
+            bldr, builderid = item
+            summary = summaries[builderid]
             # Sort primarily highest priority of build requests
-            priority = yield bldr.get_highest_priority()
+            priority = summary.highest_priority
             if priority is None:
                 # for builders that do not have pending buildrequest, we just use large number
                 priority = -math.inf
             # Break ties using the time of oldest build request
-            time = yield bldr.getOldestRequestTime()
+            time = summary.oldest_submitted_at
             if time is None:
                 # for builders that do not have pending buildrequest, we just use large number
                 time = math.inf
@@ -427,7 +457,7 @@ class BuildRequestDistributor(service.AsyncMultiService):
                     time = time.timestamp()
             return (-priority, time, bldr.name)
 
-        yield async_sort(builders, key)
+        builders[:] = [bldr for bldr, _ in sorted(zip(builders, builderids), key=key)]
 
         timer.stop()
         return builders
@@ -544,6 +574,49 @@ class BuildRequestDistributor(service.AsyncMultiService):
                 # then this may re-claim the same buildrequests
                 self.botmaster.maybeStartBuildsForBuilder(self.name)
 
+        # the requests that are still unclaimed are waiting for a worker
+        if bc.unclaimedBrdicts is not None:
+            self._record_queue_depth(bldr.name, len(bc.unclaimedBrdicts))
+
+        warm_pools = WarmPoolManager.lookup(self.master)
+        if warm_pools is not None:
+            warm_pools.refill()
+
+    def _prune_queue_depths(self, samples: deque[tuple[float, int]], now: float) -> None:
+        while samples and samples[0][0] < now - self.QUEUE_DEPTH_WINDOW:
+            samples.popleft()
+
+    def _record_queue_depth(self, buildername: str, depth: int) -> None:
+        now = self.master.reactor.seconds()
+        samples = self._queue_depths.get(buildername)
+        if samples is None:
+            if depth == 0:
+                return
+            samples = self._queue_depths[buildername] = deque()
+        # the older samples that are not larger can never be the maximum again
+        while samples and samples[-1][1] <= depth:
+            samples.pop()
+        samples.append((now, depth))
+        self._prune_queue_depths(samples, now)
+
+    def getRecentQueueDepth(self, buildernames) -> int:
+        """
+        Return the sum over the given builders of the largest number of build requests that
+        waited for a worker in the last QUEUE_DEPTH_WINDOW seconds.
+        """
+        now = self.master.reactor.seconds()
+        total = 0
+        for name in buildernames:
+            samples = self._queue_depths.get(name)
+            if samples is None:
+                continue
+            self._prune_queue_depths(samples, now)
+            if not samples:
+                del self._queue_depths[name]
+                continue
+            total += samples[0][1]
+        return total
+
     def _add_in_progress_brids(self, brids):
         for brid in brids:
             self.master.botmaster.add_in_progress_buildrequest(brid)
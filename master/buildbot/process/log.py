@@ -108,10 +108,12 @@ class Log:
         self._had_errors = len(self.subPoint.pop_exceptions()) > 0
 
         # start a compressLog call but don't make our caller wait for
-        # it to complete
-        d = self.master.data.updates.compressLog(self.logid)
-        d.addErrback(log.err, f"while compressing log {self.logid} (ignored)")
-        self.master.db.run_db_task(d)
+        # it to complete. The log recompression service takes care of it
+        # when enabled.
+        if self.master.config.logRecompression is None:
+            d = self.master.data.updates.compressLog(self.logid)
+            d.addErrback(log.err, f"while compressing log {self.logid} (ignored)")
+            self.master.db.run_db_task(d)
         self._finishing = False
 
 
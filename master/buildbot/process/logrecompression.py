@@ -0,0 +1,217 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import dataclasses
+from typing import Any
+
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.util import poll
+from buildbot.util import service
+from buildbot.util import state
+from buildbot.util.twisted import async_to_deferred
+
+
+@dataclasses.dataclass
+class LogRecompressionProgress:
+    # logs up to this id have been processed
+    last_logid: int
+    # highest log id, when the last batch ran
+    max_logid: int
+    # logs up to last_logid that were not finished yet, and are processed once they are
+    unfinished_logs: int
+    # since the master started
+    logs_processed: int
+    bytes_saved: int
+    paused: bool
+
+
+class LogRecompressionService(state.StateMixin, service.ClusteredBuildbotService):
+    """
+    Goes through the finished logs in the background, and regroups and recompresses their
+    chunks with the configured log compression method, a batch of logs at a time.
+
+    Progress is stored in the database, so that a restarted master carries on where it stopped,
+    and starts over when the compression method changes. Only one master of a cluster
+    recompresses logs at a time.
+    """
+
+    name: str | None = 'log_recompression'  # type: ignore[assignment]
+
+    # the logs that are never finished, e.g. because their master crashed, are forgotten
+    # beyond this number
+    MAX_UNFINISHED_LOGS = 1000
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.config: dict[str, Any] | None = None
+        self.paused = False
+        self._method: str | None = None
+        self._last_logid: int | None = None
+        self._unfinished_logids: set[int] = set()
+        self._max_logid = 0
+        self._logs_processed = 0
+        self._bytes_saved = 0
+
+    @async_to_deferred
+    async def reconfigServiceWithBuildbotConfig(self, new_config) -> None:
+        if new_config.logRecompression != self.config:
+            await self._recompress_batch.stop()
+            self.config = new_config.logRecompression
+            self._maybe_start()
+
+        await super().reconfigServiceWithBuildbotConfig(new_config)
+
+    def _getServiceId(self):
+        return self.master.db.state.getObjectId(self.name, self.__class__.__name__)
+
+    @async_to_deferred
+    async def _claimService(self) -> bool:
+        # the master that recompresses the logs is kept in the state of the service
+        state = self.master.db.state
+        masterid = await state.getState(self.serviceid, 'masterid', None)
+        if masterid == self.master.masterid:
+            return True
+        if masterid is not None:
+            master = await self.master.db.masters.getMaster(masterid)
+            if master is not None and master.active:
+                return False
+        # claim the service of a master that stopped or crashed
+        return await state.compareAndSetState(
+            self.serviceid, 'masterid', masterid, self.master.masterid
+        )
+
+    def _unclaimService(self):
+        return self.master.db.state.compareAndSetState(
+            self.serviceid, 'masterid', self.master.masterid, None
+        )
+
+    def activate(self):
+        self._maybe_start()
+        return defer.succeed(None)
+
+    @async_to_deferred
+    async def deactivate(self) -> None:
+        await self._recompress_batch.stop()
+
+    def _maybe_start(self) -> None:
+        if self.active and self.config is not None and not self.paused:
+            self._recompress_batch.start(interval=self.config['interval'])
+
+    @async_to_deferred
+    async def pause(self) -> None:
+        """Stop recompressing logs, once the current log is done"""
+        self.paused = True
+        await self._recompress_batch.stop()
+
+    def resume(self) -> None:
+        self.paused = False
+        if not self._recompress_batch.running:
+            self._maybe_start()
+
+    def get_progress(self) -> LogRecompressionProgress:
+        return LogRecompressionProgress(
+            last_logid=self._last_logid or 0,
+            max_logid=self._max_logid,
+            unfinished_logs=len(self._unfinished_logids),
+            logs_processed=self._logs_processed,
+            bytes_saved=self._bytes_saved,
+            paused=self.paused,
+        )
+
+    @poll.method
+    @async_to_deferred
+    async def _recompress_batch(self) -> None:
+        assert self.config is not None
+        method = self.master.config.logCompressionMethod
+
+        if self._last_logid is None or method != self._method:
+            progress = await self.getState('progress', {})
+            self._method = method
+            # logs processed with another compression method need to be processed again
+            if progress.get('method') == method:
+                self._last_logid = progress['last_logid']
+                self._unfinished_logids = set(progress.get('unfinished_logids', []))
+            else:
+                self._last_logid = 0
+                self._unfinished_logids = set()
+
+        logs = self.master.db.logs
+        # the logs that were not finished yet when the batches went past them
+        finished_logids: list[int] = []
+        if self._unfinished_logids:
+            finished_logids, unfinished_logids, _ = await logs.get_logids_for_compression(
+                logids=sorted(self._unfinished_logids)
+            )
+            # forget the logs that were deleted in the meantime
+            self._unfinished_logids = set(finished_logids + unfinished_logids)
+
+        (
+            new_finished_logids,
+            new_unfinished_logids,
+            self._max_logid,
+        ) = await logs.get_logids_for_compression(
+            after_logid=self._last_logid, limit=self.config['batch_size']
+        )
+        if not finished_logids and not new_finished_logids and not new_unfinished_logids:
+            return
+
+        bytes_saved = 0
+        for logid in finished_logids:
+            if self.paused:
+                break
+            bytes_saved += await self._recompress_log(logid)
+            self._unfinished_logids.discard(logid)
+
+        for logid in sorted(new_finished_logids + new_unfinished_logids):
+            if self.paused:
+                break
+            if logid in new_unfinished_logids:
+                self._unfinished_logids.add(logid)
+            else:
+                bytes_saved += await self._recompress_log(logid)
+            self._last_logid = logid
+
+        if len(self._unfinished_logids) > self.MAX_UNFINISHED_LOGS:
+            # the oldest logs are the most likely to never be finished
+            forgotten = sorted(self._unfinished_logids)[: -self.MAX_UNFINISHED_LOGS]
+            self._unfinished_logids.difference_update(forgotten)
+            log.msg(f"log recompression: giving up on {len(forgotten)} unfinished logs")
+
+        self._bytes_saved += bytes_saved
+        await self.setState(
+            'progress',
+            {
+                'method': method,
+                'last_logid': self._last_logid,
+                'unfinished_logids': sorted(self._unfinished_logids),
+            },
+        )
+        log.msg(
+            f"log recompression: processed logs up to {self._last_logid} "
+            f"of {self._max_logid}, saved {bytes_saved} bytes"
+        )
+
+    async def _recompress_log(self, logid: int) -> int:
+        self._logs_processed += 1
+        try:
+            return await self.master.db.logs.compressLog(logid, recompress=True)
+        except Exception as e:
+            # a log that cannot be recompressed must not stop the other logs
+            log.err(e, f"while recompressing log {logid}")
+            return 0
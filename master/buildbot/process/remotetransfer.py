@@ -19,11 +19,14 @@ module for regrouping all FileWriterImpl and FileReaderImpl away from steps
 
 import os
 import shutil
-import tarfile
 import tempfile
 from io import BytesIO
 
+from twisted.internet import defer
+from twisted.internet import threads
+
 from buildbot.util import bytes2unicode
+from buildbot.util import tarstream
 from buildbot.util import unicode2bytes
 from buildbot.worker.protocols import base
 
@@ -96,48 +99,77 @@ class FileWriter(base.FileWriterImpl):
             os.unlink(self.tmpname)
 
 
-class DirectoryWriter(FileWriter):
+class DirectoryWriter(base.FileWriterImpl):
     """
-    A DirectoryWriter is implemented as a FileWriter, with an added post-processing
-    step to unpack the archive, once the transfer has completed.
+    A DirectoryWriter receives a tar archive and unpacks it while it is being transferred.
+    The archive itself is never written to disk. Decompression and extraction of each block
+    run in a thread, and the block is acknowledged to the worker only once it has been
+    processed, so the worker cannot send data faster than the master can unpack it.
     """
 
     def __init__(self, destroot, maxsize, compress, mode):
         self.destroot = destroot
         self.compress = compress
+        self.mode = mode
+        self.remaining = maxsize
+        self.extractor = tarstream.TarStreamExtractor(destroot, compress)
+        # blocks must be processed in order, one at a time
+        self._lock = defer.DeferredLock()
+        self._failure = None
+
+    def _run_in_thread(self, fn, *args):
+        return self._lock.run(self._call_in_thread, fn, *args)
+
+    def _call_in_thread(self, fn, *args):
+        if self._failure is not None:
+            # the extractor state is unknown after an error, don't process anything else
+            return defer.fail(self._failure)
+
+        def eb(f):
+            self._failure = f
+            return f
+
+        return threads.deferToThread(fn, *args).addErrback(eb)
+
+    def remote_write(self, data):
+        """
+        Called from remote worker to write L{data} to the archive within boundaries
+        of L{maxsize}
+
+        @type  data: C{string}
+        @param data: String of data to write
+        """
+        data = unicode2bytes(data)
+        if self.remaining is not None:
+            data = data[: self.remaining]
+            self.remaining -= len(data)
+        return self._run_in_thread(self.extractor.feed, data)
 
-        self.fd, self.tarname = tempfile.mkstemp(prefix='buildbot-transfer-')
-        os.close(self.fd)
+    def remote_utime(self, accessed_modified):
+        pass
 
-        super().__init__(self.tarname, maxsize, mode)
+    def remote_close(self):
+        """
+        Called by remote worker to state that no more data will be transferred
+        """
+        return self._run_in_thread(self.extractor.close)
 
     def remote_unpack(self):
         """
         Called by remote worker to state that no more data will be transferred
         """
-        # Make sure remote_close is called, otherwise atomic rename won't happen
-        self.remote_close()
-
-        # Map configured compression to a TarFile setting
-        if self.compress == 'bz2':
-            mode = 'r|bz2'
-        elif self.compress == 'gz':
-            mode = 'r|gz'
-        else:
-            mode = 'r'
+        # the archive has been unpacked while being received, just check that it was complete
+        return self.remote_close()
 
-        # Unpack archive and clean up after self
-        with tarfile.open(name=self.tarname, mode=mode) as archive:
-            if hasattr(tarfile, 'data_filter'):
-                archive.extractall(path=self.destroot, filter='data')
-            else:
-                archive.extractall(path=self.destroot)
-        os.remove(self.tarname)
+    def cancel(self):
+        return self._lock.run(threads.deferToThread, self.extractor.abort)
 
     def purge(self):
-        super().purge()
-        if os.path.isdir(self.destroot):
-            shutil.rmtree(self.destroot)
+        def remove_destroot():
+            if os.path.isdir(self.destroot):
+                shutil.rmtree(self.destroot)
+
+        return self._lock.run(threads.deferToThread, remove_destroot)
 
 
 class FileReader(base.FileReaderImpl):
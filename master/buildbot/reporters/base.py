@@ -22,6 +22,7 @@ from twisted.python import log
 
 from buildbot import config
 from buildbot.reporters import utils
+from buildbot.reporters.context import ReportContextCache
 from buildbot.util import service
 from buildbot.util import tuplematch
 
@@ -39,6 +40,7 @@ class ReporterBase(service.BuildbotService):
         self.generators = None
         self._event_consumers = {}
         self._pending_got_event_calls = {}
+        self._report_context = None
 
     def checkConfig(self, generators):
         if not isinstance(generators, list):
@@ -55,6 +57,7 @@ class ReporterBase(service.BuildbotService):
     @defer.inlineCallbacks
     def reconfigService(self, generators):
         self.generators = generators
+        self._report_context = yield ReportContextCache.getService(self.master)
 
         wanted_event_keys = set()
         for g in self.generators:
@@ -97,6 +100,19 @@ class ReporterBase(service.BuildbotService):
 
     @defer.inlineCallbacks
     def _got_event(self, key, msg):
+        # this is called for all the reporters before any of them is done with the event, so the
+        # details fetched for it are shared by all of them
+        report_context = self._report_context
+        if report_context is not None:
+            report_context.event_started(key)
+        try:
+            yield self._handle_event(key, msg)
+        finally:
+            if report_context is not None:
+                report_context.event_finished(key)
+
+    @defer.inlineCallbacks
+    def _handle_event(self, key, msg):
         chain_key = self._get_chain_key_for_event(key, msg)
         if chain_key is not None:
             d = defer.Deferred()
@@ -165,7 +165,11 @@ class BitbucketStatusPush(ReporterBase):
             if self.debug:
                 log.msg(f"Bitbucket status {bitbucket_uri} {body}")
 
-            response = yield self._http.post(bitbucket_uri, json=body)
+            # a newer state of the same status replaces the one that is not sent yet, setting a
+            # status is idempotent so it can be retried
+            response = yield self._http.post(
+                bitbucket_uri, json=body, coalesce_key=(bitbucket_uri, body['key']), retry=True
+            )
             if response.code not in (200, 201):
                 content = yield response.content()
                 log.msg(f"{response.code}: unable to upload Bitbucket status {content}")
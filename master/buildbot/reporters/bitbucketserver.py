@@ -127,7 +127,10 @@ class BitbucketServerStatusPush(ReporterBase):
         if context:
             payload['name'] = context
 
-        return self._http.post(STATUS_API_URL.format(sha=sha), json=payload)
+        url = STATUS_API_URL.format(sha=sha)
+        # a newer state of the same status replaces the one that is not sent yet, setting a
+        # status is idempotent so it can be retried
+        return self._http.post(url, json=payload, coalesce_key=(url, key), retry=True)
 
     @defer.inlineCallbacks
     def sendMessage(self, reports):
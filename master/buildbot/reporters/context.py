@@ -0,0 +1,154 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+from typing import Callable
+
+from twisted.internet import defer
+from twisted.python import failure
+
+from buildbot.reporters import utils
+from buildbot.util import service
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class _SharedFetch:
+    """The result of a fetch, delivered to all the callers that want it"""
+
+    def __init__(self, d: defer.Deferred) -> None:
+        self.done = False
+        self.result: Any = None
+        self.waiters: list[defer.Deferred] = []
+        d.addBoth(self._fetched)
+
+    def _fetched(self, result: Any) -> None:
+        self.done = True
+        self.result = result
+        waiters, self.waiters = self.waiters, []
+        for waiter in waiters:
+            self._fire(waiter)
+
+    def _fire(self, d: defer.Deferred) -> None:
+        if isinstance(self.result, failure.Failure):
+            d.errback(self.result)
+        else:
+            d.callback(self.result)
+
+    def wait(self) -> defer.Deferred:
+        d: defer.Deferred = defer.Deferred()
+        if self.done:
+            self._fire(d)
+        else:
+            self.waiters.append(d)
+        return d
+
+
+class _EventContext:
+    def __init__(self) -> None:
+        # the number of reporters handling the event
+        self.handlers = 0
+        self.fetches: dict[tuple, _SharedFetch] = {}
+
+
+class ReportContextCache(service.SharedService):
+    """
+    Shares the details that the report generators fetch for an event between all the reporters.
+
+    Each reporter consumes the events on its own, so the details would otherwise be fetched once
+    per reporter. The details are kept while at least one reporter is handling the event, and
+    dropped once all of them are done with it, so that the next event fetches fresh data.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._events: dict[tuple, _EventContext] = {}
+
+    @classmethod
+    def lookup(cls, master) -> ReportContextCache | None:
+        return master.namedServices.get(cls.getName())
+
+    def event_started(self, key: tuple) -> None:
+        ctx = self._events.get(key)
+        if ctx is None:
+            ctx = self._events[key] = _EventContext()
+        ctx.handlers += 1
+
+    def event_finished(self, key: tuple) -> None:
+        ctx = self._events[key]
+        ctx.handlers -= 1
+        if ctx.handlers == 0:
+            del self._events[key]
+
+    def _get_shared(
+        self, key: tuple, fetch_key: tuple, fetch: Callable[[], defer.Deferred]
+    ) -> defer.Deferred:
+        ctx = self._events.get(key)
+        if ctx is None:
+            return fetch()
+        shared = ctx.fetches.get(fetch_key)
+        if shared is None:
+            shared = ctx.fetches[fetch_key] = _SharedFetch(fetch())
+        return shared.wait()
+
+    @defer.inlineCallbacks
+    def get_details_for_build(self, key, build, **kwargs):
+        @defer.inlineCallbacks
+        def fetch():
+            details = copy.deepcopy(build)
+            yield utils.getDetailsForBuild(self.master, details, **kwargs)
+            return details
+
+        fetch_key = ('build', build['buildid'], _freeze(sorted(kwargs.items())))
+        details = yield self._get_shared(key, fetch_key, fetch)
+        # the callers update the build they were given
+        build.update(copy.deepcopy(details))
+
+    @defer.inlineCallbacks
+    def get_details_for_buildset(self, key, bsid, **kwargs):
+        fetch_key = ('buildset', bsid, _freeze(sorted(kwargs.items())))
+        res = yield self._get_shared(
+            key, fetch_key, lambda: utils.getDetailsForBuildset(self.master, bsid, **kwargs)
+        )
+        return copy.deepcopy(res)
+
+
+def get_details_for_build(master, key, build, **kwargs):
+    """
+    Same as utils.getDetailsForBuild, but shares the details with the other reporters handling
+    the event identified by key.
+    """
+    cache = ReportContextCache.lookup(master)
+    if cache is None:
+        return utils.getDetailsForBuild(master, build, **kwargs)
+    return cache.get_details_for_build(key, build, **kwargs)
+
+
+def get_details_for_buildset(master, key, bsid, **kwargs):
+    """
+    Same as utils.getDetailsForBuildset, but shares the details with the other reporters handling
+    the event identified by key.
+    """
+    cache = ReportContextCache.lookup(master)
+    if cache is None:
+        return utils.getDetailsForBuildset(master, bsid, **kwargs)
+    return cache.get_details_for_buildset(key, bsid, **kwargs)
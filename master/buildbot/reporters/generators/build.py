@@ -20,7 +20,7 @@ from twisted.internet import defer
 from zope.interface import implementer
 
 from buildbot import interfaces
-from buildbot.reporters import utils
+from buildbot.reporters import context
 from buildbot.reporters.message import MessageFormatter
 from buildbot.reporters.message import MessageFormatterRenderable
 
@@ -65,8 +65,9 @@ class BuildStatusGenerator(BuildStatusGeneratorMixin):
         is_new = event == 'new'
         want_previous_build = False if is_new else self._want_previous_build()
 
-        yield utils.getDetailsForBuild(
+        yield context.get_details_for_build(
             master,
+            key,
             build,
             want_properties=self.formatter.want_properties,
             want_steps=self.formatter.want_steps,
@@ -74,6 +75,7 @@ class BuildStatusGenerator(BuildStatusGeneratorMixin):
             want_logs=self.formatter.want_logs,
             add_logs=self.add_logs,
             want_logs_content=self.formatter.want_logs_content,
+            logs_content_max_size=getattr(self.formatter, 'logs_content_max_size', None),
         )
 
         if not self.is_message_needed_by_props(build):
@@ -123,14 +125,16 @@ class BuildStartEndStatusGenerator(BuildStatusGeneratorMixin):
 
         formatter = self.start_formatter if is_new else self.end_formatter
 
-        yield utils.getDetailsForBuild(
+        yield context.get_details_for_build(
             master,
+            key,
             build,
             want_properties=formatter.want_properties,
             want_steps=formatter.want_steps,
             want_logs=formatter.want_logs,
             add_logs=self.add_logs,
             want_logs_content=formatter.want_logs_content,
+            logs_content_max_size=getattr(formatter, 'logs_content_max_size', None),
         )
 
         if not self.is_message_needed_by_props(build):
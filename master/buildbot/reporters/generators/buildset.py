@@ -20,7 +20,7 @@ from zope.interface import implementer
 
 from buildbot import interfaces
 from buildbot.process.results import statusToString
-from buildbot.reporters import utils
+from buildbot.reporters import context
 from buildbot.reporters.message import MessageFormatter
 
 from .utils import BuildStatusGeneratorMixin
@@ -55,14 +55,16 @@ class BuildSetStatusGenerator(BuildStatusGeneratorMixin):
     @defer.inlineCallbacks
     def generate(self, master, reporter, key, message):
         bsid = message['bsid']
-        res = yield utils.getDetailsForBuildset(
+        res = yield context.get_details_for_buildset(
             master,
+            key,
             bsid,
             want_properties=self.formatter.want_properties,
             want_steps=self.formatter.want_steps,
             want_previous_build=self._want_previous_build(),
             want_logs=self.formatter.want_logs,
             want_logs_content=self.formatter.want_logs_content,
+            logs_content_max_size=getattr(self.formatter, 'logs_content_max_size', None),
         )
 
         builds = res['builds']
@@ -158,13 +160,15 @@ class BuildSetCombinedStatusGenerator:
     def generate(self, master, reporter, key, message):
         bsid = message["bsid"]
 
-        res = yield utils.getDetailsForBuildset(
+        res = yield context.get_details_for_buildset(
             master,
+            key,
             bsid,
             want_properties=self.formatter.want_properties,
             want_steps=self.formatter.want_steps,
             want_logs=self.formatter.want_logs,
             want_logs_content=self.formatter.want_logs_content,
+            logs_content_max_size=getattr(self.formatter, 'logs_content_max_size', None),
         )
 
         builds = res['builds']
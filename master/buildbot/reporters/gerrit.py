@@ -35,6 +35,7 @@ from buildbot.process.results import RETRY
 from buildbot.process.results import SUCCESS
 from buildbot.process.results import WARNINGS
 from buildbot.process.results import Results
+from buildbot.reporters import context
 from buildbot.reporters import utils
 from buildbot.reporters.base import ReporterBase
 from buildbot.util import bytes2unicode
@@ -206,8 +207,9 @@ class GerritBuildSetStatusGenerator(GerritStatusGeneratorBase):
     @defer.inlineCallbacks
     def generate(self, master, reporter, key, message):
         bsid = message["bsid"]
-        res = yield utils.getDetailsForBuildset(
+        res = yield context.get_details_for_buildset(
             master,
+            key,
             bsid,
             want_properties=True,
             want_steps=self.want_steps,
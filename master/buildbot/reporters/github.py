@@ -160,10 +160,15 @@ class GitHubStatusPush(ReporterBase):
             payload['context'] = context
 
         headers = yield self._get_auth_header(props)
+        url = '/'.join(['/repos', repo_user, repo_name, 'statuses', sha])
         ret = yield self._http.post(
-            '/'.join(['/repos', repo_user, repo_name, 'statuses', sha]),
+            url,
             json=payload,
             headers=headers,
+            # a newer state of the same status replaces the one that is not sent yet, setting a
+            # status is idempotent so it can be retried
+            coalesce_key=(url, context),
+            retry=True,
         )
         return ret
 
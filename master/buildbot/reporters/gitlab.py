@@ -133,7 +133,10 @@ class GitLabStatusPush(ReporterBase):
         if context is not None:
             payload['name'] = context
 
-        return self._http.post(f'/api/v4/projects/{project_id}/statuses/{sha}', json=payload)
+        url = f'/api/v4/projects/{project_id}/statuses/{sha}'
+        # a newer state of the same status replaces the one that is not sent yet, setting a
+        # status is idempotent so it can be retried
+        return self._http.post(url, json=payload, coalesce_key=(url, branch, context), retry=True)
 
     @defer.inlineCallbacks
     def getProjectId(self, sourcestamp):
@@ -186,6 +186,7 @@ class MessageFormatterBase(util.ComparableMixin):
         want_steps=False,
         want_logs=False,
         want_logs_content=False,
+        logs_content_max_size=None,
     ):
         if ctx is None:
             ctx = {}
@@ -194,6 +195,7 @@ class MessageFormatterBase(util.ComparableMixin):
         self.want_steps = want_steps
         self.want_logs = want_logs
         self.want_logs_content = want_logs_content
+        self.logs_content_max_size = logs_content_max_size
 
     def buildAdditionalContext(self, master, ctx):
         pass
@@ -23,27 +23,40 @@ from twisted.internet import defer
 from twisted.python import log
 
 from buildbot.data import resultspec
+from buildbot.data.logs import log_db_to_data
+from buildbot.data.steps import step_db_to_data
 from buildbot.process.properties import renderer
 from buildbot.process.results import RETRY
 from buildbot.util import flatten
+from buildbot.util.twisted import async_to_deferred
 
 if TYPE_CHECKING:
     from buildbot.db.buildrequests import BuildRequestModel
 
+# the builds before the previous one are most often retried builds, if any
+_PREVIOUS_BUILDS_PAGE_SIZE = 10
+
 
 @defer.inlineCallbacks
 def getPreviousBuild(master, build):
     # naive n-1 algorithm. Still need to define what we should skip
     # SKIP builds? forced builds? rebuilds?
     # don't hesitate to contribute improvements to that algorithm
-    n = build['number'] - 1
-    while n >= 0:
-        prev = yield master.data.get(("builders", build['builderid'], "builds", n))
-
-        if prev and prev['results'] != RETRY:
-            return prev
-        n -= 1
-    return None
+    offset = 0
+    while True:
+        prevs = yield master.data.get(
+            ("builders", build['builderid'], "builds"),
+            filters=[resultspec.Filter('number', 'lt', [build['number']])],
+            order=['-number'],
+            limit=_PREVIOUS_BUILDS_PAGE_SIZE,
+            offset=offset,
+        )
+        for prev in prevs:
+            if prev['results'] != RETRY:
+                return prev
+        if len(prevs) < _PREVIOUS_BUILDS_PAGE_SIZE:
+            return None
+        offset += _PREVIOUS_BUILDS_PAGE_SIZE
 
 
 @defer.inlineCallbacks
@@ -56,6 +69,7 @@ def getDetailsForBuildset(
     want_logs=False,
     add_logs=None,
     want_logs_content=False,
+    logs_content_max_size=None,
 ):
     # Here we will do a bunch of data api calls on behalf of the reporters
     # We do try to make *some* calls in parallel with the help of gatherResults, but don't commit
@@ -86,6 +100,7 @@ def getDetailsForBuildset(
             want_logs=want_logs,
             add_logs=add_logs,
             want_logs_content=want_logs_content,
+            logs_content_max_size=logs_content_max_size,
         )
 
     return {"buildset": buildset, "builds": builds}
@@ -101,6 +116,7 @@ def getDetailsForBuild(
     want_logs=False,
     add_logs=None,
     want_logs_content=False,
+    logs_content_max_size=None,
 ):
     buildrequest = yield master.data.get(("buildrequests", build['buildrequestid']))
     buildset = yield master.data.get(("buildsets", buildrequest['buildsetid']))
@@ -125,6 +141,7 @@ def getDetailsForBuild(
         want_logs=want_logs,
         add_logs=add_logs,
         want_logs_content=want_logs_content,
+        logs_content_max_size=logs_content_max_size,
     )
     return ret
 
@@ -157,6 +174,27 @@ def should_attach_log(logs_config, log):
     return False
 
 
+@async_to_deferred
+async def get_log_content(master, logid, max_size=None):
+    """
+    Returns the content of a log in the same form as the data API, keeping at most max_size
+    characters of it. The lines are streamed, so that the rest of a large log is not read.
+    """
+    parts = []
+    size = 0
+    lines = master.db.logs.iter_log_lines(logid)
+    try:
+        async for line in lines:
+            if max_size is not None and size + len(line) > max_size:
+                parts.append(line[: max_size - size])
+                break
+            parts.append(line)
+            size += len(line)
+    finally:
+        await lines.aclose()
+    return {'logid': logid, 'firstline': 0, 'content': ''.join(parts)}
+
+
 @defer.inlineCallbacks
 def getDetailsForBuilds(
     master,
@@ -168,6 +206,7 @@ def getDetailsForBuilds(
     want_logs=False,
     add_logs=None,
     want_logs_content=False,
+    logs_content_max_size=None,
 ):
     builderids = {build['builderid'] for build in builds}
 
@@ -178,10 +217,10 @@ def getDetailsForBuilds(
     buildersbyid = {builder['builderid']: builder for builder in builders}
 
     if want_properties:
-        buildproperties = yield defer.gatherResults(
-            [master.data.get(("builds", build['buildid'], 'properties')) for build in builds],
-            consumeErrors=True,
-        )
+        props_by_buildid = yield master.db.builds.getBuildsProperties([
+            build['buildid'] for build in builds
+        ])
+        buildproperties = [props_by_buildid[build['buildid']] for build in builds]
     else:  # we still need a list for the big zip
         buildproperties = list(range(len(builds)))
 
@@ -204,16 +243,22 @@ def getDetailsForBuilds(
     if want_logs:
         want_steps = True
 
-    if want_steps:  # pylint: disable=too-many-nested-blocks
-        buildsteps = yield defer.gatherResults(
-            [master.data.get(("builds", build['buildid'], 'steps')) for build in builds],
-            consumeErrors=True,
-        )
+    if want_steps:
+        steps_by_buildid = yield master.db.steps.getStepsForBuilds([
+            build['buildid'] for build in builds
+        ])
+        buildsteps = [
+            [step_db_to_data(model) for model in steps_by_buildid[build['buildid']]]
+            for build in builds
+        ]
         if want_logs:
+            logs_by_stepid = yield master.db.logs.getLogsForSteps([
+                s['stepid'] for build_steps in buildsteps for s in build_steps
+            ])
+            attached_logs = []
             for build, build_steps in zip(builds, buildsteps):
                 for s in build_steps:
-                    logs = yield master.data.get(("steps", s['stepid'], 'logs'))
-                    s['logs'] = list(logs)
+                    s['logs'] = [log_db_to_data(model) for model in logs_by_stepid[s['stepid']]]
                     for l in s['logs']:
                         l['stepname'] = s['name']
                         l['url'] = get_url_for_log(
@@ -222,7 +267,14 @@ def getDetailsForBuilds(
                         l['url_raw'] = get_url_for_log_raw(master, l['logid'], 'raw')
                         l['url_raw_inline'] = get_url_for_log_raw(master, l['logid'], 'raw_inline')
                         if should_attach_log(logs_config, l):
-                            l['content'] = yield master.data.get(("logs", l['logid'], 'contents'))
+                            attached_logs.append(l)
+
+            contents = yield defer.gatherResults(
+                [get_log_content(master, l['logid'], logs_content_max_size) for l in attached_logs],
+                consumeErrors=True,
+            )
+            for l, content in zip(attached_logs, contents):
+                l['content'] = content
 
     else:  # we still need a list for the big zip
         buildsteps = list(range(len(builds)))
@@ -23,8 +23,8 @@ from zope.interface import implementer
 
 from buildbot import config
 from buildbot import interfaces
-from buildbot.changes import changes
 from buildbot.process.properties import Properties
+from buildbot.schedulers.dispatcher import ChangeDispatcher
 from buildbot.util.service import ClusteredBuildbotService
 from buildbot.util.state import StateMixin
 from buildbot.warnings import warn_deprecated
@@ -191,11 +191,15 @@ class BaseScheduler(ClusteredBuildbotService, StateMixin):
     def startConsumingChanges(self, fileIsImportant=None, change_filter=None, onlyImportant=False):
         assert fileIsImportant is None or callable(fileIsImportant)
 
-        # register for changes with the data API
+        # register for changes with the change dispatcher, which loads each
+        # change once for all the schedulers
         assert not self._change_consumer
-        self._change_consumer = yield self.master.mq.startConsuming(
-            lambda k, m: self._changeCallback(k, m, fileIsImportant, change_filter, onlyImportant),
-            ('changes', None, 'new'),
+        dispatcher = yield ChangeDispatcher.getService(self.master)
+        self._change_consumer = yield dispatcher.subscribe(
+            lambda change: self._changeCallback(
+                change, fileIsImportant, change_filter, onlyImportant
+            ),
+            change_filter,
         )
 
     @defer.inlineCallbacks
@@ -205,16 +209,11 @@ class BaseScheduler(ClusteredBuildbotService, StateMixin):
             self._enabledCallback, ('schedulers', str(self.serviceid), 'updated')
         )
 
-    @defer.inlineCallbacks
-    def _changeCallback(self, key, msg, fileIsImportant, change_filter, onlyImportant):
+    def _changeCallback(self, change, fileIsImportant, change_filter, onlyImportant):
         # ignore changes delivered while we're not running
         if not self._change_consumer:
             return
 
-        # get a change object, since the API requires it
-        chdict = yield self.master.db.changes.getChange(msg['changeid'])
-        change = yield changes.Change.fromChdict(self.master, chdict)
-
         # filter it
         if change_filter and not change_filter.filter_change(change):
             return
@@ -641,11 +640,15 @@ class ReconfigurableBaseScheduler(ClusteredBuildbotService, StateMixin):
     def startConsumingChanges(self, fileIsImportant=None, change_filter=None, onlyImportant=False):
         assert fileIsImportant is None or callable(fileIsImportant)
 
-        # register for changes with the data API
+        # register for changes with the change dispatcher, which loads each
+        # change once for all the schedulers
         assert not self._change_consumer
-        self._change_consumer = yield self.master.mq.startConsuming(
-            lambda k, m: self._changeCallback(k, m, fileIsImportant, change_filter, onlyImportant),
-            ('changes', None, 'new'),
+        dispatcher = yield ChangeDispatcher.getService(self.master)
+        self._change_consumer = yield dispatcher.subscribe(
+            lambda change: self._changeCallback(
+                change, fileIsImportant, change_filter, onlyImportant
+            ),
+            change_filter,
         )
 
     @defer.inlineCallbacks
@@ -655,16 +658,11 @@ class ReconfigurableBaseScheduler(ClusteredBuildbotService, StateMixin):
             self._enabledCallback, ('schedulers', str(self.serviceid), 'updated')
         )
 
-    @defer.inlineCallbacks
-    def _changeCallback(self, key, msg, fileIsImportant, change_filter, onlyImportant):
+    def _changeCallback(self, change, fileIsImportant, change_filter, onlyImportant):
         # ignore changes delivered while we're not running
         if not self._change_consumer:
             return
 
-        # get a change object, since the API requires it
-        chdict = yield self.master.db.changes.getChange(msg['changeid'])
-        change = yield changes.Change.fromChdict(self.master, chdict)
-
         # filter it
         if change_filter and not change_filter.filter_change(change):
             return
@@ -0,0 +1,199 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.changes import changes
+from buildbot.changes.filter import ChangeFilter
+from buildbot.util import service
+from buildbot.util.ssfilter import _FilterExactMatch
+
+if TYPE_CHECKING:
+    from buildbot.mq.base import QueueRef
+
+# the change attributes that the subscriptions are indexed on, in order of preference
+_INDEXED_ATTRS = ('branch', 'project', 'repository', 'codebase')
+
+
+def _get_index_key(change_filter: Any) -> tuple[str, list] | None:
+    """
+    Return (attribute, values) such that the filter only accepts changes whose attribute is one
+    of values, or None if there is no such attribute.
+    """
+    if not isinstance(change_filter, ChangeFilter):
+        return None
+    exact_values: dict[str, list] = {}
+    for f in change_filter.filters:
+        if type(f) is _FilterExactMatch and f.prop not in exact_values:
+            exact_values[f.prop] = f.values
+    for attr in _INDEXED_ATTRS:
+        if attr in exact_values:
+            return attr, exact_values[attr]
+    return None
+
+
+class ChangeSubscription:
+    def __init__(
+        self,
+        dispatcher: ChangeDispatcher,
+        callback: Callable[[changes.Change], Any],
+        index_key: tuple[str, list] | None,
+        serial: int,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.callback = callback
+        self.index_key = index_key
+        self.serial = serial
+        self.active = True
+
+    def stopConsuming(self) -> None:
+        self.dispatcher.unsubscribe(self)
+
+
+class ChangeDispatcher(service.SharedService):
+    """
+    Loads each new change once, and hands it to the schedulers consuming changes.
+
+    The subscriptions are indexed on the values that their change filter requires for the
+    branch, project, repository or codebase of the change, so that only the schedulers which
+    may accept a change are called for it. The subscribers still need to apply their filter.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._serial = itertools.count()
+        # attribute -> value -> subscriptions (dict as an ordered set)
+        self._index: dict[str, dict[Any, dict[ChangeSubscription, None]]] = {}
+        self._unindexed: dict[ChangeSubscription, None] = {}
+        self._count = 0
+        self._consumer: QueueRef | None = None
+        # waiting for the mq consumer to be started, None when not starting
+        self._starting: list[defer.Deferred] | None = None
+
+    @defer.inlineCallbacks
+    def subscribe(self, callback: Callable[[changes.Change], Any], change_filter: Any = None):
+        """
+        Call callback with each new change that may match change_filter.  Returns an object with a
+        stopConsuming method, like mq consumers.
+        """
+        sub = ChangeSubscription(self, callback, _get_index_key(change_filter), next(self._serial))
+        if sub.index_key is None:
+            self._unindexed[sub] = None
+        else:
+            attr, values = sub.index_key
+            by_value = self._index.setdefault(attr, {})
+            for value in values:
+                by_value.setdefault(value, {})[sub] = None
+        self._count += 1
+
+        try:
+            yield self._start_consuming()
+        except Exception:
+            self.unsubscribe(sub)
+            raise
+        return sub
+
+    def unsubscribe(self, sub: ChangeSubscription) -> None:
+        if not sub.active:
+            return
+        sub.active = False
+        if sub.index_key is None:
+            del self._unindexed[sub]
+        else:
+            attr, values = sub.index_key
+            by_value = self._index[attr]
+            for value in values:
+                subs = by_value.get(value)
+                if subs is not None:
+                    subs.pop(sub, None)
+                    if not subs:
+                        del by_value[value]
+            if not by_value:
+                del self._index[attr]
+        self._count -= 1
+        if self._count == 0 and self._consumer is not None:
+            self._stop_consuming()
+
+    def _start_consuming(self) -> defer.Deferred:
+        if self._consumer is not None:
+            return defer.succeed(None)
+        d: defer.Deferred = defer.Deferred()
+        if self._starting is not None:
+            self._starting.append(d)
+            return d
+        self._starting = [d]
+
+        def started(qref):
+            self._consumer = qref
+            waiters, self._starting = self._starting, None
+            # all the subscriptions may be gone in the meantime
+            if self._count == 0:
+                self._stop_consuming()
+            for waiter in waiters:
+                waiter.callback(None)
+
+        def failed(f):
+            waiters, self._starting = self._starting, None
+            for waiter in waiters:
+                waiter.errback(f)
+
+        start_d = defer.maybeDeferred(
+            self.master.mq.startConsuming, self._on_change, ('changes', None, 'new')
+        )
+        start_d.addCallbacks(started, failed)
+        return d
+
+    def _stop_consuming(self) -> None:
+        consumer, self._consumer = self._consumer, None
+        d = defer.maybeDeferred(consumer.stopConsuming)
+        d.addErrback(log.err, "while stopping consuming changes")
+
+    def _get_subscriptions(self, change: changes.Change) -> list[ChangeSubscription]:
+        subs = list(self._unindexed)
+        for attr, by_value in self._index.items():
+            value = getattr(change, attr, '')
+            try:
+                matching = by_value.get(value)
+            except TypeError:
+                # unhashable values never match the filter values
+                continue
+            if matching:
+                subs.extend(matching)
+        # keep the order in which the subscribers subscribed
+        subs.sort(key=lambda sub: sub.serial)
+        return subs
+
+    @defer.inlineCallbacks
+    def _on_change(self, key, msg):
+        if self._count == 0:
+            return
+
+        chdict = yield self.master.db.changes.getChange(msg['changeid'])
+        change = yield changes.Change.fromChdict(self.master, chdict)
+
+        for sub in self._get_subscriptions(change):
+            # a previous subscriber may have stopped this one
+            if not sub.active:
+                continue
+            d = defer.maybeDeferred(sub.callback, change)
+            d.addErrback(log.err, 'while dispatching change')
@@ -19,6 +19,7 @@ manage providers and handle secrets
 from __future__ import annotations
 
 from twisted.internet import defer
+from twisted.python import failure
 
 from buildbot.secrets.providers.base import SecretProviderBase
 from buildbot.secrets.secret import SecretDetails
@@ -28,11 +29,24 @@ from buildbot.util import service
 class SecretManager(service.BuildbotServiceManager):
     """
     Secret manager
+
+    The secrets of the providers configured with a cache_ttl are cached for that long. Concurrent
+    requests for a secret that is not cached share a single call to the provider. The cache is
+    cleared on reconfig, and can be cleared explicitly with invalidate().
     """
 
     name: str | None = 'secrets'  # type: ignore[assignment]
     config_attr = "secretsProviders"
 
+    def __init__(self):
+        super().__init__()
+        # (provider name, secret) -> (value, expiration time)
+        self._cache = {}
+        # (provider name, secret) -> Deferreds waiting for the provider
+        self._fetching = {}
+        # incremented on invalidation, so that in-flight fetches are not cached
+        self._generation = 0
+
     @defer.inlineCallbacks
     def setup(self):
         configuredProviders = self.get_service_config(self.master.config)
@@ -42,6 +56,22 @@ class SecretManager(service.BuildbotServiceManager):
             yield child.setServiceParent(self)
             yield child.configureService()
 
+    @defer.inlineCallbacks
+    def reconfigServiceWithBuildbotConfig(self, new_config):
+        self.invalidate()
+        yield super().reconfigServiceWithBuildbotConfig(new_config)
+
+    def invalidate(self, secret=None):
+        """
+        forget the cached value of secret, or of all the secrets if secret is None
+        """
+        self._generation += 1
+        if secret is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[1] == secret]:
+            del self._cache[key]
+
     @defer.inlineCallbacks
     def get(self, secret, *args, **kwargs):
         """
@@ -52,8 +82,43 @@ class SecretManager(service.BuildbotServiceManager):
         @return type: SecretDetails
         """
         for provider in self.services:
-            value = yield provider.get(secret)
+            value = yield self._get_from_provider(provider, secret)
             source_name = provider.__class__.__name__
             if value is not None:
                 return SecretDetails(source_name, secret, value)
         return None
+
+    def _get_from_provider(self, provider, secret):
+        if not provider.cache_ttl and not provider.negative_cache_ttl:
+            return defer.maybeDeferred(provider.get, secret)
+
+        key = (provider.name, secret)
+        cached = self._cache.get(key)
+        if cached is not None:
+            value, expires = cached
+            if expires > self.master.reactor.seconds():
+                return defer.succeed(value)
+            del self._cache[key]
+
+        d = defer.Deferred()
+        waiting = self._fetching.get(key)
+        if waiting is not None:
+            waiting.append(d)
+            return d
+
+        self._fetching[key] = [d]
+        fetch_d = defer.maybeDeferred(provider.get, secret)
+        fetch_d.addBoth(self._fetched, provider, key, self._generation)
+        return d
+
+    def _fetched(self, result, provider, key, generation):
+        if not isinstance(result, failure.Failure) and generation == self._generation:
+            ttl = provider.cache_ttl if result is not None else provider.negative_cache_ttl
+            if ttl:
+                self._cache[key] = (result, self.master.reactor.seconds() + ttl)
+
+        for d in self._fetching.pop(key):
+            if isinstance(result, failure.Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
@@ -18,14 +18,37 @@ secret provider interface
 
 import abc
 
+from buildbot import config
 from buildbot.util.service import BuildbotService
 
 
 class SecretProviderBase(BuildbotService):
     """
     Secret provider base
+
+    All providers accept the ``cache_ttl`` and ``negative_cache_ttl`` arguments, which make the
+    secret manager remember the secrets found, respectively not found, by the provider for the
+    given number of seconds.
     """
 
+    compare_attrs = ('cache_ttl', 'negative_cache_ttl')
+    cache_ttl = None
+    negative_cache_ttl = None
+
+    def __init__(self, *args, **kwargs):
+        self.cache_ttl = kwargs.pop('cache_ttl', None)
+        self.negative_cache_ttl = kwargs.pop('negative_cache_ttl', None)
+        for attr in ('cache_ttl', 'negative_cache_ttl'):
+            value = getattr(self, attr)
+            if value is not None and (not isinstance(value, (int, float)) or value < 0):
+                config.error(f"{attr} must be a non-negative number of seconds")
+        super().__init__(*args, **kwargs)
+
+    def reconfigServiceWithSibling(self, sibling):
+        self.cache_ttl = sibling.cache_ttl
+        self.negative_cache_ttl = sibling.negative_cache_ttl
+        return super().reconfigServiceWithSibling(sibling)
+
     @abc.abstractmethod
     def get(self, *args, **kwargs):
         """
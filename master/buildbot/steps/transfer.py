@@ -59,7 +59,7 @@ class _TransferBuildStep(BuildStep):
     def runTransferCommand(
         self,
         cmd: remotecommand.RemoteCommand,
-        writer: remotetransfer.FileWriter | None = None,
+        writer: remotetransfer.FileWriter | remotetransfer.DirectoryWriter | None = None,
     ):
         # Run a transfer step, add a callback to extract the command status,
         # add an error handler that cancels the writer.
@@ -68,12 +68,12 @@ class _TransferBuildStep(BuildStep):
             yield self.runCommand(cmd)
         finally:
             if writer:
-                writer.cancel()
+                yield writer.cancel()
 
         cmd_res = cmd.results()
         if cmd_res >= FAILURE:
             if writer:
-                writer.purge()
+                yield writer.purge()
         return cmd_res
 
     @defer.inlineCallbacks
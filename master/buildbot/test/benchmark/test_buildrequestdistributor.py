@@ -0,0 +1,117 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from unittest import mock
+
+from twisted.internet import defer
+
+from buildbot.process import buildrequestdistributor
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+
+
+class BuildRequestDistributorBenchmark(benchmark.BenchmarkTestCase):
+    REQUESTS_PER_BUILDER = 5
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        super().setUp()
+        self.botmaster = mock.Mock(name='botmaster')
+        self.botmaster.builders = {}
+        self.master = self.botmaster.master = yield fakemaster.make_master(
+            self, wantData=True, wantDb=True
+        )
+        self.master.caches = fakemaster.FakeCaches()
+        self.brd = buildrequestdistributor.BuildRequestDistributor(self.botmaster)
+        self.brd.parent = self.botmaster
+        yield self.brd.startService()
+        self.addCleanup(self.brd.stopService)
+
+        yield self.master.db.insert_test_data([
+            fakedb.Master(id=fakedb.FakeDBConnector.MASTER_ID),
+            fakedb.SourceStamp(id=21),
+            fakedb.Buildset(id=11, reason='because'),
+            fakedb.BuildsetSourceStamp(sourcestampid=21, buildsetid=11),
+        ])
+        self.started_builds = 0
+        self.next_brid = 1
+
+    def create_builder(self, builderid):
+        name = f'builder{builderid}'
+        bldr = mock.Mock(name=name)
+        bldr.name = name
+        bldr.getBuilderId = lambda: builderid
+        bldr.getCollapseRequestsFn = lambda: False
+        bldr.config.nextWorker = None
+        bldr.config.nextBuild = None
+        bldr.canStartBuild = lambda *args: True
+
+        worker = mock.Mock(spec=['isAvailable'], name=f'worker{builderid}')
+        worker.name = f'worker{builderid}'
+        bldr.workers = [worker]
+        bldr.getAvailableWorkers = lambda: [w for w in bldr.workers if w.isAvailable()]
+
+        def maybeStartBuild(worker, breqs):
+            worker.isAvailable.return_value = False
+            self.started_builds += 1
+            return defer.succeed(True)
+
+        bldr.maybeStartBuild = maybeStartBuild
+        self.botmaster.builders[name] = bldr
+        return bldr
+
+    @async_to_deferred
+    async def test_distribute(self):
+        builder_count = self.scaled(500)
+        builders = [self.create_builder(builderid) for builderid in range(1, builder_count + 1)]
+        await self.master.db.insert_test_data([
+            fakedb.Builder(id=bldr.getBuilderId(), name=bldr.name) for bldr in builders
+        ])
+        names = [bldr.name for bldr in builders]
+
+        async def setup():
+            # each run starts one build per builder, out of several pending
+            # requests
+            rows = []
+            for bldr in builders:
+                bldr.workers[0].isAvailable.return_value = True
+                for _ in range(self.REQUESTS_PER_BUILDER):
+                    rows.append(
+                        fakedb.BuildRequest(
+                            id=self.next_brid,
+                            buildsetid=11,
+                            builderid=bldr.getBuilderId(),
+                            submitted_at=130000 + self.next_brid,
+                        )
+                    )
+                    self.next_brid += 1
+            await self.master.db.insert_test_data(rows)
+            self.started_builds = 0
+
+        async def run():
+            for name in await self.brd._sortBuilders(names):
+                await self.brd._maybeStartBuildsOnBuilder(self.botmaster.builders[name])
+            self.assertEqual(self.started_builds, builder_count)
+
+        await self.benchmark(
+            'buildrequestdistributor.distribute',
+            run,
+            ops=builder_count,
+            setup=setup,
+            builders=builder_count,
+            requests_per_builder=self.REQUESTS_PER_BUILDER,
+        )
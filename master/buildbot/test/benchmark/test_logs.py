@@ -0,0 +1,101 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+
+
+class LogsBenchmark(benchmark.BenchmarkTestCase):
+    LINE = 'a line of a build log, long enough to look like compiler output ' * 2 + '\n'
+    LINES_PER_APPEND = 100
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        super().setUp()
+        self.master = yield fakemaster.make_master(self, wantDb=True)
+        yield self.master.db.insert_test_data([
+            fakedb.Worker(id=47, name='linux'),
+            fakedb.Buildset(id=20),
+            fakedb.Builder(id=88, name='b1'),
+            fakedb.BuildRequest(id=41, buildsetid=20, builderid=88),
+            fakedb.Master(id=88),
+            fakedb.Build(
+                id=30, buildrequestid=41, number=7, masterid=88, builderid=88, workerid=47
+            ),
+            fakedb.Step(id=101, buildid=30, number=1, name='one'),
+        ])
+        self.log_count = 0
+
+    @async_to_deferred
+    async def add_log(self):
+        self.log_count += 1
+        return await self.master.db.logs.addLog(
+            stepid=101, name=f'stdio{self.log_count}', slug=f'stdio{self.log_count}', type='s'
+        )
+
+    @async_to_deferred
+    async def do_test_append(self, compression):
+        self.master.config.logCompressionMethod = compression
+        appends = self.scaled(1000)
+        content = self.LINE * self.LINES_PER_APPEND
+
+        async def setup():
+            self.logid = await self.add_log()
+
+        async def run():
+            for _ in range(appends):
+                await self.master.db.logs.appendLog(self.logid, content)
+
+        await self.benchmark(
+            f'logs.append.{compression}',
+            run,
+            ops=appends * self.LINES_PER_APPEND,
+            setup=setup,
+            appends=appends,
+            lines_per_append=self.LINES_PER_APPEND,
+        )
+
+    def test_append_raw(self):
+        return self.do_test_append('raw')
+
+    def test_append_gz(self):
+        return self.do_test_append('gz')
+
+    @async_to_deferred
+    async def do_test_read(self, compression):
+        self.master.config.logCompressionMethod = compression
+        appends = self.scaled(1000)
+        num_lines = appends * self.LINES_PER_APPEND
+        logid = await self.add_log()
+        for _ in range(appends):
+            await self.master.db.logs.appendLog(logid, self.LINE * self.LINES_PER_APPEND)
+
+        async def run():
+            count = 0
+            async for _ in self.master.db.logs.iter_log_lines(logid, 0, num_lines - 1):
+                count += 1
+            self.assertEqual(count, num_lines)
+
+        await self.benchmark(f'logs.read.{compression}', run, ops=num_lines, lines=num_lines)
+
+    def test_read_raw(self):
+        return self.do_test_read('raw')
+
+    def test_read_gz(self):
+        return self.do_test_read('gz')
@@ -0,0 +1,82 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+
+from buildbot.mq import simple
+from buildbot.test.fake import fakemaster
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+
+
+class SimpleMQBenchmark(benchmark.BenchmarkTestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        super().setUp()
+        self.master = yield fakemaster.make_master(self)
+        self.mq = simple.SimpleMQ()
+        yield self.mq.setServiceParent(self.master)
+        yield self.mq.startService()
+        self.addCleanup(self.mq.stopService)
+        self.received = 0
+
+    def callback(self, routingKey, data):
+        self.received += 1
+
+    @async_to_deferred
+    async def test_fan_out(self):
+        # many consumers of the same messages, e.g. web UI clients watching
+        # all builds
+        consumers = self.scaled(1000)
+        messages = self.scaled(1000)
+        for _ in range(consumers):
+            await self.mq.startConsuming(self.callback, ('builds', None, None))
+
+        async def run():
+            self.received = 0
+            for i in range(messages):
+                self.mq.produce(('builds', str(i), 'new'), {'buildid': i})
+            self.assertEqual(self.received, consumers * messages)
+
+        await self.benchmark(
+            'mq.fan_out',
+            run,
+            ops=consumers * messages,
+            consumers=consumers,
+            messages=messages,
+        )
+
+    @async_to_deferred
+    async def test_dispatch(self):
+        # many consumers of distinct messages, e.g. one per running build;
+        # each message is delivered to a single consumer
+        consumers = self.scaled(10000)
+        messages = self.scaled(10000)
+        for i in range(consumers):
+            await self.mq.startConsuming(self.callback, ('builds', str(i), None))
+
+        async def run():
+            self.received = 0
+            for i in range(messages):
+                self.mq.produce(('builds', str(i % consumers), 'finished'), {'buildid': i})
+            self.assertEqual(self.received, messages)
+
+        await self.benchmark(
+            'mq.dispatch',
+            run,
+            ops=messages,
+            consumers=consumers,
+            messages=messages,
+        )
@@ -0,0 +1,51 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from buildbot.test.fake import fakemaster
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+
+# values for the captured path elements, by type flag
+_SAMPLE_VALUES = {'n': '12', 'i': 'builder-name', 's': 'some name', '': 'value'}
+
+
+def _sample_path(pattern):
+    path = []
+    for elt in pattern:
+        type_flag, sep, _ = elt.partition(':')
+        path.append(_SAMPLE_VALUES[type_flag] if sep else elt)
+    return tuple(path)
+
+
+class PathMatchBenchmark(benchmark.BenchmarkTestCase):
+    @async_to_deferred
+    async def test_route_data_endpoints(self):
+        master = await fakemaster.make_master(self, wantData=True)
+        matcher = master.data.realConnector.matcher
+        paths = [_sample_path(pattern) for pattern, _ in matcher.iterPatterns()]
+        rounds = self.scaled(100)
+
+        async def run():
+            for _ in range(rounds):
+                for path in paths:
+                    matcher[path]
+
+        await self.benchmark(
+            'pathmatch.route.data_endpoints',
+            run,
+            ops=rounds * len(paths),
+            patterns=len(paths),
+            rounds=rounds,
+        )
@@ -0,0 +1,65 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from buildbot.process.properties import Interpolate
+from buildbot.process.properties import Properties
+from buildbot.process.properties import Property
+from buildbot.process.properties import renderer
+from buildbot.test.fake.fakebuild import FakeBuild
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+
+
+class PropertiesBenchmark(benchmark.BenchmarkTestCase):
+    def setUp(self):
+        super().setUp()
+        self.props = Properties()
+        for i in range(100):
+            self.props.setProperty(f'prop{i}', f'value{i}', 'benchmark')
+        self.build = FakeBuild(props=self.props)
+
+    @async_to_deferred
+    async def do_test_render(self, name, value, expected):
+        renders = self.scaled(2000)
+
+        async def run():
+            for _ in range(renders):
+                rendered = await self.build.render(value)
+            self.assertEqual(rendered, expected)
+
+        await self.benchmark(f'properties.render.{name}', run, ops=renders, renders=renders)
+
+    def test_render_interpolate(self):
+        return self.do_test_render(
+            'interpolate',
+            Interpolate('make -j%(prop:prop1)s %(prop:prop2)s %(prop:missing:-default)s'),
+            'make -jvalue1 value2 default',
+        )
+
+    def test_render_command(self):
+        # a typical step command: a list mixing constants and renderables
+        @renderer
+        def upper(props):
+            return props.getProperty('prop3').upper()
+
+        return self.do_test_render(
+            'command',
+            ['make', Property('prop1'), Interpolate('--dir=%(prop:prop2)s'), upper, 'install'],
+            ['make', 'value1', '--dir=value2', 'VALUE3', 'install'],
+        )
+
+    def test_render_dict(self):
+        value = {f'ENV{i}': Interpolate(f'%(prop:prop{i})s') for i in range(20)}
+        return self.do_test_render('dict', value, {f'ENV{i}': f'value{i}' for i in range(20)})
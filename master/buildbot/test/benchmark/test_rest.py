@@ -0,0 +1,83 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+import json
+
+from twisted.internet import defer
+
+from buildbot.test import fakedb
+from buildbot.test.util import benchmark
+from buildbot.test.util import www
+from buildbot.util import bytes2unicode
+from buildbot.util.twisted import async_to_deferred
+from buildbot.www import rest
+
+
+class RestBenchmark(www.WwwTestMixin, benchmark.BenchmarkTestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        super().setUp()
+        self.master = yield self.make_master(url='h:/')
+        self.rsrc = rest.V2RootResource(self.master)
+        self.rsrc.reconfigResource(self.master.config)
+
+        def allow(*args, **kw):
+            return
+
+        self.master.www.assertUserAllowed = allow
+
+    @async_to_deferred
+    async def do_test_render_collection(self, name, path, count):
+        async def run():
+            await self.render_resource(self.rsrc, path)
+            content = json.loads(bytes2unicode(self.request.written))
+            self.assertEqual(content['meta']['total'], count)
+
+        await self.benchmark(f'rest.collection.{name}', run, ops=count, items=count)
+
+    @async_to_deferred
+    async def test_render_builds(self):
+        count = self.scaled(1000)
+        rows = [
+            fakedb.Master(id=88),
+            fakedb.Worker(id=47, name='linux'),
+            fakedb.Builder(id=77, name='builder'),
+            fakedb.Buildset(id=20),
+        ]
+        for i in range(1, count + 1):
+            rows.append(fakedb.BuildRequest(id=i, buildsetid=20, builderid=77))
+            rows.append(
+                fakedb.Build(
+                    id=i,
+                    number=i,
+                    buildrequestid=i,
+                    masterid=88,
+                    builderid=77,
+                    workerid=47,
+                    state_string='build finished',
+                )
+            )
+        await self.master.db.insert_test_data(rows)
+        await self.do_test_render_collection('builds', b'/builds', count)
+
+    @async_to_deferred
+    async def test_render_builders(self):
+        count = self.scaled(1000)
+        rows = [fakedb.Master(id=88)]
+        for i in range(1, count + 1):
+            rows.append(fakedb.Builder(id=i, name=f'builder{i}', description='a builder'))
+            rows.append(fakedb.BuilderMaster(builderid=i, masterid=88))
+        await self.master.db.insert_test_data(rows)
+        await self.do_test_render_collection('builders', b'/builders', count)
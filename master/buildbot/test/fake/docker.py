@@ -13,10 +13,37 @@
 #
 # Copyright Buildbot Team Members
 
+import queue
 
 __version__ = "4.0"
 
 
+class EventStream:
+    """The stream returned by Client.events(), closed like the stream of docker-py"""
+
+    _closed = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def __iter__(self):
+        while True:
+            event = self._queue.get()
+            if event is self._closed:
+                self._queue.task_done()
+                return
+            yield event
+            self._queue.task_done()
+
+    def put(self, event):
+        # returns once the reader of the stream is done with the event
+        self._queue.put(event)
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(self._closed)
+
+
 class Client:
     latest = None
     containerCreated = False
@@ -29,14 +56,26 @@ class Client:
         self._images = [{'RepoTags': ['busybox:latest', 'worker:latest', 'tester:latest']}]
         self._pullable = ['alpine:latest', 'tester:latest']
         self._pullCount = 0
+        self._imagesCount = 0
+        self._event_streams = []
         self._containers = {}
 
         if Client.containerCreated:
             self.create_container("some-default-image")
 
     def images(self):
+        self._imagesCount += 1
         return self._images
 
+    def events(self, filters=None, decode=None):
+        stream = EventStream()
+        self._event_streams.append(stream)
+        return stream
+
+    def emit_image_event(self, action, image):
+        for stream in self._event_streams:
+            stream.put({'Type': 'image', 'Action': action, 'Actor': {'ID': image}})
+
     def start(self, container):
         if self.start_exception is not None:
             raise self.start_exception  # pylint: disable=raising-bad-type
@@ -171,6 +171,8 @@ class HTTPClientService(service.SharedService):
         cert=None,
         allow_redirects=None,  # checks are not implemented
         proxies=None,  # checks are not implemented
+        coalesce_key=None,  # checks are not implemented
+        retry=False,  # checks are not implemented
     ) -> IHttpResponse:
         if ep.startswith('http://') or ep.startswith('https://'):
             pass
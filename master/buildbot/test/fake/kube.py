@@ -0,0 +1,221 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+import copy
+import json
+
+from twisted.internet import reactor
+from twisted.web import resource
+from twisted.web import server
+
+from buildbot.test.util.site import SiteWithClose
+from buildbot.util import bytes2unicode
+from buildbot.util import unicode2bytes
+
+
+class FakeKubeApiServer(resource.Resource):
+    """
+    A local kubernetes API server that serves the pods of the namespaces: create, delete, read
+    the status, list and watch them, with an optional equality based label selector. The tests
+    change the state of the pods with the methods of this class.
+
+    The deletion of the pods is immediate, unless hold_deletion is set: the pods are then only
+    marked for deletion until finish_deletion() is called.
+    """
+
+    isLeaf = True
+
+    def __init__(self):
+        super().__init__()
+        self.pods = {}
+        self.resource_version = 0
+        # the resource versions up to this one cannot be watched anymore
+        self.expired_version = 0
+        self.hold_deletion = False
+        # (method, path) of the requests received, the watches excepted
+        self.requests = []
+        self._events = []
+        self._watches = []
+        self.site = None
+        self.port = None
+
+    def listen(self, testcase):
+        self.site = SiteWithClose(self)
+        testcase.addCleanup(self.site.close_connections)
+        testcase.addCleanup(self.site.stopFactory)
+        self.port = reactor.listenTCP(0, self.site, interface='127.0.0.1')
+        testcase.addCleanup(self.port.stopListening)
+        testcase.addCleanup(self.close_watches)
+        return f"http://127.0.0.1:{self.port.getHost().port}"
+
+    def has_watch(self, namespace):
+        return any(ns == namespace for ns, _, _ in self._watches)
+
+    def count_requests(self, method, path_suffix=''):
+        return len([r for r in self.requests if r[0] == method and r[1].endswith(path_suffix)])
+
+    def _add_event(self, event_type, pod):
+        self.resource_version += 1
+        pod['metadata']['resourceVersion'] = str(self.resource_version)
+        event = (
+            self.resource_version,
+            pod['metadata']['namespace'],
+            event_type,
+            copy.deepcopy(pod),
+        )
+        self._events.append(event)
+        for namespace, selector, request in list(self._watches):
+            if namespace == event[1] and self._matches(event[3], selector):
+                self._write_event(request, event_type, event[3])
+
+    def _write_event(self, request, event_type, obj):
+        request.write(unicode2bytes(json.dumps({'type': event_type, 'object': obj}) + '\n'))
+
+    def create_pod(self, namespace, pod):
+        pod = copy.deepcopy(pod)
+        pod['metadata']['namespace'] = namespace
+        pod['status'] = {'phase': 'Pending'}
+        self.pods[(namespace, pod['metadata']['name'])] = pod
+        self._add_event('ADDED', pod)
+        return pod
+
+    def set_pod_status(self, namespace, name, **status):
+        pod = self.pods[(namespace, name)]
+        pod['status'].update(status)
+        self._add_event('MODIFIED', pod)
+
+    def delete_pod(self, namespace, name):
+        pod = self.pods.get((namespace, name))
+        if pod is None:
+            return None
+        if self.hold_deletion:
+            pod['metadata']['deletionTimestamp'] = '2024-01-01T00:00:00Z'
+            self._add_event('MODIFIED', pod)
+        else:
+            self.finish_deletion(namespace, name)
+        return pod
+
+    def finish_deletion(self, namespace, name):
+        pod = self.pods.pop((namespace, name))
+        self._add_event('DELETED', pod)
+
+    def expire_watches(self):
+        """Make the current resource versions too old to be watched, as after a compaction"""
+        self.expired_version = self.resource_version
+        for _, _, request in list(self._watches):
+            self._write_event(
+                request, 'ERROR', {'kind': 'Status', 'code': 410, 'reason': 'Expired'}
+            )
+            request.finish()
+
+    def close_watches(self):
+        """End the current watch streams, as the API server does after their timeout"""
+        for _, _, request in list(self._watches):
+            request.finish()
+
+    def _parse_selector(self, selector):
+        if not selector:
+            return {}
+        return dict(term.split('=', 1) for term in selector.split(','))
+
+    def _matches(self, pod, selector):
+        labels = pod['metadata'].get('labels') or {}
+        return all(labels.get(key) == value for key, value in selector.items())
+
+    def _reply(self, request, code, content):
+        request.setResponseCode(code)
+        request.setHeader(b'content-type', b'application/json')
+        return unicode2bytes(json.dumps(content))
+
+    def _not_found(self, request, name):
+        return self._reply(
+            request,
+            404,
+            {'kind': 'Status', 'code': 404, 'reason': 'NotFound', 'message': f'{name} not found'},
+        )
+
+    def render(self, request):
+        method = bytes2unicode(request.method)
+        path = bytes2unicode(request.path)
+        args = {bytes2unicode(k): bytes2unicode(v[0]) for k, v in request.args.items()}
+        parts = path.strip('/').split('/')
+        if parts[:3] != ['api', 'v1', 'namespaces'] or len(parts) < 5 or parts[4] != 'pods':
+            return self._not_found(request, path)
+        namespace = parts[3]
+        selector = self._parse_selector(args.get('labelSelector'))
+
+        if len(parts) == 5 and method == 'GET' and args.get('watch') in ('1', 'true'):
+            return self._render_watch(
+                request, namespace, selector, int(args.get('resourceVersion', 0))
+            )
+
+        self.requests.append((method, path))
+        if len(parts) == 5 and method == 'GET':
+            items = [
+                pod
+                for (ns, _), pod in self.pods.items()
+                if ns == namespace and self._matches(pod, selector)
+            ]
+            return self._reply(
+                request,
+                200,
+                {
+                    'kind': 'PodList',
+                    'metadata': {'resourceVersion': str(self.resource_version)},
+                    'items': items,
+                },
+            )
+        if len(parts) == 5 and method == 'POST':
+            pod = json.loads(bytes2unicode(request.content.read()))
+            name = pod['metadata']['name']
+            if (namespace, name) in self.pods:
+                return self._reply(
+                    request,
+                    409,
+                    {'kind': 'Status', 'reason': 'AlreadyExists', 'message': f'{name} exists'},
+                )
+            return self._reply(request, 201, self.create_pod(namespace, pod))
+
+        name = parts[5]
+        if method == 'DELETE':
+            pod = self.delete_pod(namespace, name)
+            if pod is None:
+                return self._not_found(request, name)
+            return self._reply(request, 200, pod)
+        if method == 'GET':
+            pod = self.pods.get((namespace, name))
+            if pod is None:
+                return self._not_found(request, name)
+            return self._reply(request, 200, pod)
+        return self._not_found(request, path)
+
+    def _render_watch(self, request, namespace, selector, resource_version):
+        request.setResponseCode(200)
+        request.setHeader(b'content-type', b'application/json')
+        if resource_version < self.expired_version:
+            self._write_event(
+                request, 'ERROR', {'kind': 'Status', 'code': 410, 'reason': 'Expired'}
+            )
+            request.finish()
+            return server.NOT_DONE_YET
+
+        for version, ns, event_type, pod in self._events:
+            if ns == namespace and version > resource_version and self._matches(pod, selector):
+                self._write_event(request, event_type, pod)
+
+        watch = (namespace, selector, request)
+        self._watches.append(watch)
+        request.notifyFinish().addBoth(lambda _: self._watches.remove(watch))
+        return server.NOT_DONE_YET
@@ -42,6 +42,7 @@ from .codebases import CodebaseCommit
 from .connector import FakeDBConnector
 from .logs import Log
 from .logs import LogChunk
+from .logs import LogCompressionDictionary
 from .masters import Master
 from .projects import Project
 from .schedulers import Scheduler
@@ -89,6 +90,7 @@ __all__ = [
     'FakeDBConnector',
     'Log',
     'LogChunk',
+    'LogCompressionDictionary',
     'Master',
     'Object',
     'ObjectState',
@@ -45,6 +45,7 @@ from .codebases import CodebaseBranch
 from .codebases import CodebaseCommit
 from .logs import Log
 from .logs import LogChunk
+from .logs import LogCompressionDictionary
 from .masters import Master
 from .projects import Project
 from .schedulers import Scheduler
@@ -456,6 +457,7 @@ class FakeDBConnector(DBConnector):
                         'complete': row.complete,
                         'num_lines': row.num_lines,
                         'type': row.type,
+                        'dictionary_id': row.dictionary_id,
                     }
                 ],
             )
@@ -482,6 +484,24 @@ class FakeDBConnector(DBConnector):
             self._thd_post_insert(conn, self.model.logchunks)
         return non_matched_rows
 
+    def _thd_maybe_insert_log_compression_dictionary(self, conn, rows):
+        matched_rows, non_matched_rows = self._match_rows(rows, LogCompressionDictionary)
+        for row in matched_rows:
+            conn.execute(
+                self.model.log_compression_dictionaries.insert(),
+                [
+                    {
+                        'id': row.id,
+                        'builderid': row.builderid,
+                        'created_at': row.created_at,
+                        'content': row.content,
+                    }
+                ],
+            )
+        if matched_rows:
+            self._thd_post_insert(conn, self.model.log_compression_dictionaries)
+        return non_matched_rows
+
     def _thd_maybe_insert_master(self, conn, rows):
         matched_rows, non_matched_rows = self._match_rows(rows, Master)
         for row in matched_rows:
@@ -958,6 +978,7 @@ class FakeDBConnector(DBConnector):
             remaining = self._thd_maybe_insert_changesource(conn, remaining)
             remaining = self._thd_maybe_insert_changesource_master(conn, remaining)
             remaining = self._thd_maybe_insert_log(conn, remaining)
+            remaining = self._thd_maybe_insert_log_compression_dictionary(conn, remaining)
             remaining = self._thd_maybe_insert_log_chunk(conn, remaining)
             remaining = self._thd_maybe_insert_scheduler(conn, remaining)
             remaining = self._thd_maybe_insert_scheduler_change(conn, remaining)
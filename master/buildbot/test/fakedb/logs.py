@@ -23,7 +23,15 @@ class Log(Row):
     id_column = 'id'
 
     def __init__(
-        self, id=None, name='log29', slug=None, stepid=None, complete=0, num_lines=0, type='s'
+        self,
+        id=None,
+        name='log29',
+        slug=None,
+        stepid=None,
+        complete=0,
+        num_lines=0,
+        type='s',
+        dictionary_id=None,
     ):
         if slug is None:
             slug = name
@@ -35,6 +43,7 @@ class Log(Row):
             complete=complete,
             num_lines=num_lines,
             type=type,
+            dictionary_id=dictionary_id,
         )
 
 
@@ -52,3 +61,13 @@ class LogChunk(Row):
             content=content,
             compressed=compressed,
         )
+
+
+class LogCompressionDictionary(Row):
+    table = "log_compression_dictionaries"
+
+    id_column = 'id'
+    binary_columns = ('content',)
+
+    def __init__(self, id=None, builderid=None, created_at=0, content=b''):
+        super().__init__(id=id, builderid=builderid, created_at=created_at, content=content)
@@ -115,6 +115,8 @@ class TestSetupPyEntryPoints(unittest.TestCase):
             'buildbot.util.deferwaiter.DeferWaiter',
             "buildbot.util.deferwaiter.NonRepeatedActionHandler",
             'buildbot.util.deferwaiter.RepeatedActionHandler',
+            'buildbot.util.dockerimages.DockerImageIndex',
+            'buildbot.util.dockerimages.DockerImageService',
             'buildbot.util.git.GitMixin',
             'buildbot.util.git.GitStepMixin',
             'buildbot.util.git.GitServiceAuth',
@@ -122,11 +124,14 @@ class TestSetupPyEntryPoints(unittest.TestCase):
             'buildbot.util.git.GitStepAuth',
             'buildbot.util.giturlparse.GitUrl',
             'buildbot.util.httpclientservice.HTTPClientService',
+            'buildbot.util.httpclientservice.HTTPQueueFullError',
             'buildbot.util.httpclientservice.HTTPSession',
             'buildbot.util.httpclientservice.TreqResponseWrapper',
             'buildbot.util.httpclientservice.TxRequestsResponseWrapper',
             'buildbot.util.kubeclientservice.KubeClientService',
             'buildbot.util.kubeclientservice.KubeConfigLoaderBase',
+            'buildbot.util.kubeclientservice.KubePodWatch',
+            'buildbot.util.kubeclientservice.KubeWatchInterruptedError',
             'buildbot.util.latent.CompatibleLatentWorkerMixin',
             'buildbot.util.lineboundaries.LineBoundaryFinder',
             'buildbot.util.lru.AsyncLRUCache',
@@ -161,7 +166,9 @@ class TestSetupPyEntryPoints(unittest.TestCase):
             'buildbot.util.state.StateMixin',
             'buildbot.util.subscription.Subscription',
             'buildbot.util.subscription.SubscriptionPoint',
+            'buildbot.util.tarstream.TarStreamExtractor',
             'buildbot.util.test_result_submitter.TestResultSubmitter',
+            'buildbot.util.tuplematch.TupleMatchIndex',
             "buildbot.util.watchdog.Watchdog",
             "buildbot.util.twisted.ThreadPool",
         }
@@ -170,6 +177,7 @@ class TestSetupPyEntryPoints(unittest.TestCase):
     def test_reporters(self):
         known_not_exported = {
             'buildbot.reporters.base.ReporterBase',
+            'buildbot.reporters.context.ReportContextCache',
             'buildbot.reporters.generators.utils.BuildStatusGeneratorMixin',
             'buildbot.reporters.gerrit.DEFAULT_REVIEW',
             'buildbot.reporters.gerrit.DEFAULT_SUMMARY',
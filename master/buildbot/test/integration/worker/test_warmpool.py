@@ -0,0 +1,189 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.config import BuilderConfig
+from buildbot.interfaces import LatentWorkerFailedToSubstantiate
+from buildbot.interfaces import LatentWorkerSubstantiatiationCancelled
+from buildbot.process.factory import BuildFactory
+from buildbot.process.properties import Interpolate
+from buildbot.process.properties import Properties
+from buildbot.process.results import SUCCESS
+from buildbot.test.fake.latent import LatentController
+from buildbot.test.fake.step import BuildStepController
+from buildbot.test.util.config import ConfigErrorsMixin
+from buildbot.test.util.integration import RunFakeMasterTestCase
+from buildbot.test.util.misc import TimeoutableTestCase
+from buildbot.worker.warmpool import WarmPoolManager
+
+
+class WarmPool(TimeoutableTestCase, RunFakeMasterTestCase):
+    def tearDown(self):
+        self.flushLoggedErrors(LatentWorkerSubstantiatiationCancelled)
+        super().tearDown()
+
+    @defer.inlineCallbacks
+    def create_pool_config(self, count, **kwargs):
+        controllers = [
+            LatentController(self, f'local{i}', build_wait_timeout=10, warm_pool='pool', **kwargs)
+            for i in range(count)
+        ]
+        self.stepcontroller = BuildStepController()
+        config_dict = {
+            'builders': [
+                BuilderConfig(
+                    name="testy",
+                    workernames=[c.worker.name for c in controllers],
+                    factory=BuildFactory([self.stepcontroller.step]),
+                    collapseRequests=False,
+                ),
+            ],
+            'workers': [c.worker for c in controllers],
+            'protocols': {'null': {}},
+            # Disable checks about missing scheduler.
+            'multiMaster': True,
+        }
+        yield self.setup_master(config_dict)
+        builder_id = yield self.master.data.updates.findBuilderId('testy')
+        self.manager = WarmPoolManager.lookup(self.master)
+        return controllers, builder_id
+
+    def get_started(self, controllers):
+        return [c.worker.name for c in controllers if not c.stopped]
+
+    @defer.inlineCallbacks
+    def test_starts_idle_worker(self):
+        controllers, _ = yield self.create_pool_config(2)
+        self.reactor.advance(1)
+        self.assertEqual(self.get_started(controllers), ['local0'])
+
+        yield controllers[0].start_instance(True)
+        self.assertTrue(controllers[0].worker.is_warm)
+
+        # the idle worker is kept beyond build_wait_timeout
+        self.reactor.advance(30)
+        self.assertEqual(self.get_started(controllers), ['local0'])
+        self.assertEqual(self.manager.get_stats()['pool']['idle_seconds'], 30)
+
+        for c in controllers:
+            yield c.auto_stop(True)
+
+    @defer.inlineCallbacks
+    def test_build_uses_idle_worker_and_refills(self):
+        controllers, builder_id = yield self.create_pool_config(2)
+        self.reactor.advance(1)
+        yield controllers[0].start_instance(True)
+
+        yield self.create_build_request([builder_id])
+        self.assertTrue(self.stepcontroller.running)
+        self.assertEqual(controllers[0].worker.warm_pool_hits, 1)
+
+        # the pool starts the other worker while the idle one is used
+        self.reactor.advance(1)
+        self.assertTrue(controllers[1].starting)
+        yield controllers[1].start_instance(True)
+
+        self.stepcontroller.finish_step(SUCCESS)
+        yield self.assertBuildResults(1, SUCCESS)
+
+        # only one of the idle workers is kept
+        for c in controllers:
+            yield c.auto_stop(True)
+        self.reactor.advance(10)
+        self.assertEqual(len(self.get_started(controllers)), 1)
+        self.assertEqual(self.manager.get_stats()['pool']['idle'], 1)
+
+    @defer.inlineCallbacks
+    def test_scales_with_queue_depth(self):
+        controllers, builder_id = yield self.create_pool_config(
+            3, warm_pool_min_idle=0, warm_pool_max_idle=2
+        )
+        self.reactor.advance(1)
+        self.assertEqual(self.get_started(controllers), [])
+
+        # the workers are busy starting, so that two requests wait
+        for _ in range(5):
+            yield self.create_build_request([builder_id])
+        self.assertEqual(self.master.botmaster.brd.getRecentQueueDepth(['testy']), 2)
+
+        self.stepcontroller.auto_finish_step(SUCCESS)
+        for c in controllers:
+            yield c.auto_stop(True)
+            yield c.start_instance(True)
+        for i in range(1, 6):
+            yield self.assertBuildResults(i, SUCCESS)
+
+        # the recent queue depth keeps two of the workers idle
+        self.reactor.advance(10)
+        self.assertEqual(len(self.get_started(controllers)), 2)
+
+        # until the requests are forgotten
+        self.reactor.advance(300)
+        self.assertEqual(self.get_started(controllers), [])
+
+    @defer.inlineCallbacks
+    def test_releases_idle_worker_incompatible_with_build(self):
+        controllers, builder_id = yield self.create_pool_config(
+            1, kind=Interpolate('%(prop:worker_kind)s')
+        )
+        self.reactor.advance(1)
+        yield controllers[0].start_instance(True)
+        self.assertEqual((yield controllers[0].get_started_kind()), '')
+
+        # the idle worker was started without the build properties, so it is released instead of
+        # being kept by the pool while the build waits
+        yield controllers[0].auto_stop(True)
+        controllers[0].auto_start(True)
+        yield self.create_build_request([builder_id], properties=Properties(worker_kind='a'))
+        self.reactor.advance(0.1)
+        self.assertTrue(self.stepcontroller.running)
+        self.assertEqual((yield controllers[0].get_started_kind()), 'a')
+
+        self.stepcontroller.finish_step(SUCCESS)
+        yield self.assertBuildResults(1, SUCCESS)
+
+    @defer.inlineCallbacks
+    def test_failed_start_quarantines_worker(self):
+        controllers, _ = yield self.create_pool_config(1)
+        yield controllers[0].auto_stop(True)
+        self.reactor.advance(1)
+        yield controllers[0].start_instance(False)
+        self.flushLoggedErrors(LatentWorkerFailedToSubstantiate)
+
+        self.assertIsNotNone(controllers[0].worker.quarantine_timer)
+        self.reactor.advance(1)
+        self.assertTrue(controllers[0].stopped)
+
+        # the pool tries again once the worker leaves quarantine
+        self.reactor.advance(controllers[0].worker.quarantine_initial_timeout)
+        self.reactor.advance(1)
+        self.assertTrue(controllers[0].starting)
+        yield controllers[0].start_instance(True)
+
+
+class WarmPoolConfig(ConfigErrorsMixin, unittest.TestCase):
+    def test_config_errors(self):
+        with self.assertRaisesConfigError("warm_pool must be a string"):
+            LatentController(self, 'local', warm_pool=3)
+        with self.assertRaisesConfigError("warm_pool_min_idle must be a non-negative integer"):
+            LatentController(self, 'local', warm_pool='pool', warm_pool_min_idle=-1)
+        with self.assertRaisesConfigError("warm_pool_max_idle must be an integer"):
+            LatentController(
+                self, 'local', warm_pool='pool', warm_pool_min_idle=2, warm_pool_max_idle=1
+            )
+        with self.assertRaisesConfigError("warm_pool requires a positive build_wait_timeout"):
+            LatentController(self, 'local', warm_pool='pool', build_wait_timeout=0)
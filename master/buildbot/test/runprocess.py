@@ -61,6 +61,10 @@ class MasterRunProcessMixin:
         if not collect_stderr and stderr_is_error and stderr:
             rc = -1
 
+        if callable(collect_stdout):
+            collect_stdout(stdout)
+            collect_stdout = False
+
         if collect_stdout and collect_stderr:
             return defer.succeed((rc, stdout, stderr))
         if collect_stdout:
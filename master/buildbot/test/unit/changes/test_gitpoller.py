@@ -45,6 +45,39 @@ from buildbot.util import unicode2bytes
 from buildbot.util.git_credential import GitCredentialOptions
 from buildbot.util.twisted import async_to_deferred
 
+# see gitpoller._COMMIT_LOG_FORMAT
+LOG_FORMAT_ARGS = [
+    '--name-only',
+    '-m',
+    '--format=%x00%H%x00%P%x00%ct%x00%aN <%aE>%x00%cN <%cE>%x00%s%n%b%x00',
+]
+
+
+def commit_log_output(revs, first_parent=''):
+    """
+    Returns the output of git log for the given revisions, oldest first, with made-up commit
+    information. There is a separate test suite for the parsing of git log, no need to complicate
+    each test.
+    """
+    output = b''
+    parent = first_parent
+    for rev in revs:
+        output += b'\0'.join(
+            unicode2bytes(field)
+            for field in [
+                '',
+                rev,
+                parent,
+                '1273258009',
+                'by:' + rev[:8],
+                'by:' + rev[:8],
+                'hello!\n',
+                '\n/etc/' + rev[:3] + '\n',
+            ]
+        )
+        parent = rev
+    return output
+
 
 class TestGitPollerBase(
     MasterRunProcessMixin,
@@ -76,33 +109,6 @@ class TestGitPollerBase(
 
         self.poller = yield self.attachChangeSource(self.createPoller())
 
-    def patch_poller_get_commit_info(self, poller, timestamp):
-        # There is a separate test suite for the methods below, no need to complicate each test
-        def get_timestamp(rev):
-            return defer.succeed(timestamp)
-
-        self.patch(self.poller, '_get_commit_timestamp', get_timestamp)
-
-        def author(rev):
-            return defer.succeed('by:' + rev[:8])
-
-        self.patch(self.poller, '_get_commit_author', author)
-
-        def committer(rev):
-            return defer.succeed('by:' + rev[:8])
-
-        self.patch(self.poller, '_get_commit_committer', committer)
-
-        def files(rev):
-            return defer.succeed(['/etc/' + rev[:3]])
-
-        self.patch(self.poller, '_get_commit_files', files)
-
-        def comments(rev):
-            return defer.succeed('hello!')
-
-        self.patch(self.poller, '_get_commit_comments', comments)
-
     @async_to_deferred
     async def set_last_rev(self, state: dict[str, str]) -> None:
         await self.poller.setState('lastRev', state)
@@ -118,144 +124,117 @@ class TestGitPollerBase(
 class TestGitPoller(TestGitPollerBase):
     dummyRevStr = '12345abcde'
 
-    @defer.inlineCallbacks
-    def _perform_git_output_test(
-        self, methodToTest, args, desiredGoodOutput, desiredGoodResult, emptyRaisesException=True
-    ):
+    def expect_get_commits(self, stdout=b'', exit=0):
         self.expect_commands(
-            ExpectMasterShell(['git', *args]).workdir(self.POLLER_WORKDIR),
+            ExpectMasterShell(['git', 'log', *LOG_FORMAT_ARGS, '--no-walk', self.dummyRevStr, '--'])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(stdout)
+            .exit(exit)
         )
 
-        # we should get an Exception with empty output from git
-        try:
-            yield methodToTest(self.dummyRevStr)
-            if emptyRaisesException:
-                self.fail("run_process should have failed on empty output")
-        except Exception as error:
-            if not emptyRaisesException:
-                import traceback
-
-                traceback.print_exc()
-                self.fail("run_process should NOT have failed on empty output: " + repr(error))
-
-        self.assert_all_commands_ran()
-
-        # and the method shouldn't suppress any exceptions
-        self.expect_commands(
-            ExpectMasterShell(['git', *args]).workdir(self.POLLER_WORKDIR).exit(1),
+    @defer.inlineCallbacks
+    def test_get_commits(self):
+        self.expect_get_commits(
+            b'\0'.join([
+                b'',
+                b'12345abcde',
+                b'0123456789 abcdef',
+                b'1273258009',
+                b'Sammy Jankis <email@example.com>',
+                b'Sammy Committer <committer@example.com>',
+                b'this is a commit message\n\nthat is multiline\n',
+                b'\nfile1\n"\146ile_octal"\nfile space\n',
+                b'6789abcdef',
+                b'',
+                b'1273258010',
+                b'Sammy Jankis <email@example.com>',
+                b'Sammy Jankis <email@example.com>',
+                b'\n',
+                b'',
+            ])
         )
-
-        try:
-            yield methodToTest(self.dummyRevStr)
-            self.fail("run_process should have failed on stderr output")
-        except Exception:
-            pass
-
+        commits = yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
         self.assert_all_commands_ran()
-
-        # finally we should get what's expected from good output
-        self.expect_commands(
-            ExpectMasterShell(['git', *args]).workdir(self.POLLER_WORKDIR).stdout(desiredGoodOutput)
+        self.assertEqual(
+            commits,
+            [
+                gitpoller._CommitInfo(
+                    revision='12345abcde',
+                    parents=['0123456789', 'abcdef'],
+                    timestamp=1273258009,
+                    author='Sammy Jankis <email@example.com>',
+                    committer='Sammy Committer <committer@example.com>',
+                    comments='this is a commit message\n\nthat is multiline',
+                    files=['file1', 'file_octal', 'file space'],
+                ),
+                gitpoller._CommitInfo(
+                    revision='6789abcdef',
+                    parents=[],
+                    timestamp=1273258010,
+                    author='Sammy Jankis <email@example.com>',
+                    committer='Sammy Jankis <email@example.com>',
+                    comments='',
+                    files=[],
+                ),
+            ],
         )
 
-        r = yield methodToTest(self.dummyRevStr)
+    @defer.inlineCallbacks
+    def test_get_commits_no_timestamps(self):
+        self.poller.usetimestamps = False
+        self.expect_get_commits(commit_log_output([self.dummyRevStr]))
+        commits = yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
+        self.assertEqual(commits[0].timestamp, None)
 
-        self.assertEqual(r, desiredGoodResult)
-        # check types
-        if isinstance(r, str):
-            self.assertIsInstance(r, str)
-        elif isinstance(r, list):
-            for e in r:
-                self.assertIsInstance(e, str)
+    @defer.inlineCallbacks
+    def test_get_commits_empty(self):
+        self.expect_get_commits()
+        commits = yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
+        self.assertEqual(commits, [])
 
-        self.assert_all_commands_ran()
+    @defer.inlineCallbacks
+    def test_get_commits_failure(self):
+        self.expect_get_commits(exit=1)
+        with self.assertRaises(OSError):
+            yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
 
-    def test_get_commit_author(self):
-        authorStr = 'Sammy Jankis <email@example.com>'
-        authorBytes = unicode2bytes(authorStr)
-        return self._perform_git_output_test(
-            self.poller._get_commit_author,
-            ['log', '--no-walk', '--format=%aN <%aE>', self.dummyRevStr, '--'],
-            authorBytes,
-            authorStr,
-        )
-
-    def test_get_commit_committer(self):
-        committerStr = 'Sammy Jankis <email@example.com>'
-        committerBytes = unicode2bytes(committerStr)
-        return self._perform_git_output_test(
-            self.poller._get_commit_committer,
-            ['log', '--no-walk', '--format=%cN <%cE>', self.dummyRevStr, '--'],
-            committerBytes,
-            committerStr,
-        )
-
-    def _test_get_commit_comments(self, commentStr):
-        commentBytes = unicode2bytes(commentStr)
-        return self._perform_git_output_test(
-            self.poller._get_commit_comments,
-            ['log', '--no-walk', '--format=%s%n%b', self.dummyRevStr, '--'],
-            commentBytes,
-            commentStr,
-            emptyRaisesException=False,
-        )
-
-    def test_get_commit_comments(self):
-        comments = ['this is a commit message\n\nthat is multiline', 'single line message', '']
-        return defer.DeferredList(
-            [self._test_get_commit_comments(commentStr) for commentStr in comments],
-            consumeErrors=True,
-        )
-
-    def test_get_commit_files(self):
-        filesBytes = b'\n\nfile1\nfile2\n"\146ile_octal"\nfile space'
-        filesRes = ['file1', 'file2', 'file_octal', 'file space']
-        return self._perform_git_output_test(
-            self.poller._get_commit_files,
-            [
-                'log',
-                '--name-only',
-                '--no-walk',
-                '--format=%n',
-                '-m',
-                '--first-parent',
-                self.dummyRevStr,
-                '--',
-            ],
-            filesBytes,
-            filesRes,
-            emptyRaisesException=False,
+    @defer.inlineCallbacks
+    def test_get_commits_no_author(self):
+        self.expect_get_commits(
+            b'\0'.join([b'', b'12345abcde', b'', b'1273258009', b'', b'', b'\n', b''])
         )
+        with self.assertRaises(OSError):
+            yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
 
-    def test_get_commit_files_with_space_in_changed_files(self):
-        filesBytes = b'normal_directory/file1\ndirectory with space/file2'
-        filesStr = bytes2unicode(filesBytes)
-        return self._perform_git_output_test(
-            self.poller._get_commit_files,
-            [
-                'log',
-                '--name-only',
-                '--no-walk',
-                '--format=%n',
-                '-m',
-                '--first-parent',
-                self.dummyRevStr,
-                '--',
-            ],
-            filesBytes,
-            [l for l in filesStr.splitlines() if l.strip()],
-            emptyRaisesException=False,
+    @defer.inlineCallbacks
+    def test_get_commits_bad_timestamp(self):
+        self.expect_get_commits(
+            commit_log_output([self.dummyRevStr])
+            + b'\0'.join([b'', b'6789abcdef', b'', b'notatime', b'a', b'c', b'\n', b''])
         )
+        with self.assertRaises(ValueError):
+            yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
 
-    def test_get_commit_timestamp(self):
-        stampBytes = b'1273258009'
-        stampStr = bytes2unicode(stampBytes)
-        return self._perform_git_output_test(
-            self.poller._get_commit_timestamp,
-            ['log', '--no-walk', '--format=%ct', self.dummyRevStr, '--'],
-            stampBytes,
-            float(stampStr),
-        )
+    @defer.inlineCallbacks
+    def test_get_commits_truncated(self):
+        self.expect_get_commits(b'\0'.join([b'', b'12345abcde', b'', b'1273258009']))
+        with self.assertRaises(ValueError):
+            yield self.poller._get_commits(['--no-walk', self.dummyRevStr, '--'])
+
+    def test_commit_log_parser_chunks(self):
+        output = commit_log_output(['12345abcde', '6789abcdef', '0123456789'])
+        expected = []
+        gitpoller._CommitLogParser(expected.append).feed(output)
+
+        for chunk_size in (1, 2, 7, 64):
+            commits = []
+            parser = gitpoller._CommitLogParser(commits.append)
+            for i in range(0, len(output), chunk_size):
+                parser.feed(output[i : i + chunk_size])
+            parser.finish()
+            self.assertEqual(len(commits), 3)
+            # the files of the last commit are only known once the output is finished
+            self.assertEqual(commits[:2], expected)
 
     def test_describe(self):
         self.assertSubstring("GitPoller", self.poller.describe())
@@ -435,9 +414,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
@@ -514,9 +494,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '--',
@@ -625,9 +606,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
@@ -635,9 +617,9 @@ class TestGitPoller(TestGitPollerBase):
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                commit_log_output([
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
                 ])
             ),
             ExpectMasterShell([
@@ -650,20 +632,23 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'])),
+            .stdout(
+                commit_log_output([
+                    '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
+                ])
+            ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = ['master', 'release']
         yield self.set_last_rev({
@@ -763,9 +748,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '--',
@@ -816,19 +802,29 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b''),
+            ExpectMasterShell([
+                'git',
+                'log',
+                *LOG_FORMAT_ARGS,
+                '--no-walk',
+                '--first-parent',
+                '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                '--',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(commit_log_output(['4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = ['release']
         yield self.set_last_rev({'master': '4423cdbcbb89c14e50dd5f4152415afd686c5241'})
@@ -891,9 +887,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^0ba9d553b7217ab4bbad89ad56dc0332c7d57a8c',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
@@ -901,10 +898,19 @@ class TestGitPoller(TestGitPollerBase):
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b''),
+            ExpectMasterShell([
+                'git',
+                'log',
+                *LOG_FORMAT_ARGS,
+                '--no-walk',
+                '--first-parent',
+                '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                '--',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(commit_log_output(['4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = ['release']
         yield self.set_last_rev({
@@ -970,19 +976,29 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^0ba9d553b7217ab4bbad89ad56dc0332c7d57a8c',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(b''),
+            ExpectMasterShell([
+                'git',
+                'log',
+                *LOG_FORMAT_ARGS,
+                '--no-walk',
+                '--first-parent',
+                '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                '--',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(commit_log_output(['4423cdbcbb89c14e50dd5f4152415afd686c5241'])),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = ['release']
         yield self.set_last_rev({'master': '0ba9d553b7217ab4bbad89ad56dc0332c7d57a8c'})
@@ -1041,24 +1057,23 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                commit_log_output([
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
                 ])
             ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = True
         yield self.set_last_rev({
@@ -1122,9 +1137,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '--',
@@ -1170,9 +1186,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
@@ -1180,9 +1197,9 @@ class TestGitPoller(TestGitPollerBase):
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                commit_log_output([
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
                 ])
             ),
             ExpectMasterShell([
@@ -1195,20 +1212,23 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'])),
+            .stdout(
+                commit_log_output([
+                    '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
+                ])
+            ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = True
         yield self.set_last_rev({
@@ -1278,9 +1298,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
@@ -1288,15 +1309,13 @@ class TestGitPoller(TestGitPollerBase):
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                commit_log_output([
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
                 ])
             ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         class TestCallable:
             def __call__(self, branch):
@@ -1365,20 +1384,23 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
                 '^bf0b01df6d00ae8d1ffa0b2e2acbe642a6cd35d5',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
-            .stdout(b'\n'.join([b'9118f4ab71963d23d02d4bdc54876ac8bf05acf2'])),
+            .stdout(
+                commit_log_output([
+                    '9118f4ab71963d23d02d4bdc54876ac8bf05acf2',
+                ])
+            ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         def pullFilter(branch):
             """
             Note that this isn't useful in practice, because it will only
@@ -1442,23 +1464,23 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                commit_log_output([
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
                 ])
             ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
         # do the poll
         yield self.set_last_rev({'master': 'fa3ae8ed68e664d4db24798611b352e3c6509930'})
         self.poller.doPoll.running = True
@@ -1531,24 +1553,23 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                commit_log_output([
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
                 ])
             ),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = True
 
@@ -1630,9 +1651,10 @@ class TestGitPoller(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 'fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
@@ -1741,9 +1763,10 @@ class TestGitPollerDefaultBranch(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '737b94eca1ddde3dd4a0040b25c8a25fe973fe09',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '--',
@@ -1792,9 +1815,10 @@ class TestGitPollerDefaultBranch(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '737b94eca1ddde3dd4a0040b25c8a25fe973fe09',
                 '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '--',
@@ -1879,35 +1903,27 @@ class TestGitPollerWithCodebase(TestGitPollerBase):
             ExpectMasterShell([
                 'git',
                 'log',
+                *LOG_FORMAT_ARGS,
                 '--ignore-missing',
                 '--first-parent',
-                '--format=%H',
+                '--reverse',
                 '4423cdbcbb89c14e50dd5f4152415afd686c5241',
                 '^fa3ae8ed68e664d4db24798611b352e3c6509930',
                 '--',
             ])
             .workdir(self.POLLER_WORKDIR)
             .stdout(
-                b'\n'.join([
-                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
-                    b'ff2ad982e61af5e11e6147cb2ca6bdfab47a92b7',
-                    b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
-                ])
+                commit_log_output(
+                    [
+                        '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                        'ff2ad982e61af5e11e6147cb2ca6bdfab47a92b7',
+                        '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+                    ],
+                    first_parent='0659625c8a684845076a30eeb3a7b3fe12c279b1',
+                )
             ),
-            ExpectMasterShell([
-                'git',
-                'log',
-                '--no-walk',
-                '--format=%P',
-                '4423cdbcbb89c14e50dd5f4152415afd686c5241',
-                '--',
-            ])
-            .workdir(self.POLLER_WORKDIR)
-            .stdout(b'0659625c8a684845076a30eeb3a7b3fe12c279b1\n'),
         )
 
-        self.patch_poller_get_commit_info(self.poller, timestamp=1273258009)
-
         # do the poll
         self.poller.branches = True
         yield self.set_last_rev({
@@ -58,6 +58,7 @@ global_defaults = {
     "logCompressionMethod": 'zstd' if HAS_ZSTD else 'gz',
     "logEncoding": 'utf-8',
     "logMaxTailSize": None,
+    "logRecompression": None,
     "logMaxSize": None,
     "properties": properties.Properties(),
     "collapseRequests": None,
@@ -451,12 +452,21 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
     def test_load_global_logCompressionMethod(self):
         self.do_test_load_global({"logCompressionMethod": 'bz2'}, logCompressionMethod='bz2')
 
+    def test_load_global_logCompressionMethod_zstd_dict(self):
+        if not HAS_ZSTD:
+            raise unittest.SkipTest("zstandard is not installed")
+        self.do_test_load_global(
+            {"logCompressionMethod": 'zstd-dict'}, logCompressionMethod='zstd-dict'
+        )
+
     def test_load_global_logCompressionMethod_invalid(self):
         with capture_config_errors() as errors:
             self.cfg.load_global(self.filename, {'logCompressionMethod': 'foo'})
 
         self.assertConfigError(
-            errors, "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br' or 'zstd'"
+            errors,
+            "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br', 'zstd' "
+            "or 'zstd-dict'",
         )
 
     def test_load_global_codebaseGenerator(self):
@@ -477,6 +487,28 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
     def test_load_global_logMaxTailSize(self):
         self.do_test_load_global({"logMaxTailSize": 123}, logMaxTailSize=123)
 
+    def test_load_global_logRecompression(self):
+        self.do_test_load_global(
+            {"logRecompression": {"interval": 30}},
+            logRecompression={"batch_size": 10, "interval": 30},
+        )
+
+    def test_load_global_logRecompression_invalid_key(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logRecompression': {'speed': 1}})
+
+        self.assertConfigError(
+            errors,
+            "c['logRecompression'] must be a dictionary with optional keys "
+            "'batch_size' and 'interval'",
+        )
+
+    def test_load_global_logRecompression_invalid_value(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {'logRecompression': {'batch_size': 0}})
+
+        self.assertConfigError(errors, "c['logRecompression']['batch_size'] must be a positive")
+
     def test_load_global_logEncoding(self):
         self.do_test_load_global({"logEncoding": 'latin-2'}, logEncoding='latin-2')
 
@@ -591,6 +623,16 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
         self.cfg.load_dbconfig(self.filename, {'db': {'db_url': 'abcd'}})
         self.assertResults(db=config.master.DBConfig(db_url='abcd'))
 
+    def test_load_db_thread_pool_max_size(self):
+        self.cfg.load_dbconfig(self.filename, {'db': {'db_url': 'abcd', 'thread_pool_max_size': 3}})
+        self.assertResults(db=config.master.DBConfig(db_url='abcd', thread_pool_max_size=3))
+
+    def test_load_db_thread_pool_max_size_invalid(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_dbconfig(self.filename, {'db': {'thread_pool_max_size': 0}})
+
+        self.assertConfigError(errors, "must be a positive integer")
+
     def test_load_db_unk_keys(self):
         with capture_config_errors() as errors:
             self.cfg.load_dbconfig(self.filename, {'db': {'db_url': 'abcd', 'bar': 'bar'}})
@@ -998,6 +1040,33 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
 
         self.assertConfigError(errors, 'Invalid www["cookie_expiration_time"]')
 
+    def test_load_www_avatar_cache(self):
+        self.cfg.load_www(
+            self.filename,
+            {
+                'www': {
+                    'avatar_cache_size': 10,
+                    'avatar_cache_seconds': 60,
+                    'avatar_cache_file': 'avatars.json',
+                }
+            },
+        )
+        self.assertEqual(self.cfg.www['avatar_cache_size'], 10)
+        self.assertEqual(self.cfg.www['avatar_cache_seconds'], 60)
+        self.assertEqual(self.cfg.www['avatar_cache_file'], 'avatars.json')
+
+    def test_load_www_avatar_cache_size_invalid(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_www(self.filename, {'www': {'avatar_cache_size': 0}})
+
+        self.assertConfigError(errors, 'Invalid www["avatar_cache_size"]')
+
+    def test_load_www_avatar_cache_seconds_invalid(self):
+        with capture_config_errors() as errors:
+            self.cfg.load_www(self.filename, {'www': {'avatar_cache_seconds': '1h'}})
+
+        self.assertConfigError(errors, 'Invalid www["avatar_cache_seconds"]')
+
     def test_load_www_unknown(self):
         with capture_config_errors() as errors:
             self.cfg.load_www(self.filename, {"www": {"foo": "bar"}})
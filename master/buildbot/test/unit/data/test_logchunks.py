@@ -20,6 +20,7 @@ from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.data import base
+from buildbot.data import exceptions
 from buildbot.data import logchunks
 from buildbot.data import resultspec
 from buildbot.test import fakedb
@@ -232,3 +233,174 @@ class RawLogChunkEndpoint(LogChunkEndpointBase):
         self.assertEqual(
             logchunk, {'filename': expFilename, 'mime-type': "text/plain", 'raw': expContent}
         )
+
+
+class LogMatchesEndpoint(endpoint.EndpointMixin, unittest.TestCase):
+    endpointClass = logchunks.LogMatchesEndpoint
+    resourceTypeClass = logchunks.LogMatch
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        yield self.setUpEndpoint()
+        yield self.master.db.insert_test_data([
+            fakedb.Builder(id=77),
+            fakedb.Worker(id=13, name='wrk'),
+            fakedb.Master(id=88),
+            fakedb.Buildset(id=8822),
+            fakedb.BuildRequest(id=82, builderid=77, buildsetid=8822),
+            fakedb.Build(
+                id=13, builderid=77, masterid=88, workerid=13, buildrequestid=82, number=3
+            ),
+            fakedb.Step(id=50, buildid=13, number=9, name='make'),
+            fakedb.Log(id=60, stepid=50, name='stdio', slug='stdio', type='s', num_lines=6),
+            fakedb.LogChunk(
+                logid=60,
+                first_line=0,
+                last_line=2,
+                compressed=0,
+                content=textwrap.dedent("""\
+                    hmake all
+                    ocompiling a.c
+                    ea.c:1: error: oops"""),
+            ),
+            fakedb.LogChunk(
+                logid=60,
+                first_line=3,
+                last_line=5,
+                compressed=0,
+                content=textwrap.dedent("""\
+                    ocompiling b.c
+                    eb.c:7: error: oops again
+                    ofailed"""),
+            ),
+        ])
+
+    @defer.inlineCallbacks
+    def test_get(self):
+        matches = yield self.callGet(
+            ('logs', 60, 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('content', 'contains', ['error:'])]
+            ),
+        )
+        for match in matches:
+            self.validateData(match)
+        self.assertEqual(
+            matches,
+            [
+                {
+                    'logid': 60,
+                    'line': 2,
+                    'content': 'a.c:1: error: oops',
+                    'context': 0,
+                    'before': [],
+                    'after': [],
+                },
+                {
+                    'logid': 60,
+                    'line': 4,
+                    'content': 'b.c:7: error: oops again',
+                    'context': 0,
+                    'before': [],
+                    'after': [],
+                },
+            ],
+        )
+
+    @defer.inlineCallbacks
+    def test_get_context(self):
+        matches = yield self.callGet(
+            ('builds', 13, 'steps', 9, 'logs', 'stdio', 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[
+                    resultspec.Filter('content', 'contains', ['error:']),
+                    resultspec.Filter('context', 'eq', [2]),
+                ]
+            ),
+        )
+        self.assertEqual(
+            [(m['line'], m['before'], m['after']) for m in matches],
+            [
+                (2, ['make all', 'compiling a.c'], ['compiling b.c', 'b.c:7: error: oops again']),
+                (4, ['a.c:1: error: oops', 'compiling b.c'], ['failed']),
+            ],
+        )
+
+    @defer.inlineCallbacks
+    def test_get_limit(self):
+        matches = yield self.callGet(
+            ('logs', 60, 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('content', 'contains', ['compiling'])], limit=1
+            ),
+        )
+        # the log is only read up to the first match
+        self.assertEqual([m['line'] for m in matches], [1])
+
+    @defer.inlineCallbacks
+    def test_get_offset(self):
+        matches = yield self.callGet(
+            ('logs', 60, 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('content', 'contains', ['compiling'])], offset=1
+            ),
+        )
+        self.assertEqual([m['line'] for m in matches], [3])
+
+    @defer.inlineCallbacks
+    def test_get_max_matches(self):
+        self.patch(logchunks.LogMatchesEndpoint, 'MAX_MATCHES', 1)
+        # at most MAX_MATCHES matches are returned without a limit
+        matches = yield self.callGet(
+            ('logs', 60, 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('content', 'contains', ['compiling'])]
+            ),
+        )
+        self.assertEqual([m['line'] for m in matches], [1])
+
+        with self.assertRaises(exceptions.InvalidQueryParameter):
+            yield self.callGet(
+                ('logs', 60, 'search'),
+                resultSpec=resultspec.ResultSpec(
+                    filters=[resultspec.Filter('content', 'contains', ['compiling'])], limit=2
+                ),
+            )
+
+    @defer.inlineCallbacks
+    def test_get_stream_type_not_matched(self):
+        matches = yield self.callGet(
+            ('logs', 60, 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('content', 'contains', ['ofailed'])]
+            ),
+        )
+        self.assertEqual(matches, [])
+
+    @defer.inlineCallbacks
+    def test_get_missing_log(self):
+        matches = yield self.callGet(
+            ('logs', 99, 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('content', 'contains', ['error:'])]
+            ),
+        )
+        self.assertEqual(matches, [])
+
+    @defer.inlineCallbacks
+    def test_get_no_pattern(self):
+        with self.assertRaises(exceptions.InvalidQueryParameter):
+            yield self.callGet(('logs', 60, 'search'))
+
+    @defer.inlineCallbacks
+    def test_get_context_too_big(self):
+        with self.assertRaises(exceptions.InvalidQueryParameter):
+            yield self.callGet(
+                ('logs', 60, 'search'),
+                resultSpec=resultspec.ResultSpec(
+                    filters=[
+                        resultspec.Filter('content', 'contains', ['error:']),
+                        resultspec.Filter('context', 'eq', [1000]),
+                    ]
+                ),
+            )
@@ -271,4 +271,6 @@ class Log(TestReactorMixin, interfaces.InterfaceTests, unittest.TestCase):
             pass
 
     def test_appendLog(self):
-        self.do_test_callthrough('appendLog', self.rtype.appendLog, logid=10, content='foo\nbar\n')
+        self.do_test_callthrough(
+            'append_log_buffered', self.rtype.appendLog, logid=10, content='foo\nbar\n'
+        )
@@ -109,6 +109,56 @@ class Tests(TestReactorMixin, unittest.TestCase):
 
         self.assertEqual(brdict, None)
 
+    @defer.inlineCallbacks
+    def test_get_builders_buildrequests_summary(self):
+        yield self.master.db.insert_test_data([
+            # claimed: ignored for oldest and priority
+            fakedb.BuildRequest(
+                id=50, buildsetid=self.BSID, builderid=self.BLDRID1, priority=100, submitted_at=1
+            ),
+            fakedb.BuildRequestClaim(
+                brid=50, masterid=self.MASTER_ID, claimed_at=self.CLAIMED_AT_EPOCH
+            ),
+            fakedb.BuildRequest(
+                id=51, buildsetid=self.BSID, builderid=self.BLDRID1, priority=3, submitted_at=20
+            ),
+            fakedb.BuildRequest(
+                id=52, buildsetid=self.BSID, builderid=self.BLDRID1, priority=5, submitted_at=30
+            ),
+            fakedb.BuildRequest(
+                id=53,
+                buildsetid=self.BSID,
+                builderid=self.BLDRID1,
+                complete=1,
+                complete_at=self.COMPLETE_AT_EPOCH,
+            ),
+            fakedb.BuildRequest(
+                id=54, buildsetid=self.BSID, builderid=self.BLDRID2, complete=1, complete_at=10
+            ),
+            # builder 3 is not asked for
+            fakedb.BuildRequest(id=55, buildsetid=self.BSID, builderid=self.BLDRID3),
+        ])
+        summaries = yield self.db.buildrequests.get_builders_buildrequests_summary([
+            self.BLDRID1,
+            self.BLDRID2,
+            999,
+        ])
+
+        self.assertEqual(
+            summaries,
+            {
+                self.BLDRID1: buildrequests.BuilderBuildRequestsSummaryModel(
+                    builderid=self.BLDRID1,
+                    oldest_submitted_at=epoch2datetime(20),
+                    highest_priority=5,
+                ),
+                self.BLDRID2: buildrequests.BuilderBuildRequestsSummaryModel(
+                    builderid=self.BLDRID2
+                ),
+                999: buildrequests.BuilderBuildRequestsSummaryModel(builderid=999),
+            },
+        )
+
     @defer.inlineCallbacks
     def do_test_getBuildRequests_claim_args(self, **kwargs):
         expected = kwargs.pop('expected')
@@ -21,6 +21,7 @@ from twisted.trial import unittest
 from buildbot.data import resultspec
 from buildbot.db import builds
 from buildbot.db.builds import BuildModel
+from buildbot.process.cache import CacheManager
 from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
 from buildbot.test.reactor import TestReactorMixin
@@ -398,6 +399,97 @@ class Tests(TestReactorMixin, unittest.TestCase):
             ),
         )
 
+    @defer.inlineCallbacks
+    def insert_prev_successful_build_data(self, running_build_results=None):
+        rows = [
+            fakedb.Builder(id=77, name="b1"),
+            fakedb.Master(id=88),
+            fakedb.Worker(id=13, name='wrk'),
+            fakedb.SourceStamp(id=1, branch='master'),
+            fakedb.SourceStamp(id=2, branch='dev'),
+            fakedb.SourceStamp(id=3, branch='master', codebase='lib'),
+        ]
+        # (build number, sourcestamps, results), the build 3 is still running
+        builds = [
+            (1, [1], 0),
+            (2, [2], 0),
+            (3, [1], running_build_results),
+            (4, [1, 3], 0),
+            (5, [1], 2),
+            (6, [1], None),
+        ]
+        for number, ssids, results in builds:
+            rows += [
+                fakedb.Buildset(id=number),
+                *[fakedb.BuildsetSourceStamp(buildsetid=number, sourcestampid=id) for id in ssids],
+                fakedb.BuildRequest(id=number, buildsetid=number, builderid=77),
+                fakedb.Build(
+                    id=number,
+                    buildrequestid=number,
+                    number=number,
+                    masterid=88,
+                    builderid=77,
+                    workerid=13,
+                    started_at=TIME1 + number,
+                    complete_at=TIME1 + number if results is not None else None,
+                    results=results,
+                ),
+            ]
+        yield self.db.insert_test_data(rows)
+
+    @defer.inlineCallbacks
+    def test_getPrevSuccessfulBuild(self):
+        yield self.insert_prev_successful_build_data()
+
+        @defer.inlineCallbacks
+        def get_prev_number(number, ssids):
+            ss_build = []
+            for ssid in ssids:
+                ss_build.append((yield self.db.sourcestamps.getSourceStamp(ssid)))
+            build = yield self.db.builds.getPrevSuccessfulBuild(77, number, ss_build)
+            return build.number if build is not None else None
+
+        self.assertEqual((yield get_prev_number(6, [1])), 1)
+        self.assertEqual((yield get_prev_number(6, [3, 1])), 4)
+        self.assertEqual((yield get_prev_number(6, [2])), 2)
+        self.assertEqual((yield get_prev_number(6, [3])), None)
+        self.assertEqual((yield get_prev_number(2, [1])), 1)
+        self.assertEqual((yield get_prev_number(1, [1])), None)
+        self.assertEqual((yield get_prev_number(6, [])), None)
+
+    @defer.inlineCallbacks
+    def test_getPrevSuccessfulBuild_cached(self):
+        self.master.caches = CacheManager()
+        yield self.insert_prev_successful_build_data(running_build_results=3)
+        ss_build = [(yield self.db.sourcestamps.getSourceStamp(1))]
+        lookups = []
+        lookup = self.db.builds._lookupPrevSuccessfulBuild
+
+        def count_lookups(key):
+            lookups.append(key)
+            return lookup(key)
+
+        self.patch(self.db.builds, '_lookupPrevSuccessfulBuild', count_lookups)
+
+        for _ in range(3):
+            build = yield self.db.builds.getPrevSuccessfulBuild(77, 6, ss_build)
+            self.assertEqual(build.number, 1)
+        self.assertEqual(len(lookups), 1)
+
+    @defer.inlineCallbacks
+    def test_getPrevSuccessfulBuild_previous_build_running(self):
+        self.master.caches = CacheManager()
+        yield self.insert_prev_successful_build_data()
+        ss_build = [(yield self.db.sourcestamps.getSourceStamp(1))]
+
+        build = yield self.db.builds.getPrevSuccessfulBuild(77, 6, ss_build)
+        self.assertEqual(build.number, 1)
+
+        self.reactor.advance(TIME4)
+        yield self.db.builds.finishBuild(3, 0)
+        build = yield self.db.builds.getPrevSuccessfulBuild(77, 6, ss_build)
+        self.assertEqual(build.number, 3)
+
     @defer.inlineCallbacks
     def testgetBuildPropertiesEmpty(self):
         yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
@@ -426,6 +518,28 @@ class Tests(TestReactorMixin, unittest.TestCase):
             },
         )
 
+    @defer.inlineCallbacks
+    def test_getBuildsProperties(self):
+        yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
+        yield self.db.builds.setBuildProperty(50, 'prop', 42, 'test')
+        yield self.db.builds.setBuildProperty(50, 'prop2', 43, 'test')
+        yield self.db.builds.setBuildProperty(51, 'prop', 44, 'test2')
+        props = yield self.db.builds.getBuildsProperties([50, 51, 52])
+        self.assertEqual(
+            props,
+            {
+                50: {'prop': (42, 'test'), 'prop2': (43, 'test')},
+                51: {'prop': (44, 'test2')},
+                52: {},
+            },
+        )
+
+        props = yield self.db.builds.getBuildsProperties([50, 51], names=['prop2'])
+        self.assertEqual(props, {50: {'prop2': (43, 'test')}, 51: {}})
+
+        props = yield self.db.builds.getBuildsProperties([])
+        self.assertEqual(props, {})
+
     @defer.inlineCallbacks
     def testsetandgetProperties(self):
         yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
@@ -17,6 +17,7 @@ from __future__ import annotations
 
 import base64
 import textwrap
+from functools import partial
 from typing import TYPE_CHECKING
 from unittest import mock
 
@@ -237,6 +238,33 @@ class Tests(TestReactorMixin, unittest.TestCase):
             self.assertIsInstance(logdict, logs.LogModel)
         self.assertEqual(sorted([ld.id for ld in logdicts]), [201, 202])
 
+    @defer.inlineCallbacks
+    def test_getLogsForSteps(self):
+        yield self.db.insert_test_data([
+            *self.backgroundData,
+            fakedb.Log(
+                id=201, stepid=101, name="stdio", slug="stdio", complete=0, num_lines=200, type="s"
+            ),
+            fakedb.Log(
+                id=202,
+                stepid=101,
+                name="dbg.log",
+                slug="dbg_log",
+                complete=1,
+                num_lines=300,
+                type="t",
+            ),
+            fakedb.Log(
+                id=203, stepid=102, name="stdio", slug="stdio", complete=0, num_lines=200, type="s"
+            ),
+        ])
+        logdicts = yield self.db.logs.getLogsForSteps([101, 102, 103])
+        self.assertEqual(
+            {stepid: [ld.id for ld in lds] for stepid, lds in logdicts.items()},
+            {101: [201, 202], 102: [203], 103: []},
+        )
+        self.assertEqual(logdicts[101][0], (yield self.db.logs.getLog(201)))
+
     @defer.inlineCallbacks
     def test_getLogLines(self):
         yield self.db.insert_test_data(self.backgroundData + self.testLogLines)
@@ -268,6 +296,130 @@ class Tests(TestReactorMixin, unittest.TestCase):
         expected = bytes2unicode(content.split(b'\n')[0] + b'\n')
         self.assertEqual((yield self.db.logs.getLogLines(1470, 0, 0)), expected)
 
+    def patch_decompression(self):
+        calls = []
+
+        def defer_to_compression_pool(callable, *args, **kwargs):
+            d = defer.Deferred()
+            calls.append((d, partial(callable, *args, **kwargs)))
+            return d
+
+        self.db.logs._read_max_chunks_in_flight = 2
+        self.patch(self.db.logs, '_defer_to_compression_pool', defer_to_compression_pool)
+        return calls
+
+    @async_to_deferred
+    async def test_getLogLines_decompresses_chunks_concurrently(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        calls = self.patch_decompression()
+
+        d = self.db.logs.getLogLines(201, 0, 6)
+        # no more than two chunks are decompressed at the same time
+        self.assertEqual(len(calls), 2)
+
+        # chunks finishing out of order are still returned in order
+        calls[1][0].callback(calls[1][1]())
+        self.assertEqual(len(calls), 2)
+        calls[0][0].callback(calls[0][1]())
+        self.assertEqual(len(calls), 4)
+        calls[3][0].callback(calls[3][1]())
+        calls[2][0].callback(calls[2][1]())
+
+        self.assertEqual(
+            await d,
+            'line zero\n'
+            'line 1' + 'x' * 200 + '\n'
+            'line TWO\n'
+            '\n'
+            'line 2**2\n'
+            'another line\n'
+            'yet another line\n',
+        )
+
+    @async_to_deferred
+    async def test_getLogLines_decompression_failure(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        calls = self.patch_decompression()
+
+        d = self.db.logs.getLogLines(201, 0, 6)
+        calls[1][0].errback(RuntimeError('second chunk'))
+        calls[0][0].errback(RuntimeError('first chunk'))
+
+        with self.assertRaisesRegex(RuntimeError, 'first chunk'):
+            await d
+        self.assertEqual(len(calls), 2)
+
+    async def get_log_matches(self, logid, pattern, context=0):
+        return [
+            (match.line, match.content, match.before, match.after)
+            async for match in self.db.logs.iter_log_matches(logid, pattern, context)
+        ]
+
+    @async_to_deferred
+    async def test_iter_log_matches(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+
+        self.assertEqual(
+            await self.get_log_matches(201, 'line'),
+            [
+                (0, 'line zero', [], []),
+                (1, 'line 1' + 'x' * 200, [], []),
+                (2, 'line TWO', [], []),
+                (4, 'line 2**2', [], []),
+                (5, 'another line', [], []),
+                (6, 'yet another line', [], []),
+            ],
+        )
+        self.assertEqual(await self.get_log_matches(201, 'nothing'), [])
+
+    @async_to_deferred
+    async def test_iter_log_matches_context(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+
+        # context lines are taken from the neighbouring chunks
+        self.assertEqual(
+            await self.get_log_matches(201, 'another', context=2),
+            [
+                (5, 'another line', ['', 'line 2**2'], ['yet another line']),
+                (6, 'yet another line', ['line 2**2', 'another line'], []),
+            ],
+        )
+        self.assertEqual(
+            await self.get_log_matches(201, 'TWO', context=3),
+            [
+                (
+                    2,
+                    'line TWO',
+                    ['line zero', 'line 1' + 'x' * 200],
+                    ['', 'line 2**2', 'another line'],
+                )
+            ],
+        )
+
+    @async_to_deferred
+    async def test_iter_log_matches_compressed(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        self.db.master.config.logCompressionMethod = 'gz'
+        await self.db.logs.compressLog(201, force=True)
+
+        self.assertEqual(
+            await self.get_log_matches(201, '2**2', context=1),
+            [(4, 'line 2**2', [''], ['another line'])],
+        )
+
+    @async_to_deferred
+    async def test_iter_log_matches_buffered_lines(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        await self.db.logs.append_log_buffered(201, 'one more line\nlast\n')
+
+        self.assertEqual(
+            (await self.get_log_matches(201, 'line', context=1))[-2:],
+            [
+                (6, 'yet another line', ['another line'], ['one more line']),
+                (7, 'one more line', ['yet another line'], ['last']),
+            ],
+        )
+
     @defer.inlineCallbacks
     def test_addLog_getLog(self):
         yield self.db.insert_test_data(self.backgroundData)
@@ -453,6 +605,103 @@ class Tests(TestReactorMixin, unittest.TestCase):
             {'logid': 201, 'first_line': 7, 'last_line': 7, 'content': b'abc', 'compressed': 0},
         )
 
+    def get_chunk_rows(self, logid):
+        def thd(conn):
+            tbl = self.db.model.logchunks
+            res = conn.execute(
+                sa.select(tbl.c.first_line, tbl.c.last_line, tbl.c.content, tbl.c.compressed)
+                .where(tbl.c.logid == logid)
+                .order_by(tbl.c.first_line)
+            )
+            rows = [tuple(row) for row in res]
+            res.close()
+            return rows
+
+        return self.db.pool.do(thd)
+
+    @async_to_deferred
+    async def test_append_log_buffered_readers_see_buffered_lines(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        self.assertEqual((await self.db.logs.append_log_buffered(201, 'abc\n')), (7, 7))
+        self.assertEqual((await self.db.logs.append_log_buffered(201, 'def\nghi\n')), (8, 9))
+
+        # nothing is written yet
+        self.assertEqual((await self.get_chunk_rows(201))[-1][1], 6)
+
+        self.assertEqual((await self.db.logs.getLog(201)).num_lines, 10)
+        self.assertEqual([log.num_lines for log in await self.db.logs.getLogs(101)], [10])
+        self.assertEqual(
+            (await self.db.logs.getLogLines(201, 5, 8)),
+            'another line\nyet another line\nabc\ndef\n',
+        )
+        self.assertEqual((await self.db.logs.getLogLines(201, 9, 20)), 'ghi\n')
+        lines = [line async for line in self.db.logs.iter_log_lines(201, 6)]
+        self.assertEqual(lines, ['yet another line\n', 'abc\n', 'def\n', 'ghi\n'])
+
+    @async_to_deferred
+    async def test_append_log_buffered_flush_after_interval(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        await self.db.logs.append_log_buffered(201, 'abc\n')
+        await self.db.logs.append_log_buffered(201, 'def\n')
+
+        self.reactor.advance(self.db.logs.APPEND_BUFFER_FLUSH_INTERVAL)
+
+        # the appends were merged in a single chunk
+        rows = await self.get_chunk_rows(201)
+        self.assertEqual(rows[-2:], [(6, 6, b'yet another line', 0), (7, 8, b'abc\ndef', 0)])
+        self.assertEqual((await self.db.logs.getLog(201)).num_lines, 9)
+        self.assertEqual(
+            (await self.db.logs.getLogLines(201, 6, 8)), 'yet another line\nabc\ndef\n'
+        )
+
+        # later appends continue after the written lines
+        self.assertEqual((await self.db.logs.append_log_buffered(201, 'ghi\n')), (9, 9))
+        self.reactor.advance(self.db.logs.APPEND_BUFFER_FLUSH_INTERVAL)
+        self.assertEqual((await self.get_chunk_rows(201))[-1], (9, 9, b'ghi', 0))
+
+    @async_to_deferred
+    async def test_append_log_buffered_flush_on_size(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        self.db.logs.APPEND_BUFFER_MAX_LINES = 3
+        await self.db.logs.append_log_buffered(201, 'abc\ndef\n')
+        self.assertEqual((await self.get_chunk_rows(201))[-1][1], 6)
+
+        await self.db.logs.append_log_buffered(201, 'ghi\n')
+        rows = await self.get_chunk_rows(201)
+        self.assertEqual(rows[-1], (7, 9, b'abc\ndef\nghi', 0))
+
+    @async_to_deferred
+    async def test_append_log_buffered_missing_log(self):
+        self.assertIsNone(await self.db.logs.append_log_buffered(201, 'abc\n'))
+
+    @async_to_deferred
+    async def test_finishLog_writes_buffered_lines(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        await self.db.logs.append_log_buffered(201, 'abc\n')
+        await self.db.logs.finishLog(201)
+
+        self.assertEqual((await self.get_chunk_rows(201))[-1], (7, 7, b'abc', 0))
+        log = await self.db.logs.getLog(201)
+        self.assertEqual((log.num_lines, log.complete), (8, True))
+
+    @async_to_deferred
+    async def test_appendLog_after_append_log_buffered(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        await self.db.logs.append_log_buffered(201, 'abc\n')
+        self.assertEqual((await self.db.logs.appendLog(201, 'def\n')), (8, 8))
+
+        # both appends are written, in order
+        rows = await self.get_chunk_rows(201)
+        self.assertEqual(rows[-1], (7, 8, b'abc\ndef', 0))
+
+    @async_to_deferred
+    async def test_flush_logs(self):
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        await self.db.logs.append_log_buffered(201, 'abc\n')
+        await self.db.logs.flush_logs()
+        self.assertEqual((await self.get_chunk_rows(201))[-1], (7, 7, b'abc', 0))
+        self.assertEqual((await self.db.logs.getLogLines(201, 7, 7)), 'abc\n')
+
     async def _test_compress_big_chunk(
         self,
         compressor: compression.CompressorInterface,
@@ -614,6 +863,67 @@ class Tests(TestReactorMixin, unittest.TestCase):
             ),
         )
 
+    @async_to_deferred
+    async def test_compressLog_recompress(self):
+        await self.db.insert_test_data([
+            *self.backgroundData,
+            fakedb.Log(
+                id=201, stepid=101, name="stdio", slug="stdio", complete=1, num_lines=2, type="s"
+            ),
+            fakedb.LogChunk(
+                logid=201,
+                first_line=0,
+                last_line=1,
+                compressed=1,
+                content=compression.GZipCompressor.dumps(b'a' * 1000 + b'\n' + b'b' * 1000),
+            ),
+        ])
+
+        def _thd_get_log_chunks(conn):
+            tbl = self.db.model.logchunks
+            res = conn.execute(sa.select(tbl.c.compressed).where(tbl.c.logid == 201))
+            return [row.compressed for row in res]
+
+        self.db.master.config.logCompressionMethod = 'bz2'
+        # without recompress, single chunks are left alone
+        self.assertEqual(await self.db.logs.compressLog(201), 0)
+        self.assertEqual(await self.db.pool.do(_thd_get_log_chunks), [1])
+
+        await self.db.logs.compressLog(201, recompress=True)
+        self.assertEqual(await self.db.pool.do(_thd_get_log_chunks), [2])
+        self.assertEqual(
+            await self.db.logs.getLogLines(201, 0, 1), 'a' * 1000 + '\n' + 'b' * 1000 + '\n'
+        )
+
+        # already compressed with the configured method
+        self.assertEqual(await self.db.logs.compressLog(201, recompress=True), 0)
+
+    @async_to_deferred
+    async def test_get_logids_for_compression(self):
+        await self.db.insert_test_data([
+            *self.backgroundData,
+            fakedb.Log(id=201, stepid=101, name="a", slug="a", complete=1, type="s"),
+            fakedb.Log(id=202, stepid=101, name="b", slug="b", complete=0, type="s"),
+            fakedb.Log(id=203, stepid=101, name="c", slug="c", complete=1, type="d"),
+            fakedb.Log(id=204, stepid=101, name="d", slug="d", complete=1, type="s"),
+            fakedb.Log(id=205, stepid=101, name="e", slug="e", complete=1, type="t"),
+        ])
+
+        self.assertEqual(
+            await self.db.logs.get_logids_for_compression(), ([201, 204, 205], [202], 205)
+        )
+        self.assertEqual(
+            await self.db.logs.get_logids_for_compression(after_logid=201, limit=2),
+            ([204], [202], 205),
+        )
+        self.assertEqual(
+            await self.db.logs.get_logids_for_compression(logids=[202, 203, 204]),
+            ([204], [202], 205),
+        )
+        self.assertEqual(
+            await self.db.logs.get_logids_for_compression(after_logid=205), ([], [], 205)
+        )
+
     @defer.inlineCallbacks
     def test_deleteOldLogChunks_basic(self):
         yield self.db.insert_test_data(self.backgroundData)
@@ -741,3 +1051,214 @@ class Tests(TestReactorMixin, unittest.TestCase):
         with self.assertRaises(logs.LogCompressionFormatUnavailableError):
             await self.db.logs.getLogLines(logid=LOG_ID, first_line=1, last_line=1)
         self.flushLoggedErrors(logs.LogCompressionFormatUnavailableError)
+
+    def setup_zstd_dict(self):
+        if not compression.ZStdDictCompressor.available:
+            raise unittest.SkipTest("zstandard not installed, skip the test")
+        self.db.master.config.logCompressionMethod = "zstd-dict"
+
+    def dictionary_training_data(self):
+        # finished logs of builder 88, to train a dictionary on
+        rows = []
+        for logid in range(301, 311):
+            rows.append(
+                fakedb.Log(
+                    id=logid, stepid=101, name=f'log{logid}', complete=1, num_lines=30, type='s'
+                )
+            )
+            for first_line in range(0, 30, 10):
+                content = ''.join(
+                    f'gcc -O2 -c src/module{i % 7}/file{logid + i}.c -o build/file{logid + i}.o\n'
+                    for i in range(first_line, first_line + 10)
+                )
+                rows.append(
+                    fakedb.LogChunk(
+                        logid=logid,
+                        first_line=first_line,
+                        last_line=first_line + 9,
+                        content=content[:-1].encode(),
+                    )
+                )
+        return rows
+
+    @async_to_deferred
+    async def test_zstd_dict_without_dictionary(self):
+        self.setup_zstd_dict()
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+
+        self.assertEqual((await self.db.logs.appendLog(201, 'abc\n' * 100)), (7, 106))
+        # no dictionary is trained yet, the chunk is compressed as 'zstd'
+        self.assertEqual((await self.get_chunk_rows(201))[-1][3], 4)
+
+    @async_to_deferred
+    async def test_zstd_dict_train_and_append(self):
+        self.setup_zstd_dict()
+        await self.db.insert_test_data(
+            self.backgroundData + self.testLogLines + self.dictionary_training_data()
+        )
+
+        dictionary_id = await self.db.logs.train_log_dictionary(88)
+        self.assertIsNotNone(dictionary_id)
+
+        content = ''.join(
+            f'gcc -O2 -c src/module3/file{i}.c -o build/file{i}.o\n' for i in range(20)
+        )
+        self.assertEqual((await self.db.logs.appendLog(201, content)), (7, 26))
+        _, _, chunk_content, compressed = (await self.get_chunk_rows(201))[-1]
+        self.assertEqual(compressed, self.db.logs.ZSTD_DICT_COMPRESSION_ID)
+        self.assertEqual(
+            compression.ZStdDictCompressor.get_dictionary_id(chunk_content), dictionary_id
+        )
+        self.assertEqual((await self.db.logs.getLogLines(201, 7, 26)), content)
+
+        # the dictionary is loaded from the database when needed
+        self.db.logs._dictionary_compressors.clear()
+        self.assertEqual((await self.db.logs.getLogLines(201, 7, 26)), content)
+
+        # and the log can be recompressed
+        self.db.logs._dictionary_compressors.clear()
+        await self.db.logs.compressLog(201, force=True)
+        self.assertEqual([row[3] for row in await self.get_chunk_rows(201)], [6])
+        self.assertEqual((await self.db.logs.getLogLines(201, 7, 26)), content)
+
+    @async_to_deferred
+    async def test_zstd_dict_uses_dictionary_of_other_master(self):
+        self.setup_zstd_dict()
+        await self.db.insert_test_data(
+            self.backgroundData + self.testLogLines + self.dictionary_training_data()
+        )
+        dictionary_id = await self.db.logs.train_log_dictionary(88)
+
+        def thd_copy_dictionary(conn):
+            tbl = self.db.model.log_compression_dictionaries
+            row = conn.execute(sa.select(tbl).where(tbl.c.id == dictionary_id)).fetchone()
+            r = conn.execute(
+                tbl.insert(),
+                {"builderid": 88, "created_at": row.created_at, "content": row.content},
+            )
+            conn.commit()
+            return r.inserted_primary_key[0]
+
+        # another master trains a newer dictionary of the builder
+        other_dictionary_id = await self.db.pool.do(thd_copy_dictionary)
+
+        content = ''.join(
+            f'gcc -O2 -c src/module3/file{i}.c -o build/file{i}.o\n' for i in range(20)
+        )
+        await self.db.logs.appendLog(201, content)
+        _, _, chunk_content, _ = (await self.get_chunk_rows(201))[-1]
+        self.assertEqual(
+            compression.ZStdDictCompressor.get_dictionary_id(chunk_content), other_dictionary_id
+        )
+        self.assertEqual(self.db.logs._builder_dictionaries[88].dictionary_id, other_dictionary_id)
+
+    @async_to_deferred
+    async def test_zstd_dict_train_not_enough_logs(self):
+        self.setup_zstd_dict()
+        await self.db.insert_test_data(self.backgroundData + self.testLogLines)
+
+        self.reactor.advance(1000)
+        self.assertIsNone(await self.db.logs.train_log_dictionary(88))
+        self.assertEqual(
+            self.db.logs._builder_dictionaries[88].next_training_at,
+            1000 + self.db.logs.DICTIONARY_TRAINING_RETRY_INTERVAL,
+        )
+
+    @async_to_deferred
+    async def test_zstd_dict_finishLog_trains_dictionary(self):
+        self.setup_zstd_dict()
+        await self.db.insert_test_data(
+            self.backgroundData + self.testLogLines + self.dictionary_training_data()
+        )
+
+        await self.db.logs.finishLog(201)
+        await self.db._db_tasks_waiter.wait()
+        state = self.db.logs._builder_dictionaries[88]
+        self.assertIsNotNone(state.dictionary_id)
+        self.assertFalse(state.training)
+
+        # the dictionary is not retrained before DICTIONARY_RETRAIN_INTERVAL
+        with mock.patch.object(
+            self.db.logs, 'train_log_dictionary', return_value=defer.succeed(None)
+        ) as train_log_dictionary:
+            await self.db.logs.finishLog(201)
+            self.reactor.advance(self.db.logs.DICTIONARY_RETRAIN_INTERVAL)
+            await self.db.logs.finishLog(201)
+        self.assertEqual(train_log_dictionary.call_count, 1)
+        await self.db._db_tasks_waiter.wait()
+
+    @async_to_deferred
+    async def test_zstd_dict_log_keeps_its_dictionary(self):
+        self.setup_zstd_dict()
+        await self.db.insert_test_data(
+            self.backgroundData + self.testLogLines + self.dictionary_training_data()
+        )
+        dictionary_id = await self.db.logs.train_log_dictionary(88)
+
+        content = ''.join(
+            f'gcc -O2 -c src/module3/file{i}.c -o build/file{i}.o\n' for i in range(20)
+        )
+        await self.db.logs.appendLog(201, content)
+
+        def thd_get_log_dictionary_id(conn):
+            tbl = self.db.model.logs
+            return conn.execute(sa.select(tbl.c.dictionary_id).where(tbl.c.id == 201)).scalar()
+
+        self.assertEqual((await self.db.pool.do(thd_get_log_dictionary_id)), dictionary_id)
+
+        # a newer dictionary is only used by the logs started afterwards
+        self.reactor.advance(1)
+        other_dictionary_id = await self.db.logs.train_log_dictionary(88)
+        self.assertNotEqual(other_dictionary_id, dictionary_id)
+        self.db.logs._log_dictionary_ids.clear()
+        await self.db.logs.appendLog(201, content)
+        _, _, chunk_content, _ = (await self.get_chunk_rows(201))[-1]
+        self.assertEqual(
+            compression.ZStdDictCompressor.get_dictionary_id(chunk_content), dictionary_id
+        )
+
+    @async_to_deferred
+    async def test_deleteOldLogChunks_superseded_dictionaries(self):
+        await self.db.insert_test_data([
+            *self.backgroundData,
+            fakedb.LogCompressionDictionary(id=1, builderid=88, created_at=100, content=b'1'),
+            fakedb.LogCompressionDictionary(id=2, builderid=88, created_at=200, content=b'2'),
+            fakedb.LogCompressionDictionary(id=3, builderid=88, created_at=300, content=b'3'),
+            fakedb.LogCompressionDictionary(id=4, builderid=88, created_at=400, content=b'4'),
+            # a recent log is still written with dictionary 2 by another master
+            fakedb.Log(
+                id=201,
+                stepid=101,
+                name='stdio',
+                slug='stdio',
+                complete=1,
+                type='s',
+                dictionary_id=2,
+            ),
+            # and a deleted log was written with dictionary 3
+            fakedb.Log(
+                id=202,
+                stepid=101,
+                name='other',
+                slug='other',
+                complete=1,
+                type='d',
+                dictionary_id=3,
+            ),
+        ])
+
+        def thd_get_dictionary_ids(conn):
+            tbl = self.db.model.log_compression_dictionaries
+            return [row.id for row in conn.execute(sa.select(tbl.c.id).order_by(tbl.c.id))]
+
+        # the dictionaries are not deleted before the grace period
+        await self.db.logs.deleteOldLogChunks(1000)
+        self.assertEqual((await self.db.pool.do(thd_get_dictionary_ids)), [1, 2, 3, 4])
+
+        self.reactor.advance(self.db.logs.DICTIONARY_DELETE_GRACE_PERIOD + 1000)
+        # dictionary 2 is still the latest one at that time
+        await self.db.logs.deleteOldLogChunks(250)
+        self.assertEqual((await self.db.pool.do(thd_get_dictionary_ids)), [2, 3, 4])
+        # the latest dictionary and the dictionaries of remaining logs are kept
+        await self.db.logs.deleteOldLogChunks(1000)
+        self.assertEqual((await self.db.pool.do(thd_get_dictionary_ids)), [2, 4])
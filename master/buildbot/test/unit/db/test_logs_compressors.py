@@ -80,3 +80,45 @@ class TestBrotliCompressor(TestRawCompressor):
 
 class TestZStdCompressor(TestRawCompressor):
     CompressorCls = compression.ZStdCompressor
+
+
+class TestZStdDictCompressor(unittest.TestCase):
+    def setUp(self) -> None:
+        if not compression.ZStdDictCompressor.available:
+            raise unittest.SkipTest("Compressor 'zstd-dict' is unavailable")
+
+        samples = [
+            ''.join(
+                f'gcc -O2 -c src/module{i % 7}/file{i + j}.c -o build/file{i + j}.o\n'
+                for i in range(50)
+            ).encode()
+            for j in range(30)
+        ]
+        dictionary = compression.ZStdDictCompressor.train(samples, 65536)
+        assert dictionary is not None
+        self.compressor = compression.ZStdDictCompressor(12, dictionary)
+        self.data = b'gcc -O2 -c src/module3/file42.c -o build/file42.o\n' * 10
+
+    def test_train_not_enough_samples(self) -> None:
+        self.assertIsNone(compression.ZStdDictCompressor.train([b'xy'], 65536))
+
+    def test_dumps_read(self) -> None:
+        compressed_data = self.compressor.dumps(self.data)
+        self.assertEqual(compression.ZStdDictCompressor.get_dictionary_id(compressed_data), 12)
+        self.assertEqual(self.compressor.read(compressed_data), self.data)
+
+    def test_compressobj_read(self) -> None:
+        compress_obj = self.compressor.CompressObj()
+        for _ in range(2):
+            # make sure re-using the same compress obj works
+            compressed_data = compress_obj.compress(self.data[:100])
+            compressed_data += compress_obj.compress(self.data[100:])
+            compressed_data += compress_obj.flush()
+            self.assertEqual(compression.ZStdDictCompressor.get_dictionary_id(compressed_data), 12)
+            self.assertEqual(self.compressor.read(compressed_data), self.data)
+
+    def test_read_other_dictionary(self) -> None:
+        compressed_data = self.compressor.dumps(self.data)
+        other = compression.ZStdDictCompressor(13, self.compressor._dictionary.as_bytes())
+        with self.assertRaises(ValueError):
+            other.read(compressed_data)
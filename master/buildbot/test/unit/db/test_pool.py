@@ -15,11 +15,13 @@
 
 
 import os
+import threading
 import time
 
 import sqlalchemy as sa
 from twisted.internet import defer
 from twisted.internet import reactor
+from twisted.internet import threads
 from twisted.trial import unittest
 
 from buildbot.db import enginestrategy
@@ -150,6 +152,110 @@ class Basic(unittest.TestCase):
         yield self.pool.do_with_transaction(access)
 
 
+class Lanes(unittest.TestCase):
+    def create_pool(self, optimal_thread_pool_size, **kwargs):
+        url = db.resolve_test_db_url(None, sqlite_memory=True)
+        engine = enginestrategy.create_engine(url, basedir=os.getcwd())
+        engine.optimal_thread_pool_size = optimal_thread_pool_size
+        self.pool = pool.DBThreadPool(engine, reactor=reactor, **kwargs)
+        self.pool.start()
+        self.addCleanup(self.pool.stop)
+        return self.pool
+
+    def test_max_threads(self):
+        self.assertEqual(self.create_pool(4).max_threads, 4)
+        self.assertEqual(self.create_pool(4, max_threads=2).max_threads, 2)
+        # the pool never uses more threads than the engine has connections
+        self.assertEqual(self.create_pool(4, max_threads=10).max_threads, 4)
+
+    def test_max_threads_invalid(self):
+        with self.assertRaises(ValueError):
+            self.create_pool(4, max_threads=0)
+
+    def test_unknown_lane(self):
+        self.create_pool(1)
+        with self.assertRaises(ValueError):
+            self.pool.do_in_lane('unknown', lambda conn: None)
+
+    @defer.inlineCallbacks
+    def test_priority_order(self):
+        self.create_pool(1)
+        release = threading.Event()
+        order = []
+
+        def block(conn):
+            release.wait(10)
+            order.append('block')
+
+        def record(conn, name):
+            order.append(name)
+
+        d_block = self.pool.do(block)
+        ds = [
+            self.pool.do_in_lane('bulk', record, 'bulk'),
+            self.pool.do(record, 'default'),
+            self.pool.do_in_lane('scheduling', record, 'scheduling'),
+        ]
+
+        stats = self.pool.get_lane_stats('default')
+        self.assertEqual((stats.queued, stats.running), (1, 1))
+        self.assertEqual(self.pool.get_lane_stats('bulk').queued, 1)
+        self.assertEqual(self.pool.get_lane_stats('scheduling').queued, 1)
+
+        release.set()
+        yield d_block
+        yield defer.gatherResults(ds)
+
+        self.assertEqual(order, ['block', 'scheduling', 'default', 'bulk'])
+        for lane in pool.LANES:
+            stats = self.pool.get_lane_stats(lane)
+            self.assertEqual((stats.queued, stats.running), (0, 0))
+            self.assertGreaterEqual(stats.max_wait_time, 0)
+        self.assertEqual(self.pool.get_lane_stats('default').calls, 2)
+
+    @defer.inlineCallbacks
+    def test_stop_runs_queued_calls(self):
+        self.create_pool(1)
+        release = threading.Event()
+
+        d_block = self.pool.do(lambda conn: release.wait(10))
+        d_queued = self.pool.do(lambda conn: 'done')
+
+        d_stop = self.pool.stop()
+        self.assertFalse(d_stop.called)
+
+        release.set()
+        yield d_stop
+        yield d_block
+        res = yield d_queued
+        self.assertEqual(res, 'done')
+        self.assertFalse(self.pool.running)
+
+    @defer.inlineCallbacks
+    def test_bulk_leaves_a_thread_free(self):
+        self.create_pool(2)
+        release = threading.Event()
+        running = threading.Semaphore(0)
+
+        def block(conn):
+            running.release()
+            release.wait(10)
+
+        try:
+            d_bulk = [self.pool.do_in_lane('bulk', block) for _ in range(2)]
+            yield threads.deferToThread(running.acquire, timeout=10)
+
+            stats = self.pool.get_lane_stats('bulk')
+            self.assertEqual((stats.queued, stats.running), (1, 1))
+
+            # the other lanes are not blocked by the bulk calls
+            res = yield self.pool.do_in_lane('scheduling', lambda conn: 'claimed')
+            self.assertEqual(res, 'claimed')
+        finally:
+            release.set()
+        yield defer.gatherResults(d_bulk)
+
+
 class Stress(unittest.TestCase):
     def setUp(self):
         setup_engine = sa.create_engine('sqlite:///test.sqlite', future=True)
@@ -226,3 +226,47 @@ class TestStateConnectorComponent(TestReactorMixin, unittest.TestCase):
         with self.assertRaises(TypeError):
             yield self.db.state.atomicCreateState(10, 'x', object)
         self.flushLoggedErrors(TypeError)
+
+    @defer.inlineCallbacks
+    def test_compareAndSetState(self):
+        yield self.db.insert_test_data([
+            fakedb.Object(id=10, name='-', class_name='-'),
+            fakedb.ObjectState(objectid=10, name='x', value_json='1'),
+        ])
+        res = yield self.db.state.compareAndSetState(10, 'x', 1, 2)
+        self.assertTrue(res)
+        res = yield self.db.state.compareAndSetState(10, 'x', 1, 3)
+        self.assertFalse(res)
+        res = yield self.db.state.getState(10, 'x')
+        self.assertEqual(res, 2)
+
+    @defer.inlineCallbacks
+    def test_compareAndSetState_missing(self):
+        yield self.db.insert_test_data([
+            fakedb.Object(id=10, name='-', class_name='-'),
+        ])
+        res = yield self.db.state.compareAndSetState(10, 'x', None, 2)
+        self.assertTrue(res)
+        res = yield self.db.state.compareAndSetState(10, 'x', None, 3)
+        self.assertFalse(res)
+        res = yield self.db.state.getState(10, 'x')
+        self.assertEqual(res, 2)
+
+    @defer.inlineCallbacks
+    def test_compareAndSetState_missing_conflict(self):
+        yield self.db.insert_test_data([
+            fakedb.Object(id=10, name='-', class_name='-'),
+        ])
+
+        def hook(conn):
+            conn.execute(
+                self.db.model.object_state.insert().values(objectid=10, name='x', value_json='22')
+            )
+            conn.commit()
+
+        self.db.state._test_timing_hook = hook
+
+        res = yield self.db.state.compareAndSetState(10, 'x', None, 2)
+        self.assertFalse(res)
+        res = yield self.db.state.getState(10, 'x')
+        self.assertEqual(res, 22)
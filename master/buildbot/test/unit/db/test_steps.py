@@ -179,6 +179,15 @@ class Tests(TestReactorMixin, unittest.TestCase):
         stepdicts = yield self.db.steps.getSteps(buildid=33)
         self.assertEqual(stepdicts, [])
 
+    @defer.inlineCallbacks
+    def test_getStepsForBuilds(self):
+        yield self.db.insert_test_data(self.backgroundData + self.stepRows)
+        stepdicts = yield self.db.steps.getStepsForBuilds([30, 31, 33])
+
+        self.assertEqual(stepdicts[30], self.stepDicts[:3])
+        self.assertEqual([s.id for s in stepdicts[31]], [73])
+        self.assertEqual(stepdicts[33], [])
+
     @defer.inlineCallbacks
     def test_addStep_getStep(self):
         yield self.db.insert_test_data(self.backgroundData)
@@ -0,0 +1,111 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.test.util import migration
+from buildbot.util import sautils
+
+
+class Migration(migration.MigrateTestMixin, unittest.TestCase):
+    def setUp(self) -> defer.Deferred[None]:  # type: ignore[override]
+        return self.setUpMigrateTest()
+
+    def create_tables_thd(self, conn: sa.future.engine.Connection) -> None:
+        metadata = sa.MetaData()
+        metadata.bind = conn  # type: ignore[attr-defined]
+
+        builders = sautils.Table(
+            'builders',
+            metadata,
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.Text, nullable=False),
+            sa.Column('name_hash', sa.String(40), nullable=False),
+        )
+        builders.create(bind=conn)
+
+        logs = sautils.Table(
+            'logs',
+            metadata,
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.Text, nullable=False),
+            sa.Column('slug', sa.String(50), nullable=False),
+            sa.Column('stepid', sa.Integer, nullable=False),
+            sa.Column('complete', sa.SmallInteger, nullable=False),
+            sa.Column('num_lines', sa.Integer, nullable=False),
+            sa.Column('type', sa.String(1), nullable=False),
+        )
+        logs.create(bind=conn)
+
+        conn.execute(builders.insert(), [{"id": 3, "name": "b1", "name_hash": "h1"}])
+        conn.execute(
+            logs.insert(),
+            [
+                {
+                    "id": 5,
+                    "name": "stdio",
+                    "slug": "stdio",
+                    "stepid": 7,
+                    "complete": 1,
+                    "num_lines": 10,
+                    "type": "s",
+                }
+            ],
+        )
+        conn.commit()
+
+    def test_update(self) -> defer.Deferred[None]:
+        def setup_thd(conn: sa.future.engine.Connection) -> None:
+            self.create_tables_thd(conn)
+
+        def verify_thd(conn: sa.future.engine.Connection) -> None:
+            metadata = sa.MetaData()
+            metadata.bind = conn  # type: ignore[attr-defined]
+
+            dictionaries = sautils.Table(
+                'log_compression_dictionaries', metadata, autoload_with=conn
+            )
+            self.assertIsInstance(dictionaries.c.content.type, sa.LargeBinary)
+
+            conn.execute(
+                dictionaries.insert(),
+                [{"id": 1, "builderid": 3, "created_at": 1695730972, "content": b'dict'}],
+            )
+            q = sa.select(
+                dictionaries.c.id,
+                dictionaries.c.builderid,
+                dictionaries.c.created_at,
+                dictionaries.c.content,
+            )
+            self.assertEqual(conn.execute(q).fetchall(), [(1, 3, 1695730972, b'dict')])
+
+            insp = sa.inspect(conn)
+            index_names = [
+                item['name'] for item in insp.get_indexes('log_compression_dictionaries')
+            ]
+            self.assertIn('log_compression_dictionaries_builderid', index_names)
+
+            # existing logs do not use a dictionary
+            logs = sautils.Table('logs', metadata, autoload_with=conn)
+            self.assertIsInstance(logs.c.dictionary_id.type, sa.Integer)
+            q = sa.select(logs.c.id, logs.c.dictionary_id)
+            self.assertEqual(conn.execute(q).fetchall(), [(5, None)])
+            self.assertIn('logs_dictionary_id', [item['name'] for item in insp.get_indexes('logs')])
+
+        return self.do_test_migration('067', '068', setup_thd, verify_thd)
@@ -28,7 +28,6 @@ from buildbot.process import factory
 from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
 from buildbot.test.reactor import TestReactorMixin
-from buildbot.util import epoch2datetime
 from buildbot.util.eventual import fireEventually
 from buildbot.util.twisted import async_to_deferred
 
@@ -282,21 +281,27 @@ class Test(TestBRDBase):
         returnDeferred=False,
     ):
         self.useMock_maybeStartBuildsOnBuilder()
-        self.addBuilders(list(oldestRequestTimes))
+        yield self.addBuilders(list(oldestRequestTimes))
         self.master.config.prioritizeBuilders = prioritizeBuilders
 
-        def mklambda(t):  # work around variable-binding issues
+        rows = [fakedb.Master(id=fakedb.FakeDBConnector.MASTER_ID)]
+        for i, (n, t) in enumerate(oldestRequestTimes.items()):
+            builderid = self.builders[n].getBuilderId()
             if returnDeferred:
-                return lambda: defer.succeed(t)
-            return lambda: t
-
-        for n, t in oldestRequestTimes.items():
-            if t is not None:
-                t = epoch2datetime(t)
-            self.builders[n].getOldestRequestTime = mklambda(t)
-
-        for n, t in highestPriorities.items():
-            self.builders[n].get_highest_priority = mklambda(t)
+                self.builders[n].getBuilderId = lambda builderid=builderid: defer.succeed(builderid)
+            if t is None:
+                continue
+            rows += [
+                fakedb.Buildset(id=100 + i),
+                fakedb.BuildRequest(
+                    id=200 + i,
+                    buildsetid=100 + i,
+                    builderid=builderid,
+                    submitted_at=t,
+                    priority=highestPriorities[n],
+                ),
+            ]
+        yield self.master.db.insert_test_data(rows)
 
         result = yield self.brd._sortBuilders(list(oldestRequestTimes))
 
@@ -336,6 +341,30 @@ class Test(TestBRDBase):
             ['bldr1', 'bldr3', 'bldr2'],
         )
 
+    @defer.inlineCallbacks
+    def test_sortBuilders_default_ignores_claimed_and_complete(self):
+        self.useMock_maybeStartBuildsOnBuilder()
+        yield self.addBuilders(['bldr1', 'bldr2'])
+        self.master.config.prioritizeBuilders = None
+        bldrid1 = self.builders['bldr1'].getBuilderId()
+        bldrid2 = self.builders['bldr2'].getBuilderId()
+
+        yield self.master.db.insert_test_data([
+            fakedb.Master(id=fakedb.FakeDBConnector.MASTER_ID),
+            fakedb.Buildset(id=100),
+            fakedb.BuildRequest(id=200, buildsetid=100, builderid=bldrid1, priority=5),
+            fakedb.BuildRequest(id=201, buildsetid=100, builderid=bldrid2, priority=50),
+            fakedb.BuildRequestClaim(
+                brid=201, masterid=fakedb.FakeDBConnector.MASTER_ID, claimed_at=1
+            ),
+            fakedb.BuildRequest(id=202, buildsetid=100, builderid=bldrid2, priority=40, complete=1),
+            fakedb.BuildRequest(id=203, buildsetid=100, builderid=bldrid2, priority=1),
+        ])
+
+        result = yield self.brd._sortBuilders(['bldr2', 'bldr1'])
+
+        self.assertEqual(result, ['bldr1', 'bldr2'])
+
     def test_sortBuilders_custom(self):
         def prioritizeBuilders(master, builders):
             self.assertIdentical(master, self.master)
@@ -466,6 +495,38 @@ class TestMaybeStartBuilds(TestBRDBase):
             rows=rows, exp_claims=[10], exp_builds=[('test-worker1', [10])]
         )
 
+    @defer.inlineCallbacks
+    def test_records_queue_depth(self):
+        self.addWorkers({'test-worker1': 1})
+        rows = [
+            *self.base_rows,
+            fakedb.BuildRequest(id=10, buildsetid=11, builderid=77, submitted_at=130000),
+            fakedb.BuildRequest(id=11, buildsetid=11, builderid=77, submitted_at=135000),
+            fakedb.BuildRequest(id=12, buildsetid=11, builderid=77, submitted_at=140000),
+        ]
+        yield self.do_test_maybeStartBuildsOnBuilder(
+            rows=rows, exp_claims=[10], exp_builds=[('test-worker1', [10])]
+        )
+        self.assertEqual(self.brd.getRecentQueueDepth(['A', 'B']), 2)
+
+        self.reactor.advance(self.brd.QUEUE_DEPTH_WINDOW + 1)
+        self.assertEqual(self.brd.getRecentQueueDepth(['A']), 0)
+
+    def test_recent_queue_depth_window(self):
+        self.brd._record_queue_depth('A', 3)
+        self.reactor.advance(100)
+        self.brd._record_queue_depth('A', 1)
+        self.brd._record_queue_depth('B', 2)
+        self.assertEqual(self.brd.getRecentQueueDepth(['A']), 3)
+        self.assertEqual(self.brd.getRecentQueueDepth(['A', 'B']), 5)
+
+        self.reactor.advance(250)
+        self.assertEqual(self.brd.getRecentQueueDepth(['A', 'B']), 3)
+
+        self.brd._record_queue_depth('A', 0)
+        self.reactor.advance(100)
+        self.assertEqual(self.brd.getRecentQueueDepth(['A', 'B']), 0)
+
     @defer.inlineCallbacks
     def test_sorted_by_submit_time(self):
         # same as "limited_by_workers" but with rows swapped
@@ -517,6 +578,19 @@ class TestMaybeStartBuilds(TestBRDBase):
             rows=rows, exp_claims=[10], exp_builds=[('test-worker1', [10])]
         )
 
+    @defer.inlineCallbacks
+    def test_nextWorker_default_prefers_warm_workers(self):
+        self.addWorkers({'test-worker1': 1, 'test-worker2': 1, 'test-worker3': 1})
+        self.bldr.workers[1].worker = mock.Mock(is_warm=True)
+        self.patch(random, 'choice', nth_worker(0))
+        rows = [
+            *self.base_rows,
+            fakedb.BuildRequest(id=10, buildsetid=11, builderid=77),
+        ]
+        yield self.do_test_maybeStartBuildsOnBuilder(
+            rows=rows, exp_claims=[10], exp_builds=[('test-worker2', [10])]
+        )
+
     @defer.inlineCallbacks
     def test_limited_by_canStartBuild(self):
         """Set the 'canStartBuild' value in the config to something
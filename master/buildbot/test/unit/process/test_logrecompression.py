@@ -0,0 +1,238 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.config.master import MasterConfig
+from buildbot.process.logrecompression import LogRecompressionProgress
+from buildbot.process.logrecompression import LogRecompressionService
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.unit.db import test_logs
+from buildbot.util.twisted import async_to_deferred
+
+
+class TestLogRecompressionService(TestReactorMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantDb=True)
+        self.master.config.logCompressionMethod = 'gz'
+        yield self.master.db.insert_test_data(test_logs.Tests.backgroundData)
+        self.config = MasterConfig()
+        self.config.logRecompression = {'batch_size': 2, 'interval': 10}
+
+    @async_to_deferred
+    async def add_log(self, logid, complete=1):
+        # a finished log written by a master that did not compress logs
+        await self.master.db.insert_test_data([
+            fakedb.Log(
+                id=logid, stepid=101, name=f'log{logid}', complete=complete, num_lines=2, type='s'
+            ),
+            fakedb.LogChunk(logid=logid, first_line=0, last_line=0, content=b'x' * 1000),
+            fakedb.LogChunk(logid=logid, first_line=1, last_line=1, content=b'y' * 1000),
+        ])
+
+    def get_compressed(self, logid):
+        def thd(conn):
+            tbl = self.master.db.model.logchunks
+            q = tbl.select().where(tbl.c.logid == logid).order_by(tbl.c.first_line)
+            return [row.compressed for row in conn.execute(q)]
+
+        return self.master.db.pool.do(thd)
+
+    @async_to_deferred
+    async def make_service(self):
+        svc = LogRecompressionService()
+        await svc.setServiceParent(self.master)
+        if not svc.running:
+            svc.startService()
+        self.addCleanup(self.stop_service, svc)
+        await svc.reconfigServiceWithBuildbotConfig(self.config)
+        return svc
+
+    @async_to_deferred
+    async def stop_service(self, svc):
+        if svc.running:
+            await svc.stopService()
+        if svc.parent is not None:
+            await svc.disownServiceParent()
+
+    @async_to_deferred
+    async def test_recompress_in_batches(self):
+        for logid in (201, 202, 203):
+            await self.add_log(logid)
+        await self.add_log(204, complete=0)
+        svc = await self.make_service()
+
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(201)), [1])
+        self.assertEqual((await self.get_compressed(202)), [1])
+        self.assertEqual((await self.get_compressed(203)), [0, 0])
+        self.assertEqual(
+            svc.get_progress(),
+            LogRecompressionProgress(
+                last_logid=202,
+                max_logid=204,
+                unfinished_logs=0,
+                logs_processed=2,
+                bytes_saved=3948,
+                paused=False,
+            ),
+        )
+
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(203)), [1])
+        # unfinished logs are left alone
+        self.assertEqual((await self.get_compressed(204)), [0, 0])
+        self.assertEqual(svc.get_progress().last_logid, 204)
+        self.assertEqual(svc.get_progress().unfinished_logs, 1)
+
+        # until they are finished
+        await self.add_log(205)
+        await self.master.db.logs.finishLog(204)
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(204)), [1])
+        self.assertEqual((await self.get_compressed(205)), [1])
+        self.assertEqual(svc.get_progress().unfinished_logs, 0)
+
+    @async_to_deferred
+    async def test_unfinished_logs_after_restart(self):
+        await self.add_log(201, complete=0)
+        await self.add_log(202)
+        svc = await self.make_service()
+        self.reactor.advance(10)
+        self.assertEqual(svc.get_progress().unfinished_logs, 1)
+        await self.stop_service(svc)
+
+        await self.master.db.logs.finishLog(201)
+        svc = await self.make_service()
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(201)), [1])
+        self.assertEqual(svc.get_progress().unfinished_logs, 0)
+
+    @async_to_deferred
+    async def test_skip_failing_log(self):
+        for logid in (201, 202):
+            await self.add_log(logid)
+        compressLog = self.master.db.logs.compressLog
+
+        def compress_log(logid, **kwargs):
+            if logid == 201:
+                return defer.fail(RuntimeError('corrupted log'))
+            return compressLog(logid, **kwargs)
+
+        self.patch(self.master.db.logs, 'compressLog', compress_log)
+        svc = await self.make_service()
+
+        self.reactor.advance(10)
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
+        self.assertEqual((await self.get_compressed(202)), [1])
+        self.assertEqual(svc.get_progress().last_logid, 202)
+
+    @async_to_deferred
+    async def test_disabled(self):
+        await self.add_log(201)
+        self.config.logRecompression = None
+        await self.make_service()
+
+        self.reactor.advance(100)
+        self.assertEqual((await self.get_compressed(201)), [0, 0])
+
+    @async_to_deferred
+    async def test_pause_resume(self):
+        await self.add_log(201)
+        svc = await self.make_service()
+
+        await svc.pause()
+        self.reactor.advance(100)
+        self.assertEqual((await self.get_compressed(201)), [0, 0])
+        self.assertTrue(svc.get_progress().paused)
+
+        svc.resume()
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(201)), [1])
+        self.assertFalse(svc.get_progress().paused)
+
+    @async_to_deferred
+    async def test_carry_on_after_restart(self):
+        await self.add_log(201)
+        svc = await self.make_service()
+        self.reactor.advance(10)
+        await self.stop_service(svc)
+
+        await self.add_log(202)
+        await self.add_log(203)
+        self.master.config.logCompressionMethod = 'bz2'
+        await self.master.db.logs.compressLog(201, force=True)
+        self.master.config.logCompressionMethod = 'gz'
+
+        await self.make_service()
+        self.reactor.advance(10)
+        # log 201 was already processed with 'gz'
+        self.assertEqual((await self.get_compressed(201)), [2])
+        self.assertEqual((await self.get_compressed(202)), [1])
+        self.assertEqual((await self.get_compressed(203)), [1])
+
+    @async_to_deferred
+    async def test_start_over_when_compression_method_changes(self):
+        await self.add_log(201)
+        svc = await self.make_service()
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(201)), [1])
+
+        self.master.config.logCompressionMethod = 'bz2'
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(201)), [2])
+        self.assertEqual(svc.get_progress().last_logid, 201)
+
+    @async_to_deferred
+    async def test_unfinished_logs_are_bounded(self):
+        self.patch(LogRecompressionService, 'MAX_UNFINISHED_LOGS', 1)
+        for logid in (201, 202):
+            await self.add_log(logid, complete=0)
+        svc = await self.make_service()
+
+        self.reactor.advance(10)
+        # the oldest unfinished log is given up on
+        self.assertEqual(svc.get_progress().unfinished_logs, 1)
+        self.assertEqual((await svc.getState('progress'))['unfinished_logids'], [202])
+
+    @async_to_deferred
+    async def test_runs_on_a_single_master(self):
+        await self.add_log(201)
+        other_masterid = fakedb.FakeDBConnector.MASTER_ID + 1
+        await self.master.db.insert_test_data([fakedb.Master(id=other_masterid)])
+        objectid = await self.master.db.state.getObjectId(
+            'log_recompression', 'LogRecompressionService'
+        )
+        await self.master.db.state.setState(objectid, 'masterid', other_masterid)
+
+        svc = await self.make_service()
+        self.reactor.advance(10)
+        self.assertFalse(svc.active)
+        self.assertEqual((await self.get_compressed(201)), [0, 0])
+
+        # the other master stopped
+        await self.master.db.masters.setMasterState(other_masterid, active=False)
+        self.reactor.advance(svc.POLL_INTERVAL_SEC)
+        self.assertTrue(svc.active)
+        self.reactor.advance(10)
+        self.assertEqual((await self.get_compressed(201)), [1])
+
+        await self.stop_service(svc)
+        self.assertIsNone(await self.master.db.state.getState(objectid, 'masterid'))
@@ -14,14 +14,20 @@
 # Copyright Buildbot Team Members
 
 
+import io
 import os
+import shutil
 import stat
+import tarfile
 import tempfile
+import zlib
 from unittest.mock import Mock
 
+from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.process import remotetransfer
+from buildbot.test.reactor import TestReactorMixin
 
 
 # Test buildbot.steps.remotetransfer.FileWriter class.
@@ -65,6 +71,73 @@ class TestFileWriter(unittest.TestCase):
         mockedFdopen.assert_called_once_with(7, 'wb')
 
 
+class TestDirectoryWriter(TestReactorMixin, unittest.TestCase):
+    def setUp(self):
+        self.setup_test_reactor()
+        self.destroot = os.path.join(tempfile.mkdtemp(), 'dest')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.destroot))
+
+    def make_archive(self, mode='w'):
+        f = io.BytesIO()
+        with tarfile.open(fileobj=f, mode=mode) as archive:
+            for name, content in [('a', b'a' * 3000), ('dir/b', b'b')]:
+                tarinfo = tarfile.TarInfo(name)
+                tarinfo.size = len(content)
+                archive.addfile(tarinfo, io.BytesIO(content))
+        return f.getvalue()
+
+    @defer.inlineCallbacks
+    def do_test_unpack(self, compress, mode):
+        data = self.make_archive(mode)
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, compress, 0o600)
+        for i in range(0, len(data), 1000):
+            yield writer.remote_write(data[i : i + 1000])
+        yield writer.remote_unpack()
+        yield writer.cancel()
+
+        with open(os.path.join(self.destroot, 'a'), 'rb') as f:
+            self.assertEqual(f.read(), b'a' * 3000)
+        with open(os.path.join(self.destroot, 'dir', 'b'), 'rb') as f:
+            self.assertEqual(f.read(), b'b')
+        # no temporary archive has been left behind
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.destroot))), ['dest'])
+
+    def test_unpack(self):
+        return self.do_test_unpack(None, 'w')
+
+    def test_unpack_gz(self):
+        return self.do_test_unpack('gz', 'w|gz')
+
+    def test_unpack_bz2(self):
+        return self.do_test_unpack('bz2', 'w|bz2')
+
+    @defer.inlineCallbacks
+    def test_maxsize(self):
+        data = self.make_archive()
+        writer = remotetransfer.DirectoryWriter(self.destroot, 1000, None, 0o600)
+        yield writer.remote_write(data)
+        with self.assertRaises(tarfile.ReadError):
+            yield writer.remote_unpack()
+
+    @defer.inlineCallbacks
+    def test_error_stops_extraction(self):
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, 'gz', 0o600)
+        with self.assertRaises(zlib.error):
+            yield writer.remote_write(b'not gzip data')
+        with self.assertRaises(zlib.error):
+            yield writer.remote_write(self.make_archive('w|gz'))
+        self.assertFalse(os.path.exists(os.path.join(self.destroot, 'a')))
+
+    @defer.inlineCallbacks
+    def test_purge(self):
+        data = self.make_archive()
+        writer = remotetransfer.DirectoryWriter(self.destroot, None, None, 0o600)
+        yield writer.remote_write(data[:2000])
+        yield writer.cancel()
+        yield writer.purge()
+        self.assertFalse(os.path.exists(self.destroot))
+
+
 class TestStringFileWriter(unittest.TestCase):
     def testBasic(self):
         sfw = remotetransfer.StringFileWriter()
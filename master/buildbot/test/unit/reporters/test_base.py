@@ -17,9 +17,11 @@
 from unittest import mock
 
 from twisted.internet import defer
+from twisted.internet import task
 from twisted.trial import unittest
 
 from buildbot.process.results import FAILURE
+from buildbot.reporters import utils
 from buildbot.reporters.base import ReporterBase
 from buildbot.reporters.generators.build import BuildStatusGenerator
 from buildbot.reporters.generators.worker import WorkerMissingGenerator
@@ -111,6 +113,37 @@ class TestReporterBase(
         self.assertEqual(mn.sendMessage.call_count, 1)
         mn.sendMessage.assert_called_with([report])
 
+    @defer.inlineCallbacks
+    def test_build_details_shared_between_reporters(self):
+        build = yield self.insert_build_finished(FAILURE)
+        orig_get_details = utils.getDetailsForBuild
+
+        def slow_get_details(*args, **kwargs):
+            d = orig_get_details(*args, **kwargs)
+            d.addCallback(lambda res: task.deferLater(self.reactor, 1, lambda: res))
+            return d
+
+        get_details = mock.Mock(side_effect=slow_get_details)
+        self.patch(utils, 'getDetailsForBuild', get_details)
+
+        mn1 = yield self.setupNotifier(generators=[BuildStatusGenerator()])
+        mn2 = yield self.setupNotifier(generators=[BuildStatusGenerator(mode=("failing",))])
+        self.assertIs(mn1._report_context, mn2._report_context)
+
+        key = ('builds', 20, 'finished')
+        d = defer.gatherResults([mn1._got_event(key, build), mn2._got_event(key, build)])
+        self.reactor.advance(1)
+        yield d
+        self.assertEqual(get_details.call_count, 1)
+        self.assertEqual(mn1.sendMessage.call_count, 1)
+        self.assertEqual(mn2.sendMessage.call_count, 1)
+
+        # the details are fetched again for the next event
+        d = mn1._got_event(key, build)
+        self.reactor.advance(1)
+        yield d
+        self.assertEqual(get_details.call_count, 2)
+
     @defer.inlineCallbacks
     def test_worker_missing_sends_message(self):
         generator = WorkerMissingGenerator(workers=['myworker'])
@@ -0,0 +1,120 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from unittest import mock
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.reporters import context
+from buildbot.reporters import utils
+from buildbot.reporters.context import ReportContextCache
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+
+
+class TestReportContextCache(TestReactorMixin, unittest.TestCase):
+    KEY = ('buildsets', '98', 'complete')
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self)
+        self.fetches = []
+        self.patch(utils, 'getDetailsForBuildset', self.get_details_for_buildset)
+        self.patch(utils, 'getDetailsForBuild', self.get_details_for_build)
+        self.cache = yield ReportContextCache.getService(self.master)
+
+    def get_details_for_buildset(self, master, bsid, **kwargs):
+        d = defer.Deferred()
+        self.fetches.append((d, bsid, kwargs))
+        return d
+
+    def get_details_for_build(self, master, build, **kwargs):
+        build['steps'] = [{'name': 'step'}]
+        self.fetches.append((None, build['buildid'], kwargs))
+        return defer.succeed(None)
+
+    def test_lookup(self):
+        self.assertIs(ReportContextCache.lookup(self.master), self.cache)
+
+    @defer.inlineCallbacks
+    def test_buildset_shared_during_event(self):
+        self.cache.event_started(self.KEY)
+        self.cache.event_started(self.KEY)
+        d1 = context.get_details_for_buildset(self.master, self.KEY, 98, want_steps=True)
+        d2 = context.get_details_for_buildset(self.master, self.KEY, 98, want_steps=True)
+        self.assertEqual(len(self.fetches), 1)
+
+        self.fetches[0][0].callback({'buildset': {'bsid': 98}, 'builds': []})
+        res1 = yield d1
+        res2 = yield d2
+        self.assertEqual(res1, {'buildset': {'bsid': 98}, 'builds': []})
+        self.assertEqual(res1, res2)
+        # each caller gets its own copy
+        self.assertIsNot(res1['buildset'], res2['buildset'])
+
+        self.cache.event_finished(self.KEY)
+        context.get_details_for_buildset(self.master, self.KEY, 98, want_steps=True)
+        self.assertEqual(len(self.fetches), 1)
+
+        self.cache.event_finished(self.KEY)
+        context.get_details_for_buildset(self.master, self.KEY, 98, want_steps=True)
+        self.assertEqual(len(self.fetches), 2)
+
+    def test_buildset_different_arguments(self):
+        self.cache.event_started(self.KEY)
+        context.get_details_for_buildset(self.master, self.KEY, 98, add_logs=['a'])
+        context.get_details_for_buildset(self.master, self.KEY, 98, add_logs=['b'])
+        context.get_details_for_buildset(self.master, self.KEY, 98, add_logs=['a'])
+        self.assertEqual(len(self.fetches), 2)
+
+    @defer.inlineCallbacks
+    def test_buildset_failure(self):
+        self.cache.event_started(self.KEY)
+        d1 = context.get_details_for_buildset(self.master, self.KEY, 98)
+        d2 = context.get_details_for_buildset(self.master, self.KEY, 98)
+        self.fetches[0][0].errback(RuntimeError('oops'))
+        with self.assertRaises(RuntimeError):
+            yield d1
+        with self.assertRaises(RuntimeError):
+            yield d2
+
+    @defer.inlineCallbacks
+    def test_build_updates_each_caller(self):
+        key = ('builds', '20', 'finished')
+        self.cache.event_started(key)
+        build1 = {'buildid': 20}
+        build2 = {'buildid': 20}
+        yield context.get_details_for_build(self.master, key, build1, want_steps=True)
+        yield context.get_details_for_build(self.master, key, build2, want_steps=True)
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(build1, {'buildid': 20, 'steps': [{'name': 'step'}]})
+        self.assertEqual(build1, build2)
+        self.assertIsNot(build1['steps'], build2['steps'])
+
+    def test_not_shared_outside_event(self):
+        context.get_details_for_buildset(self.master, self.KEY, 98)
+        context.get_details_for_buildset(self.master, self.KEY, 98)
+        self.assertEqual(len(self.fetches), 2)
+
+    @defer.inlineCallbacks
+    def test_without_cache(self):
+        master = yield fakemaster.make_master(self)
+        get_details = mock.Mock(return_value=defer.succeed(None))
+        self.patch(utils, 'getDetailsForBuild', get_details)
+        build = {'buildid': 20}
+        yield context.get_details_for_build(master, self.KEY, build, want_steps=True)
+        get_details.assert_called_once_with(master, build, want_steps=True)
@@ -250,6 +250,32 @@ class TestDataUtils(TestReactorMixin, unittest.TestCase, logging.LoggingMixin):
             'http://localhost:8080/#/builders/80/builds/2/steps/29/logs/stdio',
         )
 
+    @defer.inlineCallbacks
+    def test_getDetailsForBuildsetWithLogsMaxSize(self):
+        yield self.setupDb()
+        res = yield utils.getDetailsForBuildset(
+            self.master,
+            98,
+            want_logs_content=True,
+            logs_content_max_size=12,
+        )
+
+        build1 = sort_builds(res['builds'])[0]
+        self.assertEqual(
+            build1['steps'][0]['logs'][0]['content'],
+            {'logid': 80, 'firstline': 0, 'content': 'line zero\nli'},
+        )
+
+    @defer.inlineCallbacks
+    def test_getDetailsForBuildsetWithSomeLogsContent(self):
+        yield self.setupDb()
+        res = yield utils.getDetailsForBuildset(self.master, 98, add_logs=['step2.stdio'])
+
+        build1 = sort_builds(res['builds'])[0]
+        self.assertEqual([s['name'] for s in build1['steps']], ['step1', 'step2'])
+        self.assertNotIn('content', build1['steps'][0]['logs'][0])
+        self.assertEqual(build1['steps'][1]['logs'], [])
+
     @defer.inlineCallbacks
     def test_get_details_for_buildset_all(self):
         yield self.setupDb()
@@ -621,6 +647,21 @@ class TestDataUtils(TestReactorMixin, unittest.TestCase, logging.LoggingMixin):
         res = yield utils.getPreviousBuild(self.master, build)
         self.assertEqual(res['buildid'], 18)
 
+    @defer.inlineCallbacks
+    def test_getPreviousBuildWithRetryPaged(self):
+        yield self.setupDb()
+        self.patch(utils, '_PREVIOUS_BUILDS_PAGE_SIZE', 1)
+        build = yield self.master.data.get(("builds", 20))
+        res = yield utils.getPreviousBuild(self.master, build)
+        self.assertEqual(res['buildid'], 18)
+
+    @defer.inlineCallbacks
+    def test_getPreviousBuildFirstBuild(self):
+        yield self.setupDb()
+        build = yield self.master.data.get(("builds", 18))
+        res = yield utils.getPreviousBuild(self.master, build)
+        self.assertIsNone(res)
+
 
 class TestURLUtils(TestReactorMixin, unittest.TestCase):
     @defer.inlineCallbacks
@@ -0,0 +1,119 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from unittest import mock
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.changes.filter import ChangeFilter
+from buildbot.schedulers.dispatcher import ChangeDispatcher
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+
+
+class TestChangeDispatcher(TestReactorMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantMq=True, wantDb=True)
+        self.master.mq.verifyMessages = False
+        yield self.master.db.insert_test_data([
+            fakedb.SourceStamp(id=92),
+            fakedb.Change(changeid=1, sourcestampid=92, branch='main', project='p'),
+            fakedb.Change(changeid=2, sourcestampid=92, branch='dev', project='p'),
+        ])
+        self.dispatcher = yield ChangeDispatcher.getService(self.master)
+        self.received = []
+
+    def subscribe(self, name, change_filter=None):
+        return self.dispatcher.subscribe(
+            lambda change: self.received.append((name, change.number)), change_filter
+        )
+
+    def send_change(self, changeid):
+        self.master.mq.callConsumer(('changes', str(changeid), 'new'), {'changeid': changeid})
+
+    @defer.inlineCallbacks
+    def test_change_loaded_once(self):
+        yield self.subscribe('a')
+        yield self.subscribe('b')
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+
+        getChange = mock.Mock(wraps=self.master.db.changes.getChange)
+        self.patch(self.master.db.changes, 'getChange', getChange)
+        self.send_change(1)
+        self.assertEqual(self.received, [('a', 1), ('b', 1)])
+        getChange.assert_called_once_with(1)
+
+    @defer.inlineCallbacks
+    def test_indexed_filters(self):
+        yield self.subscribe('main', ChangeFilter(branch='main'))
+        yield self.subscribe('any', None)
+        yield self.subscribe('dev-or-main', ChangeFilter(branch=['dev', 'main']))
+        yield self.subscribe('project', ChangeFilter(project='p', branch_re='d.*'))
+        yield self.subscribe('other-project', ChangeFilter(project='other'))
+        yield self.subscribe('regex', ChangeFilter(branch_re='d.*'))
+
+        self.send_change(1)
+        self.assertEqual(
+            self.received,
+            [('main', 1), ('any', 1), ('dev-or-main', 1), ('project', 1), ('regex', 1)],
+        )
+
+        self.received = []
+        self.send_change(2)
+        self.assertEqual(
+            self.received, [('any', 2), ('dev-or-main', 2), ('project', 2), ('regex', 2)]
+        )
+
+    @defer.inlineCallbacks
+    def test_stop_consuming(self):
+        sub1 = yield self.subscribe('a', ChangeFilter(branch='main'))
+        sub2 = yield self.subscribe('b')
+        sub1.stopConsuming()
+        self.send_change(1)
+        self.assertEqual(self.received, [('b', 1)])
+
+        sub2.stopConsuming()
+        self.assertEqual(self.master.mq.qrefs, [])
+
+        # the consumer is restarted with the next subscription
+        yield self.subscribe('c')
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+        self.send_change(2)
+        self.assertEqual(self.received, [('b', 1), ('c', 2)])
+
+    @defer.inlineCallbacks
+    def test_subscribe_while_starting(self):
+        started = defer.Deferred()
+        self.master.mq.startConsuming = mock.Mock(return_value=started)
+
+        d1 = self.subscribe('a')
+        d2 = self.subscribe('b')
+        self.assertEqual(self.master.mq.startConsuming.call_count, 1)
+        self.assertFalse(d1.called)
+
+        started.callback(mock.Mock())
+        yield d1
+        yield d2
+
+    @defer.inlineCallbacks
+    def test_start_consuming_failure(self):
+        self.master.mq.startConsuming = mock.Mock(return_value=defer.fail(RuntimeError('oops')))
+        with self.assertRaises(RuntimeError):
+            yield self.subscribe('a')
+        self.assertEqual(self.dispatcher._unindexed, {})
@@ -2,10 +2,12 @@ from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.secrets.manager import SecretManager
+from buildbot.secrets.providers.base import SecretProviderBase
 from buildbot.secrets.secret import SecretDetails
 from buildbot.test.fake import fakemaster
 from buildbot.test.fake.secrets import FakeSecretStorage
 from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util.config import ConfigErrorsMixin
 
 
 class TestSecretsManager(TestReactorMixin, unittest.TestCase):
@@ -78,3 +80,156 @@ class TestSecretsManager(TestReactorMixin, unittest.TestCase):
         secret_service_manager.services = [fakeStorageService, otherFakeStorageService]
         secret_result = yield secret_service_manager.get("foo3")
         self.assertEqual(secret_result, None)
+
+
+class CountingSecretStorage(SecretProviderBase):
+    name = "SecretsInCounting"
+
+    def reconfigService(self, secretdict=None):
+        self.secretdict = secretdict or {}
+        self.calls = []
+        self.pending = None
+
+    def get(self, key):
+        self.calls.append(key)
+        if self.pending is not None:
+            return self.pending
+        return self.secretdict.get(key)
+
+
+class TestSecretsManagerCache(TestReactorMixin, ConfigErrorsMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self)
+        self.secrets = SecretManager()
+        yield self.secrets.setServiceParent(self.master)
+
+    def add_provider(self, **kwargs):
+        provider = CountingSecretStorage(**kwargs)
+        provider.reconfigService(secretdict={"foo": "bar"})
+        self.secrets.services.append(provider)
+        return provider
+
+    @defer.inlineCallbacks
+    def test_not_cached_by_default(self):
+        provider = self.add_provider()
+        yield self.secrets.get("foo")
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo", "foo"])
+
+    @defer.inlineCallbacks
+    def test_cached(self):
+        provider = self.add_provider(cache_ttl=60)
+        res = yield self.secrets.get("foo")
+        self.assertEqual(res.value, "bar")
+        self.reactor.advance(59)
+        res = yield self.secrets.get("foo")
+        self.assertEqual(res.value, "bar")
+        self.assertEqual(provider.calls, ["foo"])
+
+        self.reactor.advance(1)
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo", "foo"])
+
+    @defer.inlineCallbacks
+    def test_negative_cached(self):
+        provider = self.add_provider(cache_ttl=60)
+        yield self.secrets.get("other")
+        yield self.secrets.get("other")
+        self.assertEqual(provider.calls, ["other", "other"])
+
+        provider = self.add_provider(negative_cache_ttl=10, name="negative")
+        self.assertIsNone((yield self.secrets.get("nope")))
+        self.assertIsNone((yield self.secrets.get("nope")))
+        self.assertEqual(provider.calls, ["nope"])
+        # found secrets are not cached
+        yield self.secrets.get("foo")
+        yield self.secrets.get("foo")
+
+    @defer.inlineCallbacks
+    def test_provider_ttl(self):
+        first = self.add_provider(cache_ttl=60, negative_cache_ttl=60)
+        second = self.add_provider(name="second")
+        second.secretdict = {"other": "value"}
+        yield self.secrets.get("other")
+        yield self.secrets.get("other")
+        self.assertEqual(first.calls, ["other"])
+        self.assertEqual(second.calls, ["other", "other"])
+
+    @defer.inlineCallbacks
+    def test_concurrent_fetches_coalesced(self):
+        provider = self.add_provider(cache_ttl=60)
+        provider.pending = defer.Deferred()
+        d1 = self.secrets.get("foo")
+        d2 = self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo"])
+
+        provider.pending.callback("bar")
+        self.assertEqual((yield d1).value, "bar")
+        self.assertEqual((yield d2).value, "bar")
+
+    @defer.inlineCallbacks
+    def test_failure_not_cached(self):
+        provider = self.add_provider(cache_ttl=60)
+        provider.pending = defer.Deferred()
+        d1 = self.secrets.get("foo")
+        d2 = self.secrets.get("foo")
+        provider.pending.errback(RuntimeError("oops"))
+        with self.assertRaises(RuntimeError):
+            yield d1
+        with self.assertRaises(RuntimeError):
+            yield d2
+
+        provider.pending = None
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo", "foo"])
+
+    @defer.inlineCallbacks
+    def test_invalidate(self):
+        provider = self.add_provider(cache_ttl=60)
+        yield self.secrets.get("foo")
+        self.secrets.invalidate("other")
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo"])
+
+        self.secrets.invalidate("foo")
+        yield self.secrets.get("foo")
+        self.secrets.invalidate()
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo", "foo", "foo"])
+
+    @defer.inlineCallbacks
+    def test_invalidate_during_fetch(self):
+        provider = self.add_provider(cache_ttl=60)
+        provider.pending = defer.Deferred()
+        d = self.secrets.get("foo")
+        self.secrets.invalidate()
+        provider.pending.callback("old")
+        self.assertEqual((yield d).value, "old")
+
+        provider.pending = None
+        res = yield self.secrets.get("foo")
+        self.assertEqual(res.value, "bar")
+
+    @defer.inlineCallbacks
+    def test_invalidated_on_reconfig(self):
+        provider = CountingSecretStorage(secretdict={"foo": "bar"}, cache_ttl=60)
+        self.master.config.secretsProviders = [provider]
+        yield self.secrets.reconfigServiceWithBuildbotConfig(self.master.config)
+        yield provider.configureService()
+        yield self.secrets.get("foo")
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo"])
+
+        yield self.secrets.reconfigServiceWithBuildbotConfig(self.master.config)
+        yield self.secrets.get("foo")
+        self.assertEqual(provider.calls, ["foo", "foo"])
+
+    def test_invalid_ttl(self):
+        with self.assertRaisesConfigError("cache_ttl must be a non-negative number of seconds"):
+            CountingSecretStorage(cache_ttl=-1)
+        with self.assertRaisesConfigError(
+            "negative_cache_ttl must be a non-negative number of seconds"
+        ):
+            CountingSecretStorage(negative_cache_ttl="1h")
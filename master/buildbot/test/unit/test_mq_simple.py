@@ -84,3 +84,51 @@ class SimpleMQ(TestReactorMixin, unittest.TestCase):
         self.assertFalse(d.called)
         d1.callback(None)
         self.assertTrue(d.called)
+
+    @defer.inlineCallbacks
+    def test_stop_consuming(self):
+        callback = mock.Mock()
+        qref = yield self.mq.startConsuming(callback, ('a', None))
+        yield qref.stopConsuming()
+        yield self.mq.produce(('a', 'b'), 'foo')
+        callback.assert_not_called()
+        self.assertEqual(self.mq.qrefs, [])
+
+    @defer.inlineCallbacks
+    def test_invoke_in_consuming_order(self):
+        calls = []
+        yield self.mq.startConsuming(lambda *args: calls.append(1), ('a', None))
+        yield self.mq.startConsuming(lambda *args: calls.append(2), ('a', 'b'))
+        yield self.mq.startConsuming(lambda *args: calls.append(3), (None, 'b'))
+        yield self.mq.startConsuming(lambda *args: calls.append(4), ('a', 'c'))
+        yield self.mq.produce(('a', 'b'), 'foo')
+        self.assertEqual(calls, [1, 2, 3])
+
+    @defer.inlineCallbacks
+    def test_persistent_queue(self):
+        callback = mock.Mock()
+        qref = yield self.mq.startConsuming(callback, ('a', None), persistent_name='p')
+        yield qref.stopConsuming()
+        yield self.mq.produce(('a', 'b'), 'foo')
+        callback.assert_not_called()
+
+        callback2 = mock.Mock()
+        qref2 = yield self.mq.startConsuming(callback2, ('a', None), persistent_name='p')
+        self.assertIs(qref, qref2)
+        callback2.assert_called_once_with(('a', 'b'), 'foo')
+
+    @defer.inlineCallbacks
+    def test_many_consumers_only_matching_invoked(self):
+        callbacks = [mock.Mock() for _ in range(1000)]
+        for i, callback in enumerate(callbacks):
+            yield self.mq.startConsuming(callback, ('builds', str(i), None))
+
+        with mock.patch('buildbot.util.tuplematch.matchTuple') as matchTuple:
+            yield self.mq.produce(('builds', '10', 'new'), 'foo')
+        matchTuple.assert_not_called()
+
+        for i, callback in enumerate(callbacks):
+            if i == 10:
+                callback.assert_called_once_with(('builds', '10', 'new'), 'foo')
+            else:
+                callback.assert_not_called()
@@ -26,6 +26,7 @@ from twisted.web import resource
 
 from buildbot import interfaces
 from buildbot.test.fake import httpclientservice as fakehttpclientservice
+from buildbot.test.reactor import TestReactorMixin
 from buildbot.test.util.site import SiteWithClose
 from buildbot.test.util.warnings import assertProducesWarning
 from buildbot.util import bytes2unicode
@@ -319,6 +320,122 @@ class HTTPClientServiceTestTReqNoEncoding(HTTPClientServiceTestBase):
         )
 
 
+class HTTPClientServiceTestQueue(TestReactorMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.patch(httpclientservice.HTTPClientService, 'MAX_CONCURRENT_PER_HOST', 2)
+        self.patch(httpclientservice.HTTPClientService, 'MAX_QUEUED_PER_HOST', 2)
+        self.parent = service.MasterService()
+        self.parent.reactor = self.reactor
+        yield self.parent.startService()
+        self._http = yield httpclientservice.HTTPClientService.getService(self.parent, '')
+        self.session = httpclientservice.HTTPSession(self._http, 'http://foo')
+
+        self.requests = []
+        self._http._do_single_request = self.do_single_request
+
+    def do_single_request(self, session, method, ep, **kwargs):
+        d = defer.Deferred()
+        self.requests.append((method, ep, kwargs, d))
+        return d
+
+    def response(self, code):
+        return mock.Mock(code=code, content=mock.Mock(return_value=defer.succeed(b'')))
+
+    def test_concurrency_limited_per_host(self):
+        d1 = self.session.post('/1')
+        self.session.post('/2')
+        self.session.post('/3')
+        self.session.post('http://other/4')
+        self.assertEqual([r[1] for r in self.requests], ['/1', '/2', 'http://other/4'])
+
+        res = self.response(200)
+        self.requests[0][3].callback(res)
+        self.assertIs(self.successResultOf(d1), res)
+        self.assertEqual([r[1] for r in self.requests], ['/1', '/2', 'http://other/4', '/3'])
+
+    @defer.inlineCallbacks
+    def test_concurrency_limit_argument(self):
+        http = yield httpclientservice.HTTPClientService.getService(
+            self.parent, 'http://bar', max_concurrent_per_host=1, max_queued_per_host=1
+        )
+        http._do_single_request = self.do_single_request
+        session = httpclientservice.HTTPSession(http, 'http://bar')
+        session.post('/1')
+        session.post('/2')
+        self.failureResultOf(session.post('/3'), httpclientservice.HTTPQueueFullError)
+        self.assertEqual([r[1] for r in self.requests], ['/1'])
+
+    def test_queue_full(self):
+        for i in range(4):
+            self.session.post(f'/{i}')
+        self.failureResultOf(self.session.post('/5'), httpclientservice.HTTPQueueFullError)
+
+    def test_coalesced(self):
+        self.session.post('/1')
+        self.session.post('/2')
+        d3 = self.session.post('/status', json={'state': 'pending'}, coalesce_key='k')
+        d4 = self.session.post('/status', json={'state': 'success'}, coalesce_key='k')
+
+        self.requests[0][3].callback(self.response(200))
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.requests[2][2], {'json': {'state': 'success'}})
+
+        res = self.response(201)
+        self.requests[2][3].callback(res)
+        self.assertIs(self.successResultOf(d3), res)
+        self.assertIs(self.successResultOf(d4), res)
+
+    def test_retry(self):
+        d = self.session.get('/1', retry=True)
+        res = self.response(503)
+        self.requests[0][3].callback(res)
+        self.assertNoResult(d)
+        # the body of the response is read to release the connection
+        res.content.assert_called_once_with()
+        self.reactor.advance(1)
+        self.assertEqual(len(self.requests), 2)
+
+        self.requests[1][3].errback(RuntimeError('connection lost'))
+        self.reactor.advance(2)
+        self.assertEqual(len(self.requests), 3)
+
+        res = self.response(200)
+        self.requests[2][3].callback(res)
+        self.assertIs(self.successResultOf(d), res)
+
+    def test_retry_gives_up(self):
+        self.patch(httpclientservice.HTTPClientService, 'RETRY_MAX_WAIT_SECONDS', 3)
+        d = self.session.delete('/1', retry=True)
+        self.requests[0][3].errback(RuntimeError('connection lost'))
+        self.reactor.advance(1)
+        self.requests[1][3].errback(RuntimeError('connection lost'))
+        self.reactor.advance(2)
+        self.requests[2][3].errback(RuntimeError('connection lost'))
+        self.failureResultOf(d, RuntimeError)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_no_retry_by_default(self):
+        d = self.session.get('/1')
+        res = self.response(503)
+        self.requests[0][3].callback(res)
+        self.assertIs(self.successResultOf(d), res)
+
+        d = self.session.put('/2')
+        self.requests[1][3].errback(RuntimeError('connection lost'))
+        self.failureResultOf(d, RuntimeError)
+        self.assertEqual(len(self.requests), 2)
+
+    @defer.inlineCallbacks
+    def test_stop_cancels_waiting(self):
+        self.session.post('/1')
+        self.session.post('/2')
+        d = self.session.post('/3')
+        yield self._http.stopService()
+        self.failureResultOf(d, defer.CancelledError)
+
+
 class MyResource(resource.Resource):
     isLeaf = True
 
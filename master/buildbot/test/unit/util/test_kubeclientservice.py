@@ -21,11 +21,14 @@ from unittest import mock
 from unittest.case import SkipTest
 
 from twisted.internet import defer
+from twisted.internet import reactor
+from twisted.internet import task
 from twisted.python import runtime
 from twisted.trial import unittest
 
 from buildbot.test.fake import fakemaster
 from buildbot.test.fake import httpclientservice as fakehttpclientservice
+from buildbot.test.fake.kube import FakeKubeApiServer
 from buildbot.test.reactor import TestReactorMixin
 from buildbot.test.util import config
 from buildbot.util import kubeclientservice
@@ -278,3 +281,155 @@ class KubeClientServiceTest(unittest.TestCase):
         self.assertEqual(config.running, 1)
         yield self.client.unregister(worker2)
         self.assertEqual(config.running, 0)
+
+
+class KubePodWatchTest(unittest.TestCase):
+    timeout = 10
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.server = FakeKubeApiServer()
+        url = self.server.listen(self)
+
+        self.parent = service.MasterService()
+        self.parent.reactor = reactor
+        self.client = kubeclientservice.KubeClientService()
+        yield self.client.setServiceParent(self.parent)
+        yield self.parent.startService()
+        self.addCleanup(self.parent.stopService)
+
+        self.config = kubeclientservice.KubeHardcodedConfig(master_url=url)
+        self.worker = mock.Mock(name="worker1")
+        yield self.client.register(self.worker, self.config)
+
+    @defer.inlineCallbacks
+    def wait_until(self, condition):
+        while not condition():
+            yield task.deferLater(reactor, 0.01)
+
+    def create_pod(self, namespace, name):
+        labels = dict(kubeclientservice.KubePodWatch.WORKER_POD_LABELS)
+        self.server.create_pod(namespace, {'metadata': {'name': name, 'labels': labels}})
+
+    @defer.inlineCallbacks
+    def get_synced_watch(self, namespace='default'):
+        watch = self.client.get_pod_watch(self.config, namespace)
+        yield self.wait_until(lambda: watch.synced and self.server.has_watch(namespace))
+        return watch
+
+    @defer.inlineCallbacks
+    def test_fans_out_pod_events(self):
+        self.create_pod('default', 'old')
+        watch = yield self.get_synced_watch()
+        self.assertIs(self.client.get_pod_watch(self.config, 'default'), watch)
+        self.assertEqual(watch.get_pod('old')['status'], {'phase': 'Pending'})
+
+        self.create_pod('default', 'pod')
+        yield watch.wait_for_pod('pod', lambda pod: pod is not None)
+
+        running = watch.wait_for_pod('pod', lambda pod: pod['status']['phase'] == 'Running')
+        deleted1 = watch.wait_for_pod('pod', lambda pod: pod is None)
+        deleted2 = watch.wait_for_pod('pod', lambda pod: pod is None)
+
+        self.server.set_pod_status('default', 'pod', phase='Running')
+        pod = yield running
+        self.assertEqual(pod['metadata']['name'], 'pod')
+        self.assertFalse(deleted1.called)
+
+        self.server.delete_pod('default', 'pod')
+        self.assertIsNone((yield deleted1))
+        self.assertIsNone((yield deleted2))
+
+        # a single list for all the events, and no polling of the pods
+        self.assertEqual(self.server.requests, [('GET', '/api/v1/namespaces/default/pods')])
+
+    @defer.inlineCallbacks
+    def test_one_watch_per_namespace(self):
+        watch = yield self.get_synced_watch()
+        other = yield self.get_synced_watch('other')
+        self.assertIsNot(watch, other)
+
+        self.create_pod('other', 'pod')
+        yield other.wait_for_pod('pod', lambda pod: pod is not None)
+        self.assertIsNone(watch.get_pod('pod'))
+
+    @defer.inlineCallbacks
+    def test_only_worker_pods(self):
+        self.server.create_pod('default', {'metadata': {'name': 'other1'}})
+        watch = yield self.get_synced_watch()
+        self.server.create_pod('default', {'metadata': {'name': 'other2'}})
+        self.create_pod('default', 'pod')
+
+        yield watch.wait_for_pod('pod', lambda pod: pod is not None)
+        self.assertEqual(list(watch.pods), ['pod'])
+
+    @defer.inlineCallbacks
+    def test_ca_file_read_in_thread(self):
+        ca_file = os.path.join(
+            os.path.dirname(__file__), '..', '..', 'integration', 'pki', 'ca', 'ca.crt'
+        )
+        config = kubeclientservice.KubeHardcodedConfig(
+            master_url='https://kube.example.com', verify=ca_file
+        )
+        watch = kubeclientservice.KubePodWatch(reactor, config, 'default')
+        deferToThread = mock.Mock(wraps=kubeclientservice.threads.deferToThread)
+        self.patch(kubeclientservice.threads, 'deferToThread', deferToThread)
+
+        agent = yield watch._get_agent()
+        self.assertIs((yield watch._get_agent()), agent)
+        deferToThread.assert_called_once_with(watch._read_file, ca_file)
+
+    @defer.inlineCallbacks
+    def test_resumes_after_stream_end(self):
+        watch = yield self.get_synced_watch()
+        self.server.close_watches()
+        self.create_pod('default', 'pod')
+
+        yield watch.wait_for_pod('pod', lambda pod: pod is not None)
+        self.assertEqual(self.server.count_requests('GET'), 1)
+
+    @defer.inlineCallbacks
+    def test_lists_again_after_expiry(self):
+        watch = yield self.get_synced_watch()
+        d = watch.wait_for_pod('pod', lambda pod: pod is not None)
+
+        self.server.expire_watches()
+        with self.assertRaises(kubeclientservice.KubeWatchInterruptedError):
+            yield d
+
+        self.create_pod('default', 'pod')
+        yield self.wait_until(lambda: watch.synced)
+        yield watch.wait_for_pod('pod', lambda pod: pod is not None)
+        self.assertEqual(self.server.count_requests('GET'), 2)
+
+    @defer.inlineCallbacks
+    def test_cancel_wait(self):
+        watch = yield self.get_synced_watch()
+        d = watch.wait_for_pod('pod', lambda pod: pod is not None)
+        d.cancel()
+        with self.assertRaises(defer.CancelledError):
+            yield d
+        self.assertEqual(watch._waiters, {})
+
+    @defer.inlineCallbacks
+    def test_stopped_with_last_worker(self):
+        watch = yield self.get_synced_watch()
+        d = watch.wait_for_pod('pod', lambda pod: pod is not None)
+
+        yield self.client.unregister(self.worker)
+        self.assertFalse(watch.synced)
+        with self.assertRaises(kubeclientservice.KubeWatchInterruptedError):
+            yield d
+        self.assertIsNone(self.client.get_pod_watch(self.config, 'default'))
+
+    def test_not_watched(self):
+        self.patch(kubeclientservice.KubeClientService, 'WATCH_PODS', False)
+        self.assertIsNone(self.client.get_pod_watch(self.config, 'default'))
+
+    @defer.inlineCallbacks
+    def test_not_watched_with_client_certificate(self):
+        config = kubeclientservice.KubeHardcodedConfig(
+            name="KubeConfigWithCert", master_url='https://kube.example.com', cert='/path/to/cert'
+        )
+        yield self.client.register(mock.Mock(name="worker2"), config)
+        self.assertIsNone(self.client.get_pod_watch(config, 'default'))
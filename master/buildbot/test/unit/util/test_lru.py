@@ -262,6 +262,26 @@ class LRUCacheTest(unittest.TestCase):
         self.assertEqual(self.lru.get('p'), set(['PPP']))
         self.assertEqual(self.lru.get('q'), set(['new-q']))  # updated
 
+    def test_remove(self):
+        calls = []
+
+        def miss_fn(k):
+            calls.append(k)
+            return short(k)
+
+        self.lru = lru.LRUCache(miss_fn, 3)
+        a = self.lru.get('a')
+        self.lru.get('b')
+        self.lru.remove('a')
+        self.lru.remove('x')
+        self.lru.inv()
+        self.assertEqual(self.lru.keys(), ['b'])
+
+        # a fresh value is fetched, even though the old one is still referenced
+        self.assertEqual(self.lru.get('a'), a)
+        self.assertEqual(calls, ['a', 'b', 'a'])
+        self.lru.inv()
+
 
 class AsyncLRUCacheTest(unittest.TestCase):
     def setUp(self):
@@ -580,3 +600,11 @@ class AsyncLRUCacheTest(unittest.TestCase):
         self.assertEqual((yield self.lru.get('p')), short('p'))
         self.lru.put('p', set(['P2P2']))
         self.assertEqual((yield self.lru.get('p')), set(['P2P2']))
+
+    @defer.inlineCallbacks
+    def test_remove(self):
+        self.assertEqual((yield self.lru.get('p')), short('p'))
+        self.lru.put('p', set(['P2P2']))
+        self.lru.remove('p')
+        self.assertEqual((yield self.lru.get('p')), short('p'))
+        self.lru.inv()
@@ -94,3 +94,44 @@ class Matcher(unittest.TestCase):
         self.m[('abc', 'efg')] = 3
         self.assertEqual(self.m[('abc', 'def')], (2, {}))
         self.assertEqual(self.m[('abc', 'efg')], (3, {}))
+
+    def test_literal_before_pattern(self):
+        self.m[('A', ':a')] = 'pattern'
+        self.m[('A', 'b')] = 'literal'
+        self.assertEqual(self.m[('A', 'b')], ('literal', {}))
+        self.assertEqual(self.m[('A', 'c')], ('pattern', {"a": 'c'}))
+
+    def test_backtracking(self):
+        self.m[('A', 'b', 'C')] = 'literal'
+        self.m[('A', 'n:a', 'D')] = 'num'
+        self.m[('A', 'i:a', 'D')] = 'ident'
+        self.m[('A', ':a', 'E')] = 'any'
+        self.assertEqual(self.m[('A', 'b', 'C')], ('literal', {}))
+        self.assertEqual(self.m[('A', 'b', 'D')], ('ident', {"a": 'b'}))
+        self.assertEqual(self.m[('A', '1', 'D')], ('num', {"a": 1}))
+        self.assertEqual(self.m[('A', 'b', 'E')], ('any', {"a": 'b'}))
+        with self.assertRaises(KeyError):
+            self.m[('A', 'b', 'F')]
+
+    def test_shared_prefix(self):
+        self.m[('A', 'n:a', 'B')] = 'B'
+        self.m[('A', 'n:a', 'C')] = 'C'
+        self.m[('A', 'n:b', 'D')] = 'D'
+        self.assertEqual(self.m[('A', '1', 'C')], ('C', {"a": 1}))
+        self.assertEqual(self.m[('A', '1', 'D')], ('D', {"b": 1}))
+
+    def test_non_string_path_elements(self):
+        self.m[('A', 'n:a')] = 'num'
+        self.m[('B', 'i:b')] = 'ident'
+        self.assertEqual(self.m[('A', 10)], ('num', {"a": 10}))
+        with self.assertRaises(KeyError):
+            self.m[('B', 10)]
+
+    def test_empty_path(self):
+        self.m[()] = 'root'
+        self.assertEqual(self.m[()], ('root', {}))
+
+    def test_invalid_type_flag(self):
+        self.m[('A', 'x:a')] = 'A'
+        with self.assertRaises(AssertionError):
+            self.m[('A', '1')]
@@ -0,0 +1,146 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+
+from twisted.python import runtime
+from twisted.trial import unittest
+
+from buildbot.util import tarstream
+
+
+def make_archive(members, mode='w'):
+    f = io.BytesIO()
+    with tarfile.open(fileobj=f, mode=mode) as archive:
+        for tarinfo, content in members:
+            archive.addfile(tarinfo, io.BytesIO(content) if content is not None else None)
+    return f.getvalue()
+
+
+def make_info(name, type=tarfile.REGTYPE, size=0, mode=0o644, linkname='', mtime=1000000):
+    tarinfo = tarfile.TarInfo(name)
+    tarinfo.type = type
+    tarinfo.size = size
+    tarinfo.mode = mode
+    tarinfo.linkname = linkname
+    tarinfo.mtime = mtime
+    return tarinfo
+
+
+def file_member(name, content, **kwargs):
+    return make_info(name, size=len(content), **kwargs), content
+
+
+class TestTarStreamExtractor(unittest.TestCase):
+    def setUp(self):
+        self.destroot = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.destroot)
+
+    def extract(self, data, compress=None, piece_size=7):
+        extractor = tarstream.TarStreamExtractor(self.destroot, compress)
+        for i in range(0, len(data), piece_size):
+            extractor.feed(data[i : i + piece_size])
+        extractor.close()
+
+    def read(self, *path):
+        with open(os.path.join(self.destroot, *path), 'rb') as f:
+            return f.read()
+
+    def do_test_extract(self, compress, mode):
+        data = make_archive(
+            [
+                (make_info('dir', type=tarfile.DIRTYPE, mode=0o755), None),
+                file_member('dir/a', b'content of a' * 100),
+                file_member('dir/empty', b''),
+                file_member('dir/' + 'x' * 150, b'long name'),
+                file_member('exactly_one_block', b'z' * tarfile.BLOCKSIZE),
+            ],
+            mode=mode,
+        )
+        self.extract(data, compress)
+
+        self.assertEqual(self.read('dir', 'a'), b'content of a' * 100)
+        self.assertEqual(self.read('dir', 'empty'), b'')
+        self.assertEqual(self.read('dir', 'x' * 150), b'long name')
+        self.assertEqual(self.read('exactly_one_block'), b'z' * tarfile.BLOCKSIZE)
+        self.assertEqual(os.stat(os.path.join(self.destroot, 'dir', 'a')).st_mtime, 1000000)
+        self.assertEqual(os.stat(os.path.join(self.destroot, 'dir')).st_mtime, 1000000)
+
+    def test_extract(self):
+        self.do_test_extract(None, 'w')
+
+    def test_extract_gz(self):
+        self.do_test_extract('gz', 'w|gz')
+
+    def test_extract_bz2(self):
+        self.do_test_extract('bz2', 'w|bz2')
+
+    def test_extract_single_piece(self):
+        data = make_archive([file_member('a', b'content')])
+        self.extract(data, piece_size=len(data))
+        self.assertEqual(self.read('a'), b'content')
+
+    def test_extract_links(self):
+        if runtime.platformType == 'win32':
+            raise unittest.SkipTest("links are not supported on windows")
+        data = make_archive([
+            file_member('a', b'content'),
+            (make_info('sym', type=tarfile.SYMTYPE, linkname='a'), None),
+            (make_info('hard', type=tarfile.LNKTYPE, linkname='a'), None),
+        ])
+        self.extract(data)
+        self.assertEqual(os.readlink(os.path.join(self.destroot, 'sym')), 'a')
+        self.assertEqual(self.read('hard'), b'content')
+
+    def test_file_mode(self):
+        if runtime.platformType == 'win32':
+            raise unittest.SkipTest("permissions are not supported on windows")
+        data = make_archive([
+            file_member('exe', b'content', mode=0o755),
+            file_member('noexe', b'content', mode=0o640),
+        ])
+        self.extract(data)
+        self.assertEqual(os.stat(os.path.join(self.destroot, 'exe')).st_mode & 0o777, 0o755)
+        self.assertEqual(os.stat(os.path.join(self.destroot, 'noexe')).st_mode & 0o777, 0o640)
+
+    def test_truncated_archive(self):
+        data = make_archive([file_member('a', b'content' * 1000)])
+        with self.assertRaises(tarfile.ReadError):
+            self.extract(data[:3000])
+
+    def test_truncated_compressed_archive(self):
+        data = make_archive([file_member('a', b'content' * 1000)], mode='w|gz')
+        with self.assertRaises(tarfile.ReadError):
+            self.extract(data[:-10], 'gz')
+
+    def test_missing_end_of_archive(self):
+        f = io.BytesIO()
+        archive = tarfile.TarFile(fileobj=f, mode='w')
+        tarinfo, content = file_member('a', b'content')
+        archive.addfile(tarinfo, io.BytesIO(content))
+        self.extract(f.getvalue())
+        self.assertEqual(self.read('a'), b'content')
+
+    def test_outside_destination(self):
+        if not hasattr(tarfile, 'data_filter'):
+            raise unittest.SkipTest("tarfile does not support filters")
+        data = make_archive([file_member('../outside', b'content')])
+        with self.assertRaises(tarfile.OutsideDestinationError):
+            self.extract(data)
+        self.assertFalse(os.path.exists(os.path.join(self.destroot, '..', 'outside')))
@@ -27,3 +27,53 @@ class MatchTuple(tuplematching.TupleMatchingMixin, unittest.TestCase):
         should_match_string = 'should match' if shouldMatch else "shouldn't match"
         msg = f"{routingKey!r} {should_match_string} {filter!r}"
         self.assertEqual(shouldMatch, result, msg)
+
+
+class TupleMatchIndex(tuplematching.TupleMatchingMixin, unittest.TestCase):
+    def do_test_match(self, routingKey, shouldMatch, filter):
+        index = tuplematch.TupleMatchIndex()
+        index.add(filter, 'value')
+        result = index.match(routingKey)
+        should_match_string = 'should match' if shouldMatch else "shouldn't match"
+        msg = f"{routingKey!r} {should_match_string} {filter!r}"
+        self.assertEqual(['value'] if shouldMatch else [], result, msg)
+
+    def test_match_order(self):
+        index = tuplematch.TupleMatchIndex()
+        index.add(('a', None), 1)
+        index.add(('a', 'b'), 2)
+        index.add((None, 'b'), 3)
+        index.add(('a', 'c'), 4)
+        index.add(('a', None), 5)
+        self.assertEqual(index.match(('a', 'b')), [1, 2, 3, 5])
+        self.assertEqual(index.match(('a', 'c')), [1, 4, 5])
+        self.assertEqual(index.match(('x', 'b')), [3])
+        self.assertEqual(index.values(), [1, 2, 3, 4, 5])
+
+    def test_remove(self):
+        index = tuplematch.TupleMatchIndex()
+        index.add(('a', None), 1)
+        index.add(('a', 'b'), 2)
+        self.assertTrue(index.remove(('a', 'b'), 2))
+        self.assertFalse(index.remove(('a', 'b'), 2))
+        self.assertFalse(index.remove(('a', None), 2))
+        self.assertFalse(index.remove(('a',), 1))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.match(('a', 'b')), [1])
+
+    def test_remove_prunes_empty_nodes(self):
+        index = tuplematch.TupleMatchIndex()
+        index.add(('a', None, 'c'), 1)
+        index.add(('a', 'b', 'c'), 2)
+        index.remove(('a', 'b', 'c'), 2)
+        index.remove(('a', None, 'c'), 1)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index._roots, {})
+
+    def test_many_filters(self):
+        index = tuplematch.TupleMatchIndex()
+        for i in range(50000):
+            index.add(('builds', str(i), None), i)
+        index.add(('builds', None, 'finished'), 'all')
+        self.assertEqual(index.match(('builds', '1234', 'finished')), [1234, 'all'])
+        self.assertEqual(index.match(('builds', 'x', 'new')), [])
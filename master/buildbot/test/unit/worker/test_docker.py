@@ -422,6 +422,72 @@ class TestDockerLatentWorker(ConfigErrorsMixin, TestReactorMixin, unittest.TestC
         self.assertEqual(name, 'tester:latest')
         self.assertEqual(self._client._pullCount, 0)
 
+    @defer.inlineCallbacks
+    def test_start_instance_lists_images_once(self):
+        bs = yield self.setupWorker('bot', 'pass', 'tcp://1234:2375', 'busybox', ['bin/bash'])
+        yield bs.start_instance(self.build)
+        yield bs.stop_instance()
+        yield bs.start_instance(self.build)
+        self.assertEqual(self._client._imagesCount, 1)
+
+    @defer.inlineCallbacks
+    def test_start_instance_lists_images_after_image_event(self):
+        bs = yield self.setupWorker('bot', 'pass', 'tcp://1234:2375', 'busybox', ['bin/bash'])
+        yield bs.start_instance(self.build)
+        yield bs.stop_instance()
+
+        self._client._images = [{'RepoTags': ['worker:latest']}]
+        self._client.emit_image_event('delete', 'busybox:latest')
+        with self.assertRaises(interfaces.LatentWorkerCannotSubstantiate):
+            yield bs.start_instance(self.build)
+        self.assertEqual(self._client._imagesCount, 2)
+
+    @defer.inlineCallbacks
+    def test_start_instance_lists_images_after_ttl(self):
+        bs = yield self.setupWorker('bot', 'pass', 'tcp://1234:2375', 'busybox', ['bin/bash'])
+        yield bs.start_instance(self.build)
+        yield bs.stop_instance()
+
+        self.reactor.advance(bs._image_service.IMAGE_INDEX_TTL)
+        yield bs.start_instance(self.build)
+        self.assertEqual(self._client._imagesCount, 2)
+
+    @defer.inlineCallbacks
+    def test_start_instance_pull_updates_image_index(self):
+        bs = yield self.setupWorker(
+            'bot', 'pass', 'tcp://1234:2375', 'alpine:latest', autopull=True
+        )
+        _, name = yield bs.start_instance(self.build)
+        self.assertEqual(name, 'alpine:latest')
+        self.assertEqual(self._client._pullCount, 1)
+
+        yield bs.stop_instance()
+        yield bs.start_instance(self.build)
+        self.assertEqual(self._client._pullCount, 1)
+
+    @defer.inlineCallbacks
+    def test_prepull(self):
+        bs = yield self.setupWorker(
+            'bot', 'pass', 'tcp://1234:2375', 'alpine:latest', autopull=True, prepull=True
+        )
+        self.assertEqual(self._client._pullCount, 1)
+
+        _, name = yield bs.start_instance(self.build)
+        self.assertEqual(name, 'alpine:latest')
+        self.assertEqual(self._client._pullCount, 1)
+
+    @defer.inlineCallbacks
+    def test_prepull_image_present(self):
+        yield self.setupWorker('bot', 'pass', 'tcp://1234:2375', 'tester:latest', prepull=True)
+        self.assertEqual(self._client._pullCount, 0)
+
+    @defer.inlineCallbacks
+    def test_prepull_renderable_image(self):
+        with self.assertRaisesConfigError("prepull needs an image and a docker_host"):
+            yield self.setupWorker(
+                'bot', 'pass', 'tcp://1234:2375', Property('image'), prepull=True
+            )
+
     @defer.inlineCallbacks
     def test_start_instance_noimage_renderabledockerfile(self):
         bs = yield self.setupWorker(
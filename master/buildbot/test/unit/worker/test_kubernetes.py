@@ -17,6 +17,8 @@ import base64
 from unittest import mock
 
 from twisted.internet import defer
+from twisted.internet import reactor
+from twisted.internet import task
 from twisted.trial import unittest
 
 from buildbot.interfaces import LatentWorkerFailedToSubstantiate
@@ -26,9 +28,13 @@ from buildbot.test.fake import fakemaster
 from buildbot.test.fake import httpclientservice as fakehttpclientservice
 from buildbot.test.fake.fakebuild import FakeBuildForRendering as FakeBuild
 from buildbot.test.fake.fakeprotocol import FakeTrivialConnection as FakeBot
+from buildbot.test.fake.kube import FakeKubeApiServer
 from buildbot.test.reactor import TestReactorMixin
+from buildbot.util import httpclientservice
+from buildbot.util.kubeclientservice import KubeClientService
 from buildbot.util.kubeclientservice import KubeHardcodedConfig
 from buildbot.worker import kubernetes
+from buildbot.worker.latent import States
 
 
 class FakeResult:
@@ -68,6 +74,8 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
     @defer.inlineCallbacks
     def setupWorker(self, *args, config=None, **kwargs):
         self.patch(kubernetes.KubeLatentWorker, "_generate_random_password", lambda _: "random_pw")
+        # the pods are polled in these tests, see TestKubernetesWorkerWatch
+        self.patch(KubeClientService, "WATCH_PODS", False)
 
         if config is None:
             config = KubeHardcodedConfig(master_url="https://kube.example.com")
@@ -87,7 +95,10 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         return worker
 
     def get_expected_metadata(self):
-        return {"name": "buildbot-worker-87de7e"}
+        return {
+            "name": "buildbot-worker-87de7e",
+            "labels": {"app.kubernetes.io/managed-by": "buildbot"},
+        }
 
     def get_expected_spec(self, image):
         return {
@@ -327,7 +338,7 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         self.expect_pod_delete_nonexisting()
         self.expect_pod_status_not_found()
 
-        expected_metadata = {"name": "buildbot-worker-87de7e"}
+        expected_metadata = self.get_expected_metadata()
         expected_spec = {
             "affinity": {},
             "containers": [
@@ -483,3 +494,85 @@ class TestKubernetesWorker(TestReactorMixin, unittest.TestCase):
         )
 
         yield worker.stop_instance()
+
+
+class TestKubernetesWorkerWatch(unittest.TestCase):
+    timeout = 10
+
+    @defer.inlineCallbacks
+    def setupWorker(self, *args, **kwargs):
+        self.patch(kubernetes.KubeLatentWorker, "_generate_random_password", lambda _: "random_pw")
+        self.patch(httpclientservice.HTTPClientService, "PREFER_TREQ", True)
+
+        self.server = FakeKubeApiServer()
+        url = self.server.listen(self)
+        self.config = KubeHardcodedConfig(master_url=url)
+
+        worker = kubernetes.KubeLatentWorker(
+            *args, masterFQDN="buildbot-master", kube_config=self.config, **kwargs
+        )
+        self.master = yield fakemaster.make_master(self, wantRealReactor=True, wantData=True)
+        self.master.httpservice = yield httpclientservice.HTTPClientService.getService(
+            self.master, url
+        )
+
+        yield worker.setServiceParent(self.master)
+        yield self.master.startService()
+        self.addCleanup(self.master.stopService)
+
+        self.watch = worker._kube.get_pod_watch(self.config, 'default')
+        yield self.wait_until(lambda: self.watch.synced and self.server.has_watch('default'))
+        return worker
+
+    @defer.inlineCallbacks
+    def wait_until(self, condition):
+        while not condition():
+            yield task.deferLater(reactor, 0.01)
+
+    @defer.inlineCallbacks
+    def test_stop_waits_for_deletion_event(self):
+        worker = yield self.setupWorker('worker')
+        yield worker.start_instance(FakeBuild())
+        name = worker.getContainerName()
+        yield self.watch.wait_for_pod(name, lambda pod: pod is not None)
+
+        self.server.hold_deletion = True
+        status_requests = self.server.count_requests('GET', '/status')
+        d = worker.stop_instance()
+        yield self.wait_until(lambda: 'deletionTimestamp' in self.watch.get_pod(name)['metadata'])
+        self.assertFalse(d.called)
+
+        self.server.finish_deletion('default', name)
+        yield d
+        # the deletion was seen by the watch, without polling the pod status
+        self.assertEqual(self.server.count_requests('GET', '/status'), status_requests)
+
+    @defer.inlineCallbacks
+    def test_stop_polls_unknown_pod(self):
+        worker = yield self.setupWorker('worker')
+        yield worker.stop_instance()
+        self.assertEqual(self.server.count_requests('GET', '/status'), 1)
+
+    @defer.inlineCallbacks
+    def test_failed_pod_fails_substantiation(self):
+        worker = yield self.setupWorker('worker')
+        d = worker.substantiate(None, FakeBuild())
+        yield self.wait_until(lambda: worker._pod_failure_waiter is not None)
+        self.assertEqual(worker.state, States.SUBSTANTIATING_STARTING)
+
+        self.server.set_pod_status(
+            'default',
+            worker.getContainerName(),
+            containerStatuses=[
+                {
+                    'name': worker.getContainerName(),
+                    'state': {
+                        'waiting': {'reason': 'ImagePullBackOff', 'message': 'no such image'}
+                    },
+                }
+            ],
+        )
+        # the failure is seen from the event, well before check_instance_interval
+        res = yield d
+        self.assertIsInstance(res, LatentWorkerFailedToSubstantiate)
+        self.assertIn('no such image', str(res))
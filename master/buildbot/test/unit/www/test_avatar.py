@@ -13,6 +13,8 @@
 #
 # Copyright Buildbot Team Members
 
+import os
+
 from twisted.internet import defer
 from twisted.trial import unittest
 
@@ -22,6 +24,7 @@ from buildbot.test.reactor import TestReactorMixin
 from buildbot.test.util import www
 from buildbot.www import auth
 from buildbot.www import avatar
+from buildbot.www import resource
 
 
 class TestAvatar(avatar.AvatarBase):
@@ -118,6 +121,118 @@ class AvatarResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
         )
 
 
+class CountingAvatar(avatar.AvatarBase):
+    def __init__(self):
+        self.calls = []
+        self.pending = None
+
+    def getUserAvatar(self, email, username, size, defaultAvatarUrl):
+        self.calls.append(email)
+        if self.pending is not None:
+            return self.pending
+        if email == b'nobody':
+            return defer.succeed(None)
+        raise resource.Redirect(b'http://avatars/' + email)
+
+
+class AvatarResourceCache(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.method = CountingAvatar()
+        self.master = yield self.make_master(
+            url='http://a/b/',
+            auth=auth.NoAuth(),
+            avatar_methods=[self.method],
+            avatar_cache_seconds=60,
+        )
+        self.rsrc = avatar.AvatarResource(self.master)
+        self.rsrc.reconfigResource(self.master.config)
+
+    @defer.inlineCallbacks
+    def test_cached(self):
+        for _ in range(2):
+            res = yield self.render_resource(self.rsrc, b'/?email=foo')
+            self.assertEqual(res, {"redirected": b'http://avatars/foo'})
+        self.assertEqual(self.method.calls, [b'foo'])
+
+    @defer.inlineCallbacks
+    def test_no_avatar_cached(self):
+        for _ in range(2):
+            res = yield self.render_resource(self.rsrc, b'/?email=nobody')
+            self.assertEqual(res, {"redirected": avatar.AvatarResource.defaultAvatarUrl})
+        self.assertEqual(self.method.calls, [b'nobody'])
+
+    @defer.inlineCallbacks
+    def test_concurrent_requests_coalesced(self):
+        self.method.pending = defer.Deferred()
+        d1 = self.render_resource(self.rsrc, b'/?email=foo')
+        d2 = self.render_resource(self.rsrc, b'/?email=foo')
+        self.assertEqual(self.method.calls, [b'foo'])
+
+        self.method.pending.callback((b"image/png", b"png"))
+        self.assertEqual((yield d1), b"png")
+        self.assertEqual((yield d2), b"png")
+
+    @defer.inlineCallbacks
+    def test_expired(self):
+        yield self.render_resource(self.rsrc, b'/?email=foo')
+        self.reactor.advance(59)
+        yield self.render_resource(self.rsrc, b'/?email=foo')
+        self.assertEqual(self.method.calls, [b'foo'])
+
+        self.reactor.advance(1)
+        res = yield self.render_resource(self.rsrc, b'/?email=foo')
+        self.assertEqual(res, {"redirected": b'http://avatars/foo'})
+        self.assertEqual(self.method.calls, [b'foo', b'foo'])
+
+    @defer.inlineCallbacks
+    def test_size_limit(self):
+        self.master.config.www['avatar_cache_size'] = 1
+        self.rsrc.reconfigResource(self.master.config)
+        yield self.render_resource(self.rsrc, b'/?email=foo')
+        yield self.render_resource(self.rsrc, b'/?email=bar')
+        yield self.render_resource(self.rsrc, b'/?email=foo')
+        self.assertEqual(self.method.calls, [b'foo', b'bar', b'foo'])
+
+    @defer.inlineCallbacks
+    def test_cache_file(self):
+        self.master.basedir = os.path.abspath(self.mktemp())
+        os.makedirs(self.master.basedir)
+        self.master.config.www['avatar_cache_file'] = 'avatars.json'
+        self.rsrc.reconfigResource(self.master.config)
+
+        yield self.render_resource(self.rsrc, b'/?email=foo')
+        self.method.pending = defer.succeed((b"image/png", b"png"))
+        yield self.render_resource(self.rsrc, b'/?email=bar')
+        self.reactor.advance(1)
+        self.assertTrue(os.path.exists(os.path.join(self.master.basedir, 'avatars.json')))
+
+        # a restarted master reads the avatars back
+        rsrc = avatar.AvatarResource(self.master)
+        rsrc.reconfigResource(self.master.config)
+        res = yield self.render_resource(rsrc, b'/?email=foo')
+        self.assertEqual(res, {"redirected": b'http://avatars/foo'})
+        res = yield self.render_resource(rsrc, b'/?email=bar')
+        self.assertEqual(res, b"png")
+        self.assertEqual(self.method.calls, [b'foo', b'bar'])
+
+        # expired entries are not loaded
+        self.reactor.advance(60)
+        rsrc = avatar.AvatarResource(self.master)
+        rsrc.reconfigResource(self.master.config)
+        self.assertEqual(rsrc.cache.keys(), [])
+
+    def test_cache_file_invalid(self):
+        self.master.basedir = os.path.abspath(self.mktemp())
+        os.makedirs(self.master.basedir)
+        with open(os.path.join(self.master.basedir, 'avatars.json'), 'w') as f:
+            f.write('not json')
+        self.master.config.www['avatar_cache_file'] = 'avatars.json'
+        self.rsrc.reconfigResource(self.master.config)
+        self.assertEqual(self.rsrc.cache.keys(), [])
+
+
 github_username_search_reply = {
     "login": "defunkt",
     "id": 42424242,
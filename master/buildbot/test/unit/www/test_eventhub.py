@@ -0,0 +1,195 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from unittest import mock
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.www.eventhub import EventConnection
+from buildbot.www.eventhub import EventHub
+
+
+class FakeConnection:
+    def __init__(self):
+        self.written = []
+        self.dropped = False
+        self.events = EventConnection(self.written.append, self.drop)
+
+    def drop(self):
+        self.dropped = True
+
+
+class TestEventConnection(unittest.TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.events = self.conn.events
+
+    def test_send(self):
+        self.events.send(b'a')
+        self.events.send(b'b')
+        self.assertEqual(self.conn.written, [b'a', b'b'])
+
+    def test_queued_while_paused(self):
+        self.events.send(b'a')
+        self.events.pauseProducing()
+        self.events.send(b'b')
+        self.events.send(b'c')
+        self.assertEqual(self.conn.written, [b'a'])
+
+        self.events.resumeProducing()
+        self.assertEqual(self.conn.written, [b'a', b'b', b'c'])
+        self.events.send(b'd')
+        self.assertEqual(self.conn.written, [b'a', b'b', b'c', b'd'])
+
+    def test_paused_while_writing_queue(self):
+        self.events.pauseProducing()
+        self.events.send(b'a')
+        self.events.send(b'b')
+
+        def write(data):
+            self.conn.written.append(data)
+            self.events.pauseProducing()
+
+        self.events._write = write
+        self.events.resumeProducing()
+        self.assertEqual(self.conn.written, [b'a'])
+        self.events.resumeProducing()
+        self.assertEqual(self.conn.written, [b'a', b'b'])
+
+    def test_slow_client_dropped(self):
+        self.patch(EventConnection, 'MAX_QUEUED_SIZE', 10)
+        self.events.pauseProducing()
+        self.events.send(b'x' * 6)
+        self.assertFalse(self.conn.dropped)
+        self.events.send(b'x' * 6)
+        self.assertTrue(self.conn.dropped)
+
+        self.events.resumeProducing()
+        self.events.send(b'y')
+        self.assertEqual(self.conn.written, [])
+
+    def test_stop_producing(self):
+        self.events.pauseProducing()
+        self.events.send(b'a')
+        self.events.stopProducing()
+        self.events.resumeProducing()
+        self.events.send(b'b')
+        self.assertEqual(self.conn.written, [])
+
+
+class TestEventHub(TestReactorMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self):
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantMq=True)
+        self.master.mq.verifyMessages = False
+        self.encode = mock.Mock(side_effect=lambda key, message: repr((key, message)).encode())
+        self.hub = EventHub(self.master, self.encode)
+
+    @defer.inlineCallbacks
+    def test_shared_consumer(self):
+        conn1 = FakeConnection()
+        conn2 = FakeConnection()
+        yield self.hub.subscribe(('builds', None, None), conn1.events)
+        yield self.hub.subscribe(('builds', None, None), conn2.events)
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+
+        self.master.mq.callConsumer(('builds', '1', 'new'), {'buildid': 1})
+        self.assertEqual(self.encode.call_count, 1)
+        expected = [repr((('builds', '1', 'new'), {'buildid': 1})).encode()]
+        self.assertEqual(conn1.written, expected)
+        self.assertEqual(conn2.written, expected)
+
+        self.hub.unsubscribe(('builds', None, None), conn1.events)
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+        self.master.mq.callConsumer(('builds', '1', 'finished'), {'buildid': 1})
+        self.assertEqual(len(conn1.written), 1)
+        self.assertEqual(len(conn2.written), 2)
+
+        self.hub.unsubscribe(('builds', None, None), conn2.events)
+        self.assertEqual(self.master.mq.qrefs, [])
+
+    @defer.inlineCallbacks
+    def test_message_encoded_once_for_several_paths(self):
+        conn1 = FakeConnection()
+        conn2 = FakeConnection()
+        yield self.hub.subscribe(('builds', None, None), conn1.events)
+        yield self.hub.subscribe(('builds', None, 'new'), conn2.events)
+        self.assertEqual(len(self.master.mq.qrefs), 2)
+
+        self.master.mq.callConsumer(('builds', '1', 'new'), {'buildid': 1})
+        self.assertEqual(self.encode.call_count, 1)
+        self.assertEqual(conn1.written, conn2.written)
+
+        self.master.mq.callConsumer(('builds', '2', 'new'), {'buildid': 2})
+        self.assertEqual(self.encode.call_count, 2)
+
+    @defer.inlineCallbacks
+    def test_subscribe_while_starting(self):
+        started = defer.Deferred()
+        qref = mock.Mock()
+        self.master.mq.startConsuming = mock.Mock(return_value=started)
+        conn1 = FakeConnection()
+        conn2 = FakeConnection()
+
+        d1 = self.hub.subscribe(('builds', None, None), conn1.events)
+        d2 = self.hub.subscribe(('builds', None, None), conn2.events)
+        self.assertEqual(self.master.mq.startConsuming.call_count, 1)
+        self.assertFalse(d1.called)
+        self.assertFalse(d2.called)
+
+        started.callback(qref)
+        yield d1
+        yield d2
+
+    @defer.inlineCallbacks
+    def test_unsubscribe_while_starting(self):
+        started = defer.Deferred()
+        qref = mock.Mock()
+        self.master.mq.startConsuming = mock.Mock(return_value=started)
+        conn = FakeConnection()
+
+        d = self.hub.subscribe(('builds', None, None), conn.events)
+        self.hub.unsubscribe(('builds', None, None), conn.events)
+        started.callback(qref)
+        yield d
+        qref.stopConsuming.assert_called_once_with()
+
+        # a new consumer is started for the next subscription
+        self.master.mq.startConsuming.return_value = defer.succeed(mock.Mock())
+        yield self.hub.subscribe(('builds', None, None), conn.events)
+        self.assertEqual(self.master.mq.startConsuming.call_count, 2)
+
+    @defer.inlineCallbacks
+    def test_start_consuming_failure(self):
+        started = defer.Deferred()
+        self.master.mq.startConsuming = mock.Mock(return_value=started)
+        conn1 = FakeConnection()
+        conn2 = FakeConnection()
+
+        d1 = self.hub.subscribe(('builds', None, None), conn1.events)
+        d2 = self.hub.subscribe(('builds', None, None), conn2.events)
+        started.errback(RuntimeError('oops'))
+        with self.assertRaises(RuntimeError):
+            yield d1
+        with self.assertRaises(RuntimeError):
+            yield d2
+
+        self.master.mq.startConsuming.return_value = defer.succeed(mock.Mock())
+        yield self.hub.subscribe(('builds', None, None), conn1.events)
+        self.assertEqual(self.master.mq.startConsuming.call_count, 2)
@@ -361,6 +361,28 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin, unittest.TestCase)
         self.assertEqual(head, b'')
         self.assertEqual(int(self.request.headers[b'content-length'][0]), len(get))
 
+    @defer.inlineCallbacks
+    def test_api_content_length(self):
+        get = yield self.render_resource(self.rsrc, b'/test')
+        self.assertEqual(int(self.request.headers[b'content-length'][0]), len(get))
+
+    @defer.inlineCallbacks
+    def test_api_streamed(self):
+        self.patch(rest.V2RootResource, 'JSON_STREAM_THRESHOLD', 100)
+        self.patch(rest.V2RootResource, 'JSON_BLOCK_SIZE', 10)
+        yield self.render_resource(self.rsrc, b'/test')
+        # sent with chunked transfer encoding
+        self.assertNotIn(b'content-length', self.request.headers)
+        self.assertRestCollection(typeName='tests', items=list(endpoint.testData.values()), total=8)
+
+    @defer.inlineCallbacks
+    def test_api_head_big(self):
+        self.patch(rest.V2RootResource, 'JSON_STREAM_THRESHOLD', 100)
+        get = yield self.render_resource(self.rsrc, b'/test', method=b'GET')
+        head = yield self.render_resource(self.rsrc, b'/test', method=b'HEAD')
+        self.assertEqual(head, b'')
+        self.assertEqual(int(self.request.headers[b'content-length'][0]), len(get))
+
     @defer.inlineCallbacks
     def test_api_collection(self):
         yield self.render_resource(self.rsrc, b'/test')
@@ -18,6 +18,8 @@ import datetime
 import json
 
 from twisted.internet import defer
+from twisted.internet import error
+from twisted.python import failure
 from twisted.trial import unittest
 
 from buildbot.test.reactor import TestReactorMixin
@@ -61,6 +63,18 @@ class EventResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
         with self.assertRaises(AssertionError):
             self.assertReceivesChangeNewMessage(request)
 
+    def test_listen_then_connection_lost(self):
+        self.render_resource(self.sse, b'/listen/changes/*/*')
+        request = self.request
+        self.readUUID(request)
+        self.assertEqual(len(self.sse.consumers), 1)
+
+        request.connectionLost(failure.Failure(error.ConnectionDone()))
+        self.assertEqual(self.sse.consumers, {})
+        self.assertEqual(self.sse.event_hub._subscriptions, {})
+        with self.assertRaises(AssertionError):
+            self.assertReceivesChangeNewMessage(request)
+
     def test_listen_add_then_remove(self):
         self.render_resource(self.sse, b'/listen')
         request = self.request
@@ -138,3 +138,23 @@ class WsResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
             json.dumps({"cmd": 'stopConsuming', "path": 'builds/*/*', "_id": 2}), False
         )
         self.assert_called_with_json(self.proto.sendMessage, {"msg": "OK", "code": 200, "_id": 2})
+
+    def test_startConsuming_shared(self):
+        proto2 = self.ws._factory.buildProtocol("me")
+        proto2.sendMessage = Mock(spec=proto2.sendMessage)
+        for proto in (self.proto, proto2):
+            proto.onMessage(
+                json.dumps({"cmd": 'startConsuming', "path": 'builds/*/*', "_id": 1}), False
+            )
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+
+        self.master.mq.verifyMessages = False
+        self.master.mq.callConsumer(("builds", "1", "new"), {"buildid": 1})
+        self.assertEqual(self.proto.sendMessage.call_args, proto2.sendMessage.call_args)
+
+        self.proto.connectionLost(None)
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+        proto2.onMessage(
+            json.dumps({"cmd": 'stopConsuming', "path": 'builds/*/*', "_id": 2}), False
+        )
+        self.assertEqual(self.master.mq.qrefs, [])
@@ -0,0 +1,114 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import time
+from typing import TYPE_CHECKING
+from typing import Any
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot import version
+from buildbot.test.reactor import TestReactorMixin
+
+if TYPE_CHECKING:
+    from typing import Awaitable
+    from typing import Callable
+
+
+def is_benchmark_enabled() -> bool:
+    return 'BUILDBOT_BENCHMARK' in os.environ
+
+
+def write_result(result: dict[str, Any]) -> None:
+    path = os.environ.get('BUILDBOT_BENCHMARK_RESULTS')
+    if not path:
+        return
+    # one JSON document per line, so that concurrent test runners can append
+    # to the same file
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result, sort_keys=True) + '\n')
+
+
+class BenchmarkTestCase(TestReactorMixin, unittest.TestCase):
+    """
+    Base class of the scenarios in buildbot.test.benchmark.
+
+    During normal runs of the tests, each scenario runs once with its smallest
+    size, to make sure that it keeps working.  When ``BUILDBOT_BENCHMARK`` is
+    defined, scenarios run with their full size, ``BENCHMARK_REPEAT`` times,
+    and the timings are appended as JSON lines to the file named by
+    ``BUILDBOT_BENCHMARK_RESULTS``, if any.
+    """
+
+    BENCHMARK_REPEAT = 5
+
+    # the size of the scenarios during normal test runs
+    SMOKE_SIZE = 10
+
+    def setUp(self) -> None:
+        self.setup_test_reactor()
+
+    def scaled(self, size: int) -> int:
+        if is_benchmark_enabled():
+            return size
+        return min(size, self.SMOKE_SIZE)
+
+    @defer.inlineCallbacks
+    def benchmark(
+        self,
+        name: str,
+        run: Callable[[], Awaitable[Any]],
+        ops: int,
+        setup: Callable[[], Awaitable[Any]] | None = None,
+        **params: Any,
+    ):
+        """
+        Time ``run``, which performs ``ops`` operations, and record the result
+        under ``name``.  ``setup`` is called before each repetition and is not
+        timed.  Extra keyword arguments describe the scenario and are recorded
+        with the result.
+        """
+        repeat = self.BENCHMARK_REPEAT if is_benchmark_enabled() else 1
+        timings = []
+        for _ in range(repeat):
+            if setup is not None:
+                yield defer.ensureDeferred(setup())
+            start = time.perf_counter()
+            yield defer.ensureDeferred(run())
+            timings.append(time.perf_counter() - start)
+
+        median = statistics.median(timings)
+        result = {
+            'name': name,
+            'params': params,
+            'ops': ops,
+            'repeat': repeat,
+            'timings': timings,
+            'min': min(timings),
+            'median': median,
+            'ops_per_second': ops / median if median else None,
+            'buildbot_version': version,
+            'python_version': platform.python_version(),
+            'timestamp': time.time(),
+        }
+        write_result(result)
+        return result
@@ -51,6 +51,7 @@ class FakeRequest:
     method = b'GET'
     path = b'/req.path'
     responseCode = 200
+    producer = None
 
     def __init__(self, path=None):
         # from twisted.web.http.Request. Used to detect connection dropped
@@ -110,6 +111,11 @@ class FakeRequest:
     def processingFailed(self, f):
         self.deferred.errback(f)
 
+    def connectionLost(self, reason):
+        # like twisted.web.http.Request, the channel is gone when notifyFinish fires
+        self.channel = None
+        self.deferred.errback(reason)
+
     def notifyFinish(self):
         d = defer.Deferred()
 
@@ -123,6 +129,15 @@ class FakeRequest:
     def getSession(self):
         return self.session
 
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+
+    def unregisterProducer(self):
+        if self.channel is None:
+            # as twisted.web.http.Request, which unregisters the producer from its channel
+            raise AttributeError("'NoneType' object has no attribute 'unregisterProducer'")
+        self.producer = None
+
 
 class RequiresWwwMixin:
     # mix this into a TestCase to skip if buildbot-www is not installed
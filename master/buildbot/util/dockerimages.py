@@ -0,0 +1,196 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import threading
+
+from twisted.internet import defer
+from twisted.internet import threads
+from twisted.python import log
+
+from buildbot.util import service
+
+
+class DockerImageIndex:
+    """
+    The image tags of a docker host.
+
+    The tags are listed once, and listed again when the docker events of the host show that its
+    images changed, or after ttl seconds. While the events cannot be followed, the tags are listed
+    for each lookup.
+
+    The methods are called from the threads that talk to the docker host.
+    """
+
+    # how long to wait for the events stream before listing the images without it
+    WATCH_START_TIMEOUT = 10
+
+    def __init__(self, docker_host, client_factory, clock, ttl):
+        self.docker_host = docker_host
+        self.client_factory = client_factory
+        self.clock = clock
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tags = set()
+        self._repos = set()
+        self._listed_at = None
+        self._stale = True
+        self._watcher = None
+        self._events = None
+        self._watch_failed_at = None
+        self._stopped = False
+
+    def has_image(self, client, name):
+        """Whether name is a tag or a repository of the images of the host"""
+        with self._lock:
+            self._ensure_watching()
+            now = self.clock()
+            if self._stale or now - self._listed_at >= self.ttl:
+                self._list_images(client)
+            return name in self._tags or name in self._repos
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            events = self._events
+        if events is not None:
+            events.close()
+
+    def _list_images(self, client):
+        tags = set()
+        for image in client.images():
+            tags.update(image['RepoTags'] or [])
+        self._tags = tags
+        self._repos = {tag.rsplit(':', 1)[0] for tag in tags}
+        self._listed_at = self.clock()
+        # without the events, the next lookup needs to list the images again
+        self._stale = self._events is None
+
+    def _ensure_watching(self):
+        if self._watcher is not None or self._stopped:
+            return
+        if self._watch_failed_at is not None and self.clock() - self._watch_failed_at < self.ttl:
+            return
+
+        started = threading.Event()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(started,),
+            name=f"docker image events of {self.docker_host}",
+            daemon=True,
+        )
+        self._watcher.start()
+        # the images are listed once the stream is open, so that no change is missed
+        started.wait(self.WATCH_START_TIMEOUT)
+        self._stale = True
+
+    def _watch(self, started):
+        client = None
+        try:
+            client = self.client_factory()
+            events = client.events(filters={'type': 'image'}, decode=True)
+            self._events = events
+            if self._stopped:
+                events.close()
+            started.set()
+            for _ in events:
+                self.invalidate()
+        except Exception as e:
+            if not self._stopped:
+                log.msg(f"Cannot follow the image events of docker host {self.docker_host}: {e}")
+                self._watch_failed_at = self.clock()
+        finally:
+            started.set()
+            with self._lock:
+                self._watcher = None
+                self._events = None
+                self._stale = True
+            if client is not None:
+                client.close()
+
+
+class DockerImageService(service.SharedService):
+    """
+    Shares an index of the images of each docker host between the docker workers, so that the
+    images are not listed for each started container, and pulls the images of the workers in the
+    background.
+    """
+
+    name: str | None = "DockerImageService"  # type: ignore[assignment]
+
+    # the images of a host are listed again after this many seconds, even without any event
+    IMAGE_INDEX_TTL = 300
+
+    def __init__(self):
+        super().__init__()
+        self._indexes = {}
+        self._host_locks = {}
+        self._prepulls = {}
+
+    def get_index(self, docker_host, client_factory):
+        index = self._indexes.get(docker_host)
+        if index is None:
+            index = self._indexes[docker_host] = DockerImageIndex(
+                docker_host, client_factory, self.master.reactor.seconds, self.IMAGE_INDEX_TTL
+            )
+        return index
+
+    def prepull(self, docker_host, image, client_factory):
+        """
+        Pull image on docker_host in the background, unless it is there already. The pulls on
+        different hosts run in parallel, while the pulls on a host run one after the other.
+        """
+        key = (docker_host, image)
+        if key in self._prepulls:
+            return self._prepulls[key]
+
+        index = self.get_index(docker_host, client_factory)
+        lock = self._host_locks.get(docker_host)
+        if lock is None:
+            lock = self._host_locks[docker_host] = defer.DeferredLock()
+
+        d = lock.run(threads.deferToThread, self._thd_prepull, index, client_factory, image)
+        self._prepulls[key] = d
+
+        @d.addBoth
+        def done(res):
+            del self._prepulls[key]
+            return res
+
+        d.addErrback(log.err, f"while pulling image {image} on docker host {docker_host}")
+        return d
+
+    def _thd_prepull(self, index, client_factory, image):
+        client = client_factory()
+        try:
+            if index.has_image(client, image):
+                return False
+            log.msg(f"Pulling image {image} on docker host {index.docker_host}")
+            client.pull(image)
+            index.invalidate()
+            return True
+        finally:
+            client.close()
+
+    def stopService(self):
+        for index in self._indexes.values():
+            index.stop()
+        self._indexes = {}
+        return super().stopService()
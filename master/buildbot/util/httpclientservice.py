@@ -14,10 +14,13 @@
 # Copyright Buildbot Team Members
 
 import json as jsonmodule
+from collections import deque
+from urllib.parse import urlparse
 
 from twisted.internet import defer
 from twisted.logger import Logger
 from twisted.python import deprecate
+from twisted.python import failure
 from twisted.python import versions
 from twisted.python.threadpool import ThreadPool
 from twisted.web.client import Agent
@@ -28,6 +31,8 @@ from buildbot.interfaces import IHttpResponse
 from buildbot.util import service
 from buildbot.util import toJson
 from buildbot.util import unicode2bytes
+from buildbot.util.backoff import BackoffTimeoutExceededError
+from buildbot.util.backoff import ExponentialBackoffEngineAsync
 
 try:
     import txrequests
@@ -79,6 +84,87 @@ class TreqResponseWrapper:
         return self._res.request.absoluteURI.decode()
 
 
+class HTTPQueueFullError(Exception):
+    pass
+
+
+class _QueuedRequest:
+    __slots__ = ('coalesce_key', 'do_request', 'waiters')
+
+    def __init__(self, do_request, coalesce_key):
+        self.do_request = do_request
+        self.coalesce_key = coalesce_key
+        self.waiters = []
+
+
+class _HostQueue:
+    """
+    Limits the number of concurrent requests to a host. The requests above the limit wait in a
+    bounded queue, in which a request replaces the waiting request with the same coalesce key.
+    """
+
+    def __init__(self, host, max_concurrent, max_queued):
+        self.host = host
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self._queue = deque()
+        self._by_coalesce_key = {}
+
+    def submit(self, do_request, coalesce_key=None):
+        d = defer.Deferred()
+        queued = self._by_coalesce_key.get(coalesce_key) if coalesce_key is not None else None
+        if queued is not None:
+            # only the latest state is worth sending, the callers of the replaced request get
+            # the response of this one
+            queued.do_request = do_request
+            queued.waiters.append(d)
+            return d
+
+        if self.active >= self.max_concurrent and len(self._queue) >= self.max_queued:
+            return defer.fail(
+                HTTPQueueFullError(
+                    f"{len(self._queue)} requests to {self.host} are already waiting"
+                )
+            )
+
+        queued = _QueuedRequest(do_request, coalesce_key)
+        queued.waiters.append(d)
+        if self.active < self.max_concurrent:
+            self._start(queued)
+        else:
+            self._queue.append(queued)
+            if coalesce_key is not None:
+                self._by_coalesce_key[coalesce_key] = queued
+        return d
+
+    def _start(self, queued):
+        self.active += 1
+        d = defer.maybeDeferred(queued.do_request)
+        d.addBoth(self._finished, queued)
+
+    def _finished(self, result, queued):
+        self.active -= 1
+        for d in queued.waiters:
+            if isinstance(result, failure.Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
+
+        if self._queue and self.active < self.max_concurrent:
+            queued = self._queue.popleft()
+            if queued.coalesce_key is not None:
+                del self._by_coalesce_key[queued.coalesce_key]
+            self._start(queued)
+
+    def cancel_waiting(self):
+        queue, self._queue = self._queue, deque()
+        self._by_coalesce_key = {}
+        for queued in queue:
+            for d in queued.waiters:
+                d.errback(defer.CancelledError(f"the request to {self.host} was not sent"))
+
+
 class HTTPClientService(service.SharedService):
     """A SharedService class that can make http requests to remote services.
 
@@ -91,6 +177,16 @@ class HTTPClientService(service.SharedService):
     # We prefer at the moment keeping it simple
     PREFER_TREQ = False
     MAX_THREADS = 20
+    # default number of concurrent requests to a host; the requests above it wait in a queue of
+    # at most MAX_QUEUED_PER_HOST requests
+    MAX_CONCURRENT_PER_HOST = 10
+    MAX_QUEUED_PER_HOST = 1000
+    # the requests sent with retry=True are retried on connection errors and on these response
+    # codes, for at most RETRY_MAX_WAIT_SECONDS
+    RETRY_CODES = (429, 502, 503, 504)
+    RETRY_START_SECONDS = 1
+    RETRY_MULTIPLIER = 2
+    RETRY_MAX_WAIT_SECONDS = 60
 
     def __init__(
         self,
@@ -101,8 +197,16 @@ class HTTPClientService(service.SharedService):
         cert=None,
         debug=False,
         skipEncoding=False,
+        max_concurrent_per_host=None,
+        max_queued_per_host=None,
     ):
         super().__init__()
+        if max_concurrent_per_host is None:
+            max_concurrent_per_host = self.MAX_CONCURRENT_PER_HOST
+        if max_queued_per_host is None:
+            max_queued_per_host = self.MAX_QUEUED_PER_HOST
+        self.max_concurrent_per_host = max_concurrent_per_host
+        self.max_queued_per_host = max_queued_per_host
         self._session = HTTPSession(
             self,
             base_url,
@@ -115,6 +219,7 @@ class HTTPClientService(service.SharedService):
         )
         self._pool = None
         self._txrequests_sessions = []
+        self._host_queues = {}
 
     def updateHeaders(self, headers):
         self._session.update_headers(headers)
@@ -142,6 +247,10 @@ class HTTPClientService(service.SharedService):
 
     @defer.inlineCallbacks
     def stopService(self):
+        host_queues = self._host_queues
+        self._host_queues = {}
+        for host_queue in host_queues.values():
+            host_queue.cancel_waiting()
         if txrequests is not None:
             sessions = self._txrequests_sessions
             self._txrequests_sessions = []
@@ -152,7 +261,63 @@ class HTTPClientService(service.SharedService):
             yield self._pool.closeCachedConnections()
         yield super().stopService()
 
-    def _do_request(self, session, method, ep, **kwargs):
+    def _do_request(self, session, method, ep, coalesce_key=None, retry=False, **kwargs):
+        """
+        Sends the request once a connection to the host is available. coalesce_key identifies
+        requests that replace each other, such as updates of the same commit status: a request
+        waiting to be sent is replaced by a new one with the same key. The requests sent with
+        retry=True are retried on errors, which only suits idempotent requests.
+        """
+        host = urlparse(self._get_url(session, ep)).netloc
+        host_queue = self._host_queues.get(host)
+        if host_queue is None:
+            host_queue = self._host_queues[host] = _HostQueue(
+                host, self.max_concurrent_per_host, self.max_queued_per_host
+            )
+
+        return host_queue.submit(
+            lambda: self._do_request_with_retry(session, method, ep, retry, kwargs), coalesce_key
+        )
+
+    @defer.inlineCallbacks
+    def _do_request_with_retry(self, session, method, ep, retry, kwargs):
+        backoff = ExponentialBackoffEngineAsync(
+            self.master.reactor,
+            self.RETRY_START_SECONDS,
+            self.RETRY_MULTIPLIER,
+            self.RETRY_MAX_WAIT_SECONDS,
+        )
+        while True:
+            # the request arguments are modified while preparing the request
+            attempt_kwargs = dict(kwargs)
+            if 'headers' in kwargs:
+                attempt_kwargs['headers'] = dict(kwargs['headers'])
+            try:
+                res = yield self._do_single_request(session, method, ep, **attempt_kwargs)
+            except Exception as e:
+                if not retry:
+                    raise
+                log.info("http {method} {ep} failed, retrying: {e}", method=method, ep=ep, e=e)
+                try:
+                    yield backoff.wait_on_failure()
+                except BackoffTimeoutExceededError:
+                    raise e from None
+                continue
+
+            if not retry or res.code not in self.RETRY_CODES:
+                return res
+            log.info("http {method} {ep} got {code}, retrying", method=method, ep=ep, code=res.code)
+            try:
+                # reading the body releases the connection while waiting
+                yield res.content()
+            except Exception:
+                pass
+            try:
+                yield backoff.wait_on_failure()
+            except BackoffTimeoutExceededError:
+                return res
+
+    def _do_single_request(self, session, method, ep, **kwargs):
         prefer_treq = self.PREFER_TREQ
         if session.auth is not None and not isinstance(session.auth, tuple):
             prefer_treq = False
@@ -161,12 +326,14 @@ class HTTPClientService(service.SharedService):
         else:
             return self._do_txrequest(session, method, ep, **kwargs)
 
-    def _prepare_request(self, session, ep, kwargs):
+    def _get_url(self, session, ep):
         if ep.startswith('http://') or ep.startswith('https://'):
-            url = ep
-        else:
-            assert ep == "" or ep.startswith("/"), "ep should start with /: " + ep
-            url = session.base_url + ep
+            return ep
+        assert ep == "" or ep.startswith("/"), "ep should start with /: " + ep
+        return session.base_url + ep
+
+    def _prepare_request(self, session, ep, kwargs):
+        url = self._get_url(session, ep)
         if session.auth is not None and 'auth' not in kwargs:
             kwargs['auth'] = session.auth
         headers = kwargs.get('headers', {})
@@ -227,8 +394,8 @@ class HTTPClientService(service.SharedService):
             kwargs['headers'] = {k: [v] for k, v in kwargs["headers"].items()}
 
         if session._treq_agent is None:
-            session._trex_agent = Agent(self.master.reactor, pool=self._pool)
-        kwargs['agent'] = session._trex_agent
+            session._treq_agent = Agent(self.master.reactor, pool=self._pool)
+        kwargs['agent'] = session._treq_agent
 
         res = yield getattr(treq, method)(url, **kwargs)
         return IHttpResponse(TreqResponseWrapper(res))
@@ -16,16 +16,27 @@ from __future__ import annotations
 
 import abc
 import base64
+import json
 import os
+from urllib.parse import urlencode
 
+import treq
 from twisted.internet import defer
+from twisted.internet import protocol
 from twisted.internet import reactor
+from twisted.internet import task
+from twisted.internet import threads
 from twisted.internet.error import ProcessExitedAlready
 from twisted.logger import Logger
 from twisted.python.failure import Failure
+from twisted.web.client import Agent
+from twisted.web.client import BrowserLikePolicyForHTTPS
+from twisted.web.http_headers import Headers
 
 from buildbot import config
+from buildbot.util import bytes2unicode
 from buildbot.util import service
+from buildbot.util import unicode2bytes
 from buildbot.util.protocol import LineProcessProtocol
 
 log = Logger()
@@ -219,15 +230,332 @@ class KubeInClusterConfigLoader(KubeConfigLoaderBase):
         return os.environ["KUBERNETES_PORT"].replace("tcp", "https")
 
 
+class KubeWatchInterruptedError(Exception):
+    pass
+
+
+class _WatchStreamProtocol(protocol.Protocol):
+    """Splits the body of a watch response into the events, one JSON document per line"""
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+        self.finished = defer.Deferred(canceller=lambda _: self.stop())
+        self._buffer = b""
+        self._stopped = False
+
+    def dataReceived(self, data):
+        lines = (self._buffer + data).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            if self._stopped:
+                return
+            if not line.strip():
+                continue
+            try:
+                self.on_event(json.loads(line))
+            except Exception:
+                self._finish(Failure())
+                self.stop()
+
+    def connectionLost(self, reason):
+        self._finish(None)
+
+    def _finish(self, result):
+        if self.finished.called:
+            return
+        if isinstance(result, Failure):
+            self.finished.errback(result)
+        else:
+            self.finished.callback(result)
+
+    def stop(self):
+        self._stopped = True
+        if self.transport is not None:
+            self.transport.stopProducing()
+        # the end of the body may not be delivered once stopped
+        self._finish(None)
+
+
+class KubePodWatch:
+    """
+    Follows the pods of a namespace through a single watch stream of the kubernetes API, and
+    hands the changes of each pod to whoever waits on it.
+
+    The stream is resumed from the last seen resource version when it ends, and the pods are
+    listed again when that version is too old. While the stream is not in sync, the waiters are
+    interrupted, and the workers poll the API instead.
+    """
+
+    RETRY_START_SECONDS = 1
+    RETRY_MAX_SECONDS = 30
+    # the labels of the pods of the latent workers: only these pods are listed and watched
+    WORKER_POD_LABELS = {'app.kubernetes.io/managed-by': 'buildbot'}
+
+    def __init__(self, reactor, kube_config, namespace):
+        self.reactor = reactor
+        self.kube_config = kube_config
+        self.namespace = namespace
+        # the last known state of each worker pod of the namespace, valid while synced
+        self.pods = {}
+        self.synced = False
+        self._resource_version = None
+        self._waiters = {}
+        self._running = False
+        self._run_d = None
+        self._pending = None
+        self._stream = None
+        self._agent = None
+
+    @staticmethod
+    def supports_config(kube_config):
+        # client certificates are only supported by txrequests, which cannot stream responses
+        config = kube_config.getConfig()
+        return 'cert' not in config and config.get('verify') is not False
+
+    def start(self):
+        self._running = True
+        self._run_d = self._run()
+
+    @defer.inlineCallbacks
+    def stop(self):
+        self._running = False
+        if self._pending is not None:
+            self._pending.cancel()
+        if self._run_d is not None:
+            yield self._run_d
+        self._set_unsynced()
+
+    def get_pod(self, name):
+        """Return the last known state of a pod, None if it does not exist"""
+        assert self.synced
+        return self.pods.get(name)
+
+    def wait_for_pod(self, name, condition):
+        """
+        Return a Deferred that fires with the state of the pod (None once it is deleted) as soon
+        as condition(state) is true. It fails with KubeWatchInterruptedError if the stream gets
+        out of sync meanwhile.
+        """
+        if not self.synced:
+            return defer.fail(KubeWatchInterruptedError(f"pods of {self.namespace} not in sync"))
+        pod = self.pods.get(name)
+        if condition(pod):
+            return defer.succeed(pod)
+
+        waiters = self._waiters.setdefault(name, [])
+
+        def cancel(d):
+            waiters.remove((condition, d))
+            if not waiters:
+                del self._waiters[name]
+
+        d = defer.Deferred(canceller=cancel)
+        waiters.append((condition, d))
+        return d
+
+    def _notify(self, name):
+        waiters = self._waiters.get(name)
+        if not waiters:
+            return
+        pod = self.pods.get(name)
+        ready = [(condition, d) for condition, d in waiters if condition(pod)]
+        for waiter in ready:
+            waiters.remove(waiter)
+        if not waiters:
+            del self._waiters[name]
+        for _, d in ready:
+            d.callback(pod)
+
+    def _set_unsynced(self):
+        self.synced = False
+        self.pods = {}
+        waiters = self._waiters
+        self._waiters = {}
+        for name, name_waiters in waiters.items():
+            for _, d in name_waiters:
+                d.errback(KubeWatchInterruptedError(f"lost the watch of pod {name}"))
+
+    @defer.inlineCallbacks
+    def _run(self):
+        delay = self.RETRY_START_SECONDS
+        while self._running:
+            try:
+                if self._resource_version is None:
+                    yield self._list_pods()
+                yield self._watch_pods()
+                delay = self.RETRY_START_SECONDS
+            except Exception as e:
+                if not self._running:
+                    break
+                log.warn(
+                    "watch of the pods of {namespace} failed, retrying in {delay}s: {e}",
+                    namespace=self.namespace,
+                    delay=delay,
+                    e=e,
+                )
+                self._set_unsynced()
+                self._resource_version = None
+                try:
+                    yield self._wait_pending(task.deferLater(self.reactor, delay))
+                except defer.CancelledError:
+                    break
+                delay = min(delay * 2, self.RETRY_MAX_SECONDS)
+
+    @defer.inlineCallbacks
+    def _wait_pending(self, d):
+        if not self._running:
+            d.cancel()
+        self._pending = d
+        try:
+            return (yield d)
+        finally:
+            self._pending = None
+
+    @staticmethod
+    def _read_file(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @defer.inlineCallbacks
+    def _get_agent(self):
+        if self._agent is None:
+            verify = self.kube_config.getConfig().get('verify')
+            if isinstance(verify, str):
+                from twisted.internet import ssl
+
+                # the CA file is read once, outside of the reactor thread
+                pem = yield threads.deferToThread(self._read_file, verify)
+                policy = BrowserLikePolicyForHTTPS(trustRoot=ssl.Certificate.loadPEM(pem))
+                self._agent = Agent(self.reactor, contextFactory=policy)
+            else:
+                self._agent = Agent(self.reactor)
+        return self._agent
+
+    @defer.inlineCallbacks
+    def _request(self, params):
+        config = self.kube_config.getConfig()
+        headers = dict(config.get('headers') or {})
+        auth = yield self.kube_config.getAuthorization()
+        if auth is not None:
+            headers['Authorization'] = auth
+        headers['Accept'] = 'application/json'
+
+        params = dict(params)
+        params['labelSelector'] = ','.join(
+            f'{key}={value}' for key, value in sorted(self.WORKER_POD_LABELS.items())
+        )
+        url = (
+            f"{self.kube_config.get_master_url()}/api/v1/namespaces/{self.namespace}/pods"
+            f"?{urlencode(params)}"
+        )
+        agent = yield self._wait_pending(self._get_agent())
+        res = yield self._wait_pending(
+            agent.request(
+                b'GET',
+                unicode2bytes(url),
+                Headers({k: [v] for k, v in headers.items()}),
+            )
+        )
+        return res
+
+    @defer.inlineCallbacks
+    def _read_json(self, res):
+        body = yield self._wait_pending(treq.content(res))
+        return json.loads(bytes2unicode(body))
+
+    @defer.inlineCallbacks
+    def _list_pods(self):
+        res = yield self._request({})
+        pod_list = yield self._read_json(res)
+        if res.code != 200:
+            raise KubeWatchInterruptedError(f"listing pods failed: {pod_list.get('message')}")
+
+        self._resource_version = pod_list['metadata']['resourceVersion']
+        self.pods = {pod['metadata']['name']: pod for pod in pod_list.get('items') or []}
+        self.synced = True
+        for name in list(self._waiters):
+            self._notify(name)
+
+    @defer.inlineCallbacks
+    def _watch_pods(self):
+        res = yield self._request({
+            'watch': '1',
+            'resourceVersion': self._resource_version,
+            'allowWatchBookmarks': 'true',
+        })
+        if res.code != 200:
+            status = yield self._read_json(res)
+            raise KubeWatchInterruptedError(f"watching pods failed: {status.get('message')}")
+
+        self._stream = _WatchStreamProtocol(self._on_event)
+        res.deliverBody(self._stream)
+        try:
+            yield self._wait_pending(self._stream.finished)
+        finally:
+            self._stream = None
+
+    def _on_event(self, event):
+        obj = event['object']
+        if event['type'] == 'ERROR':
+            if obj.get('code') == 410:
+                # the resource version is too old: list the pods again
+                log.info("watch of the pods of {namespace} expired", namespace=self.namespace)
+                self._set_unsynced()
+                self._resource_version = None
+                self._stream.stop()
+                return
+            raise KubeWatchInterruptedError(f"watch error: {obj.get('message')}")
+
+        self._resource_version = obj['metadata']['resourceVersion']
+        if event['type'] == 'BOOKMARK':
+            return
+        name = obj['metadata']['name']
+        if event['type'] == 'DELETED':
+            self.pods.pop(name, None)
+        else:
+            self.pods[name] = obj
+        self._notify(name)
+
+
 class KubeClientService(service.SharedService):
     name: str | None = "KubeClientService"  # type: ignore[assignment]
 
+    # the pods are followed through a watch stream of their namespace, instead of polling the
+    # API for each pod
+    WATCH_PODS = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._config_id_to_workers = {}
         self._worker_to_config = {}
+        self._watches = {}
         self._lock = defer.DeferredLock()
 
+    def get_pod_watch(self, kube_config, namespace):
+        """
+        Return the watch of the pods of namespace shared by the workers using kube_config, or
+        None when the pods are polled
+        """
+        if not self.WATCH_PODS or not self.running:
+            return None
+        if id(kube_config) not in self._config_id_to_workers:
+            return None
+        if not KubePodWatch.supports_config(kube_config):
+            return None
+
+        key = (id(kube_config), namespace)
+        watch = self._watches.get(key)
+        if watch is None:
+            watch = self._watches[key] = KubePodWatch(self.master.reactor, kube_config, namespace)
+            watch.start()
+        return watch
+
+    @defer.inlineCallbacks
+    def _stop_watches(self, config_id=None):
+        for key in list(self._watches):
+            if config_id is None or key[0] == config_id:
+                yield self._watches.pop(key).stop()
+
     @defer.inlineCallbacks
     def register(self, worker, config):
         yield self._lock.acquire()
@@ -256,6 +584,7 @@ class KubeClientService(service.SharedService):
             worker_list.remove(worker.name)
             if not worker_list:
                 del self._config_id_to_workers[config_id]
+                yield self._stop_watches(config_id)
                 yield config.disownServiceParent()
         finally:
             self._lock.release()
@@ -272,6 +601,7 @@ class KubeClientService(service.SharedService):
     def stopService(self):
         yield self._lock.acquire()
         try:
+            yield self._stop_watches()
             yield super().stopService()
         finally:
             self._lock.release()
@@ -70,6 +70,14 @@ class LRUCache:
 
         return result
 
+    def remove(self, key):
+        """Forget the value for key, so that the next get() calls the miss_fn again."""
+        self.weakrefs.pop(key, None)
+        if self.cache.pop(key, self.sentinel) is self.sentinel:
+            return
+        del self.refcount[key]
+        self.queue = deque(k for k in self.queue if k != key)
+
     def keys(self):
         return list(self.cache)
 
@@ -24,9 +24,38 @@ def ident(x):
     raise TypeError
 
 
+class _Node:
+    """A node of the tree of patterns, matching one path element"""
+
+    __slots__ = ('literals', 'captures', 'value', 'has_value')
+
+    def __init__(self):
+        # literal path element -> _Node
+        self.literals = {}
+        # (pattern element, type function, argument name, _Node), in insertion order
+        self.captures = []
+        self.value = None
+        self.has_value = False
+
+    def child(self, pattern_elt, parsed):
+        if parsed is None:
+            node = self.literals.get(pattern_elt)
+            if node is None:
+                node = self.literals[pattern_elt] = _Node()
+            return node
+        for capture in self.captures:
+            if capture[0] == pattern_elt:
+                return capture[3]
+        node = _Node()
+        self.captures.append((pattern_elt, parsed[0], parsed[1], node))
+        return node
+
+
 class Matcher:
     def __init__(self):
         self._patterns = {}
+        # pattern element -> parsed pattern element, see _parse
+        self._parsed = {}
         self._dirty = True
 
     def __setitem__(self, path, value):
@@ -44,36 +73,72 @@ class Matcher:
         if self._dirty:
             self._compile()
 
-        patterns = self._by_length.get(len(path), {})
-        for pattern in patterns:
-            kwargs = {}
-            for pattern_elt, path_elt in zip(pattern, path):
-                mo = self.path_elt_re.match(pattern_elt)
-                if mo:
-                    type_flag, arg_name = mo.groups()
-                    if type_flag:
-                        try:
-                            type_fn = self.type_fns[type_flag]
-                        except Exception:
-                            assert type_flag in self.type_fns, f"no such type flag {type_flag}"
-                        try:
-                            path_elt = type_fn(path_elt)
-                        except Exception:
-                            break
-                    kwargs[arg_name] = path_elt
-                else:
-                    if pattern_elt != path_elt:
-                        break
+        captured = []
+        node = self._match(self._root, path, 0, captured)
+        if node is None:
+            raise KeyError(f'No match for {path!r}')
+        return node.value, dict(captured)
+
+    def _match(self, node, path, index, captured):
+        """
+        Find the node matching path[index:] below node, trying the literal path elements before
+        the captures, and backtracking when a branch does not match the rest of the path.  The
+        values of the captures on the way are appended to captured.
+        """
+        if index == len(path):
+            return node if node.has_value else None
+
+        path_elt = path[index]
+        try:
+            literal = node.literals.get(path_elt)
+        except TypeError:
+            literal = None
+        if literal is not None:
+            found = self._match(literal, path, index + 1, captured)
+            if found is not None:
+                return found
+
+        for _, type_fn, arg_name, child in node.captures:
+            if type_fn is None:
+                value = path_elt
             else:
-                # complete match
-                return patterns[pattern], kwargs
-        raise KeyError(f'No match for {path!r}')
+                try:
+                    value = type_fn(path_elt)
+                except Exception:
+                    continue
+            captured.append((arg_name, value))
+            found = self._match(child, path, index + 1, captured)
+            if found is not None:
+                return found
+            captured.pop()
+        return None
 
     def iterPatterns(self):
         return list(self._patterns.items())
 
+    def _parse(self, pattern_elt):
+        """
+        Return (type function, argument name) for a capture, or None for a literal path element.
+        """
+        parsed = self._parsed.get(pattern_elt)
+        if parsed is None and pattern_elt not in self._parsed:
+            mo = self.path_elt_re.match(pattern_elt)
+            if mo:
+                type_flag, arg_name = mo.groups()
+                type_fn = None
+                if type_flag:
+                    assert type_flag in self.type_fns, f"no such type flag {type_flag}"
+                    type_fn = self.type_fns[type_flag]
+                parsed = (type_fn, arg_name)
+            self._parsed[pattern_elt] = parsed
+        return parsed
+
     def _compile(self):
-        self._by_length = {}
+        self._root = _Node()
         for k, v in self.iterPatterns():
-            length = len(k)
-            self._by_length.setdefault(length, {})[k] = v
+            node = self._root
+            for pattern_elt in k:
+                node = node.child(pattern_elt, self._parse(pattern_elt))
+            node.value = v
+            node.has_value = True
+        self._dirty = False
@@ -0,0 +1,204 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import bz2
+import io
+import os
+import tarfile
+import zlib
+
+# header types whose data is a part of the header of the following member
+_EXTENDED_HEADER_TYPES = (
+    tarfile.XHDTYPE,
+    tarfile.SOLARIS_XHDTYPE,
+    tarfile.GNUTYPE_LONGNAME,
+    tarfile.GNUTYPE_LONGLINK,
+)
+
+
+def _padded(size):
+    return size + (-size % tarfile.BLOCKSIZE)
+
+
+class TarStreamExtractor:
+    """
+    Extracts a tar archive that is received in arbitrary pieces, without storing the archive
+    itself.
+
+    Data is passed to feed() as it arrives. Headers are parsed with the tarfile module as soon
+    as they are complete, and the contents of regular files are written to disk right away, so
+    memory use is bounded by the size of the pieces and not by the size of the members.
+    close() must be called once all data has been fed; it raises tarfile.ReadError if the
+    archive ends in the middle of a member.
+
+    Members are filtered with tarfile.data_filter when it is available, which is what
+    TarFile.extractall(filter='data') would do.
+    """
+
+    def __init__(self, destroot, compress=None):
+        self.destroot = destroot
+
+        if compress == 'bz2':
+            self._decompressor = bz2.BZ2Decompressor()
+        elif compress == 'gz':
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self._decompressor = None
+
+        self._buffer = bytearray()
+        self._fp = None
+        self._member = None
+        self._member_path = None
+        # number of data bytes (including padding) left in the current member
+        self._remaining = 0
+        self._directories = []
+        self._finished = False
+
+    def feed(self, data):
+        if self._decompressor is not None:
+            data = self._decompressor.decompress(data)
+        self._buffer += data
+        self._process()
+
+    def close(self):
+        if self._decompressor is not None and not self._decompressor.eof:
+            raise tarfile.ReadError("unexpected end of compressed data")
+        self._process()
+        # like tarfile, accept archives without end of archive marker, as long as they do not
+        # end in the middle of a member
+        if not self._finished and (self._buffer or self._remaining):
+            self.abort()
+            raise tarfile.ReadError("unexpected end of data")
+
+        # like TarFile.extractall(), set directory attributes last, deepest first, so that
+        # extracting their contents does not fail or modify them afterwards
+        self._directories.sort(key=lambda d: d[0], reverse=True)
+        for path, member in self._directories:
+            self._set_attributes(path, member)
+        self._directories = []
+
+    def abort(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def _process(self):
+        while not self._finished:
+            if self._remaining:
+                if not self._buffer:
+                    return
+                self._consume_data()
+            elif not self._read_header():
+                return
+
+    def _consume_data(self):
+        chunk = self._buffer[: self._remaining]
+        del self._buffer[: len(chunk)]
+
+        if self._fp is not None:
+            # do not write the padding of the last block
+            data_left = self._remaining - (-self._member.size % tarfile.BLOCKSIZE)
+            if data_left > 0:
+                self._fp.write(chunk[:data_left])
+        self._remaining -= len(chunk)
+
+        if not self._remaining:
+            self._finish_member()
+
+    def _read_header(self):
+        # the header of a member may be preceded by extended headers (e.g. for long names),
+        # so wait until the whole chain is available before parsing it
+        size = 0
+        while True:
+            if len(self._buffer) < size + tarfile.BLOCKSIZE:
+                return False
+            block = bytes(self._buffer[size : size + tarfile.BLOCKSIZE])
+            if size == 0 and block == tarfile.NUL * tarfile.BLOCKSIZE:
+                # end of archive, anything after is record padding
+                self._finished = True
+                self._buffer.clear()
+                return True
+            size += tarfile.BLOCKSIZE
+            if block[156:157] not in _EXTENDED_HEADER_TYPES:
+                break
+            extended = tarfile.TarInfo.frombuf(block, tarfile.ENCODING, 'surrogateescape')
+            size += _padded(extended.size)
+
+        headers = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        with tarfile.open(fileobj=io.BytesIO(headers), mode='r:') as archive:
+            member = archive.next()
+
+        self._start_member(member)
+        return True
+
+    def _start_member(self, member):
+        data_size = _padded(member.size) if member.isreg() else 0
+        if member.issparse():
+            raise tarfile.ReadError(f"sparse file {member.name!r} is not supported")
+
+        if hasattr(tarfile, 'data_filter'):
+            member = tarfile.data_filter(member, self.destroot)
+        path = os.path.join(self.destroot, member.name)
+
+        if member.isdir():
+            # like TarFile.extractall(), keep the directory private until its final mode is
+            # set in close()
+            if member.mode is None:
+                os.makedirs(path, exist_ok=True)
+            else:
+                os.makedirs(path, 0o700, exist_ok=True)
+            self._directories.append((path, member))
+        elif member.isreg():
+            self._make_parent(path)
+            self._fp = open(path, 'wb')
+        elif member.issym():
+            self._make_parent(path)
+            if os.path.lexists(path):
+                os.unlink(path)
+            os.symlink(member.linkname, path)
+        elif member.islnk():
+            self._make_parent(path)
+            if os.path.lexists(path):
+                os.unlink(path)
+            os.link(os.path.join(self.destroot, member.linkname), path)
+        # other member types (devices, fifos) are not supported and are skipped
+
+        self._member = member
+        self._member_path = path
+        self._remaining = data_size
+        if not self._remaining:
+            self._finish_member()
+
+    def _finish_member(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+            self._set_attributes(self._member_path, self._member)
+        self._member = None
+        self._member_path = None
+
+    def _make_parent(self, path):
+        parent = os.path.dirname(path)
+        if not os.path.isdir(parent):
+            os.makedirs(parent)
+
+    def _set_attributes(self, path, member):
+        if member.mode is not None:
+            os.chmod(path, member.mode)
+        if member.mtime is not None:
+            os.utime(path, (member.mtime, member.mtime))
@@ -21,3 +21,143 @@ def matchTuple(routingKey, filter):
         if f is not None and f != k:
             return False
     return True
+
+
+class TupleMatchIndex:
+    """
+    An index of filters suitable for matchTuple, keyed by routing key segment.
+
+    Filters are stored in a trie with one level per element, where a `None`
+    element (a wildcard) is kept on a separate branch.  Looking up a routing key
+    only visits the branches that can match it, so the cost does not depend on
+    the number of non-matching filters.  Matches are returned in the order in
+    which they were added.
+    """
+
+    __slots__ = ['_roots', '_seq', '_size']
+
+    def __init__(self):
+        # maps filter length to the root node for filters of that length
+        self._roots = {}
+        self._seq = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, filter, value):
+        node = self._roots.get(len(filter))
+        if node is None:
+            node = self._roots[len(filter)] = _TupleMatchNode()
+        for f in filter:
+            node = node.child(f, create=True)
+        if node.values is None:
+            node.values = {}
+        self._seq += 1
+        node.values[value] = self._seq
+        self._size += 1
+
+    def remove(self, filter, value):
+        """
+        Remove a value added with the given filter.  Returns False if the value
+        was not in the index.
+        """
+        node = self._roots.get(len(filter))
+        if node is None:
+            return False
+        path = []
+        for f in filter:
+            child = node.child(f)
+            if child is None:
+                return False
+            path.append((node, f))
+            node = child
+        if not node.values or value not in node.values:
+            return False
+        del node.values[value]
+        self._size -= 1
+
+        # prune nodes that became empty so that short-lived filters with
+        # unique keys do not accumulate
+        while path and node.is_empty():
+            node, f = path.pop()
+            node.remove_child(f)
+        if not path and node.is_empty():
+            del self._roots[len(filter)]
+        return True
+
+    def match(self, routingKey):
+        """
+        Returns the list of values whose filter matches the routing key.
+        """
+        node = self._roots.get(len(routingKey))
+        if node is None:
+            return []
+        found = []
+        self._collect(node, routingKey, 0, found)
+        if len(found) > 1:
+            found.sort()
+        return [value for _, value in found]
+
+    def values(self):
+        """
+        Returns all values in the index, in the order in which they were added.
+        """
+        found = []
+        stack = list(self._roots.values())
+        while stack:
+            node = stack.pop()
+            if node.values:
+                found.extend((seq, value) for value, seq in node.values.items())
+            if node.children is not None:
+                stack.extend(node.children.values())
+            if node.wildcard is not None:
+                stack.append(node.wildcard)
+        found.sort()
+        return [value for _, value in found]
+
+    def _collect(self, node, routingKey, pos, found):
+        if pos == len(routingKey):
+            if node.values:
+                found.extend((seq, value) for value, seq in node.values.items())
+            return
+        if node.children is not None:
+            child = node.children.get(routingKey[pos])
+            if child is not None:
+                self._collect(child, routingKey, pos + 1, found)
+        if node.wildcard is not None:
+            self._collect(node.wildcard, routingKey, pos + 1, found)
+
+
+class _TupleMatchNode:
+    __slots__ = ['children', 'values', 'wildcard']
+
+    def __init__(self):
+        self.children = None
+        self.wildcard = None
+        self.values = None
+
+    def child(self, f, create=False):
+        if f is None:
+            if self.wildcard is None and create:
+                self.wildcard = _TupleMatchNode()
+            return self.wildcard
+        if self.children is None:
+            if not create:
+                return None
+            self.children = {}
+        node = self.children.get(f)
+        if node is None and create:
+            node = self.children[f] = _TupleMatchNode()
+        return node
+
+    def remove_child(self, f):
+        if f is None:
+            self.wildcard = None
+        else:
+            del self.children[f]
+            if not self.children:
+                self.children = None
+
+    def is_empty(self):
+        return not self.values and self.children is None and self.wildcard is None
@@ -16,8 +16,11 @@
 from __future__ import annotations
 
 import inspect
+import threading
 from functools import wraps
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import AsyncGenerator
 from typing import Callable
 from typing import Coroutine
 from typing import Generator
@@ -26,9 +29,14 @@ from typing import Union
 
 from twisted.internet import defer
 from twisted.internet import reactor
+from twisted.internet import threads
 from twisted.python import threadpool
+from twisted.python.failure import Failure
 from typing_extensions import ParamSpec
 
+if TYPE_CHECKING:
+    from twisted.internet.interfaces import IReactorThreads
+
 _T = TypeVar('_T')
 _P = ParamSpec('_P')
 
@@ -83,3 +91,126 @@ class ThreadPool(threadpool.ThreadPool):
         if remove_trigger:
             reactor.removeSystemEventTrigger(self._stop_event)
         self._stop_event = None
+
+
+async def async_iter_on_pool(
+    generator_sync: Callable[[], Generator[_T, None, None]],
+    *,
+    reactor: IReactorThreads,
+    provider_threadpool: threadpool.ThreadPool | None = None,
+    max_backlog: int = 1,
+    wait_backlog_consuption: bool = True,
+) -> AsyncGenerator[_T, None]:
+    """
+    Utility to transform a sync `Generator` function into an `AsyncGenerator`
+    by executing it on a threadpool.
+
+    :param generator_sync:
+        sync Generator function (if arguments are necessary, use functools.partial)
+
+    :param reactor: Twisted reactor to use
+
+    :param provider_threadpool:
+        Threadpool to run the Generator on (default to reactor's ThreadPool)
+
+    :param max_backlog:
+        Maximum size of the buffer used to communicate between sync and async Generators.
+
+        A value of 0 or less means unlimited.
+
+        When the buffer contains `max_backlog` items,
+        the threaded sync Generator will wait until at least one element is consumed.
+
+        Note: this is forced to `0` if in unit tests and `provider_threadpool` is a `NonThreadPool`.
+
+    :param wait_backlog_consuption:
+        If `True`, will wait until all items in the buffer are consumed.
+
+        This is used to prevent a new threadpool task to run,
+        potentially creating a new buffer consuming memory
+        while the previous buffer is still in use.
+
+        Note: this is forced to `False` if in unit tests and `provider_threadpool` is a `NonThreadPool`.
+
+    If the `AsyncGenerator` is closed before the end, the sync Generator is stopped once it
+    provides its next item.
+    """
+
+    if provider_threadpool is None:
+        provider_threadpool = reactor.getThreadPool()
+
+    # create a single element queue as to
+    # occupy a thread of the pool
+    # avoiding too many compressed chunks in memory awaiting DB insert
+    # use 0 (unlimited) in tests as there isn't really a threadpool / reactor running
+    from buildbot.config.master import get_is_in_unit_tests
+
+    if get_is_in_unit_tests():
+        from buildbot.test.fake.reactor import NonThreadPool
+
+        if isinstance(provider_threadpool, NonThreadPool):
+            max_backlog = 0
+            wait_backlog_consuption = False
+
+    queue: defer.DeferredQueue[_T | _CloseObj] = defer.DeferredQueue()
+
+    condition = threading.Condition()
+
+    # dummy object that resolve the callback of the task.
+    # Needed as we can't know what the callable will provide,
+    # so None, False, ... can't be used.
+    # But, we know that callback will return None, so we can
+    # override it's callback result
+    class _CloseObj:
+        pass
+
+    close_obj = _CloseObj()
+
+    # set when the consumer stops before the end, so that the sync Generator
+    # does not wait forever for its items to be consumed
+    stopped = False
+
+    def _can_put_in_queue():
+        return stopped or max_backlog <= 0 or len(queue.pending) < max_backlog
+
+    def _provider_wrapped() -> None:
+        try:
+            for item in generator_sync():
+                with condition:
+                    condition.wait_for(_can_put_in_queue)
+                if stopped:
+                    return
+                reactor.callFromThread(queue.put, item)
+        finally:
+            if wait_backlog_consuption:
+                with condition:
+                    condition.wait_for(lambda: stopped or len(queue.pending) <= 0)
+
+    def _put_close(res: None | Failure) -> None | Failure:
+        queue.put(close_obj)
+        return res
+
+    worker_task = threads.deferToThreadPool(
+        reactor,
+        provider_threadpool,
+        _provider_wrapped,
+    ).addBoth(callback=_put_close)
+
+    try:
+        while (item := await queue.get()) is not close_obj:
+            assert not isinstance(item, _CloseObj)
+            with condition:
+                condition.notify()
+            yield item
+    finally:
+        if not worker_task.called:
+            with condition:
+                stopped = True
+                condition.notify_all()
+
+    assert worker_task.called
+    # so that if task ended in exception, it's correctly propagated
+    # but only if error, as await a successfully resolved Deferred will
+    # never finish
+    if isinstance(worker_task.result, Failure):
+        await worker_task
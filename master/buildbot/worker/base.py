@@ -386,6 +386,11 @@ class AbstractWorker(service.BuildbotService):
         # different kinds of workers.
         return defer.succeed(True)
 
+    def buildRejectedAsIncompatible(self):
+        # called when isCompatibleWithBuild rejected a pending build request. Latent workers may
+        # release the running instance so that the build can start a compatible one.
+        pass
+
     def startMissingTimer(self):
         if self.missing_timeout and self.parent and self.running:
             self.stopMissingTimer()  # in case it's already running
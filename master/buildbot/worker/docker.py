@@ -28,6 +28,7 @@ from buildbot import config
 from buildbot.interfaces import LatentWorkerCannotSubstantiate
 from buildbot.interfaces import LatentWorkerFailedToSubstantiate
 from buildbot.util import unicode2bytes
+from buildbot.util.dockerimages import DockerImageService
 from buildbot.util.latent import CompatibleLatentWorkerMixin
 from buildbot.worker import AbstractLatentWorker
 
@@ -150,6 +151,7 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         encoding='gzip',
         buildargs=None,
         hostname=None,
+        prepull=False,
         **kwargs,
     ):
         super().checkConfig(
@@ -180,6 +182,11 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
                     )
                     continue
 
+        if prepull and not (isinstance(image, str) and isinstance(docker_host, str)):
+            config.error(
+                "DockerLatentWorker: prepull needs an image and a docker_host which are strings"
+            )
+
     @defer.inlineCallbacks
     def reconfigService(
         self,
@@ -203,6 +210,7 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         target="",
         buildargs=None,
         hostname=None,
+        prepull=False,
         **kwargs,
     ):
         yield super().reconfigService(
@@ -229,6 +237,31 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         if tls is not None:
             self.client_args['tls'] = tls
         self.hostname = hostname
+        self.prepull = prepull
+
+        self._image_service = yield DockerImageService.getService(self.master)
+        if self.running:
+            self._prepull_image()
+
+    @defer.inlineCallbacks
+    def startService(self):
+        yield super().startService()
+        self._prepull_image()
+
+    def _prepull_image(self):
+        if self.prepull:
+            self._image_service.prepull(
+                self.docker_host, self.image, self._get_client_factory(self.docker_host)
+            )
+
+    def _get_client_args(self, docker_host):
+        curr_client_args = self.client_args.copy()
+        curr_client_args['base_url'] = docker_host
+        return curr_client_args
+
+    def _get_client_factory(self, docker_host):
+        client_args = self._get_client_args(docker_host)
+        return lambda: self._getDockerClient(client_args)
 
     def _thd_parse_volumes(self, volumes):
         volume_list = []
@@ -279,6 +312,9 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
             hostname,
         ) = yield self.renderWorkerPropsOnStart(build)
 
+        image_index = self._image_service.get_index(
+            docker_host, self._get_client_factory(docker_host)
+        )
         res = yield threads.deferToThread(
             self._thd_start_instance,
             docker_host,
@@ -291,19 +327,10 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
             target,
             buildargs,
             hostname,
+            image_index,
         )
         return res
 
-    def _image_exists(self, client, name):
-        # Make sure the image exists
-        for image in client.images():
-            for tag in image['RepoTags'] or []:
-                if ':' in name and tag == name:
-                    return True
-                if tag.startswith(name + ':'):
-                    return True
-        return False
-
     def _thd_start_instance(
         self,
         docker_host,
@@ -316,9 +343,9 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         target,
         buildargs,
         hostname,
+        image_index,
     ):
-        curr_client_args = self.client_args.copy()
-        curr_client_args['base_url'] = docker_host
+        curr_client_args = self._get_client_args(docker_host)
 
         docker_client = self._getDockerClient(curr_client_args)
         container_name = self.getContainerName()
@@ -335,7 +362,7 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
 
         found = False
         if image is not None:
-            found = self._image_exists(docker_client, image)
+            found = image_index.has_image(docker_client, image)
         else:
             image = f'{self.workername}_{id(self)}_image'
         if (not found) and (dockerfile is not None):
@@ -362,14 +389,16 @@ class DockerLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
             for line in lines:
                 for streamline in _handle_stream_line(line):
                     log.msg(streamline)
+            image_index.invalidate()
 
-        imageExists = self._image_exists(docker_client, image)
+        imageExists = image_index.has_image(docker_client, image)
         if ((not imageExists) or self.alwaysPull) and self.autopull:
             if not imageExists:
                 log.msg(f"Image '{image}' not found, pulling from registry")
             docker_client.pull(image)
+            image_index.invalidate()
 
-        if not self._image_exists(docker_client, image):
+        if not image_index.has_image(docker_client, image):
             msg = f'Image "{image}" not found on docker host.'
             log.msg(msg)
             docker_client.close()
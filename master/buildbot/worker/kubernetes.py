@@ -22,6 +22,7 @@ from buildbot.util import httpclientservice
 from buildbot.util import kubeclientservice
 from buildbot.util.latent import CompatibleLatentWorkerMixin
 from buildbot.worker.docker import DockerBaseWorker
+from buildbot.worker.latent import States
 
 log = Logger()
 
@@ -49,6 +50,15 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
     _namespace = None
     _kube = None
     _kube_config = None
+    _pod_failure_waiter = None
+
+    # the reasons of a waiting container for which the pod is not going to start
+    POD_FAILED_WAITING_REASONS = (
+        'CreateContainerConfigError',
+        'ErrImageNeverPull',
+        'ImagePullBackOff',
+        'InvalidImageName',
+    )
 
     @defer.inlineCallbacks
     def getPodSpec(self, build):
@@ -58,7 +68,11 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         return {
             "apiVersion": "v1",
             "kind": "Pod",
-            "metadata": {"name": self.getContainerName()},
+            "metadata": {
+                "name": self.getContainerName(),
+                # the pods are followed through a watch of the pods with these labels
+                "labels": dict(kubeclientservice.KubePodWatch.WORKER_POD_LABELS),
+            },
             "spec": {
                 "affinity": (yield self.get_affinity(build)),
                 "containers": [
@@ -171,10 +185,67 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
             yield self._create_pod(self._namespace, pod_spec)
         except KubeError as e:
             raise LatentWorkerFailedToSubstantiate(str(e)) from e
+        self._wait_for_pod_failure()
         return True
 
+    def _get_pod_watch(self, namespace):
+        if self._kube is None:
+            return None
+        watch = self._kube.get_pod_watch(self._kube_config, namespace)
+        if watch is None or not watch.synced:
+            return None
+        return watch
+
+    def _get_pod_failure(self, pod):
+        if pod is None:
+            return None
+        status = pod.get('status') or {}
+        if status.get('phase') in ('Failed', 'Succeeded'):
+            return f"pod {status['phase'].lower()}: {status.get('message', '')}"
+        for container in status.get('containerStatuses') or []:
+            waiting = (container.get('state') or {}).get('waiting') or {}
+            if waiting.get('reason') in self.POD_FAILED_WAITING_REASONS:
+                message = waiting.get('message', waiting['reason'])
+                return f"container {container.get('name')}: {message}"
+        return None
+
+    def _wait_for_pod_failure(self):
+        # check the instance as soon as the pod fails, instead of waiting for the next check
+        watch = self._get_pod_watch(self._namespace)
+        if watch is None:
+            return
+        d = watch.wait_for_pod(
+            self.getContainerName(), lambda pod: self._get_pod_failure(pod) is not None
+        )
+
+        @d.addCallback
+        def failed(_):
+            self._pod_failure_waiter = None
+            # while start_instance() runs, the failure is left to the periodic check
+            if self.state == States.SUBSTANTIATING_STARTING and not self._start_stop_lock.locked:
+                self._stop_check_instance_timer()
+                self._check_instance_timer_fired()
+
+        d.addErrback(
+            lambda f: f.trap(kubeclientservice.KubeWatchInterruptedError, defer.CancelledError)
+        )
+        self._pod_failure_waiter = d
+
+    def check_instance(self):
+        # without a watch, the failures of the pods are only seen by the missing timeout
+        watch = self._get_pod_watch(self._namespace)
+        if watch is None:
+            return (True, "")
+        failure = self._get_pod_failure(watch.get_pod(self.getContainerName()))
+        if failure is not None:
+            return (False, failure)
+        return (True, "")
+
     @defer.inlineCallbacks
     def stop_instance(self, fast=False, reportFailure=True):
+        if self._pod_failure_waiter is not None:
+            self._pod_failure_waiter.cancel()
+            self._pod_failure_waiter = None
         self.current_pod_spec = None
         self.resetWorkerPropsOnStop()
         try:
@@ -249,8 +320,27 @@ class KubeLatentWorker(CompatibleLatentWorkerMixin, DockerBaseWorker):
         t1 = self.master.reactor.seconds()
         url = f'/api/v1/namespaces/{namespace}/pods/{name}/status'
         while True:
-            if self.master.reactor.seconds() - t1 > timeout:
+            elapsed = self.master.reactor.seconds() - t1
+            if elapsed > timeout:
                 raise TimeoutError(f"Did not see pod {name} terminate after {timeout}s")
+
+            # the watch may not have seen a pod that was just created: its status is then
+            # requested, until the watch knows the pod or the pod is gone
+            watch = self._get_pod_watch(namespace)
+            if watch is not None and watch.get_pod(name) is not None:
+                d = watch.wait_for_pod(name, lambda pod: pod is None)
+                d.addTimeout(timeout - elapsed, self.master.reactor)
+                try:
+                    yield d
+                    return None
+                except defer.TimeoutError:
+                    raise TimeoutError(
+                        f"Did not see pod {name} terminate after {timeout}s"
+                    ) from None
+                except kubeclientservice.KubeWatchInterruptedError:
+                    # poll the pod status until the watch is in sync again
+                    pass
+
             res = yield self._http.get(url, **(yield self._get_request_kwargs()))
 
             try:
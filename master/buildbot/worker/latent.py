@@ -26,12 +26,16 @@ from twisted.python import failure
 from twisted.python import log
 from zope.interface import implementer
 
+from buildbot import config
 from buildbot.interfaces import ILatentMachine
 from buildbot.interfaces import ILatentWorker
 from buildbot.interfaces import LatentWorkerFailedToSubstantiate
 from buildbot.interfaces import LatentWorkerSubstantiatiationCancelled
+from buildbot.process import metrics
+from buildbot.process.properties import Properties
 from buildbot.util import Notifier
 from buildbot.worker.base import AbstractWorker
+from buildbot.worker.warmpool import WarmPoolManager
 
 
 class States(enum.Enum):
@@ -87,6 +91,11 @@ class AbstractLatentWorker(AbstractWorker):
     build_wait_timer: DelayedCall | None = None
     start_missing_on_startup = False
 
+    warm_pool: str | None = None
+    warm_pool_min_idle = 1
+    warm_pool_max_idle = 1
+    warm_pool_manager: WarmPoolManager | None = None
+
     # override if the latent worker may connect without substantiate. Most
     # often this will be used in workers whose lifetime is managed by
     # latent machines.
@@ -164,18 +173,67 @@ class AbstractLatentWorker(AbstractWorker):
         self._substantiation_notifier: Notifier[bool] = Notifier()
         self._start_stop_lock = defer.DeferredLock()
         self._check_instance_timer = None
+        # true while the worker is substantiated by its warm pool rather than by a build
+        self.warm_pool_starting = False
+        # the number of builds that started while the worker was already substantiated
+        self.warm_pool_hits = 0
+        # the time spent substantiated without running any build
+        self.idle_seconds = 0.0
+        self._idle_since: float | None = None
 
     def checkConfig(
-        self, name, password, build_wait_timeout=60 * 10, check_instance_interval=10, **kwargs
+        self,
+        name,
+        password,
+        build_wait_timeout=60 * 10,
+        check_instance_interval=10,
+        warm_pool=None,
+        warm_pool_min_idle=1,
+        warm_pool_max_idle=None,
+        **kwargs,
     ):
         super().checkConfig(name, password, **kwargs)
 
+        if warm_pool is not None:
+            if not isinstance(warm_pool, str):
+                config.error(f"warm_pool must be a string, not {warm_pool!r}")
+            if not isinstance(warm_pool_min_idle, int) or warm_pool_min_idle < 0:
+                config.error("warm_pool_min_idle must be a non-negative integer")
+            elif warm_pool_max_idle is not None and (
+                not isinstance(warm_pool_max_idle, int) or warm_pool_max_idle < warm_pool_min_idle
+            ):
+                config.error(
+                    "warm_pool_max_idle must be an integer not lower than warm_pool_min_idle"
+                )
+            if not isinstance(build_wait_timeout, (int, float)) or build_wait_timeout <= 0:
+                config.error("warm_pool requires a positive build_wait_timeout")
+
+    @defer.inlineCallbacks
     def reconfigService(
-        self, name, password, build_wait_timeout=60 * 10, check_instance_interval=10, **kwargs
+        self,
+        name,
+        password,
+        build_wait_timeout=60 * 10,
+        check_instance_interval=10,
+        warm_pool=None,
+        warm_pool_min_idle=1,
+        warm_pool_max_idle=None,
+        **kwargs,
     ):
         self.build_wait_timeout = build_wait_timeout
         self.check_instance_interval = check_instance_interval
-        return super().reconfigService(name, password, **kwargs)
+        self.warm_pool = warm_pool
+        self.warm_pool_min_idle = warm_pool_min_idle
+        if warm_pool_max_idle is None:
+            warm_pool_max_idle = warm_pool_min_idle
+        self.warm_pool_max_idle = warm_pool_max_idle
+        yield super().reconfigService(name, password, **kwargs)
+
+        if self.warm_pool is not None:
+            manager = yield WarmPoolManager.getService(self.master)
+            manager.register(self)
+        elif self.warm_pool_manager is not None:
+            self.warm_pool_manager.unregister(self)
 
     def _generate_random_password(self):
         return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(20))
@@ -240,6 +298,65 @@ class AbstractLatentWorker(AbstractWorker):
     def substantiated(self) -> bool:
         return self.state == States.SUBSTANTIATED and self.conn is not None
 
+    @property
+    def is_idle(self) -> bool:
+        return self.substantiated and not self.building
+
+    @property
+    def is_warm(self) -> bool:
+        # an idle worker kept substantiated by a warm pool
+        return self.warm_pool_manager is not None and self.is_idle
+
+    def get_idle_seconds(self, now: float) -> float:
+        if self._idle_since is None:
+            return self.idle_seconds
+        return self.idle_seconds + now - self._idle_since
+
+    def _start_idle(self):
+        if self._idle_since is None:
+            self._idle_since = self.master.reactor.seconds()
+
+    def _stop_idle(self):
+        if self._idle_since is None:
+            return
+        idle = self.master.reactor.seconds() - self._idle_since
+        self._idle_since = None
+        self.idle_seconds += idle
+        metrics.MetricCountEvent.log('AbstractLatentWorker.idle_seconds', idle)
+        if self.warm_pool is not None:
+            metrics.MetricCountEvent.log(f'WarmPool.{self.warm_pool}.idle_seconds', idle)
+
+    def can_warm_start(self) -> bool:
+        return (
+            self.running
+            and self.state == States.NOT_SUBSTANTIATED
+            and bool(self.workerforbuilders)
+            and self.canStartBuild()
+        )
+
+    def warm_start(self) -> None:
+        """Substantiate the worker without a build, so that it waits idle in its warm pool."""
+        # there is no build yet, so the instance is started with the worker properties only
+        props = Properties()
+        props.master = self.master
+        props.updateFromProperties(self.properties)
+
+        self.warm_pool_starting = True
+        d = self.substantiate(None, props)
+        d.addBoth(self._warm_start_finished)
+
+    def _warm_start_finished(self, result):
+        self.warm_pool_starting = False
+        if isinstance(result, failure.Failure):
+            if not result.check(LatentWorkerSubstantiatiationCancelled):
+                log.err(result, f"while starting worker {self.name} for its warm pool")
+                # don't try again immediately
+                self.putInQuarantine()
+            return
+        if result and not self.building:
+            self._start_idle()
+            self._setBuildWaitTimer()
+
     def substantiate(self, wfb: Any, build: Any) -> defer.Deferred[bool]:
         log.msg(f"substantiating worker {wfb}")
 
@@ -401,6 +518,14 @@ class AbstractLatentWorker(AbstractWorker):
     def buildStarted(self, wfb):
         assert wfb.isBusy()
         self._clearBuildWaitTimer()
+        if self.substantiated:
+            self.warm_pool_hits += 1
+            if self.warm_pool is not None:
+                metrics.MetricCountEvent.log(f'WarmPool.{self.warm_pool}.hits', 1)
+        self._stop_idle()
+        if self.warm_pool_manager is not None:
+            # the pool may need to start another worker
+            self.warm_pool_manager.refill()
 
         if ILatentMachine.providedBy(self.machine):
             self.machine.notifyBuildStarted()
@@ -408,6 +533,8 @@ class AbstractLatentWorker(AbstractWorker):
     def buildFinished(self, wfb):
         assert not wfb.isBusy()
         if not self.building:
+            if self.substantiated:
+                self._start_idle()
             if self.build_wait_timeout == 0:
                 # we insubstantiate asynchronously to trigger more bugs with
                 # the fake reactor
@@ -435,9 +562,28 @@ class AbstractLatentWorker(AbstractWorker):
         if self.build_wait_timeout <= 0:
             return
         self.build_wait_timer = self.master.reactor.callLater(
-            self.build_wait_timeout, self._soft_disconnect
+            self.build_wait_timeout, self._build_wait_timer_fired
         )
 
+    def buildRejectedAsIncompatible(self):
+        # the warm pool would keep the worker idle while the pending build waits for it, so
+        # release it now and let the build substantiate it with its own properties
+        if self.is_warm:
+            self._clearBuildWaitTimer()
+            log.msg(
+                f"warm pool {self.warm_pool}: releasing worker {self.name} that is not "
+                "compatible with a pending build"
+            )
+            self._deferwaiter.add(self._soft_disconnect())
+
+    def _build_wait_timer_fired(self):
+        self.build_wait_timer = None
+        # the warm pool keeps the worker while the pool needs idle workers
+        if self.warm_pool_manager is not None and self.warm_pool_manager.should_keep_idle(self):
+            self._setBuildWaitTimer()
+            return None
+        return self._soft_disconnect()
+
     def _stop_check_instance_timer(self):
         if self._check_instance_timer is not None:
             if self._check_instance_timer.active():
@@ -532,6 +678,7 @@ class AbstractLatentWorker(AbstractWorker):
 
             self._clearBuildWaitTimer()
             self._stop_check_instance_timer()
+            self._stop_idle()
 
             if prev_state in [States.SUBSTANTIATING_STARTING, States.SUBSTANTIATED]:
                 try:
@@ -589,6 +736,9 @@ class AbstractLatentWorker(AbstractWorker):
     def stopService(self):
         # stops the service. Waits for any pending substantiations, insubstantiations or builds
         # that are running or about to start to complete.
+        if self.warm_pool_manager is not None:
+            self.warm_pool_manager.unregister(self)
+
         while self.state not in [States.NOT_SUBSTANTIATED, States.SHUT_DOWN]:
             if self.state in [
                 States.INSUBSTANTIATING,
@@ -628,6 +778,9 @@ class AbstractLatentWorker(AbstractWorker):
         for b in self.botmaster.getBuildersForWorker(self.name):
             if b.name not in self.workerforbuilders:
                 b.addLatentWorker(self)
+        if self.warm_pool_manager is not None:
+            # the pool can start the worker once it serves builders
+            self.warm_pool_manager.refill()
         return super().updateWorker()
 
 
@@ -0,0 +1,158 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.process import metrics
+from buildbot.util import debounce
+from buildbot.util import service
+
+if TYPE_CHECKING:
+    from buildbot.worker.latent import AbstractLatentWorker
+
+
+class WarmPool:
+    """The latent workers that share a warm pool"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.workers: dict[str, AbstractLatentWorker] = {}
+
+    @property
+    def min_idle(self) -> int:
+        return max(w.warm_pool_min_idle for w in self.workers.values())
+
+    @property
+    def max_idle(self) -> int:
+        return max(w.warm_pool_max_idle for w in self.workers.values())
+
+    def get_builder_names(self) -> set[str]:
+        names: set[str] = set()
+        for worker in self.workers.values():
+            names.update(worker.workerforbuilders)
+        return names
+
+    def get_target_idle(self, queue_depth: int) -> int:
+        """The number of idle workers to keep, given the recent queue depth of the builders"""
+        return max(self.min_idle, min(self.max_idle, queue_depth))
+
+    def get_idle_count(self) -> int:
+        # the workers being started by the pool are counted as idle, so that they are not
+        # started twice
+        return sum(
+            1
+            for w in self.workers.values()
+            if (w.warm_pool_starting and not w.building) or w.is_idle
+        )
+
+    def get_idle_seconds(self, now: float) -> float:
+        return sum(w.get_idle_seconds(now) for w in self.workers.values())
+
+    def get_hits(self) -> int:
+        return sum(w.warm_pool_hits for w in self.workers.values())
+
+
+class WarmPoolManager(service.SharedService):
+    """
+    Keeps a number of the latent workers of each warm pool substantiated while they are idle, so
+    that the builds do not wait for the instances to boot.
+
+    The number of idle workers to keep is scaled between the minimum and maximum of the pool from
+    the number of build requests that recently waited for a worker on the builders of the pool.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pools: dict[str, WarmPool] = {}
+
+    @classmethod
+    def lookup(cls, master) -> WarmPoolManager | None:
+        return master.namedServices.get(cls.getName())
+
+    def register(self, worker: AbstractLatentWorker) -> None:
+        self.unregister(worker)
+        pool = self.pools.get(worker.warm_pool)
+        if pool is None:
+            pool = self.pools[worker.warm_pool] = WarmPool(worker.warm_pool)
+        pool.workers[worker.name] = worker
+        worker.warm_pool_manager = self
+        self.refill()
+
+    def unregister(self, worker: AbstractLatentWorker) -> None:
+        for name, pool in list(self.pools.items()):
+            if pool.workers.get(worker.name) is not worker:
+                continue
+            del pool.workers[worker.name]
+            if not pool.workers:
+                del self.pools[name]
+        worker.warm_pool_manager = None
+
+    def get_target_idle(self, pool: WarmPool) -> int:
+        brd = self.master.botmaster.brd
+        return pool.get_target_idle(brd.getRecentQueueDepth(pool.get_builder_names()))
+
+    def should_keep_idle(self, worker: AbstractLatentWorker) -> bool:
+        """Whether an idle worker of a pool is still needed to reach the target of the pool"""
+        pool = self.pools.get(worker.warm_pool)
+        if pool is None or pool.workers.get(worker.name) is not worker:
+            return False
+        return pool.get_idle_count() <= self.get_target_idle(pool)
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Return the idle accounting of each pool, keyed by pool name: the number of idle workers
+        and the current target, the seconds that the workers spent substantiated without a build
+        and the number of builds that started on an idle worker.
+        """
+        now = self.master.reactor.seconds()
+        return {
+            name: {
+                'idle': pool.get_idle_count(),
+                'target_idle': self.get_target_idle(pool),
+                'idle_seconds': pool.get_idle_seconds(now),
+                'hits': pool.get_hits(),
+            }
+            for name, pool in self.pools.items()
+        }
+
+    @debounce.method(wait=0.1)
+    def refill(self) -> None:
+        for pool in self.pools.values():
+            target = self.get_target_idle(pool)
+            missing = target - pool.get_idle_count()
+            metrics.MetricCountEvent.log(f'WarmPool.{pool.name}.target_idle', target, absolute=True)
+            if missing <= 0:
+                continue
+            for worker in sorted(pool.workers.values(), key=lambda w: w.name):
+                if missing <= 0:
+                    break
+                if worker.can_warm_start():
+                    log.msg(f"warm pool {pool.name}: starting idle worker {worker.name}")
+                    worker.warm_start()
+                    missing -= 1
+
+    def startService(self):
+        self.refill.start()
+        return super().startService()
+
+    @defer.inlineCallbacks
+    def stopService(self):
+        yield self.refill.stop()
+        yield super().stopService()
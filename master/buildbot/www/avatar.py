@@ -15,19 +15,24 @@
 
 import base64
 import hashlib
+import json
+import os
 from urllib.parse import urlencode
 from urllib.parse import urljoin
 from urllib.parse import urlparse
 from urllib.parse import urlunparse
 
 from twisted.internet import defer
+from twisted.internet import threads
 from twisted.python import log
 
 from buildbot import config
 from buildbot.util import bytes2unicode
+from buildbot.util import debounce
 from buildbot.util import httpclientservice
 from buildbot.util import unicode2bytes
 from buildbot.util.config import ConfiguredMixin
+from buildbot.util.lru import AsyncLRUCache
 from buildbot.www import resource
 
 
@@ -224,17 +229,58 @@ class AvatarGravatar(AvatarBase):
         raise resource.Redirect(gravatar_url)
 
 
+class _CachedAvatar:
+    """The avatar found for a user: either a redirection url or the image itself"""
+
+    __slots__ = ('url', 'content_type', 'content', 'expires', '__weakref__')
+
+    def __init__(self, expires, url=None, content_type=None, content=None):
+        self.expires = expires
+        self.url = url
+        self.content_type = content_type
+        self.content = content
+
+    def asDict(self):
+        d = {'expires': self.expires}
+        if self.url is not None:
+            d['url'] = bytes2unicode(self.url)
+        else:
+            d['content_type'] = bytes2unicode(self.content_type)
+            d['content'] = bytes2unicode(base64.b64encode(self.content))
+        return d
+
+    @classmethod
+    def fromDict(cls, d):
+        if 'url' in d:
+            return cls(d['expires'], url=unicode2bytes(d['url']))
+        return cls(
+            d['expires'],
+            content_type=unicode2bytes(d['content_type']),
+            content=base64.b64decode(d['content']),
+        )
+
+
 class AvatarResource(resource.Resource):
     # enable reconfigResource calls
     needsReconfig = True
     defaultAvatarUrl = b"img/nobody.png"
+    defaultCacheSize = 1000
+    defaultCacheSeconds = 3600
 
     def reconfigResource(self, new_config):
         self.avatarMethods = new_config.www.get('avatar_methods', [])
         self.defaultAvatarFullUrl = urljoin(
             unicode2bytes(new_config.buildbotURL), unicode2bytes(self.defaultAvatarUrl)
         )
-        self.cache = {}
+        self.cacheSeconds = new_config.www.get('avatar_cache_seconds', self.defaultCacheSeconds)
+        self.cache = AsyncLRUCache(
+            self._fetchAvatar,
+            max_size=new_config.www.get('avatar_cache_size', self.defaultCacheSize),
+        )
+        self.cacheFile = None
+        if new_config.www.get('avatar_cache_file'):
+            self.cacheFile = os.path.join(self.master.basedir, new_config.www['avatar_cache_file'])
+            self._loadCache()
         # ensure the avatarMethods is a iterable
         if isinstance(self.avatarMethods, AvatarBase):
             self.avatarMethods = (self.avatarMethods,)
@@ -242,6 +288,93 @@ class AvatarResource(resource.Resource):
         for method in self.avatarMethods:
             method.master = self.master
 
+    def _loadCache(self):
+        try:
+            with open(self.cacheFile, encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.msg(f"Could not read the avatar cache from {self.cacheFile}: {e}")
+            return
+
+        now = self.master.reactor.seconds()
+        for entry in entries:
+            try:
+                avatar = _CachedAvatar.fromDict(entry['avatar'])
+                if avatar.expires <= now:
+                    continue
+                email, username, size = entry['key']
+                cache_key = (
+                    unicode2bytes(email),
+                    unicode2bytes(username) if username is not None else None,
+                    size,
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.cache.put(cache_key, avatar)
+
+    @debounce.method(wait=1)
+    @defer.inlineCallbacks
+    def _saveCache(self):
+        if self.cacheFile is None:
+            return
+        entries = []
+        for (email, username, size), avatar in self.cache.cache.items():
+            try:
+                entries.append({
+                    'key': [
+                        bytes2unicode(email),
+                        bytes2unicode(username) if username is not None else None,
+                        size,
+                    ],
+                    'avatar': avatar.asDict(),
+                })
+            except UnicodeDecodeError:
+                continue
+
+        def thd(path, contents):
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(contents)
+            os.replace(path + '.tmp', path)
+
+        try:
+            yield threads.deferToThread(thd, self.cacheFile, json.dumps(entries))
+        except OSError as e:
+            log.msg(f"Could not write the avatar cache to {self.cacheFile}: {e}")
+
+    @defer.inlineCallbacks
+    def _fetchAvatar(self, cache_key):
+        email, username, size = cache_key
+        expires = self.master.reactor.seconds() + self.cacheSeconds
+        avatar = None
+        for method in self.avatarMethods:
+            try:
+                res = yield method.getUserAvatar(
+                    email, username, size, bytes2unicode(self.defaultAvatarFullUrl)
+                )
+            except resource.Redirect as r:
+                avatar = _CachedAvatar(expires, url=r.url)
+                break
+            if res is not None:
+                avatar = _CachedAvatar(expires, content_type=res[0], content=res[1])
+                break
+        if avatar is None:
+            # remember that no avatar was found, too
+            avatar = _CachedAvatar(expires, url=self.defaultAvatarUrl)
+        if self.cacheFile is not None:
+            self._saveCache()
+        return avatar
+
+    @defer.inlineCallbacks
+    def getAvatar(self, email, username, size):
+        cache_key = (email, username, size)
+        avatar = yield self.cache.get(cache_key)
+        if avatar.expires <= self.master.reactor.seconds():
+            self.cache.remove(cache_key)
+            avatar = yield self.cache.get(cache_key)
+        return avatar
+
     def render_GET(self, request):
         return self.asyncRenderHelper(request, self.renderAvatar)
 
@@ -254,20 +387,9 @@ class AvatarResource(resource.Resource):
         except ValueError:
             size = 32
         username = request.args.get(b"username", [None])[0]
-        cache_key = (email, username, size)
-        if self.cache.get(cache_key):
-            raise self.cache[cache_key]
-        for method in self.avatarMethods:
-            try:
-                res = yield method.getUserAvatar(
-                    email, username, size, bytes2unicode(self.defaultAvatarFullUrl)
-                )
-            except resource.Redirect as r:
-                self.cache[cache_key] = r
-                raise
-            if res is not None:
-                request.setHeader(b'content-type', res[0])
-                request.setHeader(b'content-length', unicode2bytes(str(len(res[1]))))
-                request.write(res[1])
-                return
-        raise resource.Redirect(self.defaultAvatarUrl)
+        avatar = yield self.getAvatar(email, username, size)
+        if avatar.url is not None:
+            raise resource.Redirect(avatar.url)
+        request.setHeader(b'content-type', avatar.content_type)
+        request.setHeader(b'content-length', unicode2bytes(str(len(avatar.content))))
+        request.write(avatar.content)
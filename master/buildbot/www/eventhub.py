@@ -0,0 +1,175 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+
+from twisted.internet import defer
+from twisted.internet.interfaces import IPushProducer
+from twisted.python import log
+from zope.interface import implementer
+
+if TYPE_CHECKING:
+    from buildbot.mq.base import QueueRef
+
+    EventPath = tuple[str | None, ...]
+
+
+@implementer(IPushProducer)
+class EventConnection:
+    """
+    Writes messages to a websocket or server-sent events connection.
+
+    This is registered as the producer of the connection, so that the messages are queued while
+    the client does not keep up, instead of being buffered by the transport. The connection is
+    dropped when more than MAX_QUEUED_SIZE bytes are queued.
+    """
+
+    MAX_QUEUED_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, write: Callable[[bytes], Any], drop: Callable[[], Any]) -> None:
+        self._write = write
+        self._drop = drop
+        self._queue: deque[bytes] = deque()
+        self._queued_size = 0
+        self.paused = False
+        self.dropped = False
+
+    def send(self, data: bytes) -> None:
+        if self.dropped:
+            return
+        if not self.paused and not self._queue:
+            self._write(data)
+            return
+
+        self._queue.append(data)
+        self._queued_size += len(data)
+        if self._queued_size > self.MAX_QUEUED_SIZE:
+            log.msg(f"dropping event connection: {self._queued_size} bytes are waiting to be sent")
+            self.dropped = True
+            self._queue.clear()
+            self._queued_size = 0
+            self._drop()
+
+    def pauseProducing(self) -> None:
+        self.paused = True
+
+    def resumeProducing(self) -> None:
+        self.paused = False
+        # writing may pause the producer again
+        while self._queue and not self.paused and not self.dropped:
+            data = self._queue.popleft()
+            self._queued_size -= len(data)
+            self._write(data)
+
+    def stopProducing(self) -> None:
+        self.dropped = True
+        self._queue.clear()
+        self._queued_size = 0
+
+
+class _Subscription:
+    def __init__(self) -> None:
+        # dict as an ordered set
+        self.connections: dict[EventConnection, None] = {}
+        self.qref: QueueRef | None = None
+        # waiting for the mq consumer to be started, None once it is
+        self.waiters: list[defer.Deferred[None]] | None = []
+
+
+class EventHub:
+    """
+    Delivers the mq messages to the websocket or server-sent events connections.
+
+    There is a single mq consumer per path, whatever the number of connections consuming it, and
+    each message is encoded once, whatever the number of connections it is sent to.
+    """
+
+    def __init__(self, master, encode: Callable[[tuple[str, ...], Any], bytes]) -> None:
+        self.master = master
+        self.encode = encode
+        self._subscriptions: dict[EventPath, _Subscription] = {}
+        # the same message is delivered to the consumers of all the paths it matches
+        self._last_encoded: tuple[tuple[str, ...], Any, bytes] | None = None
+
+    def subscribe(self, path: EventPath, connection: EventConnection) -> defer.Deferred[None]:
+        """Send the messages matching path to the connection, once the mq consumer is started"""
+        sub = self._subscriptions.get(path)
+        if sub is not None:
+            sub.connections[connection] = None
+            if sub.waiters is None:
+                return defer.succeed(None)
+            d: defer.Deferred[None] = defer.Deferred()
+            sub.waiters.append(d)
+            return d
+
+        sub = _Subscription()
+        sub.connections[connection] = None
+        self._subscriptions[path] = sub
+        try:
+            d = self.master.mq.startConsuming(partial(self._on_message, sub), path)
+        except Exception:
+            del self._subscriptions[path]
+            raise
+
+        def started(qref: QueueRef) -> None:
+            sub.qref = qref
+            waiters, sub.waiters = sub.waiters or [], None
+            # all the connections may be gone in the meantime
+            if not sub.connections:
+                self._stop_consuming(path, sub)
+            for waiter in waiters:
+                waiter.callback(None)
+
+        def failed(failure):
+            if self._subscriptions.get(path) is sub:
+                del self._subscriptions[path]
+            waiters, sub.waiters = sub.waiters or [], None
+            for waiter in waiters:
+                waiter.errback(failure)
+            return failure
+
+        d.addCallbacks(started, failed)
+        return d
+
+    def unsubscribe(self, path: EventPath, connection: EventConnection) -> None:
+        sub = self._subscriptions.get(path)
+        if sub is None:
+            return
+        sub.connections.pop(connection, None)
+        if not sub.connections and sub.qref is not None:
+            self._stop_consuming(path, sub)
+
+    def _stop_consuming(self, path: EventPath, sub: _Subscription) -> None:
+        del self._subscriptions[path]
+        assert sub.qref is not None
+        d = defer.maybeDeferred(sub.qref.stopConsuming)
+        d.addErrback(log.err, "while stopping consuming")
+
+    def _on_message(self, sub: _Subscription, key: tuple[str, ...], message: Any) -> None:
+        last = self._last_encoded
+        if last is not None and last[0] == key and last[1] is message:
+            data = last[2]
+        else:
+            data = self.encode(key, message)
+            self._last_encoded = (key, message, data)
+
+        for connection in list(sub.connections):
+            connection.send(data)
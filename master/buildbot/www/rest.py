@@ -20,11 +20,11 @@ import fnmatch
 import json
 import re
 from contextlib import contextmanager
+from functools import partial
 from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
 from twisted.internet import defer
-from twisted.internet import threads
 from twisted.internet.error import ConnectionDone
 from twisted.python import log
 from twisted.web.error import Error
@@ -36,6 +36,7 @@ from buildbot.data.base import EndpointKind
 from buildbot.util import bytes2unicode
 from buildbot.util import toJson
 from buildbot.util import unicode2bytes
+from buildbot.util.twisted import async_iter_on_pool
 from buildbot.www import resource
 from buildbot.www.authz import Forbidden
 from buildbot.www.encoding import BrotliEncoderFactory
@@ -43,6 +44,7 @@ from buildbot.www.encoding import ZstandardEncoderFactory
 
 if TYPE_CHECKING:
     from typing import Any
+    from typing import Generator
 
     from twisted.web import server
 
@@ -125,6 +127,11 @@ JSONRPC_CODES = {
 
 
 class V2RootResource(resource.Resource):
+    # JSON responses bigger than this are streamed to the client as they are
+    # encoded, instead of being sent with a content-length
+    JSON_STREAM_THRESHOLD = 1024 * 1024
+    JSON_BLOCK_SIZE = 64 * 1024
+
     # For GETs, this API follows http://jsonapi.org.  The getter API does not
     # permit create, update, or delete, so this is limited to reading.
     #
@@ -413,7 +420,7 @@ class V2RootResource(resource.Resource):
             else:
                 encoder.indent = 2
 
-            yield threads.deferToThread(V2RootResource._write_json_data, request, encoder, data)
+            yield defer.Deferred.fromCoroutine(self._write_json_data(request, encoder, data))
 
     def reconfigResource(self, new_config):
         # buildbotURL may contain reverse proxy path, Origin header is just
@@ -493,23 +500,63 @@ class V2RootResource(resource.Resource):
         return res
 
     @staticmethod
-    def _write_json_data(
+    def _iter_json_blocks(
+        encoder: json.encoder.JSONEncoder,
+        data: Any,
+    ) -> Generator[bytes, None, None]:
+        # iterencode() yields a lot of tiny strings, group them
+        parts: list[bytes] = []
+        size = 0
+        for chunk in encoder.iterencode(data):
+            part = unicode2bytes(chunk)
+            parts.append(part)
+            size += len(part)
+            if size >= V2RootResource.JSON_BLOCK_SIZE:
+                yield b''.join(parts)
+                parts = []
+                size = 0
+        if parts:
+            yield b''.join(parts)
+
+    async def _write_json_data(
+        self,
         request: server.Request,
         encoder: json.encoder.JSONEncoder,
         data: Any,
     ) -> None:
-        content_length = 0
-        for chunk in encoder.iterencode(data):
-            if _is_request_finished(request):
-                return
-            content_length += len(unicode2bytes(chunk))
-        request.setHeader(b"content-length", unicode2bytes(str(content_length)))
-
-        if request.method != b"HEAD":
-            for chunk in encoder.iterencode(data):
+        # The data is encoded once, in a thread. Responses up to JSON_STREAM_THRESHOLD
+        # bytes are buffered to be sent with a content-length, bigger ones are
+        # written as they are encoded, with chunked transfer encoding.
+        blocks = async_iter_on_pool(
+            partial(self._iter_json_blocks, encoder, data),
+            reactor=self.master.reactor,
+        )
+        buffered: list[bytes] | None = []
+        buffered_size = 0
+        try:
+            async for block in blocks:
                 if _is_request_finished(request):
                     return
-                request.write(unicode2bytes(chunk))
+                if buffered is None:
+                    request.write(block)
+                    continue
+
+                buffered_size += len(block)
+                if request.method == b"HEAD":
+                    # only the content-length is needed
+                    continue
+                buffered.append(block)
+                if buffered_size > self.JSON_STREAM_THRESHOLD:
+                    for buffered_block in buffered:
+                        request.write(buffered_block)
+                    buffered = None
+        finally:
+            await blocks.aclose()
+
+        if buffered is not None:
+            request.setHeader(b"content-length", unicode2bytes(str(buffered_size)))
+            if request.method != b"HEAD":
+                request.write(b''.join(buffered))
 
 
 RestRootResource.addApiVersion(2, V2RootResource)
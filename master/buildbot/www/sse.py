@@ -24,31 +24,39 @@ from buildbot.data.exceptions import InvalidPathError
 from buildbot.util import bytes2unicode
 from buildbot.util import toJson
 from buildbot.util import unicode2bytes
+from buildbot.www.eventhub import EventConnection
+from buildbot.www.eventhub import EventHub
+
+
+def encode_event(event, data):
+    key = [bytes2unicode(e) for e in event]
+    msg = {"key": key, "message": data}
+    return b"event: event\ndata: " + unicode2bytes(json.dumps(msg, default=toJson)) + b"\n\n"
 
 
 class Consumer:
-    def __init__(self, request):
+    def __init__(self, request, event_hub):
         self.request = request
-        self.qrefs = {}
+        self.event_hub = event_hub
+        # consumed paths, by their reference
+        self.paths = {}
+        self.events = EventConnection(request.write, self._drop_connection)
+
+    def _drop_connection(self):
+        self.request.transport.abortConnection()
 
     def stopConsuming(self, key=None):
         if key is not None:
-            self.qrefs[key].stopConsuming()
+            self.event_hub.unsubscribe(self.paths.pop(key), self.events)
         else:
-            for qref in self.qrefs.values():
-                qref.stopConsuming()
-            self.qrefs = {}
+            self.events.stopProducing()
+            for path in self.paths.values():
+                self.event_hub.unsubscribe(path, self.events)
+            self.paths = {}
 
-    def onMessage(self, event, data):
-        request = self.request
-        key = [bytes2unicode(e) for e in event]
-        msg = {"key": key, "message": data}
-        request.write(b"event: " + b"event" + b"\n")
-        request.write(b"data: " + unicode2bytes(json.dumps(msg, default=toJson)) + b"\n")
-        request.write(b"\n")
-
-    def registerQref(self, path, qref):
-        self.qrefs[path] = qref
+    def startConsuming(self, pathref, path):
+        self.paths[pathref] = path
+        return self.event_hub.subscribe(path, self.events)
 
 
 class EventResource(resource.Resource):
@@ -59,6 +67,7 @@ class EventResource(resource.Resource):
 
         self.master = master
         self.consumers = {}
+        self.event_hub = EventHub(master, encode_event)
 
     def decodePath(self, path):
         for i, p in enumerate(path):
@@ -85,7 +94,7 @@ class EventResource(resource.Resource):
 
         if command == b"listen":
             cid = unicode2bytes(str(uuid.uuid4()))
-            consumer = Consumer(request)
+            consumer = Consumer(request, self.event_hub)
 
         elif command in (b"add", b"remove"):
             if path:
@@ -107,14 +116,7 @@ class EventResource(resource.Resource):
                     options[k] = options[k][1]
 
             try:
-                d = self.master.mq.startConsuming(
-                    consumer.onMessage, tuple(bytes2unicode(p) for p in path)
-                )
-
-                @d.addCallback
-                def register(qref):
-                    consumer.registerQref(pathref, qref)
-
+                d = consumer.startConsuming(pathref, tuple(bytes2unicode(p) for p in path))
                 d.addErrback(log.err, "while calling startConsuming")
             except NotImplementedError:
                 return self.finish(request, 404, b"not implemented")
@@ -133,12 +135,17 @@ class EventResource(resource.Resource):
             request.write(b"event: handshake\n")
             request.write(b"data: " + cid + b"\n")
             request.write(b"\n")
+            # queue the events in the consumer while the client does not keep up
+            request.registerProducer(consumer.events, True)
             d = request.notifyFinish()
 
             @d.addBoth
             def onEndRequest(_):
                 consumer.stopConsuming()
                 del self.consumers[cid]
+                # the request has no channel anymore once the connection is lost
+                if request.channel is not None:
+                    request.unregisterProducer()
 
             return server.NOT_DONE_YET
 
@@ -23,6 +23,17 @@ from twisted.python import log
 
 from buildbot.util import bytes2unicode
 from buildbot.util import toJson
+from buildbot.www.eventhub import EventConnection
+from buildbot.www.eventhub import EventHub
+
+
+def to_json(msg):
+    return json.dumps(msg, default=toJson, separators=(",", ":")).encode()
+
+
+def encode_event(key, message):
+    # protocol is deliberately concise in size
+    return to_json({"k": "/".join(key), "m": message})
 
 
 class Subscription:
@@ -36,14 +47,23 @@ class WsProtocol(WebSocketServerProtocol):
     def __init__(self, master):
         super().__init__()
         self.master = master
-        self.qrefs = {}
+        # paths consumed by this connection
+        self.paths = set()
         self.debug = self.master.config.www.get("debug", False)
+        # all messages go through the connection queue, so that they are sent in order
+        self.events = EventConnection(self._write_message, self._drop_connection)
+
+    def _write_message(self, data):
+        self.sendMessage(data)
+
+    def _drop_connection(self):
+        self.dropConnection(abort=True)
 
     def to_json(self, msg):
-        return json.dumps(msg, default=toJson, separators=(",", ":")).encode()
+        return to_json(msg)
 
     def send_json_message(self, **msg):
-        return self.sendMessage(self.to_json(msg))
+        self.events.send(self.to_json(msg))
 
     def send_error(self, error, code, _id):
         return self.send_json_message(error=error, code=code, _id=_id)
@@ -100,23 +120,20 @@ class WsProtocol(WebSocketServerProtocol):
             return
 
         # if it's already subscribed, don't leak a subscription
-        if self.qrefs is not None and path in self.qrefs:
+        if self.paths is not None and path in self.paths:
             yield self.ack(_id=_id)
             return
 
-        def callback(key, message):
-            # protocol is deliberately concise in size
-            return self.send_json_message(k="/".join(key), m=message)
-
-        qref = yield self.master.mq.startConsuming(callback, self.parsePath(path))
-
-        # race conditions handling
-        if self.qrefs is None or path in self.qrefs:
-            qref.stopConsuming()
-
-        # only store and ack if we were not disconnected in between
-        if self.qrefs is not None:
-            self.qrefs[path] = qref
+        self.paths.add(path)
+        try:
+            yield self.factory.event_hub.subscribe(self.parsePath(path), self.events)
+        except Exception:
+            if self.paths is not None:
+                self.paths.discard(path)
+            raise
+
+        # only ack if we were not disconnected in between
+        if self.paths is not None:
             self.ack(_id=_id)
 
     @defer.inlineCallbacks
@@ -126,9 +143,9 @@ class WsProtocol(WebSocketServerProtocol):
             return
 
         # only succeed if path has been started
-        if path in self.qrefs:
-            qref = self.qrefs.pop(path)
-            yield qref.stopConsuming()
+        if path in self.paths:
+            self.paths.remove(path)
+            self.factory.event_hub.unsubscribe(self.parsePath(path), self.events)
             yield self.ack(_id=_id)
             return
         yield self.send_json_message(error=f"path was not consumed '{path!s}'", code=400, _id=_id)
@@ -139,19 +156,25 @@ class WsProtocol(WebSocketServerProtocol):
     def connectionLost(self, reason):
         if self.debug:
             log.msg("connection lost", system=self)
-        for qref in self.qrefs.values():
-            qref.stopConsuming()
+        self.events.stopProducing()
+        for path in self.paths or ():
+            self.factory.event_hub.unsubscribe(self.parsePath(path), self.events)
 
-        self.qrefs = None  # to be sure we don't add any more
+        self.paths = None  # to be sure we don't add any more
 
     def onConnect(self, request):
         return None
 
+    def onOpen(self):
+        # queue the messages in self.events while the client does not keep up
+        self.registerProducer(self.events, True)
+
 
 class WsProtocolFactory(WebSocketServerFactory):
     def __init__(self, master):
         super().__init__()
         self.master = master
+        self.event_hub = EventHub(master, encode_event)
         pingInterval = self.master.config.www.get("ws_ping_interval", 0)
         self.setProtocolOptions(webStatus=False, autoPingInterval=pingInterval)
 
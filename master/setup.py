@@ -190,6 +190,7 @@ setup_args = {
         []
         if BUILDING_WHEEL
         else [  # skip tests for wheels (save 50% of the archive)
+            "buildbot.test.benchmark",
             "buildbot.test.fuzz",
             "buildbot.test.integration",
             "buildbot.test.integration.interop",
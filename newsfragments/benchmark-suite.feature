@@ -0,0 +1 @@
+Added a benchmark suite in ``buildbot.test.benchmark`` that measures log storage, message queue fan-out, build request distribution, REST collection rendering and property rendering, and records the results as JSON lines.
@@ -0,0 +1 @@
+The default builder prioritization now fetches the pending build request summary of all builders with a single grouped database query
@@ -0,0 +1 @@
+The data API now loads the properties of build collections with a single database query instead of one query per build, which speeds up the grid, console and waterfall views. Reporters load the properties of the builds they report on the same way.
@@ -0,0 +1 @@
+The database thread pool size can now be configured with ``c['db']['thread_pool_max_size']``. Claiming and completing build requests no longer waits behind other database queries, and reads of log contents no longer occupy all database threads.
@@ -0,0 +1 @@
+``DirectoryUpload`` and ``MultipleFileUpload`` no longer write a temporary archive on the worker or on the master: the directory is archived while being sent and unpacked while being received
@@ -0,0 +1 @@
+:class:`DockerLatentWorker` now keeps an index of the images of each docker host, refreshed from the docker image events, instead of listing all the images of the host on each start, and can pull its image in the background with the new ``prepull`` option.
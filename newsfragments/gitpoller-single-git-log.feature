@@ -0,0 +1 @@
+GitPoller now reads the details of all the new commits of a branch with a single ``git log`` invocation, instead of running five git commands per commit.
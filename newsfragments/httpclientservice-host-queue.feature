@@ -0,0 +1 @@
+``HTTPClientService`` now limits the number of concurrent requests per host and queues the others in a bounded queue. Both limits can be set with the ``max_concurrent_per_host`` and ``max_queued_per_host`` arguments. The requests sent with ``retry=True`` are retried with an exponential backoff on connection errors and on 429, 502, 503 and 504 responses. The GitHub, GitLab, Bitbucket and Bitbucket Server status reporters only send the latest state of a commit status when several are waiting to be sent.
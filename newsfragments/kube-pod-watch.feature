@@ -0,0 +1 @@
+:class:`KubeLatentWorker` now follows the pods through a single watch stream of the Kubernetes API per namespace, instead of polling the status of each pod being deleted once per second, and fails the substantiation as soon as a pod fails before its worker connects. The pods of the workers get the ``app.kubernetes.io/managed-by: buildbot`` label, and only the pods with this label are watched.
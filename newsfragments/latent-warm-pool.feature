@@ -0,0 +1 @@
+Latent workers can be put in a warm pool with the new ``warm_pool``, ``warm_pool_min_idle`` and ``warm_pool_max_idle`` options: the master keeps some of the workers of a pool substantiated while idle, scales their number from the recent number of build requests waiting for a worker, and reports the idle time of each pool as metrics.
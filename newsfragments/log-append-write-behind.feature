@@ -0,0 +1 @@
+Log lines sent by workers are now buffered by the master and written to the database in larger chunks, which reduces the number of database transactions made by chatty builds.
@@ -0,0 +1 @@
+Added the ``zstd-dict`` value of ``logCompressionMethod``, which compresses logs with a zstd dictionary trained on the recent logs of each builder, for smaller logs in the database.
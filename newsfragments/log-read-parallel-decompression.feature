@@ -0,0 +1 @@
+Reading large logs (e.g. raw log downloads) now decompresses several log chunks in parallel, so it is no longer limited to a single CPU core.
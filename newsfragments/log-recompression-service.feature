@@ -0,0 +1 @@
+Added the ``logRecompression`` configuration key, which compresses finished logs in a background service, a batch at a time, instead of at the end of each step, and brings older logs to the current ``logCompressionMethod``.
@@ -0,0 +1 @@
+Added the ``/logs/{logid}/search`` data API endpoint, which returns the lines of a log containing a string, with some context lines, without downloading the whole log.
@@ -0,0 +1 @@
+The data API path matcher now routes paths through a precompiled tree of patterns instead of trying every pattern of the same length, making endpoint lookups much faster.
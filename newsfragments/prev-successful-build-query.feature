@@ -0,0 +1 @@
+Finding the previous successful build of a build, used to list its changes, is now done with a single database query instead of one query per candidate build, and its results are cached in the new ``prevSuccessfulBuilds`` cache.
@@ -0,0 +1 @@
+Reporters now load the steps and logs of the builds they report on with a few grouped database queries instead of one query per build and per step, and find the previous build with a single query. The new ``logs_content_max_size`` argument of the message formatters limits how much of each log is included when ``want_logs_content`` is enabled; the rest of the log is not read.
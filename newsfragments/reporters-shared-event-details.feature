@@ -0,0 +1 @@
+The build and buildset details fetched by report generators are now shared between all the reporters handling the same event, so that configuring several reporters no longer multiplies the database queries done for each finished build.
@@ -0,0 +1 @@
+The REST API now encodes JSON responses only once, and streams large responses to the client with chunked transfer encoding as they are encoded, instead of encoding them twice to compute their content length.
@@ -0,0 +1 @@
+Schedulers now share a single consumer of new changes: each change is loaded once for all of them, and only the schedulers whose change filter can match the branch, project, repository or codebase of the change are called.
@@ -0,0 +1 @@
+Secret providers now accept ``cache_ttl`` and ``negative_cache_ttl`` to cache the secrets they return, so that providers like Vault or ``pass`` are not queried for every render.
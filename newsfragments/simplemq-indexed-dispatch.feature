@@ -0,0 +1 @@
+Improved performance of message dispatch in ``SimpleMQ`` with many consumers by indexing consumer filters by routing key
@@ -0,0 +1 @@
+The avatars are now kept in a bounded cache that expires after ``avatar_cache_seconds``, coalesces concurrent lookups and can be saved to ``avatar_cache_file`` across restarts.
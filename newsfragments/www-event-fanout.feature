@@ -0,0 +1 @@
+The websocket and server-sent events endpoints now share a single message queue consumer per path between all the clients, encode each event once, and drop the clients which do not keep up instead of buffering their events without bound.
@@ -0,0 +1,2 @@
+@echo off
+dir c:/
\ No newline at end of file
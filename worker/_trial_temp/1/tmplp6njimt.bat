@@ -0,0 +1,2 @@
+@echo off
+echo 我
\ No newline at end of file
@@ -0,0 +1,2 @@
+@echo off
+/root/.pyenv/versions/3.11.7/bin/python3.11 -c ^"import sys; sys.stdout.write^(\^"hello\n\^"^)^"
\ No newline at end of file
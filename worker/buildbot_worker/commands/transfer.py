@@ -13,9 +13,11 @@
 #
 # Copyright Buildbot Team Members
 
+import bz2
+import io
 import os
 import tarfile
-import tempfile
+import zlib
 
 from twisted.internet import defer
 from twisted.python import log
@@ -185,7 +187,38 @@ class WorkerFileUploadCommand(TransferCommand):
         return self.protocol_command.protocol_update_upload_file_write(self.writer, data)
 
 
+class _ArchiveStream:
+    """
+    A minimal read-only file-like object over an iterator of byte strings, used
+    to feed the incrementally generated archive to the upload loop.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = bytearray()
+
+    def read(self, size):
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close(self):
+        self._chunks.close()
+
+
 class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
+    """
+    Upload a directory from worker to build master as a tar archive. The archive is
+    generated while it is being sent, so no temporary file is written on the worker
+    and the first block is sent right away. Backpressure comes from the upload loop,
+    which only asks for the next block once the previous write has been acknowledged.
+    """
+
     debug = False
     requiredArgs = ['path', 'writer', 'blocksize']
 
@@ -197,6 +230,7 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         self.compress = args['compress']
         self.stderr = None
         self.rc = 0
+        self.fp = None
 
     def start(self):
         if self.debug:
@@ -205,30 +239,19 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         if self.debug:
             self.log_msg(f"path: {self.path!r}")
 
-        # Create temporary archive
-        fd, self.tarname = tempfile.mkstemp(prefix='buildbot-transfer-')
-        self.fp = os.fdopen(fd, "rb+")
-        if self.compress == 'bz2':
-            mode = 'w|bz2'
-        elif self.compress == 'gz':
-            mode = 'w|gz'
-        else:
-            mode = 'w'
-
-        with tarfile.open(mode=mode, fileobj=self.fp) as archive:
-            try:
-                archive.add(self.path, '')
-            except OSError as e:
-                # if directory does not exist, bail out with an error
-                self.stderr = f"Cannot read directory '{self.path}' for upload: {e}"
-                self.rc = 1
-                archive.close()  # need to close it before self.finished() runs below
-                d = defer.succeed(False)
-                d.addCallback(self.finished)
-                return d
+        # the archive object is only used to build the tar headers
+        archive = tarfile.TarFile(mode='w', fileobj=io.BytesIO())
+        try:
+            root = archive.gettarinfo(self.path, '')
+        except OSError as e:
+            # if directory does not exist, bail out with an error
+            self.stderr = f"Cannot read directory '{self.path}' for upload: {e}"
+            self.rc = 1
+            d = defer.succeed(False)
+            d.addCallback(self.finished)
+            return d
 
-        # Transfer it
-        self.fp.seek(0)
+        self.fp = _ArchiveStream(self._generate_archive(archive, root))
 
         self.sendStatus([('header', f"sending {self.path}\n")])
 
@@ -246,14 +269,76 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
             d1.addCallback(lambda ignored: res)
             return d1
 
-        d.addCallback(unpack)
+        def read_err(f):
+            # a file or directory could not be read while the archive was being sent
+            f.trap(OSError)
+            self.stderr = f"Cannot read directory '{self.path}' for upload: {f.value}"
+            self.rc = 1
+            return False
+
+        d.addCallbacks(unpack, read_err)
         d.addBoth(self.finished)
         return d
 
+    def _generate_archive(self, archive, root):
+        if self.compress == 'bz2':
+            compressor = bz2.BZ2Compressor()
+        elif self.compress == 'gz':
+            # gzip container, as expected by tarfile's 'r|gz' mode
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            compressor = None
+
+        def compress(data):
+            if compressor is None:
+                return data
+            return compressor.compress(data)
+
+        offset = 0
+        for name, tarinfo in self._iter_members(archive, self.path, root):
+            buf = tarinfo.tobuf(archive.format, archive.encoding, archive.errors)
+            offset += len(buf)
+            yield compress(buf)
+
+            if not tarinfo.isreg():
+                continue
+
+            with open(name, 'rb') as f:
+                remaining = tarinfo.size
+                while remaining > 0:
+                    data = f.read(min(self.blocksize, remaining))
+                    if not data:
+                        raise OSError(f"File '{name}' was truncated while being uploaded")
+                    remaining -= len(data)
+                    yield compress(data)
+            padding = -tarinfo.size % tarfile.BLOCKSIZE
+            offset += tarinfo.size + padding
+            yield compress(tarfile.NUL * padding)
+
+        # end of archive marker, padded to a full record like tarfile.TarFile.close()
+        trailer = tarfile.BLOCKSIZE * 2
+        trailer += -(offset + trailer) % tarfile.RECORDSIZE
+        yield compress(tarfile.NUL * trailer)
+
+        if compressor is not None:
+            yield compressor.flush()
+
+    def _iter_members(self, archive, name, tarinfo):
+        # same traversal as tarfile.TarFile.add(), without writing anything
+        yield name, tarinfo
+        if tarinfo.isdir():
+            for f in sorted(os.listdir(name)):
+                child_name = os.path.join(name, f)
+                child = archive.gettarinfo(child_name, os.path.join(tarinfo.name, f))
+                if child is None:
+                    # unsupported file type, e.g. a socket
+                    continue
+                yield from self._iter_members(archive, child_name, child)
+
     def finished(self, res):
-        self.fp.close()
-        self.fp = None
-        os.remove(self.tarname)
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
         return TransferCommand.finished(self, res)
 
     def do_protocol_write(self, data):
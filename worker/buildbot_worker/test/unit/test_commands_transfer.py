@@ -390,6 +390,103 @@ class TestWorkerDirectoryUpload(CommandTestMixin, unittest.TestCase):
             ('rc', 1),
         ])
 
+    @defer.inlineCallbacks
+    def do_test_contents(self, compress):
+        os.makedirs(os.path.join(self.datadir, 'sub', 'dir'))
+        with open(os.path.join(self.datadir, 'sub', 'dir', 'big'), mode="wb") as f:
+            f.write(bytes(range(256)) * 100)
+        with open(os.path.join(self.datadir, 'sub', 'x' * 120), mode="wb") as f:
+            f.write(b"long name")
+        if runtime.platformType != 'win32':
+            os.symlink('aa', os.path.join(self.datadir, 'link'))
+
+        self.fakemaster.keep_data = True
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 1000,
+                'compress': compress,
+            },
+        )
+
+        yield self.run_command()
+
+        self.assertUpdates([
+            ('header', f'sending {self.datadir}\n'),
+            'write(s)',
+            'unpack',
+            ('rc', 0),
+        ])
+
+        with tarfile.open(fileobj=io.BytesIO(self.fakemaster.data), mode="r|*") as a:
+            got = {}
+            for member in a:
+                if member.isreg():
+                    got[member.name] = a.extractfile(member).read()
+                elif member.issym():
+                    got[member.name] = ('link', member.linkname)
+                else:
+                    got[member.name] = member.type
+
+        expected = {
+            '': tarfile.DIRTYPE,
+            'aa': b"lots of a" * 100,
+            'bb': b"and a little b" * 17,
+            'sub': tarfile.DIRTYPE,
+            'sub/dir': tarfile.DIRTYPE,
+            'sub/dir/big': bytes(range(256)) * 100,
+            'sub/' + 'x' * 120: b"long name",
+        }
+        if runtime.platformType != 'win32':
+            expected['link'] = ('link', 'aa')
+        self.assertEqual(got, expected)
+        self.assertEqual(len(self.fakemaster.data) % tarfile.RECORDSIZE == 0, compress is None)
+
+    def test_contents(self):
+        return self.do_test_contents(None)
+
+    def test_contents_bz2(self):
+        return self.do_test_contents('bz2')
+
+    def test_contents_gz(self):
+        return self.do_test_contents('gz')
+
+    @defer.inlineCallbacks
+    def test_read_error_while_streaming(self):
+        os.makedirs(os.path.join(self.datadir, 'sub'))
+        sub = os.path.join(self.datadir, 'sub')
+        listdir = os.listdir
+
+        def failing_listdir(path):
+            if path == sub:
+                raise OSError("permission denied")
+            return listdir(path)
+
+        self.patch(os, 'listdir', failing_listdir)
+
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 512,
+                'compress': None,
+            },
+        )
+
+        yield self.run_command()
+
+        self.assertUpdates([
+            ('header', f'sending {self.datadir}\n'),
+            'write(s)',
+            ('rc', 1),
+            ('stderr', f"Cannot read directory '{self.datadir}' for upload: permission denied"),
+        ])
+
 
 class TestWorkerDirectoryUploadNoDir(CommandTestMixin, unittest.TestCase):
     def setUp(self):